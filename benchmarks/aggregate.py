@@ -0,0 +1,69 @@
+"""Benchmark aggregating a scan in the scan threads.
+
+Counts and sums the items of a FakeScanClient table per value of attribute
+n in two ways: by writing the items as JSON lines and aggregating the
+parsed lines (like piping the CLI output to another program), and with
+aggregate.scan_aggregate(), which reduces each page to a partial aggregate
+in the scan threads.
+
+Usage: python benchmarks/aggregate.py [--segments N] [--pages N] [--latency SPEC]
+"""
+
+import argparse
+import collections
+import decimal
+import io
+import json
+import time
+
+from fake_scan import FakeScanClient
+
+import aws_dynamodb_parallel_scan
+from aws_dynamodb_parallel_scan import aggregate, output
+
+
+def aggregate_json_lines(client: FakeScanClient, segments: int) -> dict:
+    """Write the items as JSON lines and aggregate the parsed lines."""
+    paginator = aws_dynamodb_parallel_scan.get_paginator(client)
+    stream = io.BytesIO()
+    writer = output.JSONLinesWriter(stream, output_items=True)
+    for page in paginator.paginate(TableName="bench", TotalSegments=segments, deserialize="decimal"):
+        writer.write_page(page)
+    writer.flush()
+    counts: collections.Counter = collections.Counter()
+    sums: dict = collections.defaultdict(decimal.Decimal)
+    for line in stream.getvalue().splitlines():
+        item = json.loads(line)
+        counts[item["n"]] += 1
+        sums[item["n"]] += decimal.Decimal(item["n"])
+    return counts
+
+
+def aggregate_in_scan(client: FakeScanClient, segments: int) -> dict:
+    """Aggregate the items with aggregate.scan_aggregate()."""
+    paginator = aws_dynamodb_parallel_scan.get_paginator(client)
+    aggregation = aggregate.Aggregation(group_by=["n"], sums=["n"])
+    result = aggregate.scan_aggregate(paginator, aggregation, TableName="bench", TotalSegments=segments)
+    return {row["Group"]["n"]: row["Count"] for row in result.rows()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--segments", type=int, default=16, help="Number of segments (default: 16)")
+    parser.add_argument("--pages", type=int, default=50, help="Pages per segment (default: 50)")
+    parser.add_argument(
+        "--latency", default="fixed:0.005", help="Latency distribution of Scan requests (default: fixed:0.005)"
+    )
+    args = parser.parse_args()
+
+    for name, function in (("JSON lines", aggregate_json_lines), ("scan_aggregate", aggregate_in_scan)):
+        client = FakeScanClient(pages=args.pages, latency=args.latency, item_width=200)
+        start = time.perf_counter()
+        counts = function(client, args.segments)
+        elapsed = time.perf_counter() - start
+        items = sum(counts.values())
+        print(f"{name}: {elapsed:.2f}s ({items / elapsed:.0f} items/s, {len(counts)} groups)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Benchmark the asyncio paginator against the threaded paginator.
+
+Both paginators scan a table served by a local stub DynamoDB server
+(benchmarks/stub_server.py). The asyncio benchmark requires aiobotocore.
+
+Usage: python benchmarks/async_paginator.py [--segments N] [--latency S]
+"""
+
+import argparse
+import asyncio
+import time
+
+import boto3
+import botocore.config
+from stub_server import StubServer, StubTable
+
+import aws_dynamodb_parallel_scan
+
+CLIENT_ARGS = {
+    "region_name": "eu-north-1",
+    "aws_access_key_id": "stub",
+    "aws_secret_access_key": "stub",
+}
+
+
+def run_threaded(endpoint_url: str, segments: int) -> int:
+    """Scan the stub table with the threaded paginator and return the number of pages."""
+    config = botocore.config.Config(max_pool_connections=segments)
+    client = boto3.client("dynamodb", endpoint_url=endpoint_url, config=config, **CLIENT_ARGS)
+    paginator = aws_dynamodb_parallel_scan.get_paginator(client)
+    return sum(1 for _ in paginator.paginate(TableName="benchmark", TotalSegments=segments))
+
+
+async def run_async(endpoint_url: str, segments: int) -> int:
+    """Scan the stub table with the asyncio paginator and return the number of pages."""
+    import aiobotocore.session  # pylint: disable=import-outside-toplevel
+
+    config = botocore.config.Config(max_pool_connections=segments)
+    session = aiobotocore.session.get_session()
+    async with session.create_client("dynamodb", endpoint_url=endpoint_url, config=config, **CLIENT_ARGS) as client:
+        paginator = aws_dynamodb_parallel_scan.get_async_paginator(client)
+        return len([page async for page in paginator.paginate(TableName="benchmark", TotalSegments=segments)])
+
+
+def report(name: str, pages: int, elapsed: float):
+    print(f"{name}: {pages} pages in {elapsed:.2f}s ({pages / elapsed:.1f} pages/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--segments", type=int, default=64, help="Number of segments (default: 64)")
+    parser.add_argument("--latency", type=float, default=0.02, help="Scan latency in seconds (default: 0.02)")
+    parser.add_argument("--items-per-segment", type=int, default=1000, help="Items per segment (default: 1000)")
+    args = parser.parse_args()
+
+    with StubServer(StubTable(args.items_per_segment, latency=args.latency)) as server:
+        start = time.monotonic()
+        pages = run_threaded(server.endpoint_url, args.segments)
+        report("threaded", pages, time.monotonic() - start)
+
+        start = time.monotonic()
+        pages = asyncio.run(run_async(server.endpoint_url, args.segments))
+        report("asyncio", pages, time.monotonic() - start)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Benchmark memory use of buffered pages with a slow consumer.
+
+Scans a stubbed table with pages of about 1 MB using prefetch, so scan
+threads fetch pages faster than the consumer processes them. Reports peak
+RSS of scans without a buffer limit and with max_buffered_bytes. Each
+configuration runs in its own process because peak RSS never decreases.
+
+Usage: python benchmarks/buffering.py [--segments N] [--pages N] [--work S]
+"""
+
+import argparse
+import resource
+import subprocess  # nosec B404
+import sys
+import time
+
+import aws_dynamodb_parallel_scan
+
+PAGE_ITEMS = 100
+ITEM_SIZE = 10_000
+
+
+class StubClient:  # pylint: disable=too-few-public-methods
+    """DynamoDB client stub that returns pages of about 1 MB."""
+
+    def __init__(self, pages: int):
+        self._pages = pages
+
+    def scan(self, **kwargs):
+        time.sleep(0.005)
+        page = kwargs.get("ExclusiveStartKey", 0) + 1
+        items = [{"pk": {"S": f"{page}-{i}"}, "data": {"S": str(i) * ITEM_SIZE}} for i in range(PAGE_ITEMS)]
+        response = {
+            "Items": items,
+            "Count": PAGE_ITEMS,
+            "ScannedCount": PAGE_ITEMS,
+            "ResponseMetadata": {"HTTPHeaders": {"content-length": str(PAGE_ITEMS * ITEM_SIZE)}},
+        }
+        if page < self._pages:
+            response["LastEvaluatedKey"] = page
+        return response
+
+
+def run(segments: int, pages: int, work: float, max_buffered_bytes: int):
+    """Scan the stub table and print elapsed time and peak RSS."""
+    paginator = aws_dynamodb_parallel_scan.get_paginator(StubClient(pages))  # type: ignore[arg-type]
+    start = time.monotonic()
+    for _ in paginator.paginate(
+        TableName="benchmark", TotalSegments=segments, prefetch=pages, max_buffered_bytes=max_buffered_bytes
+    ):
+        time.sleep(work)
+    elapsed = time.monotonic() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    limit = f"{max_buffered_bytes >> 20} MiB" if max_buffered_bytes else "none"
+    print(f"max_buffered_bytes={limit}: {elapsed:.2f}s, peak RSS {peak:.0f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--segments", type=int, default=8, help="Number of segments (default: 8)")
+    parser.add_argument("--pages", type=int, default=40, help="Pages per segment (default: 40)")
+    parser.add_argument("--work", type=float, default=0.01, help="Processing time per page (default: 0.01)")
+    parser.add_argument("--max-buffered-bytes", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.max_buffered_bytes is not None:
+        run(args.segments, args.pages, args.work, args.max_buffered_bytes)
+        return
+
+    for limit in (0, 64 << 20, 16 << 20):
+        command = [sys.argv[0], f"--segments={args.segments}", f"--pages={args.pages}", f"--work={args.work}"]
+        subprocess.run([sys.executable, *command, f"--max-buffered-bytes={limit}"], check=True)  # nosec B603
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Benchmark replaying a scan from cache.ScanCache.
+
+Scans a FakeScanClient table with a cache in a temporary directory: the
+first scan stores the pages and later scans of the same table replay them
+from the memory-mapped cache entry instead of making Scan requests.
+
+Usage: python benchmarks/cache.py [--segments N] [--pages N] [--latency SPEC] [--repeat N]
+"""
+
+import argparse
+import tempfile
+import time
+
+from fake_scan import FakeScanClient
+
+import aws_dynamodb_parallel_scan
+from aws_dynamodb_parallel_scan import cache
+
+
+class DescribedFakeScanClient(FakeScanClient):
+    """FakeScanClient that can also describe its table."""
+
+    def describe_table(self, **kwargs) -> dict:
+        return {"Table": {"TableArn": f"arn:aws:dynamodb:us-east-1:123456789012:table/{kwargs['TableName']}"}}
+
+
+def scan(client: FakeScanClient, scan_cache: cache.ScanCache | None, segments: int) -> tuple[float, int]:
+    """Scan the table and return elapsed time in seconds and the number of items."""
+    paginator = aws_dynamodb_parallel_scan.get_paginator(client)
+    start = time.perf_counter()
+    items = sum(
+        page["Count"] for page in paginator.paginate(TableName="bench", TotalSegments=segments, cache=scan_cache)
+    )
+    return time.perf_counter() - start, items
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--segments", type=int, default=16, help="Number of segments (default: 16)")
+    parser.add_argument("--pages", type=int, default=50, help="Pages per segment (default: 50)")
+    parser.add_argument(
+        "--latency", default="fixed:0.02", help="Latency distribution of Scan requests (default: fixed:0.02)"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Number of cached scans (default: 3)")
+    args = parser.parse_args()
+
+    client = DescribedFakeScanClient(pages=args.pages, latency=args.latency, item_width=200)
+    elapsed, items = scan(client, None, args.segments)
+    print(f"{items} items")
+    print(f"no cache: {elapsed:.2f}s ({items / elapsed:.0f} items/s)")
+    with tempfile.TemporaryDirectory() as directory:
+        scan_cache = cache.ScanCache(directory)
+        elapsed, _ = scan(client, scan_cache, args.segments)
+        print(f"cache miss (scan and store): {elapsed:.2f}s ({items / elapsed:.0f} items/s)")
+        requests = client.requests
+        for i in range(args.repeat):
+            elapsed, _ = scan(client, scan_cache, args.segments)
+            print(f"cache hit {i + 1}: {elapsed:.2f}s ({items / elapsed:.0f} items/s)")
+        print(f"Scan requests of cache hits: {client.requests - requests}")
+
+
+if __name__ == "__main__":
+    main()
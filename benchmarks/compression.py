@@ -0,0 +1,87 @@
+"""Benchmark compressed file output of scan results.
+
+Compares compressing the JSON lines output in the consumer thread (like
+piping the CLI output to gzip, a single core) with files.FileWriter, which
+compresses chunks in a thread pool, using one and several threads. Pages of
+generated low-level items are written to a temporary directory.
+
+Usage: python benchmarks/compression.py [--pages N] [--items N] [--workers N]
+"""
+
+import argparse
+import gzip
+import os
+import random
+import tempfile
+import time
+
+from aws_dynamodb_parallel_scan import files, output
+
+
+def generate_page(items: int, offset: int, rng: random.Random) -> dict:
+    """Generate a page of low-level items with a mix of repetitive and random values."""
+    return {
+        "Items": [
+            {
+                "pk": {"S": f"item-{offset + i}"},
+                "status": {"S": rng.choice(("active", "pending", "deleted"))},
+                "quantity": {"N": str(rng.randrange(1000))},
+                "token": {"S": rng.randbytes(24).hex()},
+                "description": {"S": " ".join(rng.choice(("lorem", "ipsum", "dolor", "sit", "amet")) * 8)},
+            }
+            for i in range(items)
+        ],
+        "Count": items,
+    }
+
+
+def write_gzip_stream(pages: list[dict], directory: str):
+    """Compress the output in the consumer thread."""
+    with gzip.open(os.path.join(directory, "out.jsonl.gz"), "wb", compresslevel=6) as f:
+        writer = output.JSONLinesWriter(f, output_items=True)  # type: ignore[arg-type]
+        for page in pages:
+            writer.write_page(page)
+        writer.flush()
+
+
+def write_files(pages: list[dict], directory: str, compression: str, workers: int):
+    """Compress the output with FileWriter."""
+    with files.FileWriter(directory, compression=compression, output_items=True, max_workers=workers) as writer:
+        for page in pages:
+            writer.write_page(page)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=500, help="Number of pages (default: 500)")
+    parser.add_argument("--items", type=int, default=200, help="Items per page (default: 200)")
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count(), help="Compression threads (default: number of CPUs)"
+    )
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    pages = [generate_page(args.items, i * args.items, rng) for i in range(args.pages)]
+    size = len(output.json_lines_encoder()(item for page in pages for item in page["Items"]))
+    print(f"{args.pages * args.items} items, {size / 1e6:.0f} MB of JSON lines")
+
+    cases = [
+        ("gzip stream (consumer thread)", lambda d: write_gzip_stream(pages, d)),
+        ("FileWriter gzip, 1 thread", lambda d: write_files(pages, d, "gzip", 1)),
+        (f"FileWriter gzip, {args.workers} threads", lambda d: write_files(pages, d, "gzip", args.workers)),
+    ]
+    if files.zstandard is not None:
+        cases.append(
+            (f"FileWriter zstd, {args.workers} threads", lambda d: write_files(pages, d, "zstd", args.workers))
+        )
+    for name, run in cases:
+        with tempfile.TemporaryDirectory() as directory:
+            start = time.perf_counter()
+            run(directory)
+            elapsed = time.perf_counter() - start
+            written = sum(entry.stat().st_size for entry in os.scandir(directory) if entry.name.endswith(("gz", "zst")))
+        print(f"{name}: {elapsed:.2f}s ({size / elapsed / 1e6:.0f} MB/s, {written / 1e6:.1f} MB written)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Benchmark connection pool sizing and client sharding at high segment counts.
+
+Scans the local stub DynamoDB server (see stub_server.py) with real boto3
+clients: a default client (10 pooled connections), a client created with
+clients.create_client() with a pool for all threads and the segments
+sharded between several clients of clients.create_clients(). With the
+default client, threads beyond the pool size open connections that are
+closed after each request instead of being reused. New connections to the
+stub server take --connect-latency seconds to simulate the TCP and TLS
+handshakes with DynamoDB.
+
+Usage: python benchmarks/connection_pool.py [--segments N] [--latency S] [--connect-latency S] [--clients N]
+"""
+
+import argparse
+import logging
+import time
+
+import boto3
+from stub_server import StubServer, StubTable
+
+import aws_dynamodb_parallel_scan
+from aws_dynamodb_parallel_scan import clients
+
+CLIENT_ARGS = {"region_name": "us-east-1", "aws_access_key_id": "benchmark", "aws_secret_access_key": "benchmark"}
+
+
+def run(client, segments: int) -> tuple[float, int]:
+    """Scan the stub table and return elapsed time in seconds and number of items."""
+    paginator = aws_dynamodb_parallel_scan.get_paginator(client)
+    start = time.monotonic()
+    items = sum(page["Count"] for page in paginator.paginate(TableName="benchmark", TotalSegments=segments))
+    return time.monotonic() - start, items
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--segments", type=int, default=64, help="Number of segments (default: 64)")
+    parser.add_argument("--items-per-segment", type=int, default=1000, help="Items per segment (default: 1000)")
+    parser.add_argument("--latency", type=float, default=0.05, help="Scan latency in seconds (default: 0.05)")
+    parser.add_argument(
+        "--connect-latency", type=float, default=0.05, help="Latency of new connections (default: 0.05)"
+    )
+    parser.add_argument("--clients", type=int, default=4, help="Number of sharded clients (default: 4)")
+    args = parser.parse_args()
+
+    # Silence "Connection pool is full" warnings of the default client
+    logging.getLogger("urllib3.connectionpool").setLevel(logging.ERROR)
+    table = StubTable(args.items_per_segment, latency=args.latency)
+    with StubServer(table, connect_latency=args.connect_latency) as server:
+        kwargs = {**CLIENT_ARGS, "endpoint_url": server.endpoint_url}
+        for name, client in (
+            ("default client", boto3.client("dynamodb", **kwargs)),
+            ("create_client()", clients.create_client(args.segments, **kwargs)),
+            (
+                f"create_clients({args.clients})",
+                clients.create_clients(args.clients, args.segments, **kwargs),
+            ),
+        ):
+            run(client, args.segments)  # warm up connections
+            elapsed, items = min(run(client, args.segments) for _ in range(3))
+            print(f"{name}: {items} items in {elapsed:.2f}s ({items / elapsed:.0f} items/s)")
+
+
+if __name__ == "__main__":
+    main()
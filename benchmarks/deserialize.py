@@ -0,0 +1,75 @@
+"""Benchmark conversion of low-level DynamoDB items to native types.
+
+Compares boto3's TypeDeserializer (used by the document client) with
+convert.item_converter() using each number type. Items are either wide
+(many string and number attributes) or deeply nested (maps and lists).
+
+The document client also walks the whole response shape in its event hooks,
+so the measured TypeDeserializer time is a lower bound for the current path.
+
+Usage: python benchmarks/deserialize.py [--items N] [--attributes N] [--depth N]
+"""
+
+import argparse
+import time
+
+import boto3.dynamodb.types
+
+from aws_dynamodb_parallel_scan import convert
+
+
+def wide_item(i: int, attributes: int) -> dict:
+    """Generate an item with many top-level attributes."""
+    return {
+        "pk": {"S": f"item-{i}"},
+        **{f"s{j}": {"S": f"value-{j}"} for j in range(attributes // 2)},
+        **{f"n{j}": {"N": str(j * 1.5)} for j in range(attributes - attributes // 2)},
+    }
+
+
+def nested_item(i: int, depth: int) -> dict:
+    """Generate an item with maps and lists nested depth levels deep."""
+    value: dict = {"M": {"s": {"S": "leaf"}, "n": {"N": "7"}, "ns": {"NS": ["1", "2"]}}}
+    for level in range(depth):
+        value = {"M": {"level": {"N": str(level)}, "child": value, "list": {"L": [value, {"BOOL": True}]}}}
+    return {"pk": {"S": f"item-{i}"}, "doc": value}
+
+
+def run(convert_item, items: list[dict]) -> float:
+    """Convert all items and return elapsed time in seconds."""
+    start = time.perf_counter()
+    for item in items:
+        convert_item(item)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=10000, help="Number of items (default: 10000)")
+    parser.add_argument("--attributes", type=int, default=50, help="Attributes of wide items (default: 50)")
+    parser.add_argument("--depth", type=int, default=6, help="Nesting depth of nested items (default: 6)")
+    args = parser.parse_args()
+
+    deserializer = boto3.dynamodb.types.TypeDeserializer()
+
+    def type_deserializer(item: dict) -> dict:
+        return {k: deserializer.deserialize(v) for k, v in item.items()}
+
+    converters = {"TypeDeserializer": type_deserializer}
+    converters.update({f"item_converter({n})": convert.item_converter(n) for n in convert.NUMBER_TYPES})
+
+    datasets = {
+        f"wide ({args.attributes} attributes)": [wide_item(i, args.attributes) for i in range(args.items)],
+        f"nested (depth {args.depth})": [nested_item(i, args.depth) for i in range(args.items // 10)],
+    }
+    for dataset, items in datasets.items():
+        print(f"{dataset}, {len(items)} items:")
+        baseline = None
+        for name, convert_item in converters.items():
+            elapsed = run(convert_item, items)
+            baseline = baseline or elapsed
+            print(f"  {name}: {elapsed:.3f}s ({len(items) / elapsed:.0f} items/s, {baseline / elapsed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
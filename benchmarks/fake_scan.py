@@ -0,0 +1,120 @@
+"""Deterministic in-process fake of the DynamoDB Scan API for benchmarks.
+
+FakeScanClient stands in for a low-level boto3 DynamoDB client. The shape of
+the table (pages per segment, items per page, item width), the latency of
+each request and which requests are throttled are derived from a seed and
+the request position (TotalSegments, Segment, page, attempt), so every run
+of a scenario sees the same table and the same latencies regardless of
+thread scheduling.
+
+Latency distributions are given as strings:
+    fixed:S            every request takes S seconds
+    uniform:A,B        uniformly distributed between A and B seconds
+    lognormal:M,SIGMA  log-normal with median M seconds (long tail with large SIGMA)
+"""
+
+import math
+import random
+import threading
+import time
+import typing
+
+import botocore.exceptions
+
+
+def latency_sampler(spec: str) -> typing.Callable[[random.Random], float]:
+    """Parse a latency distribution (see module docstring) to a function that samples it."""
+    kind, _, params = spec.partition(":")
+    try:
+        values = [float(v) for v in params.split(",")] if params else []
+    except ValueError:
+        raise ValueError(f"invalid latency distribution: {spec}") from None
+    if kind == "fixed" and len(values) == 1:
+        return lambda rng: values[0]
+    if kind == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "lognormal" and len(values) == 2:
+        return lambda rng: rng.lognormvariate(math.log(values[0]), values[1])
+    raise ValueError(f"invalid latency distribution: {spec}")
+
+
+class FakeScanClient:  # pylint: disable=too-many-instance-attributes
+    """DynamoDB client fake with a scan() method that returns generated pages."""
+
+    def __init__(
+        self,
+        *,
+        pages: int = 20,
+        page_size: int = 100,
+        item_width: int = 100,
+        latency: str = "fixed:0.005",
+        throttle_rate: float = 0.0,
+        skew: float = 0.0,
+        seed: int = 0,
+    ):  # pylint: disable=too-many-arguments
+        """Create a fake client.
+
+        Args:
+            pages: Average number of pages per segment.
+            page_size: Number of items per page.
+            item_width: Size of the payload attribute of each item in bytes.
+            latency: Latency distribution of Scan requests (see module docstring).
+            throttle_rate: Probability of a request failing with ProvisionedThroughputExceededException.
+            skew: Zipf exponent of segment sizes. With 0, all segments have the same number of
+                pages. With larger values, the table is concentrated in the first segments.
+            seed: Seed of the generated latencies and throttling errors.
+        """
+        self._pages = pages
+        self._page_size = page_size
+        self._payload = "x" * item_width
+        self._latency = latency_sampler(latency)
+        self._throttle_rate = throttle_rate
+        self._skew = skew
+        self._seed = seed
+        self._lock = threading.Lock()
+        self._attempts: dict[tuple, int] = {}
+        self._segment_pages: dict[int, list[int]] = {}
+        self.requests = 0
+        self.throttled = 0
+
+    def segment_pages(self, total_segments: int) -> list[int]:
+        """Get the number of pages of each segment of a scan in total_segments segments."""
+        with self._lock:
+            if total_segments not in self._segment_pages:
+                weights = [1 / (i + 1) ** self._skew for i in range(total_segments)]
+                total = self._pages * total_segments
+                self._segment_pages[total_segments] = [max(1, round(total * w / sum(weights))) for w in weights]
+            return self._segment_pages[total_segments]
+
+    def scan(self, **kwargs) -> dict:
+        total_segments, segment = kwargs.get("TotalSegments", 1), kwargs.get("Segment", 0)
+        page = kwargs.get("ExclusiveStartKey", {}).get("page", {}).get("N", "0")
+        key = (total_segments, segment, int(page))
+        with self._lock:
+            attempt = self._attempts.get(key, 0)
+            self._attempts[key] = attempt + 1
+            self.requests += 1
+        rng = random.Random(f"{self._seed}/{key}/{attempt}")  # nosec B311
+
+        time.sleep(self._latency(rng))
+        if rng.random() < self._throttle_rate:
+            with self._lock:
+                self.throttled += 1
+            raise botocore.exceptions.ClientError(
+                {"Error": {"Code": "ProvisionedThroughputExceededException", "Message": "Throttled"}}, "Scan"
+            )
+
+        number = key[2]
+        items = [
+            {"pk": {"S": f"{segment}-{number}-{i}"}, "n": {"N": str(i)}, "payload": {"S": self._payload}}
+            for i in range(self._page_size)
+        ]
+        response: dict = {
+            "Items": items,
+            "Count": len(items),
+            "ScannedCount": len(items),
+            "ResponseMetadata": {"HTTPHeaders": {"content-length": str(len(items) * (len(self._payload) + 60))}},
+        }
+        if number + 1 < self.segment_pages(total_segments)[segment]:
+            response["LastEvaluatedKey"] = {"page": {"N": str(number + 1)}}
+        return response
@@ -0,0 +1,58 @@
+"""Benchmark the overhead of scan metrics.
+
+Scans a stubbed table whose Scan API calls return immediately, so the
+measured time is the overhead of the paginator itself. Compares scans
+without an observer, with a no-op ScanObserver and with ScanMetrics.
+
+Usage: python benchmarks/metrics.py [--segments N] [--pages N]
+"""
+
+import argparse
+import time
+
+import aws_dynamodb_parallel_scan
+from aws_dynamodb_parallel_scan import metrics
+
+
+class StubClient:  # pylint: disable=too-few-public-methods
+    """DynamoDB client stub with an instant scan() method."""
+
+    def __init__(self, pages: int):
+        self._pages = pages
+
+    def scan(self, **kwargs):
+        page = kwargs.get("ExclusiveStartKey", 0) + 1
+        response = {"Items": [{"pk": {"S": str(page)}}], "Count": 1, "ScannedCount": 1}
+        if page < self._pages:
+            response["LastEvaluatedKey"] = page
+        return response
+
+
+def run(client: StubClient, segments: int, observer: metrics.ScanObserver | None) -> float:
+    """Scan the stub table and return elapsed time in seconds."""
+    paginator = aws_dynamodb_parallel_scan.get_paginator(client)  # type: ignore[arg-type]
+    start = time.perf_counter()
+    for _ in paginator.paginate(TableName="benchmark", TotalSegments=segments, prefetch=2, observer=observer):
+        pass
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--segments", type=int, default=8, help="Number of segments (default: 8)")
+    parser.add_argument("--pages", type=int, default=5000, help="Pages per segment (default: 5000)")
+    args = parser.parse_args()
+
+    client = StubClient(args.pages)
+    total = args.segments * args.pages
+    for name, factory in (
+        ("none", lambda: None),
+        ("ScanObserver", metrics.ScanObserver),
+        ("ScanMetrics", metrics.ScanMetrics),
+    ):
+        elapsed = min(run(client, args.segments, factory()) for _ in range(3))
+        print(f"observer={name}: {total} pages in {elapsed:.2f}s ({elapsed / total * 1e6:.1f} us/page)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Benchmark ordered output of parallel scans.
+
+Scans a FakeScanClient table in completion order and in the deterministic
+orders of the ordering module, and reports the throughput and how much of
+the reorder buffer was held in memory or written to the temporary file.
+Segment latencies are log-normally distributed, so pages complete out of
+order.
+
+Usage: python benchmarks/ordering.py [--segments N] [--pages N] [--latency SPEC] [--max-memory-bytes N]
+"""
+
+import argparse
+import time
+
+from fake_scan import FakeScanClient
+
+import aws_dynamodb_parallel_scan
+from aws_dynamodb_parallel_scan import ordering
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--segments", type=int, default=16, help="Number of segments (default: 16)")
+    parser.add_argument("--pages", type=int, default=20, help="Pages per segment (default: 20)")
+    parser.add_argument(
+        "--latency", default="lognormal:0.01,0.8", help="Latency distribution (default: lognormal:0.01,0.8)"
+    )
+    parser.add_argument(
+        "--max-memory-bytes",
+        type=int,
+        default=4 << 20,
+        help="Memory limit of the reorder buffer (default: 4 MiB)",
+    )
+    args = parser.parse_args()
+
+    for order in (None, *ordering.ORDERS):
+        client = FakeScanClient(pages=args.pages, latency=args.latency, item_width=200)
+        paginator = aws_dynamodb_parallel_scan.get_paginator(client)
+        pages = paginator.paginate(TableName="bench", TotalSegments=args.segments, with_segments=True)
+        buffer = None
+        if order:
+            buffer = ordering.ReorderBuffer(
+                range(args.segments),
+                order,
+                max_memory_bytes=args.max_memory_bytes,
+                measure=aws_dynamodb_parallel_scan._page_bytes,  # pylint: disable=protected-access
+            )
+            pages = ordering.ordered_pages(pages, buffer)
+        start = time.perf_counter()
+        items = sum(page["Count"] for _, page in pages)
+        elapsed = time.perf_counter() - start
+        line = f"{order or 'completion'}: {elapsed:.2f}s ({items / elapsed:.0f} items/s)"
+        if buffer:
+            line += f", peak memory {buffer.peak_buffered_bytes / 1e6:.1f} MB, {buffer.spilled_pages} pages spilled"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Benchmark encoding scan results as JSON lines.
+
+Compares the previous output path of the CLI (one json.dumps() and print()
+call per item) with output.JSONLinesWriter using the standard library and
+orjson encoders. Items are written to os.devnull in low-level (DynamoDB
+typed), document client (native types with Decimal numbers) and converted
+(native types with int and float numbers, like clients.create_client(
+document=True, numbers="int") returns) formats.
+
+Usage: python benchmarks/output.py [--pages N] [--items N] [--attributes N]
+"""
+
+import argparse
+import io
+import json
+import os
+import time
+
+import boto3.dynamodb.types
+
+from aws_dynamodb_parallel_scan import convert, output
+
+DESERIALIZER = boto3.dynamodb.types.TypeDeserializer()
+
+
+def generate_page(items: int, attributes: int, offset: int) -> dict:
+    """Generate a page of low-level items with string and number attributes."""
+    return {
+        "Items": [
+            {
+                "pk": {"S": f"item-{offset + i}"},
+                **{f"s{j}": {"S": f"value-{j}"} for j in range(attributes // 2)},
+                **{f"n{j}": {"N": str(j * 1.5)} for j in range(attributes - attributes // 2)},
+            }
+            for i in range(items)
+        ],
+        "Count": items,
+        "ScannedCount": items,
+    }
+
+
+def to_document(page: dict) -> dict:
+    """Convert a low-level page to the format returned by the document client."""
+    items = [{k: DESERIALIZER.deserialize(v) for k, v in item.items()} for item in page["Items"]]
+    return {**page, "Items": items}
+
+
+def print_per_item(pages: list[dict], stream: io.TextIOWrapper):
+    """Previous CLI output path."""
+    for page in pages:
+        for item in page["Items"]:
+            print(json.dumps(item, cls=output.DecimalEncoder), file=stream)
+    stream.flush()
+
+
+def write_pages(pages: list[dict], stream: io.BufferedWriter, encoder: str):
+    """Output path using JSONLinesWriter."""
+    writer = output.JSONLinesWriter(stream, output_items=True, encoder=encoder)
+    for page in pages:
+        writer.write_page(page)
+    writer.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=100, help="Number of pages (default: 100)")
+    parser.add_argument("--items", type=int, default=500, help="Items per page (default: 500)")
+    parser.add_argument("--attributes", type=int, default=10, help="Attributes per item (default: 10)")
+    args = parser.parse_args()
+
+    low_level = [generate_page(args.items, args.attributes, i * args.items) for i in range(args.pages)]
+    document = [to_document(page) for page in low_level]
+    converted = list(map(convert.page_converter("int"), low_level))
+    total = args.pages * args.items
+    encoders = ["json", "orjson"] if output.orjson is not None else ["json"]
+
+    for mode, pages in (("low-level", low_level), ("document", document), ("converted", converted)):
+        with open(os.devnull, "w", encoding="utf-8") as stream:
+            start = time.monotonic()
+            print_per_item(pages, stream)
+            elapsed = time.monotonic() - start
+        print(f"{mode:>9} print per item: {total / elapsed:>10.0f} items/s")
+
+        for encoder in encoders:
+            with open(os.devnull, "wb") as binary:
+                start = time.monotonic()
+                write_pages(pages, binary, encoder)
+                elapsed = time.monotonic() - start
+            print(f"{mode:>9} writer ({encoder}): {total / elapsed:>10.0f} items/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Benchmark overlap of Scan requests and page processing with prefetch.
+
+Scans a stubbed table whose Scan API calls take a fixed time and spends a
+fixed time processing each page. Without prefetch, the request for the next
+page of a segment is only sent after the previous page has been processed.
+With prefetch, requests overlap with the processing.
+
+Usage: python benchmarks/prefetch.py [--segments N] [--pages N] [--latency S] [--work S]
+"""
+
+import argparse
+import time
+
+import aws_dynamodb_parallel_scan
+
+
+class StubClient:  # pylint: disable=too-few-public-methods
+    """DynamoDB client stub with a slow scan() method."""
+
+    def __init__(self, pages: int, latency: float):
+        self._pages = pages
+        self._latency = latency
+
+    def scan(self, **kwargs):
+        time.sleep(self._latency)
+        page = kwargs.get("ExclusiveStartKey", 0) + 1
+        response = {"Items": [{"pk": {"S": str(page)}}], "Count": 1, "ScannedCount": 1}
+        if page < self._pages:
+            response["LastEvaluatedKey"] = page
+        return response
+
+
+def run(client: StubClient, segments: int, work: float, prefetch: int) -> float:
+    """Scan the stub table and return elapsed time in seconds."""
+    paginator = aws_dynamodb_parallel_scan.get_paginator(client)  # type: ignore[arg-type]
+    start = time.monotonic()
+    for _ in paginator.paginate(TableName="benchmark", TotalSegments=segments, prefetch=prefetch):
+        time.sleep(work)
+    return time.monotonic() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--segments", type=int, default=1, help="Number of segments (default: 1)")
+    parser.add_argument("--pages", type=int, default=50, help="Pages per segment (default: 50)")
+    parser.add_argument("--latency", type=float, default=0.01, help="Scan latency in seconds (default: 0.01)")
+    parser.add_argument("--work", type=float, default=0.01, help="Processing time per page (default: 0.01)")
+    args = parser.parse_args()
+
+    client = StubClient(args.pages, args.latency)
+    total = args.segments * args.pages
+    for prefetch in (0, 1, 2):
+        elapsed = run(client, args.segments, args.work, prefetch)
+        print(f"prefetch={prefetch}: {total} pages in {elapsed:.2f}s ({total / elapsed:.1f} pages/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Local HTTP server that implements a stub of the DynamoDB Scan API.
+
+The server speaks the DynamoDB JSON protocol so real boto3, aiobotocore and
+aioboto3 clients can be pointed to it with endpoint_url. Each segment of
+the stub table contains a fixed number of generated items and every request
+takes a fixed time. New connections can be made to take a fixed time too,
+to simulate the TCP and TLS handshakes with a remote endpoint.
+
+Usage as a script: python benchmarks/stub_server.py [--port N] [--latency S]
+"""
+
+import argparse
+import http.server
+import json
+import threading
+import time
+
+
+class StubTable:  # pylint: disable=too-few-public-methods
+    """Generated table contents served by the stub server."""
+
+    def __init__(self, items_per_segment: int = 1000, page_size: int = 100, latency: float = 0.01):
+        self.items_per_segment = items_per_segment
+        self.page_size = page_size
+        self.latency = latency
+
+    def scan(self, request: dict) -> dict:
+        """Handle a Scan request."""
+        time.sleep(self.latency)
+        segment = request.get("Segment", 0)
+        start = int(request.get("ExclusiveStartKey", {}).get("pk", {}).get("N", 0))
+        end = min(self.items_per_segment, start + min(request.get("Limit", self.page_size), self.page_size))
+        items = [
+            {"pk": {"N": str(segment * self.items_per_segment + i)}, "value": {"S": "x" * 32}, "n": {"N": "1.5"}}
+            for i in range(start, end)
+        ]
+        response: dict = {"Items": items, "Count": len(items), "ScannedCount": len(items)}
+        if end < self.items_per_segment:
+            response["LastEvaluatedKey"] = {"pk": {"N": str(end)}}
+        return response
+
+
+def _handler(table: StubTable, connect_latency: float):
+    class Handler(http.server.BaseHTTPRequestHandler):
+        """Request handler for DynamoDB JSON protocol requests."""
+
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            # A handler is created for each new connection
+            time.sleep(connect_latency)
+            super().setup()
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            target = self.headers.get("X-Amz-Target", "")
+            if target.endswith(".Scan"):
+                status, response = 200, table.scan(request)
+            else:
+                status, response = 400, {"__type": "UnknownOperationException", "message": target}
+
+            body = json.dumps(response).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/x-amz-json-1.0")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+            pass
+
+    return Handler
+
+
+class StubServer:
+    """Stub DynamoDB server running in a background thread."""
+
+    def __init__(self, table: StubTable, port: int = 0, connect_latency: float = 0.0):
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", port), _handler(table, connect_latency))
+        self._server.daemon_threads = True
+        self._server.request_queue_size = 1024
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def endpoint_url(self) -> str:
+        """URL of the server."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on (default: 8000)")
+    parser.add_argument("--latency", type=float, default=0.01, help="Latency of each request (default: 0.01)")
+    parser.add_argument("--items-per-segment", type=int, default=1000, help="Items per segment (default: 1000)")
+    args = parser.parse_args()
+
+    with StubServer(StubTable(args.items_per_segment, latency=args.latency), args.port) as server:
+        print(f"Listening on {server.endpoint_url}")
+        threading.Event().wait()
+
+
+if __name__ == "__main__":
+    main()
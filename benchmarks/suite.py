@@ -0,0 +1,207 @@
+"""Benchmark suite of parallel scan scenarios against a deterministic fake Scan API.
+
+Runs each scenario of SCENARIOS through Paginator.paginate() or the CLI
+with a FakeScanClient (see fake_scan.py) and reports pages/s, items/s, peak
+RSS and tail latency (p50/p99 of the time the consumer waited for a page).
+Each scenario runs in its own process because peak RSS never decreases.
+
+The fake table and its latencies are the same on every run, so results
+saved with --save can be compared with a later run with --compare to catch
+regressions, e.g. between two commits:
+
+    git checkout main && python benchmarks/suite.py --save main.json
+    git checkout feature && python benchmarks/suite.py --compare main.json
+
+Usage: python benchmarks/suite.py [--scenario NAME ...] [--repeat N] [--save FILE] [--compare FILE]
+"""
+
+import argparse
+import contextlib
+import dataclasses
+import io
+import json
+import os
+import resource
+import subprocess  # nosec B404
+import sys
+import time
+import unittest.mock
+
+from fake_scan import FakeScanClient
+
+import aws_dynamodb_parallel_scan
+
+
+@dataclasses.dataclass
+class Scenario:
+    """Benchmark scenario."""
+
+    # Arguments of FakeScanClient
+    table: dict
+    # Arguments of Paginator.paginate() (except TableName)
+    paginate: dict = dataclasses.field(default_factory=dict)
+    # Command line arguments of the CLI (except --table-name) to run the CLI instead of paginate()
+    cli: list[str] | None = None
+    # Processing time of each page in seconds
+    work: float = 0.0
+
+
+SCENARIOS = {
+    "baseline": Scenario({"pages": 40}, {"TotalSegments": 16}),
+    "prefetch": Scenario({"pages": 40}, {"TotalSegments": 16, "prefetch": 2}, work=0.0005),
+    "tail-latency": Scenario({"pages": 40, "latency": "lognormal:0.005,1.0"}, {"TotalSegments": 16, "prefetch": 1}),
+    "many-segments": Scenario({"pages": 4}, {"TotalSegments": 1000, "max_workers": 32, "prefetch": 1}),
+    "wide-items": Scenario(
+        {"pages": 10, "page_size": 50, "item_width": 20_000},
+        {"TotalSegments": 8, "prefetch": 4, "max_buffered_bytes": 16 << 20},
+        work=0.002,
+    ),
+    "throttled": Scenario({"pages": 20, "throttle_rate": 0.05}, {"TotalSegments": 16}),
+    "skewed": Scenario({"pages": 20, "skew": 1.5}, {"TotalSegments": 16, "prefetch": 1}),
+    "deserialize": Scenario({"pages": 20}, {"TotalSegments": 16, "prefetch": 1, "deserialize": "int"}),
+    "cli-items": Scenario({"pages": 20}, cli=["--total-segments", "16", "--output-items"]),
+    "cli-deserialize": Scenario(
+        {"pages": 20}, cli=["--total-segments", "16", "--output-items", "--deserialize", "int"]
+    ),
+}
+
+# Reported metrics and whether larger values are better
+METRICS = {"pages_per_second": True, "items_per_second": True, "peak_rss_mib": False, "wait_p99_ms": False}
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Get the q-th percentile (0-100) of non-empty values with the nearest-rank method."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))]
+
+
+def run_paginate(client: FakeScanClient, scenario: Scenario) -> tuple[int, int, list[float]]:
+    """Scan the fake table with paginate() and return number of pages, items and page wait times."""
+    paginator = aws_dynamodb_parallel_scan.get_paginator(client)  # type: ignore[arg-type]
+    pages = items = 0
+    waits = []
+    waited = time.perf_counter()
+    for page in paginator.paginate(TableName="benchmark", **scenario.paginate):
+        waits.append(time.perf_counter() - waited)
+        pages += 1
+        items += len(page["Items"])
+        if scenario.work:
+            time.sleep(scenario.work)
+        waited = time.perf_counter()
+    return pages, items, waits
+
+
+def run_cli(client: FakeScanClient, scenario: Scenario) -> tuple[int, int, list[float]]:
+    """Run the CLI against the fake table with output to /dev/null and return number of pages and items.
+
+    Page wait times are not measured since pages are consumed inside the CLI.
+    """
+    argv = ["aws-dynamodb-parallel-scan", "--table-name", "benchmark", *(scenario.cli or [])]
+    with (
+        open(os.devnull, "wb") as devnull,
+        unittest.mock.patch("sys.argv", argv),
+        unittest.mock.patch("boto3.client", return_value=client),
+        unittest.mock.patch("sys.stdout", io.TextIOWrapper(devnull)),
+    ):
+        aws_dynamodb_parallel_scan.cli()
+    total_segments = int(scenario.cli[scenario.cli.index("--total-segments") + 1]) if scenario.cli else 1
+    pages = sum(client.segment_pages(total_segments))
+    return pages, pages * scenario.table.get("page_size", 100), []
+
+
+def run(name: str, repeat: int) -> dict:
+    """Run a scenario repeat times and return metrics of the fastest run."""
+    scenario = SCENARIOS[name]
+    best: dict = {}
+    for _ in range(repeat):
+        client = FakeScanClient(**scenario.table)
+        start = time.perf_counter()
+        pages, items, waits = (run_cli if scenario.cli else run_paginate)(client, scenario)
+        elapsed = time.perf_counter() - start
+        if not best or elapsed < best["seconds"]:
+            best = {
+                "seconds": elapsed,
+                "pages": pages,
+                "items": items,
+                "requests": client.requests,
+                "throttled": client.throttled,
+                "pages_per_second": pages / elapsed,
+                "items_per_second": items / elapsed,
+                **{f"wait_p{q}_ms": percentile(waits, q) * 1000 if waits else None for q in (50, 99)},
+            }
+    best["peak_rss_mib"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return best
+
+
+def format_result(name: str, result: dict, baseline: dict | None) -> str:
+    """Format the metrics of a scenario as a line, with changes relative to a baseline result."""
+    line = (
+        f"{name:<16} {result['pages_per_second']:>9.0f} pages/s {result['items_per_second']:>10.0f} items/s "
+        f"{result['peak_rss_mib']:>6.0f} MiB"
+    )
+    if result["wait_p50_ms"] is not None:
+        line += f"  wait p50 {result['wait_p50_ms']:.2f}ms p99 {result['wait_p99_ms']:.2f}ms"
+    if baseline:
+        line += "  vs baseline: " + ", ".join(
+            f"{metric} {(result[metric] / baseline[metric] - 1) * 100:+.0f}%"
+            for metric in METRICS
+            if baseline.get(metric)
+        )
+    return line
+
+
+def regressions(name: str, result: dict, baseline: dict, threshold: float) -> list[str]:
+    """Get the metrics of a scenario that are worse than in the baseline by more than threshold."""
+    return [
+        f"{name}: {metric} {baseline[metric]:.1f} -> {result[metric]:.1f}"
+        for metric, higher_is_better in METRICS.items()
+        if baseline.get(metric)
+        and (result[metric] / baseline[metric] - 1) * (1 if higher_is_better else -1) < -threshold
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS, help="Scenario to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per scenario, fastest is reported (default: 3)")
+    parser.add_argument("--save", metavar="FILE", help="Save results to a JSON file")
+    parser.add_argument("--compare", metavar="FILE", help="Compare results to results saved with --save")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Exit with status 1 if a metric is worse than in --compare by more than this (default: 0.2)",
+    )
+    parser.add_argument("--child", metavar="NAME", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run(args.child, args.repeat)))
+        return
+
+    baselines = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baselines = json.load(f)["scenarios"]
+
+    results = {}
+    failures = []
+    for name in args.scenario or SCENARIOS:
+        command = [sys.executable, sys.argv[0], f"--child={name}", f"--repeat={args.repeat}"]
+        output = subprocess.run(command, check=True, capture_output=True, text=True).stdout  # nosec B603
+        results[name] = json.loads(output)
+        print(format_result(name, results[name], baselines.get(name)), flush=True)
+        if name in baselines:
+            failures += regressions(name, results[name], baselines[name], args.threshold)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version, "scenarios": results}, f, indent=2)
+    if failures:
+        print("Regressions:", *failures, sep="\n  ")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    with contextlib.suppress(KeyboardInterrupt):
+        main()
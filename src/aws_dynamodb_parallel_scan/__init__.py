@@ -5,13 +5,66 @@ https://alexwlchan.net/2020/05/getting-every-item-from-a-dynamodb-table-with-pyt
 """
 
 import argparse
+import collections
 import concurrent.futures
+import contextlib
 import decimal
+import functools
+import heapq
+import importlib
+import importlib.util
+import itertools
 import json
+import operator
+import pathlib
+import queue
+import re
+import sys
 import textwrap
+import threading
+import time
 import typing
 
-import boto3
+import botocore.exceptions
+
+from . import (
+    _common,
+    aggregate,
+    batch,
+    cache,
+    checkpoint,
+    clients,
+    columnar,
+    convert,
+    files,
+    incremental,
+    metrics,
+    ordering,
+    output,
+    processes,
+    sharding,
+    sizing,
+    throttling,
+)
+from .aio import AsyncPaginator, get_async_paginator
+from .batch import BatchLoader, BatchWriter
+
+__all__ = [
+    "AsyncPaginator",
+    "BatchLoader",
+    "BatchWriter",
+    "CancellationToken",
+    "Paginator",
+    "QueryPaginator",
+    "cli",
+    "get_async_paginator",
+    "get_batch_loader",
+    "get_batch_writer",
+    "get_paginator",
+    "get_query_paginator",
+    "iter_items",
+    "partition_key_queries",
+]
 
 if typing.TYPE_CHECKING:  # pragma: no cover
     from mypy_boto3_dynamodb import DynamoDBClient
@@ -19,6 +72,528 @@ else:
     DynamoDBClient = None  # pylint: disable=invalid-name
 
 
+class _Segment:  # pylint: disable=too-few-public-methods
+    """Pagination state of a single segment of a parallel scan."""
+
+    def __init__(self, segment_id: int, args: dict, depth: int = 0):
+        # Identifier of this segment (Segment argument of Scan, of the original segment if split)
+        self.id = segment_id
+        # Number of times the original segment has been split to get this segment
+        self.depth = depth
+        # Arguments for the next request of this segment
+        self.args = args
+        # Fetched pages waiting for the consumer with their sizes, in segment order
+        self.fetched: collections.deque = collections.deque()
+        # Number of pages fetched but not yet consumed
+        self.buffered = 0
+        # True if next request is waiting for the consumer to catch up
+        self.parked = False
+
+
+_MAX_TOTAL_SEGMENTS = sizing.MAX_TOTAL_SEGMENTS
+
+
+# Message of the ValidationException DynamoDB rejects an ExclusiveStartKey outside the segment with, e.g.
+# "The provided Exclusive start key does not map to the provided Segment and TotalSegments values."
+# The message is not documented, so this is matched loosely.
+_INVALID_START_KEY_MESSAGE = re.compile(r"exclusive ?start ?key.*segment", re.IGNORECASE)
+
+
+def _is_invalid_start_key(exc: Exception) -> bool:
+    """Check if a Scan request was rejected because ExclusiveStartKey is not in its segment."""
+    if not isinstance(exc, botocore.exceptions.ClientError):
+        return False
+    error = exc.response.get("Error", {})
+    return error.get("Code") == "ValidationException" and bool(
+        _INVALID_START_KEY_MESSAGE.search(error.get("Message", ""))
+    )
+
+
+def _page_bytes(page: dict) -> int:
+    """Get the size of a Scan API response in bytes (from Content-Length if available)."""
+    headers = page.get("ResponseMetadata", {}).get("HTTPHeaders", {})
+    if "content-length" in headers:
+        return int(headers["content-length"])
+    return len(repr(page.get("Items", [])))
+
+
+class CancellationToken:
+    """Token to cancel parallel scans from another thread.
+
+    Cancelling stops the scans the token was given to: no new requests are made,
+    requests that have not started are dropped and the paginate() generators
+    return (without raising an exception) once requests in flight have completed.
+
+    Example:
+        token = CancellationToken()
+        threading.Timer(60, token.cancel).start()
+        for page in paginator.paginate(TableName="mytable", TotalSegments=16, cancel=token):
+            ...
+    """
+
+    def __init__(self) -> None:
+        self._callbacks: list[typing.Callable[[], None]] = []
+        self._lock = threading.Lock()
+        self._cancelled = False
+
+    @property
+    def cancelled(self) -> bool:
+        """True if the token has been cancelled."""
+        return self._cancelled
+
+    def cancel(self):
+        """Cancel the scans using this token."""
+        with self._lock:
+            self._cancelled = True
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def register(self, callback: typing.Callable[[], None]) -> typing.Callable[[], None]:
+        """Call callback when the token is cancelled (right away if it already has been).
+
+        Returns: Function that unregisters the callback.
+        """
+        with self._lock:
+            if not self._cancelled:
+                self._callbacks.append(callback)
+                return lambda: self._unregister(callback)
+        callback()
+        return lambda: None
+
+    def _unregister(self, callback: typing.Callable[[], None]):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+
+class _BufferLimit:
+    """Limit on the total size of fetched pages waiting for the consumer.
+
+    Scan threads acquire the size of a page before handing it to the consumer
+    and block while the limit would be exceeded. A page is always accepted if
+    nothing else is buffered, so pages larger than the limit do not block the
+    scan forever.
+    """
+
+    def __init__(self, limit: int, measure: typing.Callable[[dict], int]):
+        self.measure = measure
+        self._limit = limit
+        self._used = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, size: int, stopped: threading.Event) -> bool:
+        """Wait until there is room for size units. Returns False if the consumer stopped."""
+        with self._condition:
+            while self._used and self._used + size > self._limit:
+                if stopped.is_set():
+                    return False
+                self._condition.wait(0.1)
+            self._used += size
+            return True
+
+    def release(self, size: int):
+        """Release size units after the consumer has processed a page."""
+        with self._condition:
+            self._used -= size
+            self._condition.notify_all()
+
+
+class _Stopped(Exception):
+    """The scan was stopped before a request was made."""
+
+
+class _ParallelRunner:
+    """Runs paginated requests for multiple segments in parallel.
+
+    Each request runs as a separate task in a thread pool. Completed pages are
+    queued to their segment and the segment is put to a buffer the consumer
+    reads from. This keeps pages of each segment in order even if the
+    requests complete out of order. The next request of a segment is
+    submitted once the number of fetched but unconsumed pages of the segment is
+    at most `prefetch`.
+
+    Segments ready for their next request wait in a priority queue. When a
+    worker becomes available, it continues a segment that has already been
+    started before starting a new one. This keeps the number of half-scanned
+    segments close to the number of workers even if there are many more
+    segments than workers.
+
+    Throttled requests are retried with exponential backoff. The number of
+    concurrent requests is halved on throttling and slowly increased back to
+    max_workers when requests succeed. An optional rate limiter keeps the
+    consumed capacity under a target rate.
+
+    Buffer limits bound the number of items or bytes of fetched pages that
+    wait for the consumer. A scan thread that would exceed a limit blocks
+    until the consumer has processed earlier pages.
+
+    With max_split_depth, segments that are still running when there are
+    fewer unfinished segments than workers are split into two segments of a
+    segmentation with twice as many segments (see _split()), up to
+    max_split_depth times per original segment.
+
+    The scan ends early when max_items items have been consumed or when the
+    cancellation token is cancelled. Requests that have not started are
+    cancelled and no new requests are made once enough items have been fetched.
+
+    With lazy, segments are taken from the iterable as they are needed: about
+    max_workers segments are started at first, and the next segment is
+    started whenever the consumer has received the last page of a segment.
+    """
+
+    def __init__(
+        self,
+        call,
+        segments: typing.Iterable[_Segment],
+        *,
+        lazy: bool = False,
+        prefetch: int = 0,
+        max_buffered_pages: int = 0,
+        max_workers: int,
+        max_retries: int = 0,
+        rate_limiter: throttling.RateLimiter | None = None,
+        buffer_limits: typing.Sequence[_BufferLimit] = (),
+        on_consumed: typing.Callable[[int, typing.Any], None] | None = None,
+        observer: metrics.ScanObserver | None = None,
+        max_split_depth: int = 0,
+        max_items: int = 0,
+        cancel: CancellationToken | None = None,
+    ):  # pylint: disable=too-many-arguments
+        self._call = call
+        self._max_items = max_items
+        self._cancel = cancel
+        # Number of items in fetched pages
+        self._fetched_items = 0
+        self._observer = observer
+        self._max_split_depth = max_split_depth
+        # Segments not started yet, taken from the iterable by the consumer (if lazy)
+        self._pending = iter(segments) if lazy else None
+        self._segments = list(itertools.islice(self._pending, max_workers)) if self._pending else list(segments)
+        # Number of segments whose last page has not been consumed
+        self._remaining = len(self._segments)
+        self._buffer_limits = buffer_limits
+        self._prefetch = prefetch
+        self._max_workers = max_workers
+        self._max_retries = max_retries
+        self._rate_limiter = rate_limiter
+        self._on_consumed = on_consumed
+        self._concurrency = throttling.AdaptiveConcurrency(max_workers)
+        self._ready: list[tuple[bool, int, _Segment]] = []
+        self._sequence = itertools.count()
+        self._pages: queue.Queue = queue.Queue(maxsize=max_buffered_pages)
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._executor: concurrent.futures.ThreadPoolExecutor
+
+    def pages(self, with_segments: bool = False):
+        """Yield pages (or segment and page tuples) from all segments in completion order."""
+        if self._observer:
+            self._observer.scan_started([segment.id for segment in self._segments])
+        unregister = self._cancel.register(self._cancelled) if self._cancel else None
+        consumed_items = 0
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self._max_workers) as self._executor:
+            try:
+                with self._lock:
+                    for segment in self._segments:
+                        self._submit(segment)
+
+                while self._remaining:
+                    segment = self._get()
+                    if isinstance(segment, Exception):
+                        raise segment
+                    if self._stopped.is_set():
+                        # Cancelled
+                        return
+
+                    with self._lock:
+                        page, sizes, last = segment.fetched.popleft()
+
+                    truncated = False
+                    if self._max_items:
+                        items = page.get("Items", [])
+                        if consumed_items + len(items) > self._max_items:
+                            items = items[: self._max_items - consumed_items]
+                            page = {**page, "Items": items, "Count": len(items)}
+                            truncated = True
+                        consumed_items += len(items)
+
+                    yield (segment.id, page) if with_segments else page
+
+                    for limit, size in zip(self._buffer_limits, sizes):
+                        limit.release(size)
+
+                    # Remaining items of a truncated page have not been processed
+                    if self._on_consumed and not truncated:
+                        self._on_consumed(segment.id, page.get("LastEvaluatedKey"))
+                    if self._max_items and consumed_items >= self._max_items:
+                        return
+
+                    with self._lock:
+                        if last:
+                            self._remaining -= 1
+                        segment.buffered -= 1
+                        if segment.parked and segment.buffered <= self._prefetch:
+                            segment.parked = False
+                            self._submit(segment)
+                    if last and self._pending:
+                        self._start_next()
+            finally:
+                if unregister:
+                    unregister()
+                with self._lock:
+                    self._stopped.set()
+                self._executor.shutdown(cancel_futures=True)
+
+    def _cancelled(self):
+        """Stop the scan and wake up the consumer when the cancellation token is cancelled."""
+        with self._lock:
+            self._stopped.set()
+        with contextlib.suppress(queue.Full):
+            self._pages.put_nowait(None)
+
+    def _get(self):
+        """Get the next segment with a fetched page (or an exception) from the page buffer."""
+        if not self._observer:
+            return self._pages.get()
+        started = time.perf_counter()
+        value = self._pages.get()
+        self._observer.consumer_blocked(time.perf_counter() - started)
+        return value
+
+    def _start_next(self):
+        """Start the next pending segment (if any) in place of a finished one."""
+        segment = next(self._pending, None) if self._pending else None
+        if segment is None:
+            self._pending = None
+            return
+        with self._lock:
+            self._remaining += 1
+            self._submit(segment)
+
+    def _submit(self, segment: _Segment):
+        """Queue next request of given segment. Caller must hold the lock."""
+        if not self._stopped.is_set() and not self._enough_items():
+            started = "ExclusiveStartKey" in segment.args
+            heapq.heappush(self._ready, (not started, next(self._sequence), segment))
+            self._executor.submit(self._work)
+
+    def _enough_items(self) -> bool:
+        """Check if pages with max_items items have been fetched. Caller must hold the lock."""
+        return bool(self._max_items) and self._fetched_items >= self._max_items
+
+    def _work(self):
+        """Fetch the next page of the highest priority segment."""
+        with self._lock:
+            _, _, segment = heapq.heappop(self._ready)
+        if not self._stopped.is_set():
+            self._fetch(segment, segment.args)
+
+    def _fetch(self, segment: _Segment, args: dict):
+        """Fetch a single page of given segment and put it to the page buffer."""
+        try:
+            page = self._request(segment.id, args)
+        except Exception as exc:  # noqa: BLE001
+            self._put(exc)
+            return
+        self._received(segment, args, page)
+
+    def _received(self, segment: _Segment, args: dict, page: dict):
+        """Put a fetched page of given segment to the page buffer and schedule the next request."""
+        started = time.perf_counter() if self._observer else 0.0
+        sizes = [limit.measure(page) for limit in self._buffer_limits]
+        for limit, size in zip(self._buffer_limits, sizes):
+            if not limit.acquire(size, self._stopped):
+                return
+
+        split = False
+        with self._lock:
+            segment.buffered += 1
+            self._fetched_items += len(page.get("Items", []))
+            next_key = page.get("LastEvaluatedKey")
+            if next_key:
+                segment.args = {**args, "ExclusiveStartKey": next_key}
+                split = self._should_split(segment)
+                if split:
+                    # Count the segment as unfinished until it has been replaced by its halves
+                    self._remaining += 1
+                elif segment.buffered <= self._prefetch:
+                    self._submit(segment)
+                else:
+                    segment.parked = True
+            # The page is the last one of the segment if the scan ends or continues in its halves
+            segment.fetched.append((page, sizes, not next_key or split))
+
+        self._put(segment)
+        if self._observer:
+            self._observer.producer_blocked(segment.id, time.perf_counter() - started)
+        if split:
+            self._split(segment)
+
+    def _should_split(self, segment: _Segment) -> bool:
+        """Check if a running segment should be split. Caller must hold the lock."""
+        return (
+            not self._enough_items()
+            and segment.depth < self._max_split_depth
+            and self._remaining < self._max_workers
+            and segment.args.get("TotalSegments", 1) * 2 <= _MAX_TOTAL_SEGMENTS
+        )
+
+    def _split(self, segment: _Segment):
+        """Continue the scan of a segment in two segments of a segmentation with twice as many segments.
+
+        Segment s of n segments covers the same hash key range as segments 2s and 2s + 1 of
+        2n segments, and DynamoDB scans a segment in hash key order. DynamoDB only accepts the
+        ExclusiveStartKey reached in segment s for the half it belongs to. If the second half
+        accepts it, the first half has already been scanned completely. Otherwise the first
+        half continues from ExclusiveStartKey and the second half is scanned from the start.
+        """
+        args = segment.args
+        first = {**args, "TotalSegments": args.get("TotalSegments", 1) * 2, "Segment": args.get("Segment", 0) * 2}
+        second = {**first, "Segment": first["Segment"] + 1}
+        try:
+            page = self._request(segment.id, second)
+        except Exception as exc:  # noqa: BLE001
+            if not _is_invalid_start_key(exc):
+                self._put(exc)
+                return
+            second.pop("ExclusiveStartKey")
+            with self._lock:
+                # Two halves replace the segment
+                self._remaining += 1
+                for half in (first, second):
+                    self._submit(_Segment(segment.id, half, segment.depth + 1))
+            return
+        self._received(_Segment(segment.id, second, segment.depth + 1), second, page)
+
+    def _request(self, segment_id: int, args: dict):
+        """Make a single request, retrying if it is throttled."""
+        attempt = 0
+        while True:
+            if self._rate_limiter:
+                self._rate_limiter.acquire(self._stopped.wait)
+            # Waits end early when the scan is stopped, e.g. after another segment has failed
+            if not self._concurrency.acquire(self._stopped):
+                raise _Stopped()
+            started = time.perf_counter() if self._observer else 0.0
+            try:
+                page = self._call(**args)
+            except Exception as exc:
+                throttled = throttling.is_throttling_error(exc)
+                self._concurrency.release(throttled)
+                if not throttled or attempt >= self._max_retries:
+                    raise
+                if self._observer:
+                    self._observer.request_retried(segment_id, exc)
+                if self._stopped.wait(throttling.backoff_delay(attempt)):
+                    raise
+                attempt += 1
+                continue
+
+            self._concurrency.release(False)
+            if self._observer:
+                self._observer.request_completed(segment_id, time.perf_counter() - started, page)
+            if self._rate_limiter:
+                self._rate_limiter.consume(throttling.consumed_capacity(page))
+            return page
+
+    def _put(self, value):
+        """Put value to the page buffer unless the consumer has stopped."""
+        while not self._stopped.is_set():
+            try:
+                self._pages.put(value, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+
+def _client_list(client: DynamoDBClient | typing.Sequence[DynamoDBClient]) -> list:
+    """Get the clients given to a paginator as a list."""
+    clients_ = list(client) if isinstance(client, typing.Sequence) else [client]
+    if not clients_:
+        raise ValueError("at least one client is required")
+    return clients_
+
+
+def _create_call(
+    methods: list[typing.Callable[..., typing.Any]],
+    shard: typing.Callable[[dict], int],
+    deserialize: str | None,
+    transform_page: typing.Callable[[dict], dict] | None = None,
+) -> typing.Callable[..., typing.Any]:
+    """Create function that calls an API method of one of the clients and converts the response.
+
+    Args:
+        methods: Bound API methods of the clients (e.g. client.scan).
+        shard: Function that gets the number of the client to use from the request arguments.
+        deserialize: Number type to convert Items of the responses to native types with (or None).
+        transform_page: Function to apply to the (converted) responses.
+    """
+    call = methods[0]
+    if len(methods) > 1:
+
+        def call(**args):
+            return methods[shard(args) % len(methods)](**args)
+
+    if deserialize:
+        convert_page = convert.page_converter(deserialize)
+        request = call
+
+        def call(**args):
+            return convert_page(request(**args))
+
+    if transform_page:
+        untransformed = call
+
+        def call(**args):
+            return transform_page(untransformed(**args))
+
+    return call
+
+
+def _create_buffer_limits(max_buffered_items: int, max_buffered_bytes: int) -> list[_BufferLimit]:
+    """Create buffer limits for the max_buffered_items and max_buffered_bytes options."""
+    if max_buffered_items < 0 or max_buffered_bytes < 0:
+        raise ValueError("max_buffered_items and max_buffered_bytes must be non-negative")
+    return [
+        _BufferLimit(limit, measure)
+        for limit, measure in (
+            (max_buffered_items, lambda page: len(page.get("Items", []))),
+            (max_buffered_bytes, _page_bytes),
+        )
+        if limit
+    ]
+
+
+def _iter_items(pages: typing.Iterable[dict], batch_size: int | None):
+    """Yield the items of pages, or lists of batch_size items."""
+    if batch_size is None:
+        for page in pages:
+            yield from page.get("Items", [])
+        return
+
+    batch: list = []
+    for page in pages:
+        for item in page.get("Items", []):
+            batch.append(item)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def _segment_pages(
+    pages: typing.Generator[tuple[int, dict], None, None], with_segments: bool, cancel: CancellationToken | None
+) -> typing.Iterator:
+    """Yield (segment, page) tuples as pages or tuples, closing the generator of tuples when done."""
+    with contextlib.closing(pages):
+        for segment, page in pages:
+            if cancel and cancel.cancelled:
+                return
+            yield (segment, page) if with_segments else page
+
+
 class Paginator:  # pylint: disable=too-few-public-methods
     """Paginator that implements DynamoDB parallel scan.
 
@@ -26,15 +601,44 @@ class Paginator:  # pylint: disable=too-few-public-methods
     parallel.
     """
 
-    def __init__(self, client: DynamoDBClient):
+    def __init__(self, client: DynamoDBClient | typing.Sequence[DynamoDBClient]):
         """Create paginator for DynamoDB parallel scan.
 
         Args:
-            client: DynamoDB client to use for Scan API calls.
+            client: DynamoDB client to use for Scan API calls, or a list of clients to shard the
+                segments between (segment s uses client s % len(client)). Sharding spreads the
+                connections of a scan with many threads over several connection pools (see
+                clients.create_clients()).
         """
-        self._client = client
+        self._clients = _client_list(client)
 
-    def paginate(self, **kwargs):
+    def paginate(
+        self,
+        *,
+        prefetch: int = 0,
+        max_buffered_pages: int = 0,
+        max_buffered_items: int = 0,
+        max_buffered_bytes: int = 0,
+        max_workers: int | None = None,
+        max_retries: int = 10,
+        max_read_capacity: float | None = None,
+        checkpoint_store: checkpoint.CheckpointStore | None = None,
+        checkpoint_interval: float = 5.0,
+        resume_from: dict | None = None,
+        segments: typing.Iterable[int] | None = None,
+        deserialize: str | None = None,
+        observer: metrics.ScanObserver | None = None,
+        max_split_depth: int = 0,
+        max_items: int = 0,
+        cancel: CancellationToken | None = None,
+        with_segments: bool = False,
+        cache: cache.ScanCache | None = None,
+        table_estimate: sizing.TableEstimate | None = None,
+        order: str | None = None,
+        max_reorder_bytes: int = 64 << 20,
+        transform_page: typing.Callable[[dict], dict] | None = None,
+        **kwargs,
+    ):  # pylint: disable=too-many-arguments,too-many-locals
         # pylint: disable=line-too-long
         """Creates a generator that yields DynamoDB Scan API responses.
 
@@ -42,85 +646,417 @@ class Paginator:  # pylint: disable=too-few-public-methods
         are passed to DynamoDB.Client.scan() as-is.
 
         paginate() uses the value of TotalSegments argument as parallelism level. Each segment
-        is scanned in parallel in a separate thread.
+        is scanned in parallel in a separate thread unless the number of threads is limited with
+        max_workers. With TotalSegments="auto", the number of segments is chosen from the size
+        of the table given by DescribeTable and max_workers (see sizing module).
 
         paginate() yields DynamoDB Scan API responses boto3 DynamoDB.Paginator.Scan.paginate()
         method.
 
         See boto3 DynamoDB.Client.scan documentation (https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/dynamodb.html#DynamoDB.Client.scan)
         for details on supported arguments and the response format.
+
+        Args:
+            prefetch: Number of pages to fetch ahead of the consumer in each segment. With the
+                default of 0, the next page of a segment is requested after the consumer has
+                processed the current page. With prefetch > 0, the next page is requested as
+                soon as the previous page has been received which overlaps network round trips
+                with the processing of earlier pages.
+            max_buffered_pages: Maximum number of fetched pages to hold in memory across all
+                segments (0 = no limit other than the prefetch depth). Scan threads block when
+                the buffer is full.
+            max_buffered_items: Maximum number of items in fetched pages to hold in memory across
+                all segments (0 = no limit). Scan threads block when the limit would be exceeded.
+                A page is always accepted when nothing else is buffered.
+            max_buffered_bytes: Like max_buffered_items but limits the size of the buffered
+                responses in bytes (Content-Length of the responses). Memory use is bounded by the
+                limit plus the pages of requests in flight (at most max_workers pages).
+            max_workers: Maximum number of threads to scan segments with (default: TotalSegments).
+                If there are more segments than workers, segments that have already been started
+                are continued before new segments are started.
+            max_retries: Maximum number of times to retry a throttled Scan request. Retries use
+                exponential backoff with jitter, and the number of concurrent requests is reduced
+                while requests are being throttled. Retries are made on top of the retries the
+                boto3 client does on its own.
+            max_read_capacity: Maximum number of read capacity units to consume per second
+                (default: no limit). Consumed capacity is requested with
+                ReturnConsumedCapacity=TOTAL unless the request already asks for it.
+            checkpoint_store: Store to save scan progress to. Progress of a segment is recorded
+                after the consumer has processed a page of the segment and saved in the
+                background at most once per checkpoint_interval, and when the scan ends.
+            checkpoint_interval: Minimum interval between checkpoint saves in seconds.
+            resume_from: Checkpoint to resume the scan from (see CheckpointStore.load()). Segments
+                that were completed are skipped and the rest continue from the last processed
+                page. Pages that were yielded but not fully processed are scanned again.
+            segments: Segments to scan (default: all segments from 0 to TotalSegments - 1). Can be
+                used to split a scan between multiple processes or hosts.
+            deserialize: Convert Items of the responses of a low-level client to native Python
+                types in the scan threads, converting numbers to the given type: "decimal", "int"
+                (int for integers, float otherwise), "float" or "str" (see convert module). Faster
+                alternative to the document client. Scan arguments and LastEvaluatedKey keep
+                DynamoDB types.
+            observer: Observer to report scan events to, such as metrics.ScanMetrics (see metrics
+                module).
+            max_split_depth: Maximum number of times to split a straggling segment (default: 0 =
+                never). When fewer segments than max_workers are still running, each page of a
+                running segment continues the segment in two segments of twice the TotalSegments
+                so that idle workers can help with skewed or large segments. Cannot be used with
+                checkpoint_store or resume_from. Experimental: splitting relies on DynamoDB
+                behavior that is not documented, namely that segment s of n covers the same items
+                as segments 2s and 2s + 1 of 2n, that a segment is scanned in hash key order and
+                that an ExclusiveStartKey of another segment is rejected with a ValidationException
+                about the start key and the segment. If DynamoDB changes this behavior, items may
+                be missed or returned twice.
+            max_items: Maximum number of items to return in total (default: 0 = no limit). The
+                scan stops making requests as soon as enough items have been fetched and the
+                page that reaches the limit is truncated to it. Unlike Limit, which sets the
+                number of items DynamoDB evaluates per request, this limits the whole scan.
+            cancel: Token to stop the scan from another thread (see CancellationToken). The
+                generator returns once requests in flight have completed.
+            with_segments: Yield (segment, page) tuples instead of pages. Pages of a split
+                segment have the number of the original segment.
+            cache: Cache to replay the pages of an identical earlier scan from, and to store the
+                pages of this scan to when it completes (see cache.ScanCache). The table is
+                described with DescribeTable to detect changes. Pages replayed from the cache
+                have no ResponseMetadata and are not reported to observer. Cannot be used with
+                max_items, checkpoint_store, resume_from or transform_page.
+            table_estimate: Size of the table to choose TotalSegments="auto" with if it is larger
+                than the size given by DescribeTable, e.g. from sizing.probe_table().
+            order: Yield pages in a deterministic order instead of completion order: "segment"
+                (all pages of each segment in segment order) or "round-robin" (the n-th page of
+                each segment before the (n + 1)-th pages). Segments are still scanned in parallel
+                and pages that arrive early wait in a reorder buffer (see ordering module).
+                Cannot be used with max_items, max_split_depth, checkpoint_store or resume_from.
+            max_reorder_bytes: Maximum size of the pages of the reorder buffer held in memory
+                (default: 64 MiB). Further pages are written to a temporary file.
+            transform_page: Function to apply to each response in the scan threads (after
+                deserialize) before it is buffered for the consumer, e.g. to reduce the items of
+                a page to partial aggregates (see aggregate module). The returned page must keep
+                LastEvaluatedKey.
+            **kwargs: Arguments for DynamoDB.Client.scan().
         """
         # pylint: enable=line-too-long
-        segments = kwargs.get("TotalSegments") or 1
-        with concurrent.futures.ThreadPoolExecutor(max_workers=segments) as executor:
-            # Prepare Scan arguments for each segment of the parallel scan.
-            tasks = ({**kwargs, "TotalSegments": segments, "Segment": i} for i in range(segments))
-
-            # Submit scan operation for each segment
-            futures = {executor.submit(self._client.scan, **t): t for t in tasks}
-
-            while futures:
-                # Collect results
-                done, _ = concurrent.futures.wait(futures, return_when=concurrent.futures.FIRST_COMPLETED)
-
-                for future in done:
-                    # Get the result and the scan args for the completed operation
-                    task = futures.pop(future)
-                    page = future.result()
-                    yield page
-
-                    next_key = page.get("LastEvaluatedKey")
-                    if next_key:
-                        # Still more items in this segment. Submit another scan operation for this
-                        # segment that continues where the last one left off.
-                        futures[
-                            executor.submit(
-                                self._client.scan,
-                                **{**task, "ExclusiveStartKey": next_key},
-                            )
-                        ] = task
-
-
-def get_paginator(client: DynamoDBClient):
+        _common.validate_options(
+            prefetch=prefetch, max_buffered_pages=max_buffered_pages, max_workers=max_workers, max_retries=max_retries
+        )
+        # segments may be an iterator, so it is only consumed once
+        segments = sorted(set(segments)) if segments is not None else None
+        if kwargs.get("TotalSegments") == "auto":
+            if segments is not None:
+                raise ValueError('segments cannot be used with TotalSegments="auto"')
+            if resume_from:
+                kwargs["TotalSegments"] = resume_from.get("TotalSegments")
+            else:
+                kwargs["TotalSegments"], reason = sizing.auto_total_segments(
+                    self._clients[0], kwargs, max_workers=max_workers, estimate=table_estimate
+                )
+                if observer:
+                    observer.total_segments_chosen(reason)
+        if order is not None:
+            if order not in ordering.ORDERS:
+                raise ValueError(f"order must be one of {', '.join(ordering.ORDERS)}")
+            if max_items or max_split_depth or checkpoint_store or resume_from:
+                raise ValueError(
+                    "order cannot be used with max_items, max_split_depth, checkpoint_store or resume_from"
+                )
+        if cache is not None:
+            if max_items or checkpoint_store or resume_from or transform_page:
+                raise ValueError("cache cannot be used with max_items, checkpoint_store, resume_from or transform_page")
+            cache_key = cache.key(
+                {
+                    "Scan": kwargs,
+                    "Segments": segments,
+                    "Deserialize": deserialize,
+                    "Order": order,
+                    "Table": cache.table_metadata(self._clients[0], kwargs["TableName"]),
+                }
+            )
+            cached = cache.get(cache_key)
+            if cached is not None:
+                yield from _segment_pages(cached, with_segments, cancel)
+                return
+        buffer_limits = _create_buffer_limits(max_buffered_items, max_buffered_bytes)
+        if max_items < 0:
+            raise ValueError("max_items must be non-negative")
+        if max_split_depth < 0:
+            raise ValueError("max_split_depth must be non-negative")
+        if max_split_depth and (checkpoint_store or resume_from):
+            raise ValueError("max_split_depth cannot be used with checkpoint_store or resume_from")
+        rate_limiter = _common.create_rate_limiter(max_read_capacity, kwargs)
+        tasks = [_Segment(i, args) for i, args in _common.plan_segments(kwargs, resume_from, segments)]
+        writer = _common.create_checkpoint_writer(checkpoint_store, checkpoint_interval, kwargs, resume_from, segments)
+
+        runner = _ParallelRunner(
+            _create_call(
+                [client.scan for client in self._clients], operator.itemgetter("Segment"), deserialize, transform_page
+            ),
+            tasks,
+            prefetch=prefetch,
+            max_buffered_pages=max_buffered_pages,
+            max_workers=max_workers or kwargs.get("TotalSegments") or 1,
+            max_retries=max_retries,
+            rate_limiter=rate_limiter,
+            buffer_limits=buffer_limits,
+            on_consumed=writer.update if writer else None,
+            observer=observer,
+            max_split_depth=max_split_depth,
+            max_items=max_items,
+            cancel=cancel,
+        )
+        with writer or contextlib.nullcontext():
+            if cache is None and order is None:
+                yield from runner.pages(with_segments)
+                return
+            pages = runner.pages(with_segments=True)
+            if order is not None:
+                buffer = ordering.ReorderBuffer(
+                    [task.id for task in tasks], order, max_memory_bytes=max_reorder_bytes, measure=_page_bytes
+                )
+                pages = ordering.ordered_pages(pages, buffer)
+            if cache is not None:
+                pages = cache.put(cache_key, pages, complete=lambda: not (cancel and cancel.cancelled))
+            yield from _segment_pages(pages, with_segments, None)
+
+    def paginate_items(self, *, batch_size: int | None = None, **kwargs):
+        """Creates a generator that yields the items returned by a parallel scan.
+
+        Accepts the same arguments as paginate(). Use max_buffered_items or max_buffered_bytes
+        to bound the memory used by pages waiting for a slow consumer. A page is recorded as
+        processed in checkpoints after all of its items have been yielded.
+
+        Args:
+            batch_size: Yield lists of batch_size items (the last one may be shorter) instead of
+                single items, e.g. for bulk writes. Cannot be used with checkpoint_store since
+                items of a page recorded as processed could still wait in an incomplete batch.
+            **kwargs: Arguments for paginate().
+
+        Example:
+            for item in paginator.paginate_items(TableName="mytable", TotalSegments=8, max_buffered_items=10000):
+                process(item)
+        """
+        if batch_size is not None:
+            if batch_size < 1:
+                raise ValueError("batch_size must be positive")
+            if kwargs.get("checkpoint_store"):
+                raise ValueError("batch_size cannot be used with checkpoint_store")
+        yield from _iter_items(self.paginate(**kwargs), batch_size)
+
+
+# Default number of threads of QueryPaginator
+DEFAULT_QUERY_WORKERS = 32
+
+
+def _query_args(kwargs: dict, query: dict) -> dict:
+    """Get Query arguments of a query, merging expression attributes with the common arguments."""
+    args = {**kwargs, **query}
+    for key in ("ExpressionAttributeNames", "ExpressionAttributeValues"):
+        if key in kwargs and key in query:
+            args[key] = {**kwargs[key], **query[key]}
+    return args
+
+
+class QueryPaginator:  # pylint: disable=too-few-public-methods
+    """Paginator that runs many DynamoDB queries in parallel.
+
+    Companion of Paginator for reading the items of many partition keys without
+    scanning the whole table. Each query is paginated like a segment of a
+    parallel scan, with the same scheduling, buffering and throttling.
+    """
+
+    def __init__(self, client: DynamoDBClient | typing.Sequence[DynamoDBClient]):
+        """Create paginator for parallel queries.
+
+        Args:
+            client: DynamoDB client to use for Query API calls, or a list of clients to spread the
+                requests between round-robin.
+        """
+        self._clients = _client_list(client)
+
+    def paginate(
+        self,
+        queries: typing.Iterable[dict],
+        *,
+        prefetch: int = 0,
+        max_buffered_pages: int = 0,
+        max_buffered_items: int = 0,
+        max_buffered_bytes: int = 0,
+        max_workers: int | None = None,
+        max_retries: int = 10,
+        max_read_capacity: float | None = None,
+        deserialize: str | None = None,
+        observer: metrics.ScanObserver | None = None,
+        max_items: int = 0,
+        cancel: CancellationToken | None = None,
+        **kwargs,
+    ):  # pylint: disable=too-many-arguments,too-many-locals
+        """Creates a generator that yields DynamoDB Query API responses of many queries.
+
+        Pages of each query are yielded in order, pages of different queries in completion
+        order. Observer events refer to queries by their index in queries. queries is read
+        lazily: about max_workers queries are in progress at a time, so the queries can be
+        generated from a large stream of keys.
+
+        Args:
+            queries: Query arguments of each query, typically KeyConditionExpression and
+                ExpressionAttributeValues (see partition_key_queries()). Merged on top of kwargs;
+                ExpressionAttributeNames and ExpressionAttributeValues are merged key by key.
+            prefetch: Number of pages to fetch ahead of the consumer in each query.
+            max_buffered_pages: See Paginator.paginate().
+            max_buffered_items: See Paginator.paginate().
+            max_buffered_bytes: See Paginator.paginate().
+            max_workers: Maximum number of concurrent queries (default: 32).
+            max_retries: See Paginator.paginate().
+            max_read_capacity: See Paginator.paginate().
+            deserialize: See Paginator.paginate().
+            observer: Observer to report query events to (see metrics module).
+            max_items: Maximum number of items to return in total (default: 0 = no limit).
+            cancel: Token to stop the queries from another thread (see CancellationToken).
+            **kwargs: Arguments common to all queries for DynamoDB.Client.query(), such as TableName.
+
+        Example:
+            queries = partition_key_queries("pk", ({"S": key} for key in keys))
+            for page in paginator.paginate(queries, TableName="mytable", max_workers=64):
+                ...
+        """
+        _common.validate_options(
+            prefetch=prefetch, max_buffered_pages=max_buffered_pages, max_workers=max_workers, max_retries=max_retries
+        )
+        buffer_limits = _create_buffer_limits(max_buffered_items, max_buffered_bytes)
+        if max_items < 0:
+            raise ValueError("max_items must be non-negative")
+        rate_limiter = _common.create_rate_limiter(max_read_capacity, kwargs)
+        tasks = (_Segment(i, _query_args(kwargs, query)) for i, query in enumerate(queries))
+
+        requests = itertools.count()
+        runner = _ParallelRunner(
+            _create_call([client.query for client in self._clients], lambda args: next(requests), deserialize),
+            tasks,
+            lazy=True,
+            prefetch=prefetch,
+            max_buffered_pages=max_buffered_pages,
+            max_workers=max_workers or DEFAULT_QUERY_WORKERS,
+            max_retries=max_retries,
+            rate_limiter=rate_limiter,
+            buffer_limits=buffer_limits,
+            observer=observer,
+            max_items=max_items,
+            cancel=cancel,
+        )
+        yield from runner.pages()
+
+    def paginate_items(self, queries: typing.Iterable[dict], *, batch_size: int | None = None, **kwargs):
+        """Creates a generator that yields the items returned by parallel queries.
+
+        Args:
+            queries: Query arguments of each query (see paginate()).
+            batch_size: Yield lists of batch_size items (the last one may be shorter) instead of
+                single items.
+            **kwargs: Arguments for paginate().
+        """
+        if batch_size is not None and batch_size < 1:
+            raise ValueError("batch_size must be positive")
+        yield from _iter_items(self.paginate(queries, **kwargs), batch_size)
+
+
+def partition_key_queries(attribute: str, values: typing.Iterable[typing.Any]) -> typing.Iterator[dict]:
+    """Create queries for all items of given partition keys.
+
+    Args:
+        attribute: Name of the partition key attribute.
+        values: Partition key values (with DynamoDB types for low-level clients, e.g. {"S": "a"}).
+
+    Returns: Iterator of Query arguments for QueryPaginator.paginate().
+    """
+    for value in values:
+        yield {
+            "KeyConditionExpression": "#pk = :pk",
+            "ExpressionAttributeNames": {"#pk": attribute},
+            "ExpressionAttributeValues": {":pk": value},
+        }
+
+
+def get_paginator(client: DynamoDBClient | typing.Sequence[DynamoDBClient]):
     """Create paginator for DynamoDB parallel scan.
 
     Args:
-        client: DynamoDB client to use for Scan API calls.
+        client: DynamoDB client to use for Scan API calls, or a list of clients to shard the
+            segments between.
 
     Returns: Paginator object.
     """
     return Paginator(client)
 
 
-def cli():
-    """Entrypoint for CLI tool."""
+def get_query_paginator(client: DynamoDBClient | typing.Sequence[DynamoDBClient]):
+    """Create paginator for parallel queries.
 
-    def json_value(value: str):
-        return json.loads(value)
+    Args:
+        client: DynamoDB client to use for Query API calls, or a list of clients.
 
-    class DecimalEncoder(json.JSONEncoder):
-        """JSON encoder for DynamoDB Decimal types."""
+    Returns: QueryPaginator object.
+    """
+    return QueryPaginator(client)
 
-        def default(self, o):
-            if isinstance(o, decimal.Decimal):
-                if abs(o) % 1 > 0:
-                    return float(o)
-                return int(o)
-            return super().default(o)  # pragma: nocover
 
-    parser = argparse.ArgumentParser(
-        formatter_class=argparse.RawDescriptionHelpFormatter,
-        description=textwrap.dedent(
-            """
-            Perform a parallel scan of DynamoDB table.
+def get_batch_loader(client: DynamoDBClient | typing.Sequence[DynamoDBClient]):
+    """Create loader that gets items by key with parallel BatchGetItem requests.
 
-            Command line arguments map one-to-one to DynamoDB Scan request arguments. See
-            https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/dynamodb.html#DynamoDB.Client.scan
-            for reference.
-            """
-        ),
-        epilog="Results are written to stdout as JSON objects (one per line).",
-    )
+    Args:
+        client: DynamoDB client to use for BatchGetItem API calls, or a list of clients.
+
+    Returns: BatchLoader object.
+    """
+    return BatchLoader(client)
+
+
+def get_batch_writer(client: DynamoDBClient | typing.Sequence[DynamoDBClient]):
+    """Create writer that puts items to a table with parallel BatchWriteItem requests.
+
+    Args:
+        client: DynamoDB client to use for BatchWriteItem API calls, or a list of clients.
+
+    Returns: BatchWriter object.
+    """
+    return BatchWriter(client)
+
+
+def iter_items(client: DynamoDBClient, **kwargs):
+    """Scan a table in parallel and iterate over the returned items.
+
+    Args:
+        client: DynamoDB client to use for Scan API calls.
+        **kwargs: Arguments for Paginator.paginate_items().
+
+    Returns: Generator that yields items (or lists of items with batch_size).
+    """
+    return Paginator(client).paginate_items(**kwargs)
+
+
+def _json_value(value: str):
+    return json.loads(value)
+
+
+def _total_segments(value: str) -> int | str:
+    return value if value == "auto" else int(value)
+
+
+def _resolve_total_segments(
+    args: dict, max_workers: int | None, *, probe: bool = False, resume_from: dict | None = None, verbose: bool = False
+) -> int:
+    """Choose the number of segments for --total-segments auto."""
+    if resume_from:
+        return resume_from["TotalSegments"]
+    scan_args = {k: v for k, v in args.items() if v is not None}
+    client = clients.create_client(1)
+    estimate = sizing.probe_table(client, scan_args) if probe else None
+    total_segments, reason = sizing.auto_total_segments(client, scan_args, max_workers=max_workers, estimate=estimate)
+    if verbose:
+        print(sizing.format_reason(reason), file=sys.stderr, flush=True)
+    return total_segments
+
+
+def _add_scan_arguments(parser: argparse.ArgumentParser):
+    """Add the Scan request arguments shared by CLI commands."""
     parser.add_argument("--table-name", dest="TableName", metavar="<value>", required=True)
     parser.add_argument("--index-name", dest="IndexName", metavar="<value>")
     parser.add_argument("--limit", dest="Limit", metavar="<value>", type=int)
@@ -129,7 +1065,13 @@ def cli():
         dest="ReturnConsumedCapacity",
         metavar="<value>",
     )
-    parser.add_argument("--total-segments", dest="TotalSegments", metavar="<value>", type=int)
+    parser.add_argument(
+        "--total-segments",
+        dest="TotalSegments",
+        metavar="<value>",
+        type=_total_segments,
+        help="Number of segments, or auto to choose it from the size of the table and --max-workers",
+    )
     parser.add_argument(
         "--projection-expression",
         dest="ProjectionExpression",
@@ -141,41 +1083,838 @@ def cli():
         "--expression-attribute-names",
         dest="ExpressionAttributeNames",
         metavar="<value>",
-        type=json_value,
+        type=_json_value,
         help="""ExpressionAttributeNames as JSON string (e.g. {"#P":"Percentile"})""",
     )
     parser.add_argument(
         "--expression-attribute-values",
         dest="ExpressionAttributeValues",
         metavar="<value>",
-        type=json_value,
+        type=_json_value,
         help="""ExpressionAttributeValues as JSON string (e.g. {":variable": {"S": "sample"}})""",
     )
 
+
+def _add_output_arguments(parser: argparse.ArgumentParser, response: str):
+    """Add the type conversion and JSON output arguments shared by CLI commands."""
     parser.add_argument(
         "--use-document-client",
         action="store_true",
         help="Use a document client that converts DynamoDB types to native types automatically.",
     )
+    parser.add_argument(
+        "--deserialize",
+        choices=convert.NUMBER_TYPES,
+        help="Convert DynamoDB types to native types without the document client, "
+        "converting numbers to this type (int = int for integers, float otherwise)",
+    )
     parser.add_argument(
         "--output-items",
         action="store_true",
-        help="Output returned items, not full Scan API responses",
+        help=f"Output returned items, not full {response}",
+    )
+    parser.add_argument(
+        "--json-encoder",
+        choices=output.JSON_ENCODERS,
+        default="json",
+        help="JSON encoder to use (default: json). orjson is faster, but its output has no spaces "
+        "after separators and does not escape non-ASCII characters",
+    )
+
+
+def _batch_get_cli(argv: list[str]):
+    """Entrypoint for the get command of the CLI tool."""
+    parser = argparse.ArgumentParser(
+        prog="aws-dynamodb-parallel-scan get",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description=textwrap.dedent(
+            """
+            Get items of DynamoDB table by key with parallel BatchGetItem requests.
+
+            Keys are read as JSON objects (one per line) with DynamoDB types, e.g.
+            {"pk": {"S": "a"}}, or with native types with --use-document-client.
+            """
+        ),
+        epilog="Results are written to stdout as JSON objects (one per line), one response per batch of keys.",
+    )
+    parser.add_argument("--table-name", dest="TableName", metavar="<value>", required=True)
+    parser.add_argument(
+        "--keys-file",
+        metavar="<path>",
+        default="-",
+        help="File to read keys from (default: - = stdin)",
+    )
+    parser.add_argument("--projection-expression", dest="ProjectionExpression", metavar="<value>")
+    parser.add_argument("--consistent-read", dest="ConsistentRead", action="store_true", default=None)
+    parser.add_argument(
+        "--expression-attribute-names",
+        dest="ExpressionAttributeNames",
+        metavar="<value>",
+        type=_json_value,
+        help="""ExpressionAttributeNames as JSON string (e.g. {"#P":"Percentile"})""",
+    )
+    parser.add_argument("--return-consumed-capacity", dest="ReturnConsumedCapacity", metavar="<value>")
+    _add_output_arguments(parser, "BatchGetItem responses")
+    parser.add_argument(
+        "--batch-size",
+        metavar="<value>",
+        type=int,
+        default=batch.MAX_BATCH_KEYS,
+        help=f"Number of keys per BatchGetItem request (default: {batch.MAX_BATCH_KEYS})",
+    )
+    parser.add_argument(
+        "--max-workers",
+        metavar="<value>",
+        type=int,
+        default=8,
+        help="Maximum number of concurrent requests (default: 8)",
+    )
+    parser.add_argument(
+        "--max-retries",
+        metavar="<value>",
+        type=int,
+        default=10,
+        help="Maximum number of times to retry throttled requests and unprocessed keys (default: 10)",
+    )
+    parser.add_argument(
+        "--max-read-capacity",
+        metavar="<value>",
+        type=float,
+        help="Maximum number of read capacity units to consume per second (default: no limit)",
+    )
+    parser.add_argument(
+        "--clients",
+        metavar="<value>",
+        type=int,
+        default=1,
+        help="Number of DynamoDB clients to spread requests between (default: 1)",
+    )
+    args = vars(parser.parse_args(argv))
+
+    output_items = args.pop("output_items")
+    json_encoder = args.pop("json_encoder")
+    use_document_client = args.pop("use_document_client")
+    deserialize = args.pop("deserialize")
+    keys_file = args.pop("keys_file")
+    num_clients = args.pop("clients")
+    options = {k: args.pop(k) for k in ("batch_size", "max_workers", "max_retries", "max_read_capacity")}
+    if deserialize and use_document_client:
+        parser.error("--deserialize cannot be used with --use-document-client")
+    if num_clients < 1:
+        parser.error("--clients must be positive")
+    request_args = {k: v for k, v in args.items() if v is not None}
+
+    loader = get_batch_loader(clients.create_clients(num_clients, options["max_workers"], document=use_document_client))
+    parse_float = decimal.Decimal if use_document_client else float
+    with open(keys_file, encoding="utf-8") if keys_file != "-" else contextlib.nullcontext(sys.stdin) as f:
+        keys = (json.loads(line, parse_float=parse_float) for line in f if line.strip())
+        writer = output.JSONLinesWriter(sys.stdout.buffer, output_items, json_encoder)
+        try:
+            for page in loader.load(keys, deserialize=deserialize, **options, **request_args):
+                writer.write_page(page)
+        except ValueError as exc:
+            parser.error(str(exc))
+        writer.flush()
+
+
+def _load_function(spec: str) -> typing.Callable:
+    """Load function given as module:function or path/to/file.py:function."""
+    module_name, _, function_name = spec.rpartition(":")
+    if not module_name or not function_name:
+        raise ValueError(f"invalid function {spec!r}, expected module:function or file.py:function")
+    if module_name.endswith(".py"):
+        module_spec = importlib.util.spec_from_file_location(pathlib.Path(module_name).stem, module_name)
+        if module_spec is None or module_spec.loader is None:
+            raise ValueError(f"cannot load {module_name}")
+        module = importlib.util.module_from_spec(module_spec)
+        module_spec.loader.exec_module(module)
+    else:
+        module = importlib.import_module(module_name)
+    return getattr(module, function_name)
+
+
+def _copy_cli(argv: list[str]):  # pylint: disable=too-many-locals
+    """Entrypoint for the copy command of the CLI tool."""
+    parser = argparse.ArgumentParser(
+        prog="aws-dynamodb-parallel-scan copy",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description=textwrap.dedent(
+            """
+            Copy items of DynamoDB table to another table with a parallel scan and parallel
+            BatchWriteItem requests.
+
+            Scan arguments map one-to-one to DynamoDB Scan request arguments of the source table.
+            """
+        ),
+        epilog="Numbers of items read and written are written to stdout as a JSON object when done.",
+    )
+    _add_scan_arguments(parser)
+    parser.add_argument("--target-table-name", metavar="<value>", required=True)
+    parser.add_argument(
+        "--target-region",
+        metavar="<value>",
+        help="AWS region of the target table (default: region of the source table)",
+    )
+    parser.add_argument(
+        "--use-document-client",
+        action="store_true",
+        help="Use document clients so that --transform gets and returns items with native types",
+    )
+    parser.add_argument(
+        "--transform",
+        metavar="<module:function>",
+        help="Function called for each item that returns the item to write or null to skip the item, "
+        "given as module:function or path/to/file.py:function",
+    )
+    parser.add_argument(
+        "--key-attributes",
+        metavar="<names>",
+        type=lambda value: value.split(","),
+        help="Comma separated key attribute names of the target table (e.g. pk,sk). Items with the same key "
+        "in a batch are written once, the last one winning, so --transform may map items to the same key",
+    )
+    parser.add_argument(
+        "--max-workers",
+        metavar="<value>",
+        type=int,
+        help="Maximum number of segments to scan concurrently (default: value of --total-segments)",
+    )
+    parser.add_argument(
+        "--write-workers",
+        metavar="<value>",
+        type=int,
+        default=8,
+        help="Maximum number of concurrent BatchWriteItem requests (default: 8)",
+    )
+    parser.add_argument(
+        "--max-retries",
+        metavar="<value>",
+        type=int,
+        default=10,
+        help="Maximum number of times to retry throttled requests and unprocessed items (default: 10)",
+    )
+    parser.add_argument(
+        "--max-read-capacity",
+        metavar="<value>",
+        type=float,
+        help="Maximum number of read capacity units to consume per second (default: no limit)",
+    )
+    parser.add_argument(
+        "--max-write-capacity",
+        metavar="<value>",
+        type=float,
+        help="Maximum number of write capacity units to consume per second (default: no limit)",
+    )
+    parser.add_argument(
+        "--clients",
+        metavar="<value>",
+        type=int,
+        default=1,
+        help="Number of DynamoDB clients to shard segments between (default: 1)",
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="Write a progress line with scan metrics to stderr periodically and when the copy ends",
+    )
+    parser.add_argument(
+        "--stats-interval",
+        metavar="<seconds>",
+        type=float,
+        default=5.0,
+        help="Interval between progress lines of --stats (default: 5)",
+    )
+    args = vars(parser.parse_args(argv))
+
+    target_table = args.pop("target_table_name")
+    target_region = args.pop("target_region")
+    use_document_client = args.pop("use_document_client")
+    transform_spec = args.pop("transform")
+    key_attributes = args.pop("key_attributes")
+    write_workers = args.pop("write_workers")
+    max_write_capacity = args.pop("max_write_capacity")
+    num_clients = args.pop("clients")
+    stats = args.pop("stats")
+    stats_interval = args.pop("stats_interval")
+    options = {k: args.pop(k) for k in ("max_workers", "max_retries", "max_read_capacity")}
+    if num_clients < 1:
+        parser.error("--clients must be positive")
+    if write_workers < 1:
+        parser.error("--write-workers must be positive")
+    if args["TotalSegments"] == "auto":
+        args["TotalSegments"] = _resolve_total_segments(args, options["max_workers"], verbose=stats)
+    transform = None
+    if transform_spec:
+        try:
+            transform = _load_function(transform_spec)
+        except (ImportError, OSError, AttributeError, ValueError) as exc:
+            parser.error(f"cannot load --transform {transform_spec}: {exc}")
+    reporter: typing.ContextManager = contextlib.nullcontext()
+    if stats:
+        scan_metrics = metrics.ScanMetrics()
+        options["observer"] = scan_metrics
+        reporter = metrics.ProgressReporter(scan_metrics, sys.stderr, stats_interval)
+    scan_args = {k: v for k, v in args.items() if v is not None}
+
+    source = clients.create_clients(
+        num_clients, options["max_workers"] or args["TotalSegments"] or 1, document=use_document_client
+    )
+    target_args = {"region_name": target_region} if target_region else {}
+    target = clients.create_client(write_workers, document=use_document_client, **target_args)
+    read = 0
+
+    def items():
+        nonlocal read
+        for item in get_paginator(source).paginate_items(**options, **scan_args):
+            read += 1
+            yield item
+
+    with reporter:
+        try:
+            result = get_batch_writer(target).write(
+                items(),
+                max_workers=write_workers,
+                max_retries=options["max_retries"],
+                max_write_capacity=max_write_capacity,
+                transform=transform,
+                key_attributes=key_attributes,
+                TableName=target_table,
+            )
+        except ValueError as exc:
+            parser.error(str(exc))
+    sys.stdout.write(json.dumps({"ItemsRead": read, "ItemsWritten": result["Count"]}) + "\n")
+
+
+def cli():
+    """Entrypoint for CLI tool."""
+    commands = {"get": _batch_get_cli, "copy": _copy_cli}
+    if sys.argv[1:2] and sys.argv[1] in commands:
+        commands[sys.argv[1]](sys.argv[2:])
+        return
+
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description=textwrap.dedent(
+            """
+            Perform a parallel scan of DynamoDB table.
+
+            Command line arguments map one-to-one to DynamoDB Scan request arguments. See
+            https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/dynamodb.html#DynamoDB.Client.scan
+            for reference.
+            """
+        ),
+        epilog="Results are written to stdout as JSON objects (one per line). "
+        "Use 'aws-dynamodb-parallel-scan get --help' for getting items by key and "
+        "'aws-dynamodb-parallel-scan copy --help' for copying a table.",
+    )
+    _add_scan_arguments(parser)
+    _add_output_arguments(parser, "Scan API responses")
+    parser.add_argument(
+        "--output-format",
+        choices=("jsonl", *columnar.OUTPUT_FORMATS),
+        default="jsonl",
+        help="Output format (default: jsonl = JSON lines to stdout). parquet and arrow write the items "
+        "to files given with --output-path and require pyarrow",
+    )
+    parser.add_argument(
+        "--output-path",
+        metavar="<prefix>",
+        help="Path prefix of Parquet and Arrow output files (<prefix>-00000.parquet, ...)",
+    )
+    parser.add_argument(
+        "--max-file-size",
+        metavar="<bytes>",
+        type=int,
+        default=256 << 20,
+        help="Start a new Parquet or Arrow output file when a file has grown to this size, or a new "
+        "--output-dir file when this many bytes of JSON lines have been written to it (default: 256 MiB)",
+    )
+    parser.add_argument(
+        "--output-dir",
+        metavar="<path>",
+        help="Write JSON lines to files in this directory instead of stdout, with a manifest.json "
+        "listing the files and their item counts",
+    )
+    parser.add_argument(
+        "--split",
+        choices=files.SPLITS,
+        help="Split --output-dir output into size-rotated files shared by all segments or into "
+        "files of each segment (default: size)",
+    )
+    parser.add_argument(
+        "--compression",
+        choices=files.COMPRESSIONS,
+        help="Compress --output-dir files in parallel threads (default: none). zstd requires zstandard",
+    )
+    parser.add_argument(
+        "--compression-level",
+        metavar="<value>",
+        type=int,
+        help="Compression level (default: 6 for gzip, 3 for zstd)",
+    )
+    parser.add_argument(
+        "--max-workers",
+        metavar="<value>",
+        type=int,
+        help="Maximum number of segments to scan concurrently (default: value of --total-segments)",
+    )
+    parser.add_argument(
+        "--max-retries",
+        metavar="<value>",
+        type=int,
+        default=10,
+        help="Maximum number of times to retry a throttled Scan request (default: 10)",
+    )
+    parser.add_argument(
+        "--max-read-capacity",
+        metavar="<value>",
+        type=float,
+        help="Maximum number of read capacity units to consume per second (default: no limit)",
+    )
+    parser.add_argument(
+        "--max-items",
+        metavar="<value>",
+        type=int,
+        help="Stop the scan after this many items in total (--limit sets the number of items per request)",
+    )
+    parser.add_argument(
+        "--clients",
+        metavar="<value>",
+        type=int,
+        default=1,
+        help="Number of DynamoDB clients to shard segments between (default: 1). Each client has a "
+        "connection pool sized for its share of --max-workers",
+    )
+    parser.add_argument(
+        "--max-split-depth",
+        metavar="<value>",
+        type=int,
+        default=0,
+        help="Split segments that are still running when workers become idle into smaller segments, "
+        "at most this many times per segment (default: 0 = never)",
+    )
+    parser.add_argument(
+        "--checkpoint-file",
+        metavar="<path>",
+        help="Save scan progress to this file and resume from it if the file exists",
+    )
+    parser.add_argument(
+        "--processes",
+        metavar="<value>",
+        type=int,
+        help="Divide segments between this many worker processes that scan and encode the results",
+    )
+    parser.add_argument(
+        "--segments",
+        metavar="<value>",
+        type=sharding.parse_segments,
+        help="Scan only these segments of --total-segments segments (e.g. 0-63,70)",
+    )
+    parser.add_argument(
+        "--worker-index",
+        metavar="<value>",
+        type=int,
+        help="Scan the share of segments of this worker (0 to --worker-count - 1)",
+    )
+    parser.add_argument(
+        "--worker-count",
+        metavar="<value>",
+        type=int,
+        help="Number of workers the segments are divided between",
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="Write a progress line with scan metrics to stderr periodically and when the scan ends",
+    )
+    parser.add_argument(
+        "--stats-interval",
+        metavar="<seconds>",
+        type=float,
+        default=5.0,
+        help="Interval between progress lines of --stats (default: 5)",
+    )
+    parser.add_argument(
+        "--manifest-file",
+        metavar="<path>",
+        help="Write the segments scanned by this command to this file when the scan completes",
+    )
+    parser.add_argument(
+        "--watermark-attribute",
+        metavar="<name>",
+        help="Only return items whose value of this attribute (e.g. a modification timestamp) is at least "
+        "the watermark saved to --watermark-file by the previous scan",
+    )
+    parser.add_argument(
+        "--watermark-file",
+        metavar="<path>",
+        help="File to load the watermark from and to save the time the scan started to",
+    )
+    parser.add_argument(
+        "--watermark-format",
+        choices=incremental.WATERMARK_FORMATS,
+        default="iso8601",
+        help="Format of the --watermark-attribute timestamps: seconds or milliseconds since the epoch or "
+        "UTC ISO 8601 strings with or without fractional seconds (default: iso8601)",
+    )
+    parser.add_argument(
+        "--watermark-lookback",
+        metavar="<seconds>",
+        type=float,
+        default=0.0,
+        help="Subtract this from the time saved to --watermark-file, to allow for writers whose clocks "
+        "are behind (default: 0)",
+    )
+    parser.add_argument(
+        "--digest-index",
+        metavar="<path>",
+        help="Compare the items with this SQLite index of item digests from the previous scan and output "
+        "only inserted, modified and removed items as change records",
+    )
+    parser.add_argument(
+        "--key-attributes",
+        metavar="<names>",
+        type=lambda value: value.split(","),
+        help="Comma separated key attribute names of the table for --digest-index (e.g. pk,sk)",
+    )
+    parser.add_argument(
+        "--order",
+        choices=ordering.ORDERS,
+        help="Write pages in a deterministic order: all pages of each segment in segment order, or the "
+        "n-th page of each segment in turn (default: the order in which pages are fetched)",
+    )
+    parser.add_argument(
+        "--max-reorder-bytes",
+        metavar="<bytes>",
+        type=int,
+        help="Maximum size of the pages waiting for their turn in memory with --order; further pages are "
+        "written to a temporary file (default: 64 MiB)",
+    )
+    parser.add_argument(
+        "--probe",
+        action="store_true",
+        help="With --total-segments auto, also estimate the size of the table with a few Select=COUNT "
+        "requests (for new tables and tables that have grown since DescribeTable was updated)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        metavar="<path>",
+        help="Replay the results of an identical earlier scan from this directory, and store the results "
+        "of the scan to it",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        metavar="<seconds>",
+        type=float,
+        help="Number of seconds to use stored results for (default: 3600)",
+    )
+    parser.add_argument(
+        "--cache-max-size",
+        metavar="<bytes>",
+        type=int,
+        help="Maximum size of --cache-dir; least recently used results are removed (default: 1 GiB)",
+    )
+    parser.add_argument(
+        "--count",
+        action="store_true",
+        help="Output the number of items instead of the items (uses Select=COUNT unless combined with "
+        "--group-by, --sum or --distinct)",
+    )
+    parser.add_argument(
+        "--group-by",
+        metavar="<names>",
+        type=lambda value: value.split(","),
+        help="Output the number of items (and --sum and --distinct) for each combination of values of these "
+        "comma separated attributes",
+    )
+    parser.add_argument(
+        "--sum",
+        metavar="<names>",
+        type=lambda value: value.split(","),
+        help="Output the sums of these comma separated numeric attributes",
+    )
+    parser.add_argument(
+        "--distinct",
+        metavar="<names>",
+        type=lambda value: value.split(","),
+        help="Output the estimated numbers of distinct values of these comma separated attributes",
     )
     args = vars(parser.parse_args())
 
     output_items = args.pop("output_items", False)
+    json_encoder = args.pop("json_encoder")
+    output_format = args.pop("output_format")
+    output_path = args.pop("output_path", None)
+    max_file_size = args.pop("max_file_size")
+    output_dir = args.pop("output_dir", None)
+    file_options = {k: args.pop(k) for k in ("split", "compression", "compression_level")}
+    options = {k: args.pop(k) for k in ("max_workers", "max_retries", "max_read_capacity", "max_split_depth")}
     use_document_client = args.pop("use_document_client", False)
+    num_clients = args.pop("clients")
+    deserialize = args.pop("deserialize", None)
+    checkpoint_file = args.pop("checkpoint_file", None)
+    num_processes = args.pop("processes", None)
+    max_items = args.pop("max_items", None)
+    manifest_file = args.pop("manifest_file", None)
+    incremental_options = {
+        k: args.pop(k)
+        for k in (
+            "watermark_attribute",
+            "watermark_file",
+            "watermark_format",
+            "watermark_lookback",
+            "digest_index",
+            "key_attributes",
+        )
+    }
+    cache_options = {k: args.pop(k) for k in ("cache_dir", "cache_ttl", "cache_max_size")}
+    order = args.pop("order", None)
+    max_reorder_bytes = args.pop("max_reorder_bytes", None)
+    aggregate_options = {k: args.pop(k) for k in ("count", "group_by", "sum", "distinct")}
+    stats = args.pop("stats", False)
+    stats_interval = args.pop("stats_interval")
+    segments = args.pop("segments", None)
+    worker_index = args.pop("worker_index", None)
+    worker_count = args.pop("worker_count", None)
+    probe = args.pop("probe", False)
+    if args["TotalSegments"] == "auto":
+        if segments is not None or worker_count is not None:
+            parser.error("--total-segments auto cannot be used with --segments, --worker-index and --worker-count")
+        resume_from = checkpoint.JSONFileCheckpointStore(checkpoint_file).load() if checkpoint_file else None
+        args["TotalSegments"] = _resolve_total_segments(
+            args, options["max_workers"], probe=probe, resume_from=resume_from, verbose=stats
+        )
+    elif probe:
+        parser.error("--probe requires --total-segments auto")
+    if (worker_index is None) != (worker_count is None):
+        parser.error("--worker-index and --worker-count must be used together")
+    if worker_count is not None:
+        if segments is not None:
+            parser.error("--segments cannot be used with --worker-index and --worker-count")
+        try:
+            segments = sharding.worker_segments(worker_index, worker_count, args["TotalSegments"] or 1)
+        except ValueError as exc:
+            parser.error(str(exc))
+    if segments is not None:
+        last_segment = (args["TotalSegments"] or 1) - 1
+        if segments[-1] > last_segment:
+            parser.error(f"--segments must be between 0 and --total-segments - 1 ({last_segment})")
+        options["segments"] = segments
+    if deserialize:
+        if use_document_client:
+            parser.error("--deserialize cannot be used with --use-document-client")
+        options["deserialize"] = deserialize
+    if options["max_split_depth"] and checkpoint_file:
+        parser.error("--max-split-depth cannot be used with --checkpoint-file")
+    if max_items is not None:
+        if max_items < 1:
+            parser.error("--max-items must be positive")
+        if num_processes:
+            parser.error("--max-items cannot be used with --processes")
+        if manifest_file:
+            # The manifest would list segments that have not been scanned completely
+            parser.error("--max-items cannot be used with --manifest-file")
+        options["max_items"] = max_items
+    if num_processes and checkpoint_file:
+        parser.error("--checkpoint-file cannot be used with --processes")
+    if output_format != "jsonl":
+        if not output_path:
+            parser.error(f"--output-format {output_format} requires --output-path")
+        if use_document_client or deserialize or num_processes or checkpoint_file:
+            parser.error(
+                f"--output-format {output_format} cannot be used with --use-document-client, --deserialize, "
+                "--processes or --checkpoint-file"
+            )
+    watermark = incremental_options["watermark_attribute"] or incremental_options["watermark_file"]
+    digest = incremental_options["digest_index"] or incremental_options["key_attributes"]
+    if watermark or digest:
+        if watermark and not (incremental_options["watermark_attribute"] and incremental_options["watermark_file"]):
+            parser.error("--watermark-attribute and --watermark-file must be used together")
+        if digest and not (incremental_options["digest_index"] and incremental_options["key_attributes"]):
+            parser.error("--digest-index and --key-attributes must be used together")
+        if watermark and digest:
+            parser.error("--watermark-attribute cannot be used with --digest-index")
+        if incremental_options["watermark_lookback"] < 0:
+            parser.error("--watermark-lookback must not be negative")
+        if output_format != "jsonl" or output_dir or num_processes or checkpoint_file or max_items or segments:
+            parser.error(
+                "--watermark-attribute and --digest-index cannot be used with --output-format, --output-dir, "
+                "--processes, --checkpoint-file, --max-items or a subset of segments"
+            )
+    if output_dir:
+        if output_format != "jsonl" or num_processes or checkpoint_file:
+            parser.error("--output-dir cannot be used with --output-format, --processes or --checkpoint-file")
+    elif any(v is not None for v in file_options.values()):
+        parser.error("--split, --compression and --compression-level require --output-dir")
+    if order:
+        if num_processes or checkpoint_file or max_items or options["max_split_depth"]:
+            parser.error("--order cannot be used with --processes, --checkpoint-file, --max-items or --max-split-depth")
+        options["order"] = order
+        if max_reorder_bytes is not None:
+            if max_reorder_bytes < 0:
+                parser.error("--max-reorder-bytes must be non-negative")
+            options["max_reorder_bytes"] = max_reorder_bytes
+    elif max_reorder_bytes is not None:
+        parser.error("--max-reorder-bytes requires --order")
+    aggregation = None
+    if any(aggregate_options.values()):
+        if output_items or output_format != "jsonl" or output_dir or checkpoint_file or max_items:
+            parser.error(
+                "--count, --group-by, --sum and --distinct cannot be used with --output-items, --output-format, "
+                "--output-dir, --checkpoint-file or --max-items"
+            )
+        if watermark or digest or order or deserialize or cache_options["cache_dir"]:
+            parser.error(
+                "--count, --group-by, --sum and --distinct cannot be used with --watermark-attribute, "
+                "--digest-index, --order, --deserialize or --cache-dir"
+            )
+        aggregation = aggregate.Aggregation(
+            group_by=aggregate_options["group_by"] or (),
+            sums=aggregate_options["sum"] or (),
+            distinct=aggregate_options["distinct"] or (),
+        )
+    if cache_options["cache_dir"]:
+        if num_processes or checkpoint_file or max_items:
+            parser.error("--cache-dir cannot be used with --processes, --checkpoint-file or --max-items")
+        try:
+            options["cache"] = cache.ScanCache(
+                cache_options["cache_dir"],
+                **{
+                    k: cache_options[f"cache_{k}"]
+                    for k in ("ttl", "max_size")
+                    if cache_options[f"cache_{k}"] is not None
+                },
+            )
+        except ValueError as exc:
+            parser.error(str(exc))
+    elif cache_options["cache_ttl"] is not None or cache_options["cache_max_size"] is not None:
+        parser.error("--cache-ttl and --cache-max-size require --cache-dir")
+    if checkpoint_file:
+        options["checkpoint_store"] = checkpoint.JSONFileCheckpointStore(checkpoint_file)
+        options["resume_from"] = options["checkpoint_store"].load()
+    if num_clients < 1:
+        parser.error("--clients must be positive")
+    # Clients are created in the scanning process, so the factory must be picklable for --processes
+    client_factory = functools.partial(
+        clients.create_clients,
+        num_clients,
+        options["max_workers"] or args["TotalSegments"] or 1,
+        document=use_document_client,
+        # Items that are only written as JSON get int and float numbers instead of Decimals
+        # (aggregates and digests are computed from the Decimals)
+        numbers="int" if use_document_client and not aggregation and not incremental_options["digest_index"] else None,
+    )
+    reporter = contextlib.nullcontext()
+    if stats:
+        if num_processes:
+            parser.error("--stats cannot be used with --processes")
+        scan_metrics = metrics.ScanMetrics()
+        options["observer"] = scan_metrics
+        reporter = metrics.ProgressReporter(scan_metrics, sys.stderr, stats_interval)
     scan_args = {k: v for k, v in args.items() if v is not None}
 
-    client = boto3.client("dynamodb") if not use_document_client else boto3.resource("dynamodb").meta.client
-    paginator = get_paginator(client)
-    for page in paginator.paginate(**scan_args):
-        if output_items:
-            for item in page.get("Items", []):
-                print(json.dumps(item, cls=DecimalEncoder))
+    with reporter:
+        if aggregation:
+            if num_processes:
+                result = processes.scan_aggregate(
+                    num_processes,
+                    aggregation,
+                    client_factory=client_factory,
+                    document=use_document_client,
+                    **options,
+                    **scan_args,
+                )
+            else:
+                result = aggregate.scan_aggregate(
+                    get_paginator(client_factory()),
+                    aggregation,
+                    document=use_document_client,
+                    **options,
+                    **scan_args,
+                )
+            writer = output.JSONLinesWriter(sys.stdout.buffer)
+            writer.write(output.json_lines_encoder(json_encoder)(result.rows()))
+            writer.flush()
+        elif output_format != "jsonl":
+            try:
+                columnar_writer = columnar.ColumnarWriter(output_path, output_format, max_file_size=max_file_size)
+            except ValueError as exc:
+                parser.error(str(exc))
+            paginator = get_paginator(client_factory())
+            with columnar_writer:
+                for page in paginator.paginate(**options, **scan_args):
+                    columnar_writer.write_page(page)
+        elif output_dir:
+            try:
+                file_writer = files.FileWriter(
+                    output_dir,
+                    split=file_options["split"] or "size",
+                    compression=file_options["compression"] or "none",
+                    compression_level=file_options["compression_level"],
+                    max_file_size=max_file_size,
+                    output_items=output_items,
+                    encoder=json_encoder,
+                    metadata=_common.scan_metadata(scan_args, segments),
+                )
+            except ValueError as exc:
+                parser.error(str(exc))
+            paginator = get_paginator(client_factory())
+            with file_writer:
+                for segment, page in paginator.paginate(with_segments=True, **options, **scan_args):
+                    file_writer.write_page(page, segment)
+        elif num_processes:
+            lines = processes.scan_json_lines(
+                num_processes,
+                client_factory=client_factory,
+                output_items=output_items,
+                encoder=json_encoder,
+                **options,
+                **scan_args,
+            )
+            writer = output.JSONLinesWriter(sys.stdout.buffer)
+            for chunk in lines:
+                writer.write(chunk)
+            writer.flush()
+        elif incremental_options["digest_index"]:
+            paginator = get_paginator(client_factory())
+            encode = output.json_lines_encoder(json_encoder)
+            # Write each change record right away: the index is committed after the last one
+            writer = output.JSONLinesWriter(sys.stdout.buffer, buffer_size=0)
+            with incremental.DigestIndex(incremental_options["digest_index"]) as index:
+                pages = paginator.paginate(**options, **scan_args)
+                for record in index.changes(pages, incremental_options["key_attributes"]):
+                    writer.write(encode([record]))
         else:
-            print(json.dumps(page, cls=DecimalEncoder))
+            paginator = get_paginator(client_factory())
+            writer = output.JSONLinesWriter(sys.stdout.buffer, output_items, json_encoder)
+            if incremental_options["watermark_attribute"]:
+                pages = incremental.scan_changed_since(
+                    paginator,
+                    incremental_options["watermark_attribute"],
+                    checkpoint.JSONFileCheckpointStore(incremental_options["watermark_file"]),
+                    next_watermark=incremental.clock(
+                        incremental_options["watermark_format"], lookback=incremental_options["watermark_lookback"]
+                    ),
+                    document=use_document_client,
+                    **options,
+                    **scan_args,
+                )
+            else:
+                pages = paginator.paginate(**options, **scan_args)
+            for page in pages:
+                writer.write_page(page)
+                if checkpoint_file or watermark:
+                    # Make sure the page has been written before it is recorded as processed
+                    writer.flush()
+            writer.flush()
+
+    if manifest_file:
+        scanned = segments if segments is not None else range(scan_args.get("TotalSegments") or 1)
+        manifest = {
+            **_common.scan_metadata(scan_args, segments),
+            "Segments": {str(i): {"Done": True} for i in scanned},
+        }
+        checkpoint.JSONFileCheckpointStore(manifest_file).save(manifest)
 
 
 if __name__ == "__main__":  # pragma: no cover
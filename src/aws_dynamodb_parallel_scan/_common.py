@@ -0,0 +1,89 @@
+"""Helpers shared by the threaded and asyncio paginators."""
+
+import typing
+
+from . import checkpoint, sharding, throttling
+
+
+def validate_options(*, prefetch: int, max_buffered_pages: int, max_workers: int | None, max_retries: int):
+    """Validate paginate() options that are not passed to DynamoDB."""
+    if prefetch < 0:
+        raise ValueError("prefetch must be non-negative")
+    if max_buffered_pages < 0:
+        raise ValueError("max_buffered_pages must be non-negative")
+    if max_workers is not None and max_workers < 1:
+        raise ValueError("max_workers must be positive")
+    if max_retries < 0:
+        raise ValueError("max_retries must be non-negative")
+
+
+def create_rate_limiter(max_read_capacity: float | None, kwargs: dict) -> throttling.RateLimiter | None:
+    """Create rate limiter for given read capacity limit.
+
+    Sets ReturnConsumedCapacity in Scan arguments if needed for rate limiting.
+    """
+    if max_read_capacity is None:
+        return None
+    if kwargs.get("ReturnConsumedCapacity", "NONE") == "NONE":
+        kwargs["ReturnConsumedCapacity"] = "TOTAL"
+    return throttling.RateLimiter(max_read_capacity)
+
+
+def plan_segments(
+    kwargs: dict, resume_from: dict | None, only: typing.Iterable[int] | None = None
+) -> list[tuple[int, dict]]:
+    """Get Scan arguments of the first request of each segment that needs to be scanned.
+
+    Args:
+        kwargs: Scan arguments.
+        resume_from: Checkpoint to resume from (or None).
+        only: Segments to scan (default: all segments).
+
+    Returns: List of (segment, scan arguments) tuples. Segments that were completed
+        according to the checkpoint are left out.
+    """
+    segments = kwargs.get("TotalSegments") or 1
+    selected = sorted(set(only)) if only is not None else range(segments)
+    if any(i < 0 or i >= segments for i in selected):
+        raise ValueError(f"segments must be between 0 and TotalSegments - 1 ({segments - 1})")
+    if resume_from:
+        expected = {"TableName": kwargs.get("TableName"), "TotalSegments": segments}
+        if "AssignedSegments" in resume_from:
+            expected["AssignedSegments"] = sharding.format_segments(selected)
+        for key, value in expected.items():
+            if resume_from.get(key) != value:
+                raise ValueError(f"{key} of checkpoint ({resume_from.get(key)}) does not match the scan ({value})")
+
+    plan = []
+    for i in selected:
+        state = checkpoint.segment_state(resume_from, i)
+        if state.get("Done"):
+            continue
+        args = {**kwargs, "TotalSegments": segments, "Segment": i}
+        if state.get("ExclusiveStartKey"):
+            args["ExclusiveStartKey"] = state["ExclusiveStartKey"]
+        plan.append((i, args))
+    return plan
+
+
+def scan_metadata(kwargs: dict, only: typing.Iterable[int] | None = None) -> dict:
+    """Get metadata that identifies a scan (or part of it) in checkpoints and manifests."""
+    metadata = {"TableName": kwargs.get("TableName"), "TotalSegments": kwargs.get("TotalSegments") or 1}
+    if only is not None:
+        metadata["AssignedSegments"] = sharding.format_segments(only)
+    return metadata
+
+
+def create_checkpoint_writer(
+    store: checkpoint.CheckpointStore | None,
+    interval: float,
+    kwargs: dict,
+    resume_from: dict | None,
+    only: typing.Iterable[int] | None = None,
+) -> checkpoint.CheckpointWriter | None:
+    """Create checkpoint writer for a scan if checkpoints have been requested."""
+    if not store:
+        return None
+    initial = resume_from or scan_metadata(kwargs, only)
+    initial = {**initial, "Segments": dict(initial.get("Segments", {}))}
+    return checkpoint.CheckpointWriter(store, initial, interval)
@@ -0,0 +1,364 @@
+"""Counts, sums and distinct counts computed inside a parallel scan.
+
+Counting items or summing attributes with paginate() sends every item to
+the consumer just to produce a handful of numbers. scan_aggregate() instead
+adds the items of each page to a partial Aggregate of the scan thread that
+fetched the page (ThreadAccumulator, given to Paginator.paginate() as
+transform_page), so the pages that reach the consumer carry no items. The
+partials of the threads are merged when the scan is done.
+processes.scan_aggregate() does the same in worker processes, which send
+only their merged Aggregate to the parent.
+
+An Aggregation counts items, in total or per group of group_by values. It
+can also sum numeric attributes and estimate the number of distinct values
+of attributes:
+
+* Sums are exact Decimals. Missing and non-numeric values are skipped.
+* Distinct counts use HyperLogLog sketches with a relative error of about
+  1.04 / sqrt(2 ** precision), which is 1.6 % at the default precision of
+  12. Each sketch takes 2 ** precision bytes per group.
+
+The scan only requests the attributes of the aggregation, with a
+ProjectionExpression, unless the arguments already select attributes. An
+aggregation that only counts items uses Select=COUNT, so DynamoDB returns
+no items at all.
+"""
+
+import dataclasses
+import decimal
+import hashlib
+import json
+import math
+import threading
+import typing
+
+import boto3.dynamodb.types
+
+from . import convert
+
+# Scan arguments that select the returned attributes
+_SELECT_ARGS = ("Select", "ProjectionExpression", "AttributesToGet")
+# Paginator.paginate() arguments that cannot be used with aggregation
+_UNSUPPORTED_ARGS = ("max_items", "checkpoint_store", "resume_from", "cache", "order", "deserialize", "transform_page")
+_NAME_PREFIX = "#aggregate"
+# Context of DynamoDB numbers (38 digits of precision)
+_CONTEXT = decimal.Context(prec=38)
+
+
+@dataclasses.dataclass(frozen=True)
+class Aggregation:
+    """Aggregates to compute over the items of a scan.
+
+    Items are always counted.
+    """
+
+    # Attributes to group items by (default: no grouping, one group of all items)
+    group_by: typing.Sequence[str] = ()
+    # Numeric attributes to sum
+    sums: typing.Sequence[str] = ()
+    # Attributes to estimate the number of distinct values of
+    distinct: typing.Sequence[str] = ()
+    # Precision of the distinct value sketches (4 to 16)
+    precision: int = 12
+
+    def __post_init__(self):
+        # Store tuples to keep aggregations hashable and comparable
+        for name in ("group_by", "sums", "distinct"):
+            object.__setattr__(self, name, tuple(getattr(self, name)))
+        if not 4 <= self.precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+
+    @property
+    def attributes(self) -> list[str]:
+        """Get the attributes the aggregation reads."""
+        return list(dict.fromkeys((*self.group_by, *self.sums, *self.distinct)))
+
+
+class HyperLogLog:
+    """HyperLogLog sketch that estimates the number of distinct values added to it."""
+
+    def __init__(self, precision: int = 12):
+        """Create an empty sketch with 2 ** precision registers."""
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value: typing.Any):
+        """Add a native value (see convert module)."""
+        hashed = int.from_bytes(hashlib.blake2b(_canonical(value), digest_size=8).digest(), "big")
+        bits = 64 - self.precision
+        index = hashed >> bits
+        rank = bits - (hashed & ((1 << bits) - 1)).bit_length() + 1
+        self.registers[index] = max(self.registers[index], rank)
+
+    def merge(self, other: "HyperLogLog"):
+        """Add the values of another sketch of the same precision."""
+        if other.precision != self.precision:
+            raise ValueError("sketches must have the same precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def estimate(self) -> int:
+        """Estimate the number of distinct values."""
+        m = len(self.registers)
+        alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+        estimate = alpha * m * m / sum(2.0**-rank for rank in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            estimate = m * math.log(m / zeros)
+        return round(estimate)
+
+
+class _Group:  # pylint: disable=too-few-public-methods
+    """Aggregates of the items with the same group_by values."""
+
+    def __init__(self, values: tuple, aggregation: Aggregation):
+        self.values = values
+        self.count = 0
+        self.sums = {attribute: decimal.Decimal(0) for attribute in aggregation.sums}
+        self.sketches = {attribute: HyperLogLog(aggregation.precision) for attribute in aggregation.distinct}
+
+    def merge(self, other: "_Group"):
+        self.count += other.count
+        for attribute, total in other.sums.items():
+            self.sums[attribute] = _CONTEXT.add(self.sums[attribute], total)
+        for attribute, sketch in other.sketches.items():
+            self.sketches[attribute].merge(sketch)
+
+
+class Aggregate:
+    """Partial or complete result of an aggregation.
+
+    Partial aggregates of different threads or processes are combined with merge().
+    """
+
+    def __init__(self, aggregation: Aggregation):
+        """Create an empty aggregate."""
+        self.aggregation = aggregation
+        self.groups: dict[tuple, _Group] = {}
+        # Number of items read, before FilterExpression
+        self.scanned_count = 0
+
+    def add(self, item: typing.Mapping):
+        """Add an item with native types (see convert module)."""
+        self.add_items([item])
+
+    def add_items(
+        self, items: typing.Iterable[typing.Mapping], convert_value: typing.Callable[[dict], typing.Any] | None = None
+    ):
+        """Add items with native types, or low-level items converted with convert_value.
+
+        Args:
+            items: Items to add.
+            convert_value: Function to convert the values of the attributes of the aggregation
+                with (see convert.value_converter()).
+        """
+        aggregation = self.aggregation
+        attributes, group_by, sums, distinct = (
+            aggregation.attributes,
+            aggregation.group_by,
+            aggregation.sums,
+            aggregation.distinct,
+        )
+        groups = self.groups
+        for item in items:
+            if convert_value:
+                item = {a: convert_value(item[a]) for a in attributes if a in item}
+            values = tuple([item.get(a) for a in group_by])
+            try:
+                group = groups[values]
+            except KeyError:
+                group = groups[values] = _Group(values, aggregation)
+            except TypeError:
+                # Sets, lists and maps
+                group = self._group(values)
+            group.count += 1
+            for attribute in sums:
+                value = item.get(attribute)
+                number = value if isinstance(value, decimal.Decimal) else _number(value)
+                if number is not None:
+                    group.sums[attribute] = _CONTEXT.add(group.sums[attribute], number)
+            for attribute in distinct:
+                if attribute in item:
+                    group.sketches[attribute].add(item[attribute])
+
+    def add_count(self, count: int):
+        """Add items that were only counted (Select=COUNT) to an aggregation without group_by."""
+        if self.aggregation.group_by:
+            raise ValueError("items cannot be grouped without their attributes")
+        self._group(()).count += count
+
+    def merge(self, other: "Aggregate"):
+        """Add the items of another aggregate of the same aggregation."""
+        if other.aggregation != self.aggregation:
+            raise ValueError("aggregates must be of the same aggregation")
+        self.scanned_count += other.scanned_count
+        for key, group in other.groups.items():
+            if key not in self.groups:
+                self.groups[key] = _Group(group.values, self.aggregation)
+            self.groups[key].merge(group)
+
+    def rows(self) -> list[dict]:
+        """Get the result as a dict per group, ordered by the group values.
+
+        Rows have the group values (Group, with group_by), the number of items (Count), the
+        sums (Sum, with sums) and the estimated numbers of distinct values (ApproximateDistinct,
+        with distinct). Without group_by, there is a single row even if there are no items.
+        """
+        aggregation = self.aggregation
+        groups = self.groups
+        if not groups and not aggregation.group_by:
+            groups = {(): _Group((), aggregation)}
+        rows = []
+        for key in sorted(groups, key=_canonical):
+            group = groups[key]
+            row: dict = {}
+            if aggregation.group_by:
+                row["Group"] = dict(zip(aggregation.group_by, group.values))
+            row["Count"] = group.count
+            if aggregation.sums:
+                row["Sum"] = dict(group.sums)
+            if aggregation.distinct:
+                row["ApproximateDistinct"] = {a: sketch.estimate() for a, sketch in group.sketches.items()}
+            rows.append(row)
+        return rows
+
+    def _group(self, values: tuple) -> _Group:
+        key = tuple(map(_hashable, values))
+        group = self.groups.get(key)
+        if group is None:
+            group = self.groups[key] = _Group(values, self.aggregation)
+        return group
+
+
+def _hashable(value: typing.Any) -> typing.Any:
+    """Get a hashable version of a native value to group by."""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _hashable(v)) for k, v in value.items()))
+    if isinstance(value, list):
+        return tuple(map(_hashable, value))
+    if isinstance(value, set):
+        return frozenset(value)
+    return value
+
+
+def _json_default(o):
+    """Encode the native values that are not JSON serializable for _canonical()."""
+    if isinstance(o, decimal.Decimal):
+        return {"N": str(o.normalize())}
+    if isinstance(o, (set, frozenset)):
+        return {"Set": sorted(_canonical(v).hex() for v in o)}
+    if isinstance(o, boto3.dynamodb.types.Binary):
+        o = o.value
+    if isinstance(o, (bytes, bytearray)):
+        return {"B": o.hex()}
+    raise TypeError(f"Object of type {type(o).__name__} cannot be aggregated")
+
+
+def _canonical(value: typing.Any) -> bytes:
+    """Encode a native value the same way in every process, to hash and order values."""
+    if isinstance(value, str):
+        return b"S" + value.encode()
+    return b"J" + json.dumps(value, sort_keys=True, separators=(",", ":"), default=_json_default).encode()
+
+
+def _number(value: typing.Any) -> decimal.Decimal | None:
+    """Get a native value as a Decimal to sum, or None if it is not a number."""
+    if isinstance(value, decimal.Decimal):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return decimal.Decimal(str(value))
+    return None
+
+
+class ThreadAccumulator:
+    """Adds the items of Scan API responses to a partial Aggregate of each scan thread.
+
+    Used as the transform_page argument of Paginator.paginate(). Each thread adds the items
+    of the pages it fetches to its own partial, so no lock is held while adding items and
+    each group is created once per thread instead of once per page. The partials are merged
+    with result() when the scan is done.
+    """
+
+    def __init__(self, aggregation: Aggregation, *, document: bool = False):
+        """Create an accumulator.
+
+        Args:
+            aggregation: Aggregates to compute.
+            document: Items have native types (document client). Otherwise the attributes of
+                the aggregation are converted from DynamoDB types.
+        """
+        self._aggregation = aggregation
+        self._convert_value = None if document else convert.value_converter("decimal")
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.partials: list[Aggregate] = []
+
+    def __call__(self, page: dict) -> dict:
+        """Add the items (or the Count with Select=COUNT) of a page and return it without Items."""
+        partial = getattr(self._local, "partial", None)
+        if partial is None:
+            partial = self._local.partial = Aggregate(self._aggregation)
+            with self._lock:
+                self.partials.append(partial)
+        partial.scanned_count += page.get("ScannedCount", 0)
+        if "Items" in page:
+            partial.add_items(page["Items"], self._convert_value)
+        else:
+            partial.add_count(page.get("Count", 0))
+        return {k: v for k, v in page.items() if k != "Items"}
+
+    def result(self) -> Aggregate:
+        """Merge the partials of the threads."""
+        result = Aggregate(self._aggregation)
+        with self._lock:
+            for partial in self.partials:
+                result.merge(partial)
+        return result
+
+
+def aggregate_args(kwargs: dict, aggregation: Aggregation) -> dict:
+    """Add the selection of the attributes of an aggregation to Scan arguments.
+
+    Uses Select=COUNT if the aggregation only counts items, and a ProjectionExpression of the
+    attributes of the aggregation otherwise, unless the arguments already select attributes.
+    """
+    attributes = aggregation.attributes
+    if kwargs.get("Select") == "COUNT" and attributes:
+        raise ValueError("Select=COUNT can only be used to count items")
+    if any(k in kwargs for k in _SELECT_ARGS):
+        return kwargs
+    if not attributes:
+        return {**kwargs, "Select": "COUNT"}
+    names = {f"{_NAME_PREFIX}{i}": attribute for i, attribute in enumerate(attributes)}
+    return {
+        **kwargs,
+        "ProjectionExpression": ", ".join(names),
+        "ExpressionAttributeNames": {**kwargs.get("ExpressionAttributeNames", {}), **names},
+    }
+
+
+def scan_aggregate(paginator: typing.Any, aggregation: Aggregation, *, document: bool = False, **kwargs) -> Aggregate:
+    """Compute an aggregation over the items of a parallel scan.
+
+    Args:
+        paginator: Paginator to scan with (see get_paginator()).
+        aggregation: Aggregates to compute.
+        document: The paginator uses a document client (items have native types).
+        **kwargs: Arguments for Paginator.paginate(). Cannot include max_items,
+            checkpoint_store, resume_from, cache, order, deserialize or transform_page.
+
+    Returns: Aggregate of the scanned items (see Aggregate.rows()).
+
+    Example:
+        aggregation = aggregate.Aggregation(group_by=["category"], sums=["price"])
+        result = aggregate.scan_aggregate(paginator, aggregation, TableName="mytable", TotalSegments=16)
+        for row in result.rows():
+            print(row["Group"]["category"], row["Count"], row["Sum"]["price"])
+    """
+    if any(kwargs.get(name) for name in _UNSUPPORTED_ARGS):
+        raise ValueError(f"{', '.join(_UNSUPPORTED_ARGS)} cannot be used with scan_aggregate")
+    accumulator = ThreadAccumulator(aggregation, document=document)
+    # The pages have no items, only the scan has to be driven to completion
+    for _ in paginator.paginate(transform_page=accumulator, **aggregate_args(kwargs, aggregation)):
+        pass
+    return accumulator.result()
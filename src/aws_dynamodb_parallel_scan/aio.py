@@ -0,0 +1,214 @@
+"""DynamoDB parallel scan paginator for asyncio clients."""
+
+import asyncio
+import contextlib
+import typing
+
+from . import _common, checkpoint, convert, throttling
+
+# Options of Paginator.paginate() that the async paginator does not implement
+_UNSUPPORTED_OPTIONS = (
+    "max_buffered_items",
+    "max_buffered_bytes",
+    "observer",
+    "max_split_depth",
+    "max_items",
+    "cancel",
+    "with_segments",
+    "cache",
+    "table_estimate",
+    "order",
+    "max_reorder_bytes",
+    "transform_page",
+)
+
+
+class _AsyncRunner:
+    """Runs paginated requests for multiple segments concurrently on the event loop.
+
+    Each segment is scanned by its own task. A segment may fetch up to
+    `prefetch` pages ahead of the consumer before waiting for the consumer to
+    process the pages. The number of concurrent requests across all segments
+    is limited by `max_workers`.
+    """
+
+    def __init__(
+        self,
+        call,
+        segments: list[tuple[int, dict]],
+        *,
+        prefetch: int,
+        max_buffered_pages: int,
+        max_workers: int,
+        max_retries: int,
+        rate_limiter: throttling.RateLimiter | None,
+        on_consumed: typing.Callable[[int, typing.Any], None] | None,
+    ):  # pylint: disable=too-many-arguments
+        self._call = call
+        self._segments = segments
+        self._prefetch = prefetch
+        self._max_retries = max_retries
+        self._rate_limiter = rate_limiter
+        self._on_consumed = on_consumed
+        self._concurrency = asyncio.Semaphore(max_workers)
+        self._pages: asyncio.Queue = asyncio.Queue(maxsize=max_buffered_pages)
+        self._credits: dict[int, asyncio.Semaphore] = {}
+
+    async def pages(self):
+        """Yield pages from all segments in completion order."""
+        remaining = len(self._segments)
+        for segment_id, _ in self._segments:
+            self._credits[segment_id] = asyncio.Semaphore(self._prefetch + 1)
+        tasks = [asyncio.create_task(self._scan_segment(*segment)) for segment in self._segments]
+        try:
+            while remaining:
+                item = await self._pages.get()
+                if isinstance(item, Exception):
+                    raise item
+
+                segment_id, page = item
+                yield page
+
+                next_key = page.get("LastEvaluatedKey")
+                if not next_key:
+                    remaining -= 1
+                if self._on_consumed:
+                    self._on_consumed(segment_id, next_key)
+                self._credits[segment_id].release()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _scan_segment(self, segment_id: int, args: dict):
+        """Fetch all pages of a segment and put them to the page buffer."""
+        try:
+            while True:
+                await self._credits[segment_id].acquire()
+                page = await self._request(args)
+                await self._pages.put((segment_id, page))
+
+                next_key = page.get("LastEvaluatedKey")
+                if not next_key:
+                    return
+                args = {**args, "ExclusiveStartKey": next_key}
+        except Exception as exc:  # noqa: BLE001
+            await self._pages.put(exc)
+
+    async def _request(self, args: dict):
+        """Make a single request, retrying if it is throttled."""
+        attempt = 0
+        while True:
+            if self._rate_limiter:
+                while delay := self._rate_limiter.delay():
+                    await asyncio.sleep(delay)
+
+            try:
+                async with self._concurrency:
+                    page = await self._call(**args)
+            except Exception as exc:
+                if not throttling.is_throttling_error(exc) or attempt >= self._max_retries:
+                    raise
+                await asyncio.sleep(throttling.backoff_delay(attempt))
+                attempt += 1
+                continue
+
+            if self._rate_limiter:
+                self._rate_limiter.consume(throttling.consumed_capacity(page))
+            return page
+
+
+class AsyncPaginator:  # pylint: disable=too-few-public-methods
+    """Paginator that implements DynamoDB parallel scan for asyncio clients.
+
+    Works with clients whose scan() method is a coroutine, such as DynamoDB
+    clients of aiobotocore and aioboto3. All segments are scanned concurrently
+    on the event loop which allows scanning thousands of segments in a single
+    thread.
+    """
+
+    def __init__(self, client: typing.Any):
+        """Create paginator for DynamoDB parallel scan.
+
+        Args:
+            client: asyncio DynamoDB client to use for Scan API calls.
+        """
+        self._client = client
+
+    async def paginate(
+        self,
+        *,
+        prefetch: int = 0,
+        max_buffered_pages: int = 0,
+        max_workers: int | None = None,
+        max_retries: int = 10,
+        max_read_capacity: float | None = None,
+        checkpoint_store: checkpoint.CheckpointStore | None = None,
+        checkpoint_interval: float = 5.0,
+        resume_from: dict | None = None,
+        segments: typing.Iterable[int] | None = None,
+        deserialize: str | None = None,
+        **kwargs,
+    ):  # pylint: disable=too-many-arguments
+        """Creates an async generator that yields DynamoDB Scan API responses.
+
+        Accepts the Scan arguments and the options prefetch, max_buffered_pages, max_workers,
+        max_retries, max_read_capacity, checkpoint_store, checkpoint_interval, resume_from,
+        segments and deserialize of Paginator.paginate(), and yields the same Scan API responses.
+        The other options of Paginator.paginate() and TotalSegments="auto" are not supported.
+        Instead of limiting the number of threads, max_workers limits the number of concurrent Scan
+        requests (default: TotalSegments). The concurrency is not adjusted on throttling; throttled
+        requests are retried with exponential backoff.
+
+        Raises:
+            ValueError: If an option of Paginator.paginate() that is not supported is given.
+
+        Example:
+            async for page in paginator.paginate(TableName="mytable", TotalSegments=1000):
+                items = page.get("Items", [])
+        """
+        unsupported = [name for name in _UNSUPPORTED_OPTIONS if name in kwargs]
+        if unsupported:
+            raise ValueError(f"async paginator does not support {', '.join(unsupported)}")
+        if kwargs.get("TotalSegments") == "auto":
+            raise ValueError('async paginator does not support TotalSegments="auto"')
+        _common.validate_options(
+            prefetch=prefetch, max_buffered_pages=max_buffered_pages, max_workers=max_workers, max_retries=max_retries
+        )
+        rate_limiter = _common.create_rate_limiter(max_read_capacity, kwargs)
+        segments = sorted(set(segments)) if segments is not None else None
+        plan = _common.plan_segments(kwargs, resume_from, segments)
+        writer = _common.create_checkpoint_writer(checkpoint_store, checkpoint_interval, kwargs, resume_from, segments)
+
+        call = self._client.scan
+        if deserialize:
+            convert_page = convert.page_converter(deserialize)
+
+            async def call(**args):
+                return convert_page(await self._client.scan(**args))
+
+        runner = _AsyncRunner(
+            call,
+            plan,
+            prefetch=prefetch,
+            max_buffered_pages=max_buffered_pages,
+            max_workers=max_workers or kwargs.get("TotalSegments") or 1,
+            max_retries=max_retries,
+            rate_limiter=rate_limiter,
+            on_consumed=writer.update if writer else None,
+        )
+        with writer or contextlib.nullcontext():
+            async with contextlib.aclosing(runner.pages()) as pages:
+                async for page in pages:
+                    yield page
+
+
+def get_async_paginator(client: typing.Any):
+    """Create paginator for DynamoDB parallel scan with an asyncio client.
+
+    Args:
+        client: asyncio DynamoDB client to use for Scan API calls.
+
+    Returns: AsyncPaginator object.
+    """
+    return AsyncPaginator(client)
@@ -0,0 +1,390 @@
+"""Parallel point reads and bulk writes with BatchGetItem and BatchWriteItem.
+
+BatchLoader reads items by key. Keys are read from an iterable lazily and
+split into batches of at most 100 keys (the BatchGetItem limit). Batches
+are requested concurrently by a bounded number of threads, and at most a
+bounded number of batches are in flight or waiting for the consumer, so
+keys can be streamed from a large file or another scan.
+
+BatchWriter is the corresponding sink for items, e.g. the items of a
+parallel scan when copying a table. Items are put in batches of at most 25
+items (the BatchWriteItem limit) with the same bounded concurrency.
+
+UnprocessedKeys and UnprocessedItems of a response are requested again
+with exponential backoff, as are throttled requests. Results of
+BatchLoader are yielded per batch in completion order, as pages shaped
+like Scan API responses so the same output and type conversion helpers
+work for both.
+"""
+
+import concurrent.futures
+import itertools
+import json
+import threading
+import typing
+
+from . import convert, throttling
+
+# Maximum number of keys in a BatchGetItem request
+MAX_BATCH_KEYS = 100
+
+# Maximum number of items in a BatchWriteItem request
+MAX_BATCH_WRITE_ITEMS = 25
+
+# Arguments of BatchGetItem given for the table (other arguments are request level)
+_TABLE_ARGUMENTS = ("ConsistentRead", "ProjectionExpression", "ExpressionAttributeNames", "AttributesToGet")
+
+
+class UnprocessedKeysError(Exception):
+    """Keys were still unprocessed after the maximum number of retries."""
+
+    def __init__(self, keys: list):
+        super().__init__(f"{len(keys)} keys were not processed by BatchGetItem after retries")
+        self.keys = keys
+
+
+class UnprocessedItemsError(Exception):
+    """Write requests were still unprocessed after the maximum number of retries."""
+
+    def __init__(self, requests: list):
+        super().__init__(f"{len(requests)} items were not processed by BatchWriteItem after retries")
+        self.requests = requests
+
+
+def _key_id(key: dict) -> str:
+    return json.dumps(key, sort_keys=True, default=repr)
+
+
+def _batches(
+    values: typing.Iterable[dict], size: int, key: typing.Callable[[dict], str] | None = None
+) -> typing.Iterator[list[dict]]:
+    """Split values into batches of size values.
+
+    With key, values with the same key within a batch are merged, the last one replacing
+    the earlier ones.
+    """
+    iterator = iter(values)
+    if key is None:
+        while batch := list(itertools.islice(iterator, size)):
+            yield batch
+        return
+
+    unique: dict[str, dict] = {}
+    for value in iterator:
+        unique[key(value)] = value
+        if len(unique) == size:
+            yield list(unique.values())
+            unique = {}
+    if unique:
+        yield list(unique.values())
+
+
+class _Unprocessed(Exception):
+    """Unprocessed part of a batch after retries, wrapped in a public error by the caller."""
+
+    def __init__(self, batch: list):
+        super().__init__(batch)
+        self.batch = batch
+
+
+def _send(
+    call: typing.Callable[[list], dict],
+    unprocessed: typing.Callable[[dict], list],
+    batch: list,
+    *,
+    max_retries: int,
+    rate_limiter: throttling.RateLimiter | None,
+    stopped: threading.Event,
+) -> tuple[list[dict], float]:
+    """Send batch, resending throttled requests and the unprocessed part of responses.
+
+    Args:
+        call: Function that sends a request for a batch and returns the response.
+        unprocessed: Function that gets the unprocessed part of the batch from a response.
+        batch: Batch to send.
+        max_retries: Maximum number of retries.
+        rate_limiter: Rate limiter for consumed capacity.
+        stopped: Event that interrupts backoff waits when set.
+
+    Returns: Responses and total capacity units consumed. Responses are incomplete if stopped.
+
+    Raises: The request error if it is not a throttling error or retries run out, and
+        _Unprocessed if part of the batch is still unprocessed after retries.
+    """
+    responses = []
+    capacity = 0.0
+    attempt = 0
+    while batch:
+        if rate_limiter:
+            rate_limiter.acquire(stopped.wait)
+        if stopped.is_set():
+            # Another batch has failed or the consumer has stopped
+            break
+        try:
+            response = call(batch)
+        except Exception as exc:
+            if not throttling.is_throttling_error(exc) or attempt >= max_retries:
+                raise
+        else:
+            units = throttling.consumed_capacity(response)
+            capacity += units
+            if rate_limiter:
+                rate_limiter.consume(units)
+            responses.append(response)
+            batch = unprocessed(response)
+            if batch and attempt >= max_retries:
+                raise _Unprocessed(batch)
+        if batch and stopped.wait(throttling.backoff_delay(attempt)):
+            break
+        attempt += 1
+    return responses, capacity
+
+
+def _run(
+    function: typing.Callable[[list], typing.Any],
+    batches: typing.Iterator[list],
+    max_workers: int,
+    max_pending: int,
+    stopped: threading.Event,
+) -> typing.Iterator:
+    """Call function for batches in a thread pool and yield the results in completion order.
+
+    At most max_pending batches are taken from batches before their results are yielded.
+    stopped is set when the generator is closed.
+    """
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        try:
+            pending: set[concurrent.futures.Future] = set()
+            for batch in itertools.islice(batches, max_pending):
+                pending.add(executor.submit(function, batch))
+            while pending:
+                done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for batch in itertools.islice(batches, len(done)):
+                    pending.add(executor.submit(function, batch))
+                for future in done:
+                    yield future.result()
+        finally:
+            stopped.set()
+            executor.shutdown(cancel_futures=True)
+
+
+def _validate(batch_size: int, max_batch_size: int, max_workers: int, max_retries: int):
+    if not 1 <= batch_size <= max_batch_size:
+        raise ValueError(f"batch_size must be between 1 and {max_batch_size}")
+    if max_workers < 1:
+        raise ValueError("max_workers must be positive")
+    if max_retries < 0:
+        raise ValueError("max_retries must be non-negative")
+
+
+class BatchLoader:  # pylint: disable=too-few-public-methods
+    """Loader that gets items by key with parallel BatchGetItem requests."""
+
+    def __init__(self, client: typing.Any):
+        """Create loader.
+
+        Args:
+            client: DynamoDB client to use for BatchGetItem API calls, or a list of clients to
+                spread the requests between round-robin. Keys and returned items have DynamoDB
+                types with a low-level client and native types with a document client.
+        """
+        self._clients = list(client) if isinstance(client, typing.Sequence) else [client]
+        if not self._clients:
+            raise ValueError("at least one client is required")
+
+    def load(
+        self,
+        keys: typing.Iterable[dict],
+        *,
+        batch_size: int = MAX_BATCH_KEYS,
+        max_workers: int = 8,
+        max_pending_batches: int | None = None,
+        max_retries: int = 10,
+        max_read_capacity: float | None = None,
+        deserialize: str | None = None,
+        **kwargs,
+    ):  # pylint: disable=too-many-arguments,too-many-locals
+        """Creates a generator that yields the items of given keys.
+
+        Items are yielded per batch as pages with Items, Count and ConsumedCapacity (if
+        requested), in completion order. Keys that do not exist are left out. Keys repeated
+        within a batch are requested once.
+
+        Args:
+            keys: Primary keys of the items to get.
+            batch_size: Number of keys per BatchGetItem request (1-100).
+            max_workers: Maximum number of concurrent requests.
+            max_pending_batches: Maximum number of batches in flight or waiting for the consumer
+                (default: 2 * max_workers). Bounds the number of keys read ahead from keys.
+            max_retries: Maximum number of times to retry a throttled request or the unprocessed
+                keys of a batch. UnprocessedKeysError is raised if keys are still unprocessed.
+            max_read_capacity: Maximum number of read capacity units to consume per second
+                (default: no limit).
+            deserialize: Convert returned items of a low-level client to native Python types,
+                converting numbers to the given type (see convert module).
+            **kwargs: Arguments for DynamoDB.Client.batch_get_item(): TableName (required),
+                ConsistentRead, ProjectionExpression and ExpressionAttributeNames are used for the
+                table and ReturnConsumedCapacity for the requests.
+
+        Example:
+            loader = get_batch_loader(client)
+            for page in loader.load(({"pk": {"S": key}} for key in keys), TableName="mytable"):
+                ...
+        """
+        _validate(batch_size, MAX_BATCH_KEYS, max_workers, max_retries)
+        table = kwargs.pop("TableName", None)
+        if not table:
+            raise ValueError("TableName is required")
+        rate_limiter = None
+        if max_read_capacity is not None:
+            kwargs.setdefault("ReturnConsumedCapacity", "TOTAL")
+            rate_limiter = throttling.RateLimiter(max_read_capacity)
+        table_args = {k: kwargs.pop(k) for k in _TABLE_ARGUMENTS if k in kwargs}
+
+        methods = [client.batch_get_item for client in self._clients]
+        requests = itertools.count()
+        stopped = threading.Event()
+        convert_page = convert.page_converter(deserialize) if deserialize else None
+
+        def call(batch: list[dict]) -> dict:
+            return methods[next(requests) % len(methods)](RequestItems={table: {**table_args, "Keys": batch}}, **kwargs)
+
+        def unprocessed(response: dict) -> list:
+            return response.get("UnprocessedKeys", {}).get(table, {}).get("Keys", [])
+
+        def get(batch: list[dict]) -> dict:
+            try:
+                responses, capacity = _send(
+                    call, unprocessed, batch, max_retries=max_retries, rate_limiter=rate_limiter, stopped=stopped
+                )
+            except _Unprocessed as exc:
+                raise UnprocessedKeysError(exc.batch) from None
+            items = [item for response in responses for item in response.get("Responses", {}).get(table, [])]
+            page: dict = {"Items": items, "Count": len(items)}
+            if kwargs.get("ReturnConsumedCapacity", "NONE") != "NONE":
+                page["ConsumedCapacity"] = {"TableName": table, "CapacityUnits": capacity}
+            return convert_page(page) if convert_page else page
+
+        batches = _batches(keys, batch_size, _key_id)
+        yield from _run(get, batches, max_workers, max_pending_batches or 2 * max_workers, stopped)
+
+    def load_items(self, keys: typing.Iterable[dict], **kwargs):
+        """Creates a generator that yields the items of given keys.
+
+        Args:
+            keys: Primary keys of the items to get.
+            **kwargs: Arguments for load().
+        """
+        for page in self.load(keys, **kwargs):
+            yield from page["Items"]
+
+
+class BatchWriter:  # pylint: disable=too-few-public-methods
+    """Sink that puts items to a table with parallel BatchWriteItem requests."""
+
+    def __init__(self, client: typing.Any):
+        """Create writer.
+
+        Args:
+            client: DynamoDB client to use for BatchWriteItem API calls, or a list of clients to
+                spread the requests between round-robin. Items must have DynamoDB types with a
+                low-level client and native types with a document client.
+        """
+        self._clients = list(client) if isinstance(client, typing.Sequence) else [client]
+        if not self._clients:
+            raise ValueError("at least one client is required")
+
+    def write(
+        self,
+        items: typing.Iterable[dict],
+        *,
+        batch_size: int = MAX_BATCH_WRITE_ITEMS,
+        max_workers: int = 8,
+        max_pending_batches: int | None = None,
+        max_retries: int = 10,
+        max_write_capacity: float | None = None,
+        transform: typing.Callable[[dict], dict | None] | None = None,
+        key_attributes: typing.Sequence[str] | None = None,
+        **kwargs,
+    ) -> dict:  # pylint: disable=too-many-arguments,too-many-locals
+        """Put items to a table.
+
+        Items are read from items lazily, so a slow table slows down the producer (e.g. a
+        parallel scan with bounded buffers) instead of items piling up in memory.
+
+        Args:
+            items: Items to put.
+            batch_size: Number of items per BatchWriteItem request (1-25).
+            max_workers: Maximum number of concurrent requests.
+            max_pending_batches: Maximum number of batches in flight (default: 2 * max_workers).
+            max_retries: Maximum number of times to retry a throttled request or the unprocessed
+                items of a batch. UnprocessedItemsError is raised if items are still unprocessed.
+            max_write_capacity: Maximum number of write capacity units to consume per second
+                (default: no limit).
+            transform: Function called for each item before it is written. Returns the item to
+                write (the same item or a new one), or None to skip the item.
+            key_attributes: Key attribute names of the table. When given, items with the same key
+                within a batch are written once (the last one wins) instead of failing the
+                request. Items from a scan of a table have unique keys, so this is only needed
+                if transform can map different items to the same key.
+            **kwargs: Arguments for DynamoDB.Client.batch_write_item(): TableName (required) and
+                ReturnConsumedCapacity.
+
+        Returns: Dict with the number of items written (Count) and ConsumedCapacity if requested.
+
+        Example:
+            writer = get_batch_writer(target_client)
+            writer.write(get_paginator(client).paginate_items(TableName="source"), TableName="target")
+        """
+        _validate(batch_size, MAX_BATCH_WRITE_ITEMS, max_workers, max_retries)
+        table = kwargs.pop("TableName", None)
+        if not table:
+            raise ValueError("TableName is required")
+        rate_limiter = None
+        if max_write_capacity is not None:
+            kwargs.setdefault("ReturnConsumedCapacity", "TOTAL")
+            rate_limiter = throttling.RateLimiter(max_write_capacity)
+
+        methods = [client.batch_write_item for client in self._clients]
+        requests = itertools.count()
+        stopped = threading.Event()
+
+        def call(batch: list[dict]) -> dict:
+            return methods[next(requests) % len(methods)](RequestItems={table: batch}, **kwargs)
+
+        def unprocessed(response: dict) -> list:
+            return response.get("UnprocessedItems", {}).get(table, [])
+
+        def put(batch: list[dict]) -> tuple[int, float]:
+            try:
+                _, capacity = _send(
+                    call,
+                    unprocessed,
+                    [{"PutRequest": {"Item": item}} for item in batch],
+                    max_retries=max_retries,
+                    rate_limiter=rate_limiter,
+                    stopped=stopped,
+                )
+            except _Unprocessed as exc:
+                raise UnprocessedItemsError(exc.batch) from None
+            return len(batch), capacity
+
+        if transform:
+            items = (item for item in map(transform, items) if item is not None)
+        key = None
+        if key_attributes:
+            names = list(key_attributes)
+
+            def key(item: dict) -> str:
+                return _key_id({name: item.get(name) for name in names})
+
+        count = 0
+        capacity = 0.0
+        batches = _batches(items, batch_size, key)
+        for written, units in _run(put, batches, max_workers, max_pending_batches or 2 * max_workers, stopped):
+            count += written
+            capacity += units
+        result: dict = {"Count": count}
+        if kwargs.get("ReturnConsumedCapacity", "NONE") != "NONE":
+            result["ConsumedCapacity"] = {"TableName": table, "CapacityUnits": capacity}
+        return result
@@ -0,0 +1,278 @@
+"""On-disk cache of scan results for repeated identical scans.
+
+ScanCache stores the pages of complete scans in a directory, one file per
+scan, keyed by a hash of the normalized scan arguments and the table
+metadata returned by DescribeTable (ARN, creation time, item count and
+size). A scan with the same arguments is replayed from the file instead of
+scanning the table again, as long as the entry is younger than the TTL and
+the table has not been recreated or changed in size. DynamoDB updates the
+item count and size about every six hours, so the TTL bounds how stale a
+cached result can be.
+
+Entry files are a header followed by length-prefixed records of JSON
+encoded pages. Entries are read through a memory map, so a hit is replayed
+at the speed of decoding JSON from the page cache. An entry is only stored
+when the consumer has processed every page of the scan. When the cache
+grows larger than max_size, entries that were used least recently are
+removed.
+"""
+
+import base64
+import decimal
+import hashlib
+import json
+import mmap
+import os
+import pathlib
+import struct
+import tempfile
+import time
+import typing
+
+import boto3.dynamodb.types
+
+_MAGIC = b"DDBSCAN1"
+# Header: magic and length of the JSON header
+_HEADER = struct.Struct("<8sI")
+# Record: segment, length of the JSON page and whether the page has encoded values
+_RECORD = struct.Struct("<iI?")
+_SUFFIX = ".scan"
+
+
+class _Encoder:  # pylint: disable=too-few-public-methods
+    """JSON default function that records whether it was needed."""
+
+    def __init__(self):
+        self.used = False
+
+    def __call__(self, o):
+        self.used = True
+        if isinstance(o, decimal.Decimal):
+            return {"__decimal__": str(o)}
+        if isinstance(o, boto3.dynamodb.types.Binary):
+            return {"__binary__": base64.b64encode(o.value).decode("ascii")}
+        if isinstance(o, (bytes, bytearray)):
+            return {"__bytes__": base64.b64encode(o).decode("ascii")}
+        if isinstance(o, (set, frozenset)):
+            return {"__set__": sorted(o, key=repr)}
+        raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def _decode(o: dict) -> typing.Any:
+    """Decode values encoded by _Encoder."""
+    if len(o) == 1:
+        if "__decimal__" in o:
+            return decimal.Decimal(o["__decimal__"])
+        if "__binary__" in o:
+            return boto3.dynamodb.types.Binary(base64.b64decode(o["__binary__"]))
+        if "__bytes__" in o:
+            return base64.b64decode(o["__bytes__"])
+        if "__set__" in o:
+            return set(o["__set__"])
+    return o
+
+
+def encode_page(page: typing.Mapping) -> tuple[bytes, bool]:
+    """Encode a Scan API response as compact JSON, without ResponseMetadata.
+
+    Decimal, bytes, Binary and set values of document client and deserialized pages are kept.
+
+    Returns: Tuple of the JSON and whether the page has such values (see decode_page()).
+    """
+    encoder = _Encoder()
+    data = json.dumps(
+        {k: v for k, v in page.items() if k != "ResponseMetadata"}, separators=(",", ":"), default=encoder
+    ).encode()
+    return data, encoder.used
+
+
+def decode_page(data: bytes, encoded: bool) -> dict:
+    """Decode a page encoded with encode_page()."""
+    return json.loads(data, object_hook=_decode) if encoded else json.loads(data)
+
+
+class ScanCache:
+    """Stores the pages of complete scans on disk for replaying identical scans."""
+
+    def __init__(self, directory: str | os.PathLike, *, ttl: float = 3600.0, max_size: int = 1 << 30):
+        """Create a cache.
+
+        Args:
+            directory: Directory of the cache entries. Created if it does not exist.
+            ttl: Number of seconds a stored scan is used for.
+            max_size: Maximum total size of the entries in bytes. Least recently used entries are
+                removed when a new entry makes the cache larger, and scans larger than this are
+                not stored.
+        """
+        if ttl <= 0:
+            raise ValueError("ttl must be positive")
+        if max_size < 1:
+            raise ValueError("max_size must be positive")
+        self._directory = pathlib.Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_size = max_size
+
+    @staticmethod
+    def table_metadata(client: typing.Any, table_name: str) -> dict:
+        """Get the metadata of a table that invalidates cached scans when it changes.
+
+        Args:
+            client: DynamoDB client.
+            table_name: Name of the table.
+
+        Returns: ARN, creation time, item count and size of the table.
+        """
+        table = client.describe_table(TableName=table_name)["Table"]
+        return {
+            "TableArn": table.get("TableArn"),
+            "CreationDateTime": str(table.get("CreationDateTime")),
+            "ItemCount": table.get("ItemCount"),
+            "TableSizeBytes": table.get("TableSizeBytes"),
+        }
+
+    @staticmethod
+    def key(scan: typing.Mapping) -> str:
+        """Get the cache key of a scan.
+
+        Args:
+            scan: Arguments and table metadata that determine the result of the scan.
+
+        Returns: Hash of the normalized arguments.
+        """
+        normalized = json.dumps(scan, sort_keys=True, separators=(",", ":"), default=_Encoder())
+        return hashlib.sha256(normalized.encode()).hexdigest()
+
+    def get(self, key: str) -> typing.Generator[tuple[int, dict], None, None] | None:
+        """Get the pages of a stored scan.
+
+        Args:
+            key: Cache key of the scan (see key()).
+
+        Returns: Generator that yields (segment, page) tuples, or None if the scan has not been
+            stored or the entry has expired.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            # ValueError: empty file
+            return None
+        try:
+            header, offset = _read_header(mapped)
+        except ValueError:
+            header, offset = None, 0
+        if header is None or time.time() - header["Created"] >= self.ttl:
+            mapped.close()
+            path.unlink(missing_ok=True)
+            return None
+        _touch(path)
+        return _replay(mapped, offset)
+
+    def put(
+        self,
+        key: str,
+        pages: typing.Iterable[tuple[int, dict]],
+        *,
+        complete: typing.Callable[[], bool] | None = None,
+    ) -> typing.Generator[tuple[int, dict], None, None]:
+        """Store the pages of a scan as they are consumed.
+
+        The entry is stored when the consumer has processed every page, unless complete returns
+        False (e.g. when the scan was cancelled) or the pages are larger than max_size.
+
+        Args:
+            key: Cache key of the scan (see key()).
+            pages: (segment, page) tuples of the scan.
+            complete: Function that tells whether the scan returned all pages.
+
+        Returns: Generator that yields the (segment, page) tuples of pages.
+        """
+        fd, tmp = tempfile.mkstemp(dir=self._directory, prefix=".", suffix=".tmp")
+        stored = True
+        try:
+            with os.fdopen(fd, "wb") as f:
+                header = json.dumps({"Created": time.time()}).encode()
+                f.write(_HEADER.pack(_MAGIC, len(header)) + header)
+                size = _HEADER.size + len(header)
+                for segment, page in pages:
+                    if stored:
+                        data, encoded = encode_page(page)
+                        size += _RECORD.size + len(data)
+                        stored = size <= self.max_size
+                        if stored:
+                            f.write(_RECORD.pack(segment, len(data), encoded) + data)
+                    yield segment, page
+            if stored and (complete is None or complete()):
+                os.replace(tmp, self._path(key))
+                _touch(self._path(key))
+                self.evict()
+        finally:
+            pathlib.Path(tmp).unlink(missing_ok=True)
+
+    def evict(self):
+        """Remove expired entries and the least recently used entries above max_size."""
+        entries = []
+        now = time.time()
+        for path in self._directory.glob(f"*{_SUFFIX}"):
+            try:
+                with open(path, "rb") as f:
+                    header = _read_header(f.read(_HEADER.size + 4096))[0]
+                stat = path.stat()
+            except (OSError, ValueError):
+                path.unlink(missing_ok=True)
+                continue
+            if now - header["Created"] >= self.ttl:
+                path.unlink(missing_ok=True)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def clear(self):
+        """Remove all entries."""
+        for path in self._directory.glob(f"*{_SUFFIX}"):
+            path.unlink(missing_ok=True)
+
+    def _path(self, key: str) -> pathlib.Path:
+        return self._directory / f"{key}{_SUFFIX}"
+
+
+def _read_header(data: typing.Any) -> tuple[dict, int]:
+    """Read the header of an entry.
+
+    Returns: Header and offset of the first record.
+    """
+    if len(data) < _HEADER.size:
+        raise ValueError("truncated cache entry")
+    magic, length = _HEADER.unpack_from(data)
+    if magic != _MAGIC or len(data) < _HEADER.size + length:
+        raise ValueError("invalid cache entry")
+    return json.loads(bytes(data[_HEADER.size : _HEADER.size + length])), _HEADER.size + length
+
+
+def _touch(path: pathlib.Path):
+    """Set the modification time of an entry, which orders entries by last use for eviction.
+
+    The time is set explicitly because the kernel sets modification times from a clock that
+    only advances every few milliseconds.
+    """
+    now = time.time_ns()
+    os.utime(path, ns=(now, now))
+
+
+def _replay(mapped: mmap.mmap, offset: int) -> typing.Generator[tuple[int, dict], None, None]:
+    """Yield the (segment, page) tuples of an entry."""
+    with mapped:
+        end = len(mapped)
+        while offset < end:
+            segment, length, encoded = _RECORD.unpack_from(mapped, offset)
+            offset += _RECORD.size
+            data = mapped[offset : offset + length]
+            offset += length
+            yield segment, decode_page(data, encoded)
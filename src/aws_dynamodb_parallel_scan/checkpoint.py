@@ -0,0 +1,179 @@
+"""Checkpoints for resuming interrupted parallel scans.
+
+A checkpoint records the progress of each segment of a parallel scan: the
+LastEvaluatedKey of the last page the consumer has processed and whether the
+segment has been scanned completely. Checkpoints are plain dicts of form:
+
+    {
+        "TableName": "mytable",
+        "TotalSegments": 4,
+        "Segments": {
+            "0": {"ExclusiveStartKey": {"pk": {"S": "item41"}}},
+            "1": {"Done": true},
+        },
+    }
+
+Segments missing from a checkpoint have not been started yet.
+"""
+
+import abc
+import base64
+import decimal
+import json
+import os
+import tempfile
+import threading
+import typing
+
+import boto3.dynamodb.types
+
+
+class CheckpointStore(abc.ABC):
+    """Storage for scan checkpoints."""
+
+    @abc.abstractmethod
+    def load(self) -> dict | None:
+        """Load the latest checkpoint.
+
+        Returns: Checkpoint or None if no checkpoint has been saved.
+        """
+
+    @abc.abstractmethod
+    def save(self, checkpoint: dict) -> None:
+        """Save a checkpoint, replacing the previous one.
+
+        Args:
+            checkpoint: Checkpoint to save.
+        """
+
+
+class JSONFileCheckpointStore(CheckpointStore):
+    """Stores checkpoints in a local JSON file.
+
+    The file is replaced atomically on each save so an interrupted save never
+    leaves a corrupted checkpoint behind.
+    """
+
+    def __init__(self, path: str | os.PathLike):
+        """Create a JSON file checkpoint store.
+
+        Args:
+            path: Path to the checkpoint file.
+        """
+        self.path = os.fspath(path)
+
+    def load(self) -> dict | None:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f, object_hook=_decode)
+        except FileNotFoundError:
+            return None
+
+    def save(self, checkpoint: dict) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".checkpoint-", suffix=".json")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(checkpoint, f, default=_encode)
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+
+class CheckpointWriter:
+    """Collects segment progress and saves it to a store in the background.
+
+    Progress updates only modify in-memory state. A background thread saves
+    the state to the store at most once per interval, and a final save is
+    made when the writer is closed.
+    """
+
+    def __init__(self, store: CheckpointStore, checkpoint: dict, interval: float = 5.0):
+        """Create a checkpoint writer.
+
+        Args:
+            store: Store to save checkpoints to.
+            checkpoint: Initial checkpoint.
+            interval: Minimum interval between saves in seconds.
+        """
+        self._store = store
+        self._checkpoint = checkpoint
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="checkpoint-writer", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def update(self, segment: int, last_evaluated_key: typing.Any):
+        """Record that the consumer has processed a page of a segment.
+
+        Args:
+            segment: Segment number.
+            last_evaluated_key: LastEvaluatedKey of the processed page (None if it was the
+                last page of the segment).
+        """
+        state = {"ExclusiveStartKey": last_evaluated_key} if last_evaluated_key else {"Done": True}
+        with self._lock:
+            self._checkpoint["Segments"][str(segment)] = state
+            self._dirty = True
+
+    def close(self):
+        """Stop the background thread and save pending progress."""
+        self._closed.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self._flush()
+
+    def _run(self):
+        while not self._closed.wait(self._interval):
+            self._flush()
+
+    def _flush(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = {**self._checkpoint, "Segments": dict(self._checkpoint["Segments"])}
+            self._dirty = False
+        self._store.save(snapshot)
+
+
+def segment_state(checkpoint: dict | None, segment: int) -> dict:
+    """Get the recorded state of a segment.
+
+    Args:
+        checkpoint: Checkpoint to read state from (or None).
+        segment: Segment number.
+
+    Returns: Segment state (empty dict if the segment has not been started).
+    """
+    if not checkpoint:
+        return {}
+    return checkpoint.get("Segments", {}).get(str(segment), {})
+
+
+def _encode(o):
+    """Encode DynamoDB key values that are not JSON serializable."""
+    if isinstance(o, decimal.Decimal):
+        return {"__decimal__": str(o)}
+    if isinstance(o, boto3.dynamodb.types.Binary):
+        o = o.value
+    if isinstance(o, (bytes, bytearray)):
+        return {"__bytes__": base64.b64encode(o).decode("ascii")}
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def _decode(o: dict):
+    """Decode values encoded with _encode()."""
+    if "__decimal__" in o:
+        return decimal.Decimal(o["__decimal__"])
+    if "__bytes__" in o:
+        return base64.b64decode(o["__bytes__"])
+    return o
@@ -0,0 +1,119 @@
+"""DynamoDB clients with connection pools sized for parallel scans.
+
+A botocore client keeps at most max_pool_connections (default: 10) HTTP
+connections to DynamoDB. Scan threads beyond that wait for a free
+connection, and urllib3 logs "Connection pool is full" warnings when
+connections are returned to a full pool. Clients created with this module
+have a pool large enough for the concurrency of the scan and keep idle
+connections alive with TCP keep-alive.
+
+Each client's pool is guarded by a single lock. With hundreds of scan
+threads, segments can be sharded between several clients (see
+create_clients() and Paginator) so that threads contend for different locks.
+"""
+
+import typing
+
+import boto3
+import botocore.config
+
+from . import convert
+
+# Default max_pool_connections of botocore
+DEFAULT_MAX_POOL_CONNECTIONS = 10
+
+# Response key that Items are kept in while the document client converts a response
+_LOW_LEVEL_ITEMS = "_LowLevelItems"
+
+
+def client_config(max_pool_connections: int, config: botocore.config.Config | None = None) -> botocore.config.Config:
+    """Get client config for given number of concurrent requests.
+
+    Args:
+        max_pool_connections: Number of concurrent requests made with the client. The pool
+            never gets smaller than the botocore default.
+        config: Config to merge on top of the tuned config (e.g. to change retries or timeouts).
+
+    Returns: Config with max_pool_connections and TCP keep-alive. Retries keep the botocore
+        defaults (or the configuration of the environment) unless config sets them.
+    """
+    tuned = botocore.config.Config(
+        max_pool_connections=max(max_pool_connections, DEFAULT_MAX_POOL_CONNECTIONS),
+        tcp_keepalive=True,
+    )
+    return tuned.merge(config) if config else tuned
+
+
+def create_client(
+    max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS,
+    *,
+    document: bool = False,
+    numbers: str | None = None,
+    session: boto3.Session | None = None,
+    config: botocore.config.Config | None = None,
+    **kwargs,
+) -> typing.Any:
+    """Create a DynamoDB client for a parallel scan.
+
+    Args:
+        max_pool_connections: Number of concurrent requests made with the client (e.g. the
+            max_workers or TotalSegments of the scan).
+        document: Create a client that converts DynamoDB types to native types (the client of
+            a boto3 DynamoDB service resource).
+        numbers: Convert the Items of Scan and Query responses of the document client with
+            convert.item_converter(numbers) instead of the TypeDeserializer of boto3, e.g. "int"
+            to get int and float numbers that can be encoded as JSON without converting
+            Decimals. Other parts of the responses are converted by boto3.
+        session: boto3 session to create the client with (default: the default session).
+        config: Config to merge on top of the tuned config (see client_config()).
+        **kwargs: Arguments for boto3 client(), such as region_name or endpoint_url.
+
+    Returns: DynamoDB client.
+    """
+    factory: typing.Any = session or boto3
+    config = client_config(max_pool_connections, config)
+    if numbers and not document:
+        raise ValueError("numbers requires a document client")
+    if document:
+        client = factory.resource("dynamodb", config=config, **kwargs).meta.client
+        if numbers:
+            _convert_items(client, numbers)
+        return client
+    return factory.client("dynamodb", config=config, **kwargs)
+
+
+def _convert_items(client: typing.Any, numbers: str):
+    """Convert the Items of Scan and Query responses of a document client with convert.item_converter()."""
+    convert_item = convert.item_converter(numbers)
+
+    # Items are taken out of the response before boto3 converts it, and put back converted.
+    # Handlers of an operation are called before the ones of the service (like the handler of
+    # boto3), so the Items are put back by a handler of the service registered after it.
+    def take_items(parsed: dict, **_):
+        if "Items" in parsed:
+            # Items keep their position in the response (and in the JSON output of pages)
+            parsed[_LOW_LEVEL_ITEMS], parsed["Items"] = parsed["Items"], []
+
+    def put_items(parsed: dict, **_):
+        if _LOW_LEVEL_ITEMS in parsed:
+            parsed["Items"] = [convert_item(item) for item in parsed.pop(_LOW_LEVEL_ITEMS)]
+
+    for operation in ("Scan", "Query"):
+        client.meta.events.register_first(f"after-call.dynamodb.{operation}", take_items)
+    client.meta.events.register_last("after-call.dynamodb", put_items)
+
+
+def create_clients(count: int, max_workers: int, **kwargs) -> list:
+    """Create clients to shard the segments of a parallel scan between.
+
+    Args:
+        count: Number of clients.
+        max_workers: Number of concurrent requests of the scan. The connection pool of each
+            client is sized for its share of the requests.
+        **kwargs: Arguments for create_client().
+
+    Returns: List of DynamoDB clients to give to Paginator.
+    """
+    if count < 1:
+        raise ValueError("count must be positive")
+    return [create_client(-(-max_workers // count), **kwargs) for _ in range(count)]
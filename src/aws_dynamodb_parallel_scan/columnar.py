@@ -0,0 +1,252 @@
+"""Columnar (Parquet and Arrow IPC) output of scan results.
+
+ColumnarWriter collects items of low-level Scan responses into batches of
+at most batch_size items and writes each batch as a record batch (a row
+group in Parquet files), so memory use does not depend on the size of the
+table. Output is split into files of about max_file_size bytes named
+<prefix>-00000.parquet, <prefix>-00001.parquet and so on.
+
+The schema is inferred from DynamoDB attribute types:
+
+* S: string, B: binary, BOOL: bool
+* N: int64 for integers that fit into 64 bits, float64 otherwise
+* M, L, SS, NS and BS: string containing the value as JSON (binary values
+  base64 encoded)
+* NULL: null
+
+A column that has values of different types is widened: int64 to float64
+and anything else to string. All record batches of a file have the same
+schema, so a file is closed and a new one started when a batch needs a
+column the file does not have or a wider type for one. Batches that fit the
+schema of the current file are cast to it.
+
+Requires pyarrow (pip install aws-dynamodb-parallel-scan[arrow]).
+"""
+
+import base64
+import json
+import typing
+
+try:
+    import pyarrow  # type: ignore[import-untyped]
+    import pyarrow.ipc  # type: ignore[import-untyped]
+    import pyarrow.parquet  # type: ignore[import-untyped]
+except ImportError:  # pragma: no cover
+    pyarrow = None  # type: ignore[assignment]
+
+from . import convert
+
+OUTPUT_FORMATS = ("parquet", "arrow")
+
+# Column types and names of the pyarrow functions that create them
+_ARROW_TYPES = {
+    "null": "null",
+    "bool": "bool_",
+    "int64": "int64",
+    "float64": "float64",
+    "string": "string",
+    "binary": "binary",
+}
+
+_INT64_MIN = -(1 << 63)
+_INT64_MAX = (1 << 63) - 1
+
+
+def _number_kind(value: str) -> str:
+    if value.lstrip("-").isdigit() and _INT64_MIN <= int(value) <= _INT64_MAX:
+        return "int64"
+    return "float64"
+
+
+_KINDS: dict[str, typing.Callable[[typing.Any], str]] = {
+    "S": lambda _: "string",
+    "B": lambda _: "binary",
+    "BOOL": lambda _: "bool",
+    "NULL": lambda _: "null",
+    "N": _number_kind,
+}
+
+
+def _kind(value: dict) -> str:
+    """Get the column type of a low-level attribute value."""
+    ((tag, data),) = value.items()
+    return _KINDS[tag](data) if tag in _KINDS else "string"
+
+
+def _widen(a: str, b: str) -> str:
+    """Get a column type that can hold values of both types."""
+    if a == b or b == "null":
+        return a
+    if a == "null":
+        return b
+    if {a, b} == {"int64", "float64"}:
+        return "float64"
+    return "string"
+
+
+_to_native = convert.item_converter("int")
+
+
+def _json_default(o):
+    if isinstance(o, (set, frozenset)):
+        return sorted(o, key=str)
+    if isinstance(o, bytes):
+        return base64.b64encode(o).decode()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def _to_string(value: dict) -> str:
+    ((tag, data),) = value.items()
+    if tag in ("S", "N"):
+        return data
+    if tag == "BOOL":
+        return "true" if data else "false"
+    if tag == "B":
+        return base64.b64encode(data).decode()
+    return json.dumps(_to_native({"v": value})["v"], default=_json_default, separators=(",", ":"))
+
+
+def _cell(value: dict | None, kind: str):
+    """Convert a low-level attribute value to a value of given column type."""
+    if value is None or "NULL" in value:
+        return None
+    if kind == "string":
+        return _to_string(value)
+    (data,) = value.values()
+    if kind == "int64":
+        return int(data)
+    if kind == "float64":
+        return float(data)
+    return data  # string, binary and bool values are stored as-is
+
+
+def _batch_schema(items: list[dict]) -> dict[str, str]:
+    """Infer column types of a batch of low-level items."""
+    schema: dict[str, str] = {}
+    for item in items:
+        for name, value in item.items():
+            kind = _kind(value)
+            schema[name] = _widen(schema[name], kind) if name in schema else kind
+    return schema
+
+
+class ColumnarWriter:
+    """Writes items of low-level Scan API responses to size-rotated Parquet or Arrow IPC files."""
+
+    def __init__(
+        self,
+        path_prefix: str,
+        output_format: str = "parquet",
+        *,
+        max_file_size: int = 256 << 20,
+        batch_size: int = 10000,
+    ):
+        """Create a writer.
+
+        Args:
+            path_prefix: Path and name prefix of the output files.
+            output_format: "parquet" or "arrow" (Arrow IPC file format).
+            max_file_size: Approximate maximum size of an output file in bytes. A file is closed
+                when it has grown larger than this after writing a batch.
+            batch_size: Maximum number of items to hold in memory and to write as one record batch.
+        """
+        if pyarrow is None:
+            raise ValueError("columnar output requires the pyarrow package")
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"output_format must be one of {', '.join(OUTPUT_FORMATS)}")
+        if max_file_size < 1 or batch_size < 1:
+            raise ValueError("max_file_size and batch_size must be positive")
+        self._path_prefix = path_prefix
+        self._output_format = output_format
+        self._max_file_size = max_file_size
+        self._batch_size = batch_size
+        self._items: list[dict] = []
+        self._schema: dict[str, str] = {}
+        self._sink: typing.Any = None
+        self._file_writer: typing.Any = None
+        self.files: list[str] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write_page(self, page: typing.Mapping):
+        """Add the items of a low-level Scan API response."""
+        self._items.extend(page.get("Items", []))
+        while len(self._items) >= self._batch_size:
+            batch, self._items = self._items[: self._batch_size], self._items[self._batch_size :]
+            self._write_batch(batch)
+
+    def close(self) -> list[str]:
+        """Write remaining items, close the current file and return the paths of written files."""
+        if self._items:
+            batch, self._items = self._items, []
+            self._write_batch(batch)
+        self._close_file()
+        return self.files
+
+    def _write_batch(self, items: list[dict]):
+        batch_schema = _batch_schema(items)
+        merged = dict(self._schema)
+        for name, kind in batch_schema.items():
+            merged[name] = _widen(merged[name], kind) if name in merged else kind
+        if self._file_writer and merged != self._schema:
+            self._close_file()
+        self._schema = merged
+
+        arrow_schema = pyarrow.schema([(name, getattr(pyarrow, _ARROW_TYPES[kind])()) for name, kind in merged.items()])
+        columns = [[_cell(item.get(name), kind) for item in items] for name, kind in merged.items()]
+        record_batch = pyarrow.RecordBatch.from_arrays(
+            [pyarrow.array(column, type=field.type) for column, field in zip(columns, arrow_schema)],
+            schema=arrow_schema,
+        )
+        if not self._file_writer:
+            self._open_file(arrow_schema)
+        self._file_writer.write_batch(record_batch)
+        if self._sink.tell() >= self._max_file_size:
+            self._close_file()
+
+    def _open_file(self, arrow_schema):
+        path = f"{self._path_prefix}-{len(self.files):05d}.{self._output_format}"
+        self._sink = pyarrow.OSFile(path, "wb")
+        if self._output_format == "parquet":
+            self._file_writer = pyarrow.parquet.ParquetWriter(self._sink, arrow_schema)
+        else:
+            self._file_writer = pyarrow.ipc.new_file(self._sink, arrow_schema)
+        self.files.append(path)
+
+    def _close_file(self):
+        if self._file_writer:
+            self._file_writer.close()
+            self._sink.close()
+            self._file_writer = self._sink = None
+
+
+def scan_to_files(
+    paginator: typing.Any,
+    path_prefix: str,
+    *,
+    output_format: str = "parquet",
+    max_file_size: int = 256 << 20,
+    batch_size: int = 10000,
+    **kwargs,
+) -> list[str]:
+    """Scan a table with a paginator and write the items to Parquet or Arrow IPC files.
+
+    Args:
+        paginator: Paginator (see get_paginator()) with a low-level DynamoDB client.
+        path_prefix: Path and name prefix of the output files.
+        output_format: "parquet" or "arrow".
+        max_file_size: Approximate maximum size of an output file in bytes.
+        batch_size: Maximum number of items to hold in memory and to write as one record batch.
+        **kwargs: Arguments for Paginator.paginate().
+
+    Returns: Paths of the written files.
+    """
+    writer = ColumnarWriter(path_prefix, output_format, max_file_size=max_file_size, batch_size=batch_size)
+    with writer:
+        for page in paginator.paginate(**kwargs):
+            writer.write_page(page)
+    return writer.files
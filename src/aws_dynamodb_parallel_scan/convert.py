@@ -0,0 +1,121 @@
+"""Conversion of low-level DynamoDB items to native Python types.
+
+The document client of boto3 (boto3.resource("dynamodb").meta.client)
+converts responses with the generic TypeDeserializer through event hooks that
+walk the whole response shape, and creates a Decimal for every number. The
+converters in this module only convert Items of Scan responses of a low-level
+client with a lookup table of type handlers, and let the caller choose the
+type of numbers.
+
+Converted values match the ones of the document client, except that binary
+values are returned as bytes instead of boto3.dynamodb.types.Binary.
+"""
+
+import decimal
+import math
+import typing
+
+NUMBER_TYPES = ("decimal", "int", "float", "str")
+
+
+def _int_or_float(value: str) -> int | float:
+    """Convert a DynamoDB number to int if it is an integer, to float otherwise.
+
+    The result is the same as converting the Decimal of the document client (e.g. "1E+2"
+    is 100), but the Decimal is only created for numbers that look like integers as floats.
+    """
+    if value.lstrip("-").isdigit():
+        return int(value)
+    number = float(value)
+    if number.is_integer() or not math.isfinite(number):
+        exact = decimal.Decimal(value)
+        if exact == exact.to_integral_value():
+            return int(exact)
+    return number
+
+
+_NUMBERS: dict[str, typing.Callable[[str], typing.Any]] = {
+    "decimal": decimal.Decimal,
+    "int": _int_or_float,
+    "float": float,
+    "str": str,
+}
+
+# Types whose low-level values are returned as-is
+_PLAIN = frozenset(("S", "B", "BOOL"))
+
+
+def item_converter(numbers: str = "decimal") -> typing.Callable[[dict], dict]:
+    """Create a function that converts a low-level DynamoDB item to native types.
+
+    Args:
+        numbers: Type to convert numbers to: "decimal" (decimal.Decimal, like the document
+            client), "int" (int for integers, float otherwise), "float" or "str".
+
+    Returns: Function that converts an item (e.g. {"pk": {"S": "a"}}) to a dict of native
+        values (e.g. {"pk": "a"}).
+    """
+    if numbers not in _NUMBERS:
+        raise ValueError(f"numbers must be one of {', '.join(NUMBER_TYPES)}")
+    number = _NUMBERS[numbers]
+
+    # Values are unpacked in the comprehensions to avoid a function call per plain value
+    def convert_map(value: dict) -> dict:
+        return {k: data if tag in _PLAIN else handlers[tag](data) for k, v in value.items() for tag, data in v.items()}
+
+    def convert_list(value: list) -> list:
+        return [data if tag in _PLAIN else handlers[tag](data) for v in value for tag, data in v.items()]
+
+    handlers: dict[str, typing.Callable[[typing.Any], typing.Any]] = {
+        "N": number,
+        "NULL": lambda _: None,
+        "M": convert_map,
+        "L": convert_list,
+        "SS": set,
+        "NS": lambda value: set(map(number, value)),
+        "BS": set,
+    }
+    return convert_map
+
+
+def value_converter(numbers: str = "decimal") -> typing.Callable[[dict], typing.Any]:
+    """Create a function that converts a single low-level DynamoDB value to a native type.
+
+    Args:
+        numbers: Type to convert numbers to (see item_converter()).
+
+    Returns: Function that converts a value (e.g. {"S": "a"}) to a native value (e.g. "a").
+    """
+    convert_map = item_converter(numbers)
+    number = _NUMBERS[numbers]
+
+    def convert_value(value: dict) -> typing.Any:
+        for tag, data in value.items():
+            if tag in _PLAIN:
+                return data
+            if tag == "N":
+                return number(data)
+        return convert_map({"": value})[""]
+
+    return convert_value
+
+
+def page_converter(numbers: str = "decimal") -> typing.Callable[[dict], dict]:
+    """Create a function that converts Items of a Scan API response to native types.
+
+    Other parts of the response, including LastEvaluatedKey, keep DynamoDB types so the
+    response can be used to continue the scan with the low-level client.
+
+    Args:
+        numbers: Type to convert numbers to (see item_converter()).
+
+    Returns: Function that returns a converted copy of a response.
+    """
+    convert_item = item_converter(numbers)
+
+    def convert_page(page: dict) -> dict:
+        if "Items" not in page:
+            return page
+        return {**page, "Items": [convert_item(item) for item in page["Items"]]}
+
+    return convert_page
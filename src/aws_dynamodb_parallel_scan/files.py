@@ -0,0 +1,257 @@
+"""Compressed and split JSON lines file output of scan results.
+
+FileWriter writes scan results as JSON lines to files in a directory,
+either size-rotated files shared by all segments (part-00000.jsonl,
+part-00001.jsonl and so on) or separate files for each segment
+(segment-00003-00000.jsonl and so on).
+
+Pages are encoded in the consumer thread and collected into chunks of
+about chunk_size bytes. With many segments, the largest buffered chunk is
+flushed early when the buffers of all files exceed max_buffered_chunks
+chunks. Each chunk is compressed in a thread pool as a
+complete gzip member or zstd frame, and compressed chunks are appended to
+their file in order. Concatenated gzip members and zstd frames are valid
+gzip and zstd files, so files can be read with the standard tools. zlib and
+zstandard release the GIL while compressing, so chunks are compressed on
+several cores in parallel with the scan.
+
+When the writer is closed, a manifest (manifest.json) listing the files
+with their item counts and sizes is written to the directory.
+
+zstd compression requires zstandard (pip install aws-dynamodb-parallel-scan[zstd]).
+"""
+
+import collections
+import concurrent.futures
+import dataclasses
+import gzip
+import json
+import operator
+import os
+import pathlib
+import typing
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None  # type: ignore[assignment]
+
+from . import output
+
+COMPRESSIONS = ("none", "gzip", "zstd")
+SPLITS = ("size", "segment")
+
+MANIFEST_NAME = "manifest.json"
+
+_EXTENSIONS = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+
+
+def _compressor(compression: str, level: int | None) -> typing.Callable[[bytes], bytes]:
+    """Get function that compresses a chunk as a self-contained gzip member or zstd frame."""
+    if compression == "gzip":
+        gzip_level = 6 if level is None else level
+        return lambda data: gzip.compress(data, compresslevel=gzip_level, mtime=0)
+    if compression == "zstd":
+        zstd_level = 3 if level is None else level
+        # Compressor objects must not be shared between threads
+        return lambda data: zstandard.ZstdCompressor(level=zstd_level).compress(data)
+    return bytes
+
+
+@dataclasses.dataclass
+class _File:
+    """Output file and its chunks waiting to be compressed or written."""
+
+    path: pathlib.Path
+    segment: int | None
+    items: int = 0
+    size: int = 0
+    uncompressed_size: int = 0
+    buffer: list[bytes] = dataclasses.field(default_factory=list)
+    buffered: int = 0
+    pending: collections.deque = dataclasses.field(default_factory=collections.deque)
+    chunks: int = 0
+    created: bool = False
+
+
+class FileWriter:
+    """Writes scan results as JSON lines to compressed and split files in a directory."""
+
+    def __init__(
+        self,
+        directory: str | os.PathLike,
+        *,
+        split: str = "size",
+        compression: str = "none",
+        compression_level: int | None = None,
+        max_file_size: int = 256 << 20,
+        output_items: bool = False,
+        encoder: str = "json",
+        chunk_size: int = 1 << 20,
+        max_buffered_chunks: int = 16,
+        max_workers: int | None = None,
+        metadata: dict | None = None,
+    ):  # pylint: disable=too-many-arguments
+        """Create a writer.
+
+        Args:
+            directory: Directory to write the files to. Created if it does not exist. The
+                manifest of a previous run in the directory is removed.
+            split: "size" to write all segments to size-rotated files, or "segment" to write
+                each segment to its own files (requires pages with segments, see write_page()).
+            compression: "none", "gzip" or "zstd" (requires zstandard).
+            compression_level: Compression level (default: 6 for gzip, 3 for zstd).
+            max_file_size: Start a new file when a file has this many bytes of JSON lines (before
+                compression). Applies to the files of each segment with split="segment".
+            output_items: Write the items of each page (one per line) instead of the page.
+            encoder: JSON encoder to use (see output.json_lines_encoder()).
+            chunk_size: Number of bytes of JSON lines to compress and write at a time.
+            max_buffered_chunks: Maximum size of the uncompressed output buffered across all files
+                in chunks (matters with split="segment" and many segments).
+            max_workers: Number of compression threads (default: number of CPUs).
+            metadata: Additional values for the manifest, such as the table name.
+        """
+        if split not in SPLITS:
+            raise ValueError(f"split must be one of {', '.join(SPLITS)}")
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"compression must be one of {', '.join(COMPRESSIONS)}")
+        if compression == "zstd" and zstandard is None:
+            raise ValueError("zstd compression requires the zstandard package")
+        if max_file_size < 1 or chunk_size < 1 or max_buffered_chunks < 1:
+            raise ValueError("max_file_size, chunk_size and max_buffered_chunks must be positive")
+        self._directory = pathlib.Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+        # Files of a previous run are overwritten, but its manifest would make the output of an
+        # interrupted run look complete
+        (self._directory / MANIFEST_NAME).unlink(missing_ok=True)
+        self._split = split
+        self._compression = compression
+        self._compress = _compressor(compression, compression_level)
+        self._max_file_size = max_file_size
+        self._output_items = output_items
+        self._encode = output.json_lines_encoder(encoder)
+        self._chunk_size = chunk_size
+        self._max_buffered = max_buffered_chunks * chunk_size
+        # Bytes buffered across all open files
+        self._buffered = 0
+        self._max_workers = max_workers or os.cpu_count() or 1
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self._max_workers)
+        self._metadata = metadata or {}
+        # Open file of each segment (or of all segments with key None)
+        self._open: dict[int | None, _File] = {}
+        self._counters: collections.Counter = collections.Counter()
+        # Files with compressed chunks that have not been written, in submission order
+        self._pending: collections.deque[_File] = collections.deque()
+        self._closed = False
+        self.files: list[_File] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            # Leave the output without a manifest so that it is not mistaken for a complete one
+            self._closed = True
+            self._executor.shutdown(cancel_futures=True)
+
+    def write_page(self, page: typing.Mapping, segment: int | None = None):
+        """Write a Scan API response (or its items).
+
+        Args:
+            page: Scan API response.
+            segment: Segment of the page. Required with split="segment".
+        """
+        if self._split == "segment" and segment is None:
+            raise ValueError('segment is required with split="segment"')
+        items = page.get("Items", [])
+        data = self._encode(items if self._output_items else [page])
+        file = self._file(segment if self._split == "segment" else None)
+        file.items += len(items)
+        file.buffer.append(data)
+        file.buffered += len(data)
+        file.uncompressed_size += len(data)
+        self._buffered += len(data)
+        if file.buffered >= self._chunk_size:
+            self._submit(file)
+        if file.uncompressed_size >= self._max_file_size:
+            self._submit(file)
+            del self._open[file.segment]
+        if self._buffered >= self._max_buffered:
+            self._submit(max(self._open.values(), key=operator.attrgetter("buffered")))
+
+    def close(self) -> dict:
+        """Write all buffered output and the manifest.
+
+        Returns: The manifest.
+        """
+        if self._closed:
+            return self.manifest()
+        try:
+            for file in self._open.values():
+                self._submit(file)
+            self._open.clear()
+            while self._pending:
+                self._write_next()
+        finally:
+            self._closed = True
+            self._executor.shutdown(cancel_futures=True)
+        manifest = self.manifest()
+        path = self._directory / MANIFEST_NAME
+        path.write_text(json.dumps(manifest, indent=2) + "\n", encoding="utf-8")
+        return manifest
+
+    def manifest(self) -> dict:
+        """Get the manifest of the files written so far."""
+        files = []
+        for file in self.files:
+            entry: dict = {"Path": file.path.name, "Items": file.items, "Size": file.size}
+            if file.segment is not None:
+                entry["Segment"] = file.segment
+            files.append(entry)
+        return {
+            **self._metadata,
+            "Split": self._split,
+            "Compression": self._compression,
+            "Items": sum(file.items for file in self.files),
+            "Files": files,
+        }
+
+    def _file(self, segment: int | None) -> _File:
+        """Get the open file of a segment, starting a new one if needed."""
+        file = self._open.get(segment)
+        if file is None:
+            index = self._counters[segment]
+            self._counters[segment] += 1
+            name = f"part-{index:05d}" if segment is None else f"segment-{segment:05d}-{index:05d}"
+            path = self._directory / f"{name}.jsonl{_EXTENSIONS[self._compression]}"
+            file = self._open[segment] = _File(path, segment)
+            self.files.append(file)
+        return file
+
+    def _submit(self, file: _File):
+        """Compress the buffered output of a file in the thread pool."""
+        if not file.buffer and file.chunks:
+            return
+        data = b"".join(file.buffer)
+        file.buffer.clear()
+        self._buffered -= file.buffered
+        file.buffered = 0
+        file.chunks += 1
+        file.pending.append(self._executor.submit(self._compress, data))
+        self._pending.append(file)
+        # Bound the memory of chunks in flight, keeping every compression thread busy
+        while len(self._pending) > 2 * self._max_workers:
+            self._write_next()
+        while self._pending and self._pending[0].pending[0].done():
+            self._write_next()
+
+    def _write_next(self):
+        """Write the oldest compressed chunk to its file."""
+        file = self._pending.popleft()
+        data = file.pending.popleft().result()
+        with open(file.path, "ab" if file.created else "wb") as f:
+            f.write(data)
+        file.created = True
+        file.size += len(data)
@@ -0,0 +1,339 @@
+"""Incremental scans that return only the items changed since the previous run.
+
+Two strategies are supported:
+
+* Watermark (scan_changed_since()): items have an attribute that is
+  updated on every write, such as a modification timestamp. The scan
+  filters items by the attribute with a FilterExpression, so unchanged items
+  are not returned at all (they are still read and consume read capacity).
+  A watermark known before the scan starts (usually the current time, see
+  clock()) is saved for the next run when the scan completes, so items
+  changed while the scan is running are returned again by the next run.
+  Items with the watermark value are returned again too. Changes are
+  delivered at least once as long as the writers never set the attribute
+  to a value below the saved watermark, e.g. because of clock skew (use a
+  lookback to allow for it).
+* Digest index (DigestIndex): no attribute is needed. Every item is
+  returned by the scan and compared with a local SQLite index of key and
+  content hashes from the previous run. Only inserted, modified and removed
+  items are emitted, as records shaped like DynamoDB Streams records
+  (EventName INSERT, MODIFY or REMOVE with Keys and NewImage).
+
+Both strategies only record the new state when the consumer has processed
+everything, so an interrupted run is repeated in full the next time.
+"""
+
+import base64
+import datetime
+import decimal
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import typing
+
+from . import _common, checkpoint
+
+_WATERMARK_NAME = "#watermark"
+_WATERMARK_VALUE = ":watermark"
+
+WATERMARK_FORMATS = ("epoch", "epoch-ms", "iso8601")
+
+
+def _typed(value: typing.Any) -> dict:
+    """Get a watermark value (native or DynamoDB typed) as a DynamoDB typed N or S value."""
+    if isinstance(value, dict):
+        if len(value) != 1 or next(iter(value)) not in ("N", "S"):
+            raise ValueError(f"watermark attribute must be a number or a string, got {value!r}")
+        return value
+    if isinstance(value, (int, float, decimal.Decimal)) and not isinstance(value, bool):
+        return {"N": str(value)}
+    if isinstance(value, str):
+        return {"S": value}
+    raise ValueError(f"watermark attribute must be a number or a string, got {type(value).__name__}")
+
+
+def _native(value: dict) -> typing.Any:
+    """Get a typed watermark value as a native value (Decimal or str) that can be compared."""
+    return decimal.Decimal(value["N"]) if "N" in value else value["S"]
+
+
+def clock(watermark_format: str, *, lookback: float = 0.0) -> typing.Callable[[], typing.Any]:
+    """Create a function that returns the current time as a watermark.
+
+    Args:
+        watermark_format: Format of the timestamp attribute: "epoch" (seconds since the
+            epoch), "epoch-ms" (milliseconds since the epoch) or "iso8601" (UTC string
+            such as 2026-01-01T00:00:00Z, 2026-01-01T00:00:00.123Z or
+            2026-01-01T00:00:00.123+00:00). The iso8601 watermark has no fraction or time
+            zone (2026-01-01T00:00:00), so it is a prefix of all the attribute values of the
+            same second and sorts before them.
+        lookback: Seconds to subtract from the current time, to allow for writers whose
+            clocks are behind.
+
+    Returns: Function that returns the current time minus lookback, rounded down.
+    """
+    if watermark_format not in WATERMARK_FORMATS:
+        raise ValueError(f"watermark_format must be one of {', '.join(WATERMARK_FORMATS)}")
+    if lookback < 0:
+        raise ValueError("lookback must not be negative")
+
+    def now() -> typing.Any:
+        timestamp = time.time() - lookback
+        if watermark_format == "epoch":
+            return int(timestamp)
+        if watermark_format == "epoch-ms":
+            return int(timestamp * 1000)
+        # "." (fraction), "+" (offset) and "Z" sort after the prefix, but before each other
+        return datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+
+    return now
+
+
+def changed_since_args(kwargs: dict, attribute: str, watermark: typing.Any, *, document: bool = False) -> dict:
+    """Add a filter for items whose attribute is at least watermark to Scan arguments.
+
+    Args:
+        kwargs: Scan arguments. An existing FilterExpression is combined with the filter.
+        attribute: Name of the attribute updated on every write.
+        watermark: Smallest attribute value to return, native or DynamoDB typed.
+        document: Give the value with native types (for a document client).
+
+    Returns: Scan arguments with the filter.
+    """
+    value = _typed(watermark)
+    condition = f"{_WATERMARK_NAME} >= {_WATERMARK_VALUE}"
+    existing = kwargs.get("FilterExpression")
+    return {
+        **kwargs,
+        "FilterExpression": f"({existing}) AND {condition}" if existing else condition,
+        "ExpressionAttributeNames": {**kwargs.get("ExpressionAttributeNames", {}), _WATERMARK_NAME: attribute},
+        "ExpressionAttributeValues": {
+            **kwargs.get("ExpressionAttributeValues", {}),
+            _WATERMARK_VALUE: _native(value) if document else value,
+        },
+    }
+
+
+def scan_changed_since(
+    paginator: typing.Any,
+    attribute: str,
+    store: checkpoint.CheckpointStore,
+    *,
+    next_watermark: typing.Any,
+    initial: typing.Any = None,
+    document: bool = False,
+    **kwargs,
+):
+    """Scan the items whose attribute has changed since the watermark of the previous run.
+
+    The watermark is loaded from store. If there is none, the scan returns all items (or
+    the items with attribute of at least initial). When the consumer has processed all pages,
+    next_watermark is saved to store as the watermark of the next run. The watermark is not
+    saved if the scan is stopped early (the consumer stops or cancel is cancelled) or fails.
+    max_items and a subset of segments are not supported, as they never scan the whole table.
+
+    next_watermark must be known before the scan starts and must not be larger than the
+    attribute value of any write that has not completed yet, usually the current time (see
+    clock()). The largest value seen by the scan cannot be used: an item in a segment that
+    has already been scanned can be updated with a smaller value while later segments are
+    scanned, and the next run would miss it.
+
+    Args:
+        paginator: Paginator to scan with (see get_paginator()).
+        attribute: Name of the attribute updated on every write, such as a modification
+            timestamp (a number or an ISO 8601 string).
+        store: Store for the watermark, e.g. checkpoint.JSONFileCheckpointStore.
+        next_watermark: Watermark to save for the next run, or a function that returns it.
+            The function is called before the scan starts.
+        initial: Watermark to use if store does not have one.
+        document: The paginator uses a document client (filter values have native types).
+        **kwargs: Arguments for Paginator.paginate().
+
+    Returns: Generator that yields Scan API responses.
+
+    Raises:
+        ValueError: If the attribute or the watermarks mix number and string values.
+
+    Example:
+        store = checkpoint.JSONFileCheckpointStore("mytable-watermark.json")
+        next_watermark = incremental.clock("iso8601", lookback=60)
+        for page in incremental.scan_changed_since(
+            paginator, "updated_at", store, next_watermark=next_watermark, TableName="mytable"
+        ):
+            ...
+    """
+    if kwargs.get("max_items"):
+        raise ValueError("max_items cannot be used with scan_changed_since")
+    if kwargs.get("segments") is not None:
+        raise ValueError("segments cannot be used with scan_changed_since")
+    if kwargs.get("checkpoint_store") or kwargs.get("resume_from"):
+        raise ValueError("checkpoint_store and resume_from cannot be used with scan_changed_since")
+    saved = store.load()
+    if saved is not None and saved.get("Attribute") != attribute:
+        raise ValueError(f"watermark was saved for attribute {saved.get('Attribute')!r}, not {attribute!r}")
+    watermark = saved["Watermark"] if saved and saved.get("Watermark") is not None else initial
+    scan_args = changed_since_args(kwargs, attribute, watermark, document=document) if watermark is not None else kwargs
+
+    # Take the next watermark before the first request
+    latest = _typed(next_watermark() if callable(next_watermark) else next_watermark)
+    kind = next(iter(latest))
+    if watermark is not None and next(iter(_typed(watermark))) != kind:
+        raise ValueError(f"watermarks of attribute {attribute!r} mix number and string values")
+
+    for page in paginator.paginate(**scan_args):
+        for item in page.get("Items", []):
+            value = item.get(attribute)
+            if value is not None and next(iter(_typed(value))) != kind:
+                raise ValueError(f"attribute {attribute!r} mixes number and string values")
+        yield page
+
+    cancel = kwargs.get("cancel")
+    if cancel is not None and cancel.cancelled:
+        # paginate() returns normally when cancelled, but segments may not have been scanned
+        return
+    store.save(
+        {
+            **_common.scan_metadata(kwargs),
+            "Attribute": attribute,
+            "Watermark": latest,
+        }
+    )
+
+
+def _canonical(value: typing.Any) -> typing.Any:
+    """Convert an item (native or DynamoDB typed) to a JSON serializable value with sets in order."""
+    if isinstance(value, dict):
+        if len(value) == 1 and next(iter(value)) in ("SS", "NS", "BS"):
+            kind, values = next(iter(value.items()))
+            return {kind: sorted(_canonical(v) for v in values)}
+        return {k: _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, (set, frozenset)):
+        return {"__set__": sorted(json.dumps(_canonical(v), sort_keys=True) for v in value)}
+    if isinstance(value, decimal.Decimal):
+        return {"__decimal__": str(value)}
+    if isinstance(value, (bytes, bytearray)):
+        return {"__bytes__": base64.b64encode(value).decode("ascii")}
+    if hasattr(value, "value") and isinstance(value.value, bytes):
+        # boto3.dynamodb.types.Binary
+        return {"__bytes__": base64.b64encode(value.value).decode("ascii")}
+    return value
+
+
+def _dumps(value: typing.Any) -> str:
+    return json.dumps(_canonical(value), sort_keys=True, separators=(",", ":"))
+
+
+def _decode(o: dict) -> typing.Any:
+    """Decode values encoded by _canonical()."""
+    if "__decimal__" in o:
+        return decimal.Decimal(o["__decimal__"])
+    if "__bytes__" in o:
+        return base64.b64decode(o["__bytes__"])
+    return o
+
+
+def _loads(text: str) -> typing.Any:
+    return json.loads(text, object_hook=_decode)
+
+
+class DigestIndex:
+    """Local index of item digests for finding the items changed since the previous run.
+
+    The index is a SQLite database with a row for each item: its key (as JSON) and a 16 byte
+    BLAKE2b hash of its content. Items are compared with the index in the consumer thread.
+    """
+
+    def __init__(self, path: str | os.PathLike):
+        """Open an index, creating it if it does not exist.
+
+        Args:
+            path: Path to the SQLite database file.
+        """
+        self._db = sqlite3.connect(os.fspath(path), isolation_level=None)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS digests (key TEXT PRIMARY KEY, digest BLOB NOT NULL, run INTEGER NOT NULL)"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS runs (run INTEGER PRIMARY KEY)")
+        # Keys of the batch of items being compared
+        self._db.execute("CREATE TEMP TABLE batch (key TEXT PRIMARY KEY)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Close the index."""
+        self._db.close()
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM digests").fetchone()[0]
+
+    def changes(
+        self, pages: typing.Iterable[typing.Mapping], key_attributes: typing.Sequence[str], batch_size: int = 1000
+    ) -> typing.Iterator[dict]:
+        """Compare the items of a full scan with the index and yield the changes.
+
+        Yields records with EventName INSERT (new key), MODIFY (content changed) or REMOVE
+        (key not returned by the scan), Keys and NewImage (not for REMOVE). REMOVE records
+        are yielded after all pages have been compared. The index is updated to the scanned
+        state in a single transaction that is committed when the consumer has processed all
+        records, and rolled back if the run is interrupted.
+
+        Args:
+            pages: Scan API responses of a complete scan of the table (e.g. Paginator.paginate()).
+                The first run emits every item as INSERT.
+            key_attributes: Names of the key attributes of the table.
+            batch_size: Number of items to look up from the index at a time.
+        """
+        if not key_attributes:
+            raise ValueError("key_attributes is required")
+        if batch_size < 1:
+            raise ValueError("batch_size must be positive")
+        db = self._db
+        db.execute("BEGIN")
+        try:
+            run = db.execute("SELECT COALESCE(MAX(run), 0) + 1 FROM runs").fetchone()[0]
+            db.execute("INSERT INTO runs VALUES (?)", (run,))
+            batch: list[tuple[str, dict]] = []
+            for page in pages:
+                for item in page.get("Items", []):
+                    batch.append((_dumps({name: item.get(name) for name in key_attributes}), item))
+                    if len(batch) >= batch_size:
+                        yield from self._compare(batch, run)
+                        batch = []
+            yield from self._compare(batch, run)
+
+            removed = db.execute("SELECT key FROM digests WHERE run < ?", (run,))
+            for (key,) in removed:
+                yield {"EventName": "REMOVE", "Keys": _loads(key)}
+            db.execute("DELETE FROM digests WHERE run < ?", (run,))
+            db.execute("DELETE FROM runs WHERE run < ?", (run,))
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def _compare(self, batch: list[tuple[str, dict]], run: int) -> typing.Iterator[dict]:
+        """Compare a batch of items with the index and record them as seen in given run."""
+        if not batch:
+            return
+        db = self._db
+        db.executemany("INSERT OR REPLACE INTO temp.batch VALUES (?)", ((key,) for key, _ in batch))
+        known = dict(db.execute("SELECT key, digest FROM temp.batch JOIN digests USING (key)"))
+        db.execute("DELETE FROM temp.batch")
+        rows = []
+        for key, item in batch:
+            digest = hashlib.blake2b(_dumps(item).encode(), digest_size=16).digest()
+            previous = known.get(key)
+            rows.append((key, digest, run))
+            if previous == digest:
+                continue
+            event = "INSERT" if previous is None else "MODIFY"
+            yield {"EventName": event, "Keys": _loads(key), "NewImage": item}
+        db.executemany("INSERT OR REPLACE INTO digests VALUES (?, ?, ?)", rows)
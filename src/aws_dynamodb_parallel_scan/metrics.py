@@ -0,0 +1,249 @@
+"""Instrumentation of parallel scans.
+
+Paginator.paginate() reports scan events to an observer (see ScanObserver)
+given with the observer argument. ScanMetrics is an observer that collects
+per-segment counters and request latency histograms, and ProgressReporter
+writes a progress line of the collected metrics to a stream periodically.
+
+No events are generated and no time is measured when no observer is given.
+"""
+
+import bisect
+import sys
+import threading
+import time
+import typing
+
+from . import sharding, sizing, throttling
+
+# Upper bounds of latency histogram buckets in seconds. The last bucket has no upper bound.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class ScanObserver:
+    """Receives events of a parallel scan.
+
+    Subclass and override the methods of interest. Methods other than
+    total_segments_chosen(), scan_started() and consumer_blocked() are called
+    from scan threads, so they must be thread-safe. They are called
+    synchronously and should be fast.
+    """
+
+    def total_segments_chosen(self, reason: dict):
+        """Called before the scan starts when TotalSegments="auto" has been resolved.
+
+        Args:
+            reason: Chosen TotalSegments and the reasoning (see sizing.choose_total_segments()).
+        """
+
+    def scan_started(self, segments: list[int]):
+        """Called when the scan starts with the segments that will be scanned."""
+
+    def request_completed(self, segment: int, latency: float, page: typing.Mapping):
+        """Called when a Scan request of a segment has completed.
+
+        Args:
+            segment: Segment number.
+            latency: Duration of the request in seconds (excluding retries).
+            page: Scan API response.
+        """
+
+    def request_retried(self, segment: int, error: Exception):
+        """Called when a throttled Scan request of a segment is going to be retried."""
+
+    def producer_blocked(self, segment: int, seconds: float):
+        """Called when a scan thread has waited for room in the page buffer."""
+
+    def consumer_blocked(self, seconds: float):
+        """Called when the consumer has waited for the next page."""
+
+
+class LatencyHistogram:
+    """Histogram of request latencies with fixed buckets (see LATENCY_BUCKETS)."""
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float):
+        """Record a latency."""
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def merge(self, other: "LatencyHistogram"):
+        """Add the latencies recorded in another histogram."""
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, q: float) -> float:
+        """Get an upper bound for the q-th percentile (0-100) of the recorded latencies."""
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+class SegmentMetrics:  # pylint: disable=too-few-public-methods,too-many-instance-attributes
+    """Counters of a segment (or of all segments)."""
+
+    def __init__(self):
+        self.pages = 0
+        self.items = 0
+        self.scanned_count = 0
+        self.consumed_capacity = 0.0
+        self.retries = 0
+        self.producer_blocked = 0.0
+        self.latency = LatencyHistogram()
+        self.done = False
+
+    def merge(self, other: "SegmentMetrics"):
+        """Add the counters of another segment."""
+        self.pages += other.pages
+        self.items += other.items
+        self.scanned_count += other.scanned_count
+        self.consumed_capacity += other.consumed_capacity
+        self.retries += other.retries
+        self.producer_blocked += other.producer_blocked
+        self.latency.merge(other.latency)
+
+
+class ScanMetrics(ScanObserver):
+    """Observer that collects counters per segment.
+
+    Example:
+        metrics = ScanMetrics()
+        for page in paginator.paginate(TableName="mytable", TotalSegments=16, observer=metrics):
+            ...
+        print(metrics.format_progress())
+    """
+
+    def __init__(self) -> None:
+        self.segments: dict[int, SegmentMetrics] = {}
+        self.consumer_blocked_seconds = 0.0
+        self.started = time.monotonic()
+        # TotalSegments chosen with TotalSegments="auto" and the reasoning
+        self.total_segments: dict | None = None
+        self._lock = threading.Lock()
+
+    def total_segments_chosen(self, reason: dict):
+        self.total_segments = dict(reason)
+
+    def scan_started(self, segments: list[int]):
+        with self._lock:
+            self.started = time.monotonic()
+            for segment in segments:
+                self.segments.setdefault(segment, SegmentMetrics())
+
+    def request_completed(self, segment: int, latency: float, page: typing.Mapping):
+        with self._lock:
+            metrics = self._segment(segment)
+            metrics.pages += 1
+            metrics.items += page.get("Count", len(page.get("Items", [])))
+            metrics.scanned_count += page.get("ScannedCount", 0)
+            metrics.consumed_capacity += throttling.consumed_capacity(page)
+            metrics.latency.add(latency)
+            metrics.done = not page.get("LastEvaluatedKey")
+
+    def request_retried(self, segment: int, error: Exception):
+        with self._lock:
+            self._segment(segment).retries += 1
+
+    def producer_blocked(self, segment: int, seconds: float):
+        with self._lock:
+            self._segment(segment).producer_blocked += seconds
+
+    def consumer_blocked(self, seconds: float):
+        with self._lock:
+            self.consumer_blocked_seconds += seconds
+
+    def totals(self) -> SegmentMetrics:
+        """Get the counters summed over all segments."""
+        totals = SegmentMetrics()
+        with self._lock:
+            for metrics in self.segments.values():
+                totals.merge(metrics)
+            totals.done = all(m.done for m in self.segments.values())
+        return totals
+
+    def running_segments(self) -> list[int]:
+        """Get the segments that have not been completed."""
+        with self._lock:
+            return sorted(i for i, m in self.segments.items() if not m.done)
+
+    def format_progress(self) -> str:
+        """Format the collected metrics as a single line."""
+        totals = self.totals()
+        running = self.running_segments()
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        line = (
+            f"segments {len(self.segments) - len(running)}/{len(self.segments)} done, "
+            f"{totals.pages} pages, {totals.items} items ({totals.items / elapsed:.0f}/s), "
+            f"{totals.scanned_count} scanned, {totals.consumed_capacity:.1f} RCU, "
+            f"latency p50 {totals.latency.percentile(50) * 1000:.0f}ms "
+            f"p99 {totals.latency.percentile(99) * 1000:.0f}ms, {totals.retries} retries, "
+            f"consumer blocked {self.consumer_blocked_seconds:.1f}s, "
+            f"producer blocked {totals.producer_blocked:.1f}s"
+        )
+        if 0 < len(running) <= 8:
+            line += f", running: {sharding.format_segments(running)}"
+        return line
+
+    def _segment(self, segment: int) -> SegmentMetrics:
+        if segment not in self.segments:
+            self.segments[segment] = SegmentMetrics()
+        return self.segments[segment]
+
+
+class ProgressReporter:
+    """Writes the progress line of ScanMetrics to a stream periodically in the background."""
+
+    def __init__(self, metrics: ScanMetrics, stream: typing.TextIO | None = None, interval: float = 5.0):
+        """Create a progress reporter.
+
+        Args:
+            metrics: Metrics to report.
+            stream: Text stream to write to (default: sys.stderr).
+            interval: Interval between progress lines in seconds.
+        """
+        self._metrics = metrics
+        self._stream = stream or sys.stderr
+        self._interval = interval
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="progress-reporter", daemon=True)
+        self._reported_total_segments = False
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Stop the background thread and write a final progress line."""
+        self._closed.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self._report()
+
+    def _run(self):
+        while not self._closed.wait(self._interval):
+            self._report()
+
+    def _report(self):
+        if self._metrics.total_segments and not self._reported_total_segments:
+            # Explain the choice of TotalSegments="auto" once
+            print(sizing.format_reason(self._metrics.total_segments), file=self._stream, flush=True)
+            self._reported_total_segments = True
+        print(self._metrics.format_progress(), file=self._stream, flush=True)
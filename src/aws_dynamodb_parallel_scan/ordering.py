@@ -0,0 +1,162 @@
+"""Deterministic output order for parallel scans.
+
+Paginator.paginate() yields pages in the order they are fetched, which
+changes from run to run. With the order argument, pages are yielded in an
+order that only depends on the table:
+
+* "segment": all pages of the first segment, then all pages of the next
+  segment and so on.
+* "round-robin": the first page of each segment in segment order, then the
+  second page of each segment that has one and so on.
+
+Segments are still scanned in parallel. Pages that arrive before their turn
+wait in a reorder buffer. The buffer keeps at most max_memory_bytes of pages
+in memory and writes the rest to a temporary file, so the scan never waits
+for the consumer to reach a slow segment. With "segment", most of the table
+may have to be buffered while the first segments are scanned; with
+"round-robin", the buffer holds about one round of pages per segment that is
+ahead of the slowest one.
+"""
+
+import collections
+import os
+import tempfile
+import typing
+
+from . import cache
+
+ORDERS = ("segment", "round-robin")
+
+
+class ReorderBuffer:
+    """Buffers out-of-order pages of a parallel scan until it is their turn."""
+
+    def __init__(
+        self,
+        segments: typing.Iterable[int],
+        order: str,
+        *,
+        max_memory_bytes: int = 64 << 20,
+        measure: typing.Callable[[dict], int] = lambda page: len(repr(page.get("Items", []))),
+        directory: str | os.PathLike | None = None,
+    ):
+        """Create a reorder buffer.
+
+        Args:
+            segments: Segments of the scan.
+            order: "segment" or "round-robin".
+            max_memory_bytes: Maximum size of the pages held in memory. Further pages are written
+                to a temporary file.
+            measure: Function that gets the size of a page in bytes.
+            directory: Directory of the temporary file (default: the system temporary directory).
+        """
+        if order not in ORDERS:
+            raise ValueError(f"order must be one of {', '.join(ORDERS)}")
+        if max_memory_bytes < 0:
+            raise ValueError("max_memory_bytes must be non-negative")
+        self._order = order
+        self._max_memory_bytes = max_memory_bytes
+        self._measure = measure
+        self._directory = os.fspath(directory) if directory is not None else None
+        # Segments that have pages left to yield, in order, and the index of the next one
+        self._active = sorted(set(segments))
+        self._position = 0
+        # Buffered pages of each segment: (page, size) in memory or (None, (offset, length, encoded)) spilled
+        self._queues: dict[int, collections.deque] = collections.defaultdict(collections.deque)
+        self._spill: typing.BinaryIO | None = None
+        self._spill_size = 0
+        self.buffered_bytes = 0
+        self.peak_buffered_bytes = 0
+        self.spilled_pages = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Remove the temporary file."""
+        if self._spill:
+            self._spill.close()
+            self._spill = None
+
+    def add(self, segment: int, page: dict):
+        """Add a page of a segment. Pages of a segment must be added in order."""
+        queue = self._queues[segment]
+        if not queue and self._active and segment == self._active[self._position]:
+            # The page is yielded right away by ready()
+            queue.append((page, 0))
+            return
+        size = self._measure(page)
+        if self.buffered_bytes + size <= self._max_memory_bytes:
+            queue.append((page, size))
+            self.buffered_bytes += size
+            self.peak_buffered_bytes = max(self.peak_buffered_bytes, self.buffered_bytes)
+        else:
+            queue.append((None, self._write(page)))
+            self.spilled_pages += 1
+
+    def ready(self) -> typing.Iterator[tuple[int, dict]]:
+        """Yield the buffered (segment, page) tuples whose turn has come, in order."""
+        while self._active:
+            segment = self._active[self._position]
+            queue = self._queues[segment]
+            if not queue:
+                return
+            page, value = queue.popleft()
+            if page is None:
+                # Pages read back from the temporary file have no ResponseMetadata
+                page = self._read(*value)
+            else:
+                self.buffered_bytes -= value
+            self._advance(segment, page)
+            yield segment, page
+
+    def done(self) -> bool:
+        """Check if the last pages of all segments have been yielded."""
+        return not self._active
+
+    def _advance(self, segment: int, page: dict):
+        """Move on to the next turn after a page of the segment whose turn it is."""
+        if not page.get("LastEvaluatedKey"):
+            del self._active[self._position]
+            self._queues.pop(segment, None)
+        elif self._order == "round-robin":
+            self._position += 1
+        if self._active:
+            self._position %= len(self._active)
+        else:
+            self._position = 0
+
+    def _write(self, page: dict) -> tuple[int, int, bool]:
+        """Write a page to the temporary file."""
+        if self._spill is None:
+            self._spill = tempfile.TemporaryFile(dir=self._directory)  # noqa: SIM115
+        data, encoded = cache.encode_page(page)
+        offset = self._spill_size
+        self._spill.seek(offset)
+        self._spill.write(data)
+        self._spill_size += len(data)
+        return offset, len(data), encoded
+
+    def _read(self, offset: int, length: int, encoded: bool) -> dict:
+        """Read a page from the temporary file."""
+        spill = typing.cast(typing.BinaryIO, self._spill)
+        spill.seek(offset)
+        return cache.decode_page(spill.read(length), encoded)
+
+
+def ordered_pages(
+    pages: typing.Iterable[tuple[int, dict]], buffer: ReorderBuffer
+) -> typing.Generator[tuple[int, dict], None, None]:
+    """Yield (segment, page) tuples of a parallel scan in the order of a reorder buffer.
+
+    Args:
+        pages: (segment, page) tuples in completion order.
+        buffer: Reorder buffer for the segments of the scan. Closed when done.
+    """
+    with buffer:
+        for segment, page in pages:
+            buffer.add(segment, page)
+            yield from buffer.ready()
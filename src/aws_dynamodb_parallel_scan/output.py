@@ -0,0 +1,122 @@
+"""Encoding of scan results for output."""
+
+import decimal
+import json
+import typing
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
+
+JSON_ENCODERS = ("json", "orjson")
+
+
+class DecimalEncoder(json.JSONEncoder):
+    """JSON encoder for DynamoDB Decimal types."""
+
+    def default(self, o):
+        return _number(o)
+
+
+def _number(o):
+    """Convert a DynamoDB Decimal to a JSON serializable number."""
+    if isinstance(o, decimal.Decimal):
+        if o == o.to_integral_value():
+            return int(o)
+        return float(o)
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def json_lines_encoder(encoder: str = "json") -> typing.Callable[[typing.Iterable], bytes]:
+    """Create a function that encodes values as newline delimited JSON.
+
+    The returned function encodes a batch of values (e.g. all items of a page)
+    at once with a single encoder instance. Decimal numbers (of the document client) are
+    converted to int or float by a callback of the encoder; items without Decimals (e.g.
+    low-level items or items converted with convert.item_converter("int")) are encoded
+    without calling back to Python.
+
+    Args:
+        encoder: JSON encoder to use: "json" (standard library) or "orjson" (requires
+            orjson). The output of orjson is more compact: it has no spaces after separators
+            and does not escape non-ASCII characters.
+
+    Returns: Function that encodes given values as UTF-8 encoded JSON lines.
+    """
+    if encoder not in JSON_ENCODERS:
+        raise ValueError(f"encoder must be one of {', '.join(JSON_ENCODERS)}")
+    if encoder == "orjson" and orjson is None:
+        raise ValueError("orjson encoder requires the orjson package")
+
+    encode = DecimalEncoder().encode
+
+    if encoder == "orjson":
+        dumps = orjson.dumps
+        option = orjson.OPT_APPEND_NEWLINE
+
+        def encode_value(value) -> bytes:
+            try:
+                return dumps(value, default=_number, option=option)
+            except orjson.JSONEncodeError:
+                # orjson does not support integers that do not fit into 64 bits
+                return (encode(value) + "\n").encode()
+
+        def encode_orjson(values: typing.Iterable) -> bytes:
+            return b"".join(map(encode_value, values))
+
+        return encode_orjson
+
+    def encode_json(values: typing.Iterable) -> bytes:
+        return "".join(encode(value) + "\n" for value in values).encode()
+
+    return encode_json
+
+
+class JSONLinesWriter:
+    """Writes scan results as newline delimited JSON to a binary stream.
+
+    Pages are encoded at once and the encoded output is written to the
+    stream in large chunks.
+    """
+
+    def __init__(
+        self,
+        stream: typing.BinaryIO,
+        output_items: bool = False,
+        encoder: str = "json",
+        buffer_size: int = 1 << 20,
+    ):
+        """Create a writer.
+
+        Args:
+            stream: Binary stream to write to (e.g. sys.stdout.buffer).
+            output_items: Write the items of each page (one per line) instead of the page.
+            encoder: JSON encoder to use (see json_lines_encoder()).
+            buffer_size: Number of bytes to collect before writing them to the stream.
+        """
+        self._stream = stream
+        self._output_items = output_items
+        self._encode = json_lines_encoder(encoder)
+        self._buffer_size = buffer_size
+        self._chunks: list[bytes] = []
+        self._buffered = 0
+
+    def write_page(self, page: typing.Mapping):
+        """Write a Scan API response (or its items)."""
+        self.write(self._encode(page.get("Items", []) if self._output_items else [page]))
+
+    def write(self, data: bytes):
+        """Write already encoded JSON lines."""
+        self._chunks.append(data)
+        self._buffered += len(data)
+        if self._buffered >= self._buffer_size:
+            self.flush()
+
+    def flush(self):
+        """Write buffered output to the stream and flush the stream."""
+        if self._chunks:
+            self._stream.write(b"".join(self._chunks))
+            self._chunks.clear()
+            self._buffered = 0
+        self._stream.flush()
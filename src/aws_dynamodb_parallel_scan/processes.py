@@ -0,0 +1,190 @@
+"""Parallel scan using multiple processes.
+
+Converting DynamoDB responses to Python types and encoding them as JSON is
+CPU bound. In a single process the work is limited to one core by the GIL.
+scan_json_lines() splits the segments of a scan between worker processes.
+Each worker has its own DynamoDB client, scans its segments with a threaded
+paginator and encodes the results to JSON lines. The parent process only
+receives the encoded bytes. scan_aggregate() divides the segments the same
+way, and each worker only sends the aggregate of its segments.
+
+max_read_capacity and max_workers are totals for the scan and are divided
+between the workers.
+"""
+
+import multiprocessing
+import pickle  # nosec B403
+import queue
+import typing
+
+import boto3
+
+from . import aggregate, output
+
+
+def low_level_client():
+    """Create a low-level DynamoDB client."""
+    return boto3.client("dynamodb")
+
+
+def document_client():
+    """Create a DynamoDB client that converts DynamoDB types to native types."""
+    return boto3.resource("dynamodb").meta.client
+
+
+def _picklable(exc: Exception) -> Exception:
+    """Get a version of the exception that can be sent to the parent process."""
+    try:
+        pickle.loads(pickle.dumps(exc))  # nosec B301
+    except Exception:  # noqa: BLE001
+        return RuntimeError(f"{type(exc).__name__}: {exc}")
+    return exc
+
+
+def _worker(segments: list[int], results, kwargs: dict, client_factory, output_items: bool, encoder: str):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    """Scan given segments and send the results encoded as JSON lines to the parent."""
+    from . import Paginator  # pylint: disable=import-outside-toplevel,cyclic-import
+
+    try:
+        encode = output.json_lines_encoder(encoder)
+        paginator = Paginator(client_factory())
+        for page in paginator.paginate(segments=segments, **kwargs):
+            results.put(encode(page.get("Items", []) if output_items else [page]))
+    except Exception as exc:  # noqa: BLE001
+        results.put(_picklable(exc))
+        return
+    results.put(None)
+
+
+def _aggregate_worker(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    segments: list[int], results, kwargs: dict, client_factory, aggregation: aggregate.Aggregation, document: bool
+):
+    """Aggregate the items of given segments and send the aggregate to the parent."""
+    from . import Paginator  # pylint: disable=import-outside-toplevel,cyclic-import
+
+    try:
+        paginator = Paginator(client_factory())
+        results.put(aggregate.scan_aggregate(paginator, aggregation, document=document, segments=segments, **kwargs))
+    except Exception as exc:  # noqa: BLE001
+        results.put(_picklable(exc))
+        return
+    results.put(None)
+
+
+def _worker_kwargs(kwargs: dict, index: int, count: int) -> dict:
+    """Get the paginate() arguments of worker index of count with its share of the scan-wide limits."""
+    shares = dict(kwargs)
+    if kwargs.get("max_read_capacity") is not None:
+        shares["max_read_capacity"] = kwargs["max_read_capacity"] / count
+    if kwargs.get("max_workers"):
+        quotient, remainder = divmod(kwargs["max_workers"], count)
+        shares["max_workers"] = max(1, quotient + (index < remainder))
+    return shares
+
+
+def _run_workers(processes: int, target, args: tuple, max_buffered: int, kwargs: dict) -> typing.Iterator:
+    """Divide the segments of a scan between worker processes and yield the results they send.
+
+    Workers are called with their segments, the result queue, kwargs and args, and send None
+    when done.
+    """
+    if processes < 1:
+        raise ValueError("processes must be positive")
+
+    segments = kwargs.pop("segments", None)
+    selected = sorted(segments) if segments is not None else list(range(kwargs.get("TotalSegments") or 1))
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue(maxsize=max_buffered)
+    count = min(processes, len(selected))
+    workers = [
+        context.Process(
+            target=target, args=(selected[i::processes], results, _worker_kwargs(kwargs, i, count), *args), daemon=True
+        )
+        for i in range(count)
+    ]
+    for worker in workers:
+        worker.start()
+
+    try:
+        remaining = len(workers)
+        while remaining:
+            try:
+                result = results.get(timeout=1)
+            except queue.Empty:
+                if any(w.exitcode not in (None, 0) for w in workers):
+                    raise RuntimeError("Scan worker process died unexpectedly") from None
+                continue
+
+            if result is None:
+                remaining -= 1
+            elif isinstance(result, Exception):
+                raise result
+            else:
+                yield result
+    finally:
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+            worker.join()
+
+
+def scan_json_lines(
+    processes: int,
+    *,
+    client_factory: typing.Callable[[], typing.Any] = low_level_client,
+    output_items: bool = False,
+    encoder: str = "json",
+    max_buffered_chunks: int = 64,
+    **kwargs,
+) -> typing.Iterator[bytes]:
+    """Scan a table with multiple processes and yield the results as JSON lines.
+
+    Segments (all or the ones given in segments argument) are divided between the processes
+    round-robin. Each process scans its
+    segments with Paginator.paginate() using its own client.
+
+    Args:
+        processes: Number of worker processes.
+        client_factory: Picklable function that creates the DynamoDB client for a worker
+            process. Use document_client to get items with native types.
+        output_items: Output items (one per line) instead of full Scan API responses.
+        encoder: JSON encoder to use (see output.json_lines_encoder()).
+        max_buffered_chunks: Maximum number of encoded pages waiting to be read by the parent.
+            Workers block when the buffer is full.
+        **kwargs: Arguments for Paginator.paginate(). max_read_capacity and max_workers are
+            divided between the processes.
+
+    Returns: Generator that yields chunks of UTF-8 encoded JSON lines, one chunk per page.
+    """
+    yield from _run_workers(processes, _worker, (client_factory, output_items, encoder), max_buffered_chunks, kwargs)
+
+
+def scan_aggregate(
+    processes: int,
+    aggregation: aggregate.Aggregation,
+    *,
+    client_factory: typing.Callable[[], typing.Any] = low_level_client,
+    document: bool = False,
+    **kwargs,
+) -> aggregate.Aggregate:
+    """Compute an aggregation over the items of a scan with multiple processes.
+
+    Segments are divided between the processes like in scan_json_lines(). Each process
+    computes the aggregate of its segments with aggregate.scan_aggregate(), and the
+    aggregates are merged.
+
+    Args:
+        processes: Number of worker processes.
+        aggregation: Aggregates to compute.
+        client_factory: Picklable function that creates the DynamoDB client for a worker
+            process.
+        document: client_factory creates document clients (e.g. document_client).
+        **kwargs: Arguments for aggregate.scan_aggregate(). max_read_capacity and max_workers
+            are divided between the processes.
+
+    Returns: Aggregate of the scanned items.
+    """
+    result = aggregate.Aggregate(aggregation)
+    for partial in _run_workers(processes, _aggregate_worker, (client_factory, aggregation, document), 0, kwargs):
+        result.merge(partial)
+    return result
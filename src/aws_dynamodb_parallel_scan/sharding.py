@@ -0,0 +1,98 @@
+"""Helpers for splitting a parallel scan between multiple hosts.
+
+Each host scans a subset of the segments of the scan (see the segments
+argument of Paginator.paginate()). Checkpoints and manifests record the
+segments assigned to a host in AssignedSegments and the completed segments
+in Segments. check_coverage() verifies that a set of checkpoints or manifests
+covers the whole table.
+"""
+
+import typing
+
+
+def parse_segments(spec: str) -> list[int]:
+    """Parse a segment specification.
+
+    Args:
+        spec: Comma-separated list of segment numbers and inclusive ranges (e.g. "0-63,70").
+
+    Returns: Sorted list of segment numbers.
+    """
+    segments: set[int] = set()
+    for part in spec.split(","):
+        first, sep, last = part.strip().partition("-")
+        try:
+            start = int(first)
+            end = int(last) if sep else start
+        except ValueError:
+            raise ValueError(f"invalid segment specification: {spec!r}") from None
+        if start < 0 or end < start:
+            raise ValueError(f"invalid segment specification: {spec!r}")
+        segments.update(range(start, end + 1))
+    return sorted(segments)
+
+
+def format_segments(segments: typing.Iterable[int]) -> str:
+    """Format segment numbers as a compact specification accepted by parse_segments().
+
+    Args:
+        segments: Segment numbers.
+
+    Returns: Specification string (e.g. "0-63,70").
+    """
+    ranges: list[list[int]] = []
+    for segment in sorted(set(segments)):
+        if ranges and ranges[-1][1] == segment - 1:
+            ranges[-1][1] = segment
+        else:
+            ranges.append([segment, segment])
+    return ",".join(str(start) if start == end else f"{start}-{end}" for start, end in ranges)
+
+
+def worker_segments(worker_index: int, worker_count: int, total_segments: int) -> list[int]:
+    """Get a contiguous block of segments for one of several workers.
+
+    Args:
+        worker_index: Index of the worker (0 to worker_count - 1).
+        worker_count: Total number of workers.
+        total_segments: TotalSegments of the scan.
+
+    Returns: Segment numbers assigned to the worker.
+    """
+    if worker_count < 1 or not 0 <= worker_index < worker_count:
+        raise ValueError("worker_index must be between 0 and worker_count - 1")
+    if worker_count > total_segments:
+        raise ValueError("worker_count must not exceed total_segments")
+    start = worker_index * total_segments // worker_count
+    end = (worker_index + 1) * total_segments // worker_count
+    return list(range(start, end))
+
+
+def check_coverage(documents: typing.Iterable[dict]) -> None:
+    """Check that checkpoints or manifests of several workers cover all segments of a scan.
+
+    Args:
+        documents: Checkpoints or manifests of the workers.
+
+    Raises:
+        ValueError: The documents are from different scans, or some segments are incomplete
+            or were completed by more than one worker.
+    """
+    scans = set()
+    completed: dict[int, int] = {}
+    for document in documents:
+        scans.add((document.get("TableName"), document.get("TotalSegments")))
+        for segment, state in document.get("Segments", {}).items():
+            if state.get("Done"):
+                completed[int(segment)] = completed.get(int(segment), 0) + 1
+
+    if len(scans) != 1:
+        raise ValueError(f"documents are from different scans: {sorted(scans, key=str)}")
+
+    (_, total_segments), *_ = scans
+    missing = [i for i in range(total_segments or 1) if i not in completed]
+    duplicate = [i for i, count in completed.items() if count > 1]
+    if missing:
+        raise ValueError(f"segments not completed: {format_segments(missing)}")
+    if duplicate:
+        raise ValueError(f"segments completed more than once: {format_segments(duplicate)}")
@@ -0,0 +1,178 @@
+"""Choosing the number of segments of a parallel scan from the size of the table.
+
+Paginator.paginate() accepts TotalSegments="auto". The table (or index) is
+described with DescribeTable, and the number of segments is chosen with
+choose_total_segments():
+
+* DynamoDB recommends segments of at most about 2 GB, so large tables get
+  at least one segment per 2 GB.
+* Each segment should still have several full pages (MIN_PAGES_PER_SEGMENT
+  pages of 1 MB, or of Limit items). More segments than that only add
+  requests that return small pages, so small tables get fewer segments.
+* The number of segments is capped by the concurrency budget (max_workers
+  or DEFAULT_MAX_WORKERS), since segments beyond the number of threads do
+  not add throughput.
+
+DynamoDB updates TableSizeBytes and ItemCount about every six hours, so
+they are zero for new tables and can lag behind large imports.
+probe_table() estimates the size with a few Select=COUNT requests, and its
+estimate can be given to paginate() to override the described size.
+"""
+
+import dataclasses
+import math
+import typing
+
+from . import throttling
+
+# Maximum value of TotalSegments accepted by DynamoDB
+MAX_TOTAL_SEGMENTS = 1000000
+# Segment size recommended by DynamoDB
+SEGMENT_BYTES = 2 * 1000**3
+# Maximum size of a Scan response
+PAGE_BYTES = 1 << 20
+# Minimum number of full pages per segment
+MIN_PAGES_PER_SEGMENT = 8
+# Concurrency budget when max_workers is not given
+DEFAULT_MAX_WORKERS = 32
+# Bytes read per capacity unit by an eventually consistent Scan
+_EVENTUAL_CAPACITY_BYTES = 8192
+
+
+@dataclasses.dataclass
+class TableEstimate:
+    """Size of a table (or index) to choose the number of segments for."""
+
+    size_bytes: int
+    item_count: int
+    # Where the estimate comes from ("DescribeTable" or "probe")
+    source: str
+    # The table is at least this large (a probed segment had more than one page)
+    lower_bound: bool = False
+
+
+def describe_table(client: typing.Any, table_name: str, index_name: str | None = None) -> TableEstimate:
+    """Get the size of a table or index from DescribeTable.
+
+    Args:
+        client: DynamoDB client.
+        table_name: Name of the table.
+        index_name: Name of a secondary index to get the size of instead.
+
+    Returns: Size of the table or index.
+    """
+    table = client.describe_table(TableName=table_name)["Table"]
+    if index_name:
+        indexes = table.get("GlobalSecondaryIndexes", []) + table.get("LocalSecondaryIndexes", [])
+        matching = [index for index in indexes if index.get("IndexName") == index_name]
+        if not matching:
+            raise ValueError(f"table {table_name} has no index {index_name}")
+        table = matching[0]
+        return TableEstimate(table.get("IndexSizeBytes", 0), table.get("ItemCount", 0), "DescribeTable")
+    return TableEstimate(table.get("TableSizeBytes", 0), table.get("ItemCount", 0), "DescribeTable")
+
+
+def probe_table(client: typing.Any, kwargs: typing.Mapping, *, probe_segments: int = 1000, samples: int = 8):
+    """Estimate the size of a table by counting the items of a few segments.
+
+    Makes one Scan request with Select=COUNT for each of samples segments spread over a scan
+    of probe_segments segments, and extrapolates the scanned items and consumed capacity of the
+    sampled segments to the whole table. Segments that do not fit in one page are only counted
+    to their first page, making the estimate a lower bound (about probe_segments MB).
+
+    Args:
+        client: DynamoDB client.
+        kwargs: Scan arguments (TableName and IndexName are used).
+        probe_segments: TotalSegments of the probe requests.
+        samples: Number of segments to sample (at most probe_segments).
+
+    Returns: Estimated size of the table.
+    """
+    if probe_segments < 1 or samples < 1:
+        raise ValueError("probe_segments and samples must be positive")
+    samples = min(samples, probe_segments)
+    args = {k: kwargs[k] for k in ("TableName", "IndexName", "ConsistentRead") if k in kwargs}
+    items = 0
+    capacity = 0.0
+    lower_bound = False
+    for i in range(samples):
+        page = client.scan(
+            **args,
+            Select="COUNT",
+            ReturnConsumedCapacity="TOTAL",
+            TotalSegments=probe_segments,
+            Segment=i * probe_segments // samples,
+        )
+        items += page.get("ScannedCount", 0)
+        capacity += throttling.consumed_capacity(page)
+        lower_bound = lower_bound or bool(page.get("LastEvaluatedKey"))
+    capacity_bytes = _EVENTUAL_CAPACITY_BYTES // (2 if kwargs.get("ConsistentRead") else 1)
+    return TableEstimate(
+        size_bytes=round(capacity * capacity_bytes * probe_segments / samples),
+        item_count=round(items * probe_segments / samples),
+        source="probe",
+        lower_bound=lower_bound,
+    )
+
+
+def choose_total_segments(estimate: TableEstimate, *, max_workers: int | None = None, limit: int | None = None):
+    """Choose the number of segments for a table of given size.
+
+    Args:
+        estimate: Size of the table.
+        max_workers: Concurrency budget (default: DEFAULT_MAX_WORKERS).
+        limit: Limit of the Scan requests (number of items per page).
+
+    Returns: Tuple of the number of segments and a dict with the reasoning: Recommended (one
+        segment per 2 GB), Useful (most segments with MIN_PAGES_PER_SEGMENT full pages each),
+        Budget and the estimate used.
+    """
+    budget = max(1, min(max_workers or DEFAULT_MAX_WORKERS, MAX_TOTAL_SEGMENTS))
+    page_bytes = PAGE_BYTES
+    if limit and estimate.item_count:
+        page_bytes = min(page_bytes, max(1, limit * estimate.size_bytes // estimate.item_count))
+    recommended = max(1, math.ceil(estimate.size_bytes / SEGMENT_BYTES))
+    useful = max(1, estimate.size_bytes // (page_bytes * MIN_PAGES_PER_SEGMENT))
+    total_segments = min(budget, max(recommended, useful))
+    return total_segments, {
+        "TotalSegments": total_segments,
+        "TableSizeBytes": estimate.size_bytes,
+        "ItemCount": estimate.item_count,
+        "Source": estimate.source,
+        "Recommended": recommended,
+        "Useful": useful,
+        "Budget": budget,
+    }
+
+
+def auto_total_segments(
+    client: typing.Any,
+    kwargs: typing.Mapping,
+    *,
+    max_workers: int | None = None,
+    estimate: TableEstimate | None = None,
+):
+    """Choose the number of segments for a scan with TotalSegments="auto".
+
+    Args:
+        client: DynamoDB client to describe the table with.
+        kwargs: Scan arguments.
+        max_workers: Concurrency budget (default: DEFAULT_MAX_WORKERS).
+        estimate: Estimate (e.g. from probe_table()) to use if it is larger than the size
+            given by DescribeTable.
+
+    Returns: Tuple of the number of segments and the reasoning (see choose_total_segments()).
+    """
+    described = describe_table(client, kwargs["TableName"], kwargs.get("IndexName"))
+    if estimate is None or estimate.size_bytes < described.size_bytes:
+        estimate = described
+    return choose_total_segments(estimate, max_workers=max_workers, limit=kwargs.get("Limit"))
+
+
+def format_reason(reason: typing.Mapping) -> str:
+    """Format the reasoning of choose_total_segments() as a single line."""
+    return (
+        f"TotalSegments {reason['TotalSegments']}: {reason['TableSizeBytes'] / 1e6:.0f} MB, "
+        f"{reason['ItemCount']} items ({reason['Source']}), {reason['Recommended']} recommended "
+        f"(2 GB per segment), {reason['Useful']} with full pages, budget {reason['Budget']}"
+    )
@@ -0,0 +1,171 @@
+"""Retry and rate limiting helpers for DynamoDB requests."""
+
+import random
+import threading
+import time
+import typing
+
+import botocore.exceptions
+
+THROTTLING_ERROR_CODES = frozenset(
+    {
+        "ProvisionedThroughputExceededException",
+        "RequestLimitExceeded",
+        "ThrottlingException",
+    }
+)
+
+
+def is_throttling_error(exc: BaseException) -> bool:
+    """Check if given exception is a DynamoDB throttling error.
+
+    Args:
+        exc: Exception raised by a DynamoDB API call.
+
+    Returns: True if the request was throttled and can be retried.
+    """
+    if not isinstance(exc, botocore.exceptions.ClientError):
+        return False
+    return exc.response.get("Error", {}).get("Code") in THROTTLING_ERROR_CODES
+
+
+def backoff_delay(attempt: int, base: float = 0.05, cap: float = 20.0) -> float:
+    """Get delay before the next retry using exponential backoff with full jitter.
+
+    Args:
+        attempt: Number of the failed attempt (0 for the first attempt).
+        base: Maximum delay after the first attempt in seconds.
+        cap: Upper bound for the delay in seconds.
+
+    Returns: Delay in seconds.
+    """
+    return random.uniform(0, min(cap, base * 2**attempt))  # nosec B311
+
+
+def consumed_capacity(response: typing.Mapping) -> float:
+    """Get the number of capacity units consumed by a DynamoDB API call.
+
+    Args:
+        response: API response. ConsumedCapacity is only included in the response if
+            the request had ReturnConsumedCapacity set to TOTAL or INDEXES.
+
+    Returns: Total capacity units consumed by the request.
+    """
+    capacity = response.get("ConsumedCapacity") or []
+    if isinstance(capacity, typing.Mapping):
+        capacity = [capacity]
+    return sum(c.get("CapacityUnits", 0) for c in capacity)
+
+
+class RateLimiter:
+    """Token bucket that limits the rate of consumed capacity units.
+
+    The cost of a DynamoDB request is known only after the request has completed.
+    Requests may start whenever the bucket is not in debt. The capacity consumed
+    by a request is deducted from the bucket afterwards and the bucket may go
+    into debt which delays the next requests until it has been paid back.
+    """
+
+    def __init__(self, rate: float, burst: float | None = None):
+        """Create a rate limiter.
+
+        Args:
+            rate: Capacity units per second.
+            burst: Maximum number of capacity units to accumulate while idle (default: rate).
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self._burst = burst if burst is not None else rate
+        self._tokens = self._burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self._burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self) -> float:
+        """Get the time to wait before a request may be started.
+
+        Returns: Delay in seconds (0 if a request may be started right away).
+        """
+        with self._lock:
+            self._refill()
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self, sleep: typing.Callable[[float], object] = time.sleep):
+        """Wait until a request may be started.
+
+        Args:
+            sleep: Function to wait with. Can be used to make the wait interruptible
+                (e.g. threading.Event.wait).
+        """
+        while delay := self.delay():
+            if sleep(delay):
+                return
+
+    def consume(self, units: float):
+        """Deduct capacity units consumed by a completed request.
+
+        Args:
+            units: Consumed capacity units.
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= units
+
+
+class AdaptiveConcurrency:
+    """Concurrency limit with additive increase / multiplicative decrease (AIMD).
+
+    The limit is halved whenever a request is throttled and increased by one
+    after a limit's worth of requests has completed without throttling.
+    """
+
+    def __init__(self, limit: int):
+        """Create a concurrency limit.
+
+        Args:
+            limit: Initial and maximum number of concurrent requests.
+        """
+        self.max_limit = limit
+        self.limit = float(limit)
+        self._active = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, stopped: threading.Event | None = None) -> bool:
+        """Wait until a request may be started.
+
+        Args:
+            stopped: Event that interrupts the wait when set.
+
+        Returns: True if the request may be started, False if stopped was set.
+        """
+        with self._condition:
+            while self._active >= int(self.limit):
+                if stopped is None:
+                    self._condition.wait()
+                    continue
+                if stopped.is_set():
+                    return False
+                self._condition.wait(0.1)
+            if stopped is not None and stopped.is_set():
+                return False
+            self._active += 1
+            return True
+
+    def release(self, throttled: bool):
+        """Mark a request completed and adjust the limit.
+
+        Args:
+            throttled: True if the request was throttled.
+        """
+        with self._condition:
+            self._active -= 1
+            if throttled:
+                self.limit = max(1.0, self.limit / 2)
+            else:
+                self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+            self._condition.notify_all()
@@ -0,0 +1,301 @@
+import decimal
+import json
+import threading
+import unittest.mock
+
+import pytest
+
+import aws_dynamodb_parallel_scan
+from aws_dynamodb_parallel_scan import aggregate, clients, processes
+
+from .conftest import mock_scan
+from .test_processes import MockClient, mock_clients
+
+MOCK_TABLE_NAME = "dynamodb-parallel-scan-testtable"
+
+# Sums of attr2 (0 to 204) and attr3 (0.5) of the 205 test items
+ATTR2_SUM = 204 * 205 // 2
+ATTR3_SUM = decimal.Decimal("102.5")
+
+
+@pytest.mark.parametrize("count", [0, 1, 100, 20000])
+def test_hyperloglog_estimate(count):
+    sketch = aggregate.HyperLogLog()
+    for i in range(count):
+        sketch.add(f"value-{i}")
+        sketch.add(f"value-{i}")
+    assert sketch.estimate() == pytest.approx(count, rel=0.05, abs=1)
+
+
+def test_hyperloglog_merge():
+    first, second, union = aggregate.HyperLogLog(10), aggregate.HyperLogLog(10), aggregate.HyperLogLog(10)
+    for i in range(3000):
+        (first if i < 2000 else second).add(decimal.Decimal(i))
+        union.add(decimal.Decimal(i))
+    first.merge(second)
+    assert first.registers == union.registers
+
+    with pytest.raises(ValueError):
+        first.merge(aggregate.HyperLogLog(11))
+
+
+def test_hyperloglog_canonical_values():
+    sketch = aggregate.HyperLogLog()
+    for value in [{"b", "a"}, {"a", "b"}, decimal.Decimal("1.0"), decimal.Decimal(1), "1", b"1", [1, {"x": None}]]:
+        sketch.add(value)
+    # Equal sets and numbers are the same value, strings, numbers and binary values are not
+    assert sketch.estimate() == 5
+
+
+def test_aggregation_invalid_precision():
+    with pytest.raises(ValueError):
+        aggregate.Aggregation(precision=3)
+
+
+def test_aggregate_rows():
+    aggregation = aggregate.Aggregation(group_by=["category"], sums=["price"], distinct=["customer"])
+    items = [
+        {"category": "books", "price": decimal.Decimal("1.5"), "customer": "a"},
+        {"category": "books", "price": 2, "customer": "b"},
+        {"category": "books", "price": 0.25, "customer": "a"},
+        {"category": "games", "price": "free", "customer": "a"},
+        {"category": "games", "price": True},
+        {"price": decimal.Decimal(10)},
+    ]
+    first, second = aggregate.Aggregate(aggregation), aggregate.Aggregate(aggregation)
+    for i, item in enumerate(items):
+        (first if i % 2 else second).add(item)
+    first.merge(second)
+
+    assert first.rows() == [
+        {
+            "Group": {"category": "books"},
+            "Count": 3,
+            "Sum": {"price": decimal.Decimal("3.75")},
+            "ApproximateDistinct": {"customer": 2},
+        },
+        {"Group": {"category": "games"}, "Count": 2, "Sum": {"price": 0}, "ApproximateDistinct": {"customer": 1}},
+        {"Group": {"category": None}, "Count": 1, "Sum": {"price": 10}, "ApproximateDistinct": {"customer": 0}},
+    ]
+
+
+def test_aggregate_count_only():
+    aggregation = aggregate.Aggregation()
+    result = aggregate.Aggregate(aggregation)
+    assert result.rows() == [{"Count": 0}]
+    result.add_count(5)
+    result.add({"pk": "a"})
+    assert result.rows() == [{"Count": 6}]
+
+    with pytest.raises(ValueError):
+        aggregate.Aggregate(aggregate.Aggregation(group_by=["pk"])).add_count(1)
+    with pytest.raises(ValueError):
+        result.merge(aggregate.Aggregate(aggregate.Aggregation(sums=["pk"])))
+
+
+def test_thread_accumulator():
+    accumulator = aggregate.ThreadAccumulator(aggregate.Aggregation(group_by=["tags"], sums=["n"]))
+    pages = [
+        {
+            "Items": [
+                {"pk": {"S": "a"}, "tags": {"SS": ["x", "y"]}, "n": {"N": "1.5"}},
+                {"pk": {"S": "b"}, "tags": {"SS": ["y", "x"]}, "n": {"N": "2"}},
+            ],
+            "Count": 2,
+            "ScannedCount": 3,
+            "LastEvaluatedKey": {"pk": {"S": "b"}},
+        },
+        {"Items": [{"pk": {"S": "c"}}], "Count": 1, "ScannedCount": 1},
+    ]
+    results = []
+    threads = [threading.Thread(target=lambda page=page: results.append(accumulator(page))) for page in pages]
+    for thread in threads:
+        thread.start()
+        thread.join()
+
+    assert all("Items" not in page for page in results)
+    assert {"pk": {"S": "b"}} in [page.get("LastEvaluatedKey") for page in results]
+    assert len(accumulator.partials) == 2
+    result = accumulator.result()
+    assert result.scanned_count == 4
+    assert result.rows() == [
+        {"Group": {"tags": None}, "Count": 1, "Sum": {"n": 0}},
+        {"Group": {"tags": {"x", "y"}}, "Count": 2, "Sum": {"n": decimal.Decimal("3.5")}},
+    ]
+
+
+@pytest.mark.parametrize(
+    "aggregation, kwargs, expected",
+    [
+        (aggregate.Aggregation(), {}, {"Select": "COUNT"}),
+        (
+            aggregate.Aggregation(group_by=["a"], sums=["b", "a"]),
+            {"ExpressionAttributeNames": {"#f": "c"}},
+            {
+                "ProjectionExpression": "#aggregate0, #aggregate1",
+                "ExpressionAttributeNames": {"#f": "c", "#aggregate0": "a", "#aggregate1": "b"},
+            },
+        ),
+        (aggregate.Aggregation(), {"ProjectionExpression": "pk"}, {}),
+        (aggregate.Aggregation(distinct=["a"]), {"Select": "ALL_ATTRIBUTES"}, {}),
+    ],
+)
+def test_aggregate_args(aggregation, kwargs, expected):
+    assert aggregate.aggregate_args({"TableName": MOCK_TABLE_NAME, **kwargs}, aggregation) == {
+        "TableName": MOCK_TABLE_NAME,
+        **kwargs,
+        **expected,
+    }
+
+
+def test_aggregate_args_invalid_select():
+    with pytest.raises(ValueError):
+        aggregate.aggregate_args({"Select": "COUNT"}, aggregate.Aggregation(sums=["a"]))
+
+
+def test_scan_aggregate_pages_without_items():
+    def scan(**kwargs):
+        assert kwargs["ProjectionExpression"] == "#aggregate0, #aggregate1, #aggregate2, #aggregate3"
+        return mock_scan(**kwargs)
+
+    client = unittest.mock.Mock(scan=unittest.mock.Mock(side_effect=scan))
+    paginator = aws_dynamodb_parallel_scan.get_paginator(client)
+    paginate = paginator.paginate
+    pages = []
+
+    def recording_paginate(**kwargs):
+        for page in paginate(**kwargs):
+            pages.append(page)
+            yield page
+
+    aggregation = aggregate.Aggregation(group_by=["attr1"], sums=["attr2", "attr3"], distinct=["pk"])
+    with unittest.mock.patch.object(paginator, "paginate", side_effect=recording_paginate):
+        result = aggregate.scan_aggregate(
+            paginator, aggregation, document=True, TableName=MOCK_TABLE_NAME, TotalSegments=4, Limit=10
+        )
+
+    assert len(pages) == client.scan.call_count
+    assert all("Items" not in page for page in pages)
+    assert result.scanned_count == 205
+    rows = result.rows()
+    assert len(rows) == 1
+    assert rows[0]["Group"] == {"attr1": "test"}
+    assert rows[0]["Count"] == 205
+    assert rows[0]["Sum"] == {"attr2": ATTR2_SUM, "attr3": ATTR3_SUM}
+    assert rows[0]["ApproximateDistinct"]["pk"] == pytest.approx(205, rel=0.05)
+
+
+def test_scan_aggregate_table(mocked_table):
+    paginator = aws_dynamodb_parallel_scan.get_paginator(aws_dynamodb_parallel_scan.clients.create_client(4))
+
+    with unittest.mock.patch.object(paginator, "paginate", wraps=paginator.paginate) as paginate:
+        result = aggregate.scan_aggregate(
+            paginator, aggregate.Aggregation(), TableName=MOCK_TABLE_NAME, TotalSegments=4, Limit=20
+        )
+    assert paginate.call_args.kwargs["Select"] == "COUNT"
+    assert result.rows() == [{"Count": 205}]
+
+    aggregation = aggregate.Aggregation(group_by=["attr1"], sums=["attr2"])
+    result = aggregate.scan_aggregate(
+        paginator,
+        aggregation,
+        TableName=MOCK_TABLE_NAME,
+        TotalSegments=4,
+        FilterExpression="attr2 < :n",
+        ExpressionAttributeValues={":n": {"N": "10"}},
+    )
+    assert result.rows() == [{"Group": {"attr1": "test"}, "Count": 10, "Sum": {"attr2": 45}}]
+    assert result.scanned_count == 205
+
+
+@pytest.mark.parametrize("kwargs", [{"max_items": 5}, {"order": "segment"}, {"deserialize": "int"}])
+def test_scan_aggregate_invalid_args(kwargs):
+    paginator = aws_dynamodb_parallel_scan.get_paginator(unittest.mock.Mock())
+    with pytest.raises(ValueError):
+        aggregate.scan_aggregate(paginator, aggregate.Aggregation(), TableName=MOCK_TABLE_NAME, **kwargs)
+
+
+def test_processes_scan_aggregate():
+    aggregation = aggregate.Aggregation(group_by=["attr1"], sums=["attr2"], distinct=["pk"])
+    result = processes.scan_aggregate(
+        2, aggregation, client_factory=MockClient, document=True, TableName=MOCK_TABLE_NAME, TotalSegments=4
+    )
+    rows = result.rows()
+    assert [(row["Count"], row["Sum"]) for row in rows] == [(205, {"attr2": ATTR2_SUM})]
+    assert rows[0]["ApproximateDistinct"]["pk"] == pytest.approx(205, rel=0.05)
+
+
+def test_cli_scan_count(mocked_table, capsys):
+    args = ["aws-dynamodb-parallel-scan", "--table-name", MOCK_TABLE_NAME, "--total-segments", "4", "--count"]
+    with unittest.mock.patch("sys.argv", args):
+        aws_dynamodb_parallel_scan.cli()
+
+    assert json.loads(capsys.readouterr().out) == {"Count": 205}
+
+
+@pytest.mark.parametrize("extra_args", [[], ["--use-document-client"]])
+def test_cli_scan_group_by(mocked_table, capsys, extra_args):
+    args = [
+        "aws-dynamodb-parallel-scan",
+        "--table-name",
+        MOCK_TABLE_NAME,
+        "--total-segments",
+        "4",
+        "--group-by",
+        "attr1",
+        "--sum",
+        "attr2,attr3",
+        "--distinct",
+        "pk",
+        *extra_args,
+    ]
+    with unittest.mock.patch("sys.argv", args):
+        aws_dynamodb_parallel_scan.cli()
+
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 1
+    row = json.loads(lines[0])
+    assert row["Group"] == {"attr1": "test"}
+    assert row["Count"] == 205
+    assert row["Sum"] == {"attr2": ATTR2_SUM, "attr3": float(ATTR3_SUM)}
+    assert row["ApproximateDistinct"]["pk"] == pytest.approx(205, rel=0.05)
+
+
+def test_cli_scan_aggregate_processes(mock_aws_env, capsys):
+    args = [
+        "aws-dynamodb-parallel-scan",
+        "--table-name",
+        MOCK_TABLE_NAME,
+        "--total-segments",
+        "4",
+        "--processes",
+        "2",
+        "--use-document-client",
+        "--group-by",
+        "attr1",
+        "--sum",
+        "attr2",
+    ]
+    with unittest.mock.patch("sys.argv", args), unittest.mock.patch.object(clients, "create_clients", mock_clients):
+        aws_dynamodb_parallel_scan.cli()
+
+    assert json.loads(capsys.readouterr().out) == {
+        "Group": {"attr1": "test"},
+        "Count": 205,
+        "Sum": {"attr2": ATTR2_SUM},
+    }
+
+
+@pytest.mark.parametrize(
+    "extra_args",
+    [
+        ["--count", "--output-items"],
+        ["--count", "--max-items", "5"],
+        ["--sum", "n", "--deserialize", "int"],
+        ["--group-by", "pk", "--order", "segment"],
+    ],
+)
+def test_cli_scan_invalid_aggregate_args(mock_aws_env, extra_args):
+    args = ["aws-dynamodb-parallel-scan", "--table-name", MOCK_TABLE_NAME, *extra_args]
+    with unittest.mock.patch("sys.argv", args), pytest.raises(SystemExit):
+        aws_dynamodb_parallel_scan.cli()
@@ -0,0 +1,112 @@
+import asyncio
+import itertools
+import operator
+import unittest.mock
+
+import botocore.exceptions
+import pytest
+
+import aws_dynamodb_parallel_scan
+
+from . import utils
+from .conftest import mock_scan
+
+MOCK_TABLE_NAME = "dynamodb-parallel-scan-testtable"
+
+
+class AsyncClient:
+    """Asyncio DynamoDB client with mocked scan method."""
+
+    def __init__(self, scan=mock_scan):
+        self.scan = unittest.mock.AsyncMock(side_effect=scan)
+
+
+async def collect(client, **kwargs):
+    paginator = aws_dynamodb_parallel_scan.get_async_paginator(client)
+    return [page async for page in paginator.paginate(TableName=MOCK_TABLE_NAME, **kwargs)]
+
+
+@pytest.mark.parametrize(
+    "scan_args",
+    [
+        {},
+        {"TotalSegments": 4},
+        {"TotalSegments": 25, "Limit": 3, "max_workers": 4},
+        {"TotalSegments": 4, "Limit": 10, "prefetch": 2, "max_buffered_pages": 1},
+        {"TotalSegments": 4, "Limit": 10, "max_read_capacity": 1000},
+    ],
+)
+def test_async_parallel_scan(scan_args):
+    items = utils.items_from_pages(asyncio.run(collect(AsyncClient(), **scan_args)))
+    assert sorted(items, key=operator.itemgetter("pk")) == sorted(
+        utils.generate_items(205), key=operator.itemgetter("pk")
+    )
+
+
+def test_async_parallel_scan_deserialize():
+    def scan(**kwargs):
+        page = mock_scan(**kwargs)
+        return {**page, "Items": [{"pk": {"S": item["pk"]}, "n": {"N": str(item["attr2"])}} for item in page["Items"]]}
+
+    pages = asyncio.run(collect(AsyncClient(scan), TotalSegments=4, Limit=10, deserialize="int"))
+    items = utils.items_from_pages(pages)
+    assert sorted(items, key=operator.itemgetter("n")) == [{"pk": str(i), "n": i} for i in range(205)]
+
+
+def test_async_parallel_scan_with_break():
+    client = AsyncClient()
+
+    async def scan():
+        paginator = aws_dynamodb_parallel_scan.get_async_paginator(client)
+        async for _ in paginator.paginate(TableName=MOCK_TABLE_NAME, TotalSegments=4, Limit=10):
+            break
+
+    asyncio.run(scan())
+    assert client.scan.call_count == 4
+
+
+def test_async_parallel_scan_retries_throttled_requests():
+    calls = itertools.count()
+
+    def throttled_scan(**kwargs):
+        if next(calls) % 3 == 0:
+            raise botocore.exceptions.ClientError({"Error": {"Code": "ThrottlingException"}}, "Scan")
+        return mock_scan(**kwargs)
+
+    with unittest.mock.patch("aws_dynamodb_parallel_scan.throttling.backoff_delay", return_value=0):
+        pages = asyncio.run(collect(AsyncClient(throttled_scan), TotalSegments=4, Limit=10))
+    assert len(utils.items_from_pages(pages)) == 205
+
+
+def test_async_parallel_scan_error():
+    client = AsyncClient(RuntimeError("scan failed"))
+    with pytest.raises(RuntimeError, match="scan failed"):
+        asyncio.run(collect(client, TotalSegments=4))
+
+
+def test_async_parallel_scan_resume(tmp_path):
+    store = aws_dynamodb_parallel_scan.checkpoint.JSONFileCheckpointStore(tmp_path / "checkpoint.json")
+    store.save({"TableName": MOCK_TABLE_NAME, "TotalSegments": 2, "Segments": {"0": {"Done": True}}})
+
+    pages = asyncio.run(collect(AsyncClient(), TotalSegments=2, checkpoint_store=store, resume_from=store.load()))
+
+    assert len(utils.items_from_pages(pages)) == 102
+    assert store.load()["Segments"] == {"0": {"Done": True}, "1": {"Done": True}}
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"max_items": 10},
+        {"cancel": aws_dynamodb_parallel_scan.CancellationToken()},
+        {"with_segments": True},
+        {"order": "segment"},
+        {"max_buffered_bytes": 1 << 20},
+        {"TotalSegments": "auto"},
+    ],
+)
+def test_async_parallel_scan_unsupported_options(kwargs):
+    client = AsyncClient()
+    with pytest.raises(ValueError, match="async paginator does not support"):
+        asyncio.run(collect(client, **kwargs))
+    client.scan.assert_not_called()
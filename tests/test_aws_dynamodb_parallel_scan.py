@@ -1,11 +1,15 @@
 import itertools
 import json
 import operator
+import threading
+import time
 import unittest.mock
 
+import botocore.exceptions
 import pytest
 
 import aws_dynamodb_parallel_scan
+from aws_dynamodb_parallel_scan import checkpoint, clients, columnar, output, sharding, throttling
 
 from . import utils
 
@@ -19,6 +23,11 @@ MOCK_TABLE_NAME = "dynamodb-parallel-scan-testtable"
         {"TotalSegments": 4},
         {"TotalSegments": 25},
         {"TotalSegments": 4, "Limit": 100},
+        {"TotalSegments": 4, "Limit": 10, "prefetch": 1},
+        {"TotalSegments": 4, "Limit": 10, "prefetch": 3, "max_buffered_pages": 2},
+        {"TotalSegments": 4, "Limit": 10, "max_buffered_pages": 1},
+        {"TotalSegments": 25, "max_workers": 1},
+        {"TotalSegments": 25, "Limit": 3, "max_workers": 4, "prefetch": 1},
     ],
 )
 def test_parallel_scan_mocked_client(mocked_client, scan_args):
@@ -35,7 +44,382 @@ def test_parallel_scan_with_break(mocked_client):
     for _ in paginator.paginate(TableName=MOCK_TABLE_NAME, TotalSegments=4, Limit=10):
         break
 
-    assert mocked_client.scan.call_count == 4
+    # Requests that had not started when the consumer stopped are cancelled
+    assert 1 <= mocked_client.scan.call_count <= 4
+
+
+def test_parallel_scan_with_break_cancels_pending_requests(mocked_client):
+    scan = mocked_client.scan.side_effect
+
+    def slow_scan(**kwargs):
+        time.sleep(0.01)
+        return scan(**kwargs)
+
+    mocked_client.scan.side_effect = slow_scan
+    paginator = aws_dynamodb_parallel_scan.get_paginator(mocked_client)
+    for _ in paginator.paginate(TableName=MOCK_TABLE_NAME, TotalSegments=100, max_workers=1):
+        break
+
+    assert mocked_client.scan.call_count <= 3
+
+
+@pytest.mark.parametrize("max_items, expected", [(1, 1), (25, 25), (205, 205), (1000, 205)])
+def test_parallel_scan_max_items(mocked_client, max_items, expected):
+    paginator = aws_dynamodb_parallel_scan.get_paginator(mocked_client)
+    pages = list(paginator.paginate(TableName=MOCK_TABLE_NAME, TotalSegments=4, Limit=10, max_items=max_items))
+
+    assert sum(page["Count"] for page in pages) == sum(len(page["Items"]) for page in pages) == expected
+    assert len({item["pk"] for page in pages for item in page["Items"]}) == expected
+    if expected < 205:
+        # No requests after enough items have been fetched
+        assert mocked_client.scan.call_count < 24
+
+
+def test_parallel_scan_max_items_checkpoint(mocked_client, tmp_path):
+    store = checkpoint.JSONFileCheckpointStore(tmp_path / "checkpoint.json")
+    paginator = aws_dynamodb_parallel_scan.get_paginator(mocked_client)
+
+    items = list(paginator.paginate_items(TableName=MOCK_TABLE_NAME, Limit=10, max_items=15, checkpoint_store=store))
+    assert len(items) == 15
+
+    # Items of the truncated page that were not returned are scanned again
+    saved = store.load()
+    assert saved["Segments"]["0"]["ExclusiveStartKey"] == 10
+    items.extend(paginator.paginate_items(TableName=MOCK_TABLE_NAME, Limit=10, resume_from=saved))
+    assert len(items) == 15 + 195
+    assert len({item["pk"] for item in items}) == 205
+
+
+def test_parallel_scan_cancel(mocked_client):
+    token = aws_dynamodb_parallel_scan.CancellationToken()
+    paginator = aws_dynamodb_parallel_scan.get_paginator(mocked_client)
+    pages = []
+    for page in paginator.paginate(TableName=MOCK_TABLE_NAME, TotalSegments=4, Limit=10, prefetch=2, cancel=token):
+        pages.append(page)
+        token.cancel()
+
+    assert len(pages) == 1
+    assert token.cancelled
+
+    # Scans with a cancelled token end right away
+    assert list(paginator.paginate(TableName=MOCK_TABLE_NAME, TotalSegments=4, cancel=token)) == []
+
+
+def test_parallel_scan_cancel_from_another_thread(mocked_client):
+    token = aws_dynamodb_parallel_scan.CancellationToken()
+    started = threading.Event()
+
+    def blocking_scan(**kwargs):
+        started.set()
+        time.sleep(0.05)
+        return {"Items": [], "Count": 0, "ScannedCount": 0, "LastEvaluatedKey": 1}
+
+    mocked_client.scan.side_effect = blocking_scan
+    paginator = aws_dynamodb_parallel_scan.get_paginator(mocked_client)
+    threading.Thread(target=lambda: started.wait() and token.cancel()).start()
+    start = time.monotonic()
+    for _ in paginator.paginate(TableName=MOCK_TABLE_NAME, TotalSegments=4, cancel=token):
+        pass
+
+    assert time.monotonic() - start < 1
+
+
+def test_parallel_scan_prefetch_overlaps_consumer(mocked_client):
+    scan = mocked_client.scan.side_effect
+
+    def slow_scan(**kwargs):
+        time.sleep(0.02)
+        return scan(**kwargs)
+
+    def consume(**kwargs):
+        start = time.monotonic()
+        paginator = aws_dynamodb_parallel_scan.get_paginator(mocked_client)
+        for _ in paginator.paginate(TableName=MOCK_TABLE_NAME, Limit=10, **kwargs):
+            time.sleep(0.02)
+        return time.monotonic() - start
+
+    mocked_client.scan.side_effect = slow_scan
+    sequential = consume()
+    pipelined = consume(prefetch=1)
+    assert pipelined < 0.75 * sequential
+
+
+@pytest.mark.parametrize(
+    "scan_args",
+    [{"prefetch": -1}, {"max_buffered_pages": -1}, {"max_buffered_items": -1}, {"max_workers": 0}, {"max_items": -1}],
+)
+def test_parallel_scan_invalid_args(mocked_client, scan_args):
+    paginator = aws_dynamodb_parallel_scan.get_paginator(mocked_client)
+    with pytest.raises(ValueError):
+        next(paginator.paginate(TableName=MOCK_TABLE_NAME, **scan_args))
+
+
+@pytest.mark.parametrize("scan_args", [{"max_buffered_items": 20}, {"max_buffered_bytes": 1500}])
+def test_parallel_scan_max_buffered_items(mocked_client, scan_args):
+    paginator = aws_dynamodb_parallel_scan.get_paginator(mocked_client)
+    pages = paginator.paginate(TableName=MOCK_TABLE_NAME, TotalSegments=4, Limit=10, prefetch=100, **scan_args)
+    first = next(pages)
+    time.sleep(0.2)
+
+    # Consumed page, two buffered pages and at most one blocked page per worker
+    assert mocked_client.scan.call_count <= 7
+    items = first["Items"] + utils.items_from_pages(pages)
+    assert sorted(items, key=operator.itemgetter("pk")) == sorted(
+        utils.generate_items(205), key=operator.itemgetter("pk")
+    )
+
+
+def test_parallel_scan_max_buffered_bytes_from_content_length(mocked_client):
+    scan = mocked_client.scan.side_effect
+
+    def scan_with_headers(**kwargs):
+        return {**scan(**kwargs), "ResponseMetadata": {"HTTPHeaders": {"content-length": "1000000"}}}
+
+    mocked_client.scan.side_effect = scan_with_headers
+    paginator = aws_dynamodb_parallel_scan.get_paginator(mocked_client)
+    pages = paginator.paginate(
+        TableName=MOCK_TABLE_NAME, TotalSegments=4, Limit=10, prefetch=100, max_buffered_bytes=1500000
+    )
+    next(pages)
+    time.sleep(0.2)
+
+    # A 1 MB page fits into an empty buffer but not next to another one
+    assert mocked_client.scan.call_count <= 6
+    assert len(utils.items_from_pages(pages)) == 195
+
+
+def test_paginate_items(mocked_client):
+    paginator = aws_dynamodb_parallel_scan.get_paginator(mocked_client)
+    items = list(paginator.paginate_items(TableName=MOCK_TABLE_NAME, TotalSegments=4, max_buffered_items=50))
+    assert sorted(items, key=operator.itemgetter("pk")) == sorted(
+        utils.generate_items(205), key=operator.itemgetter("pk")
+    )
+
+
+def test_paginate_items_batch_size(mocked_client):
+    batches = list(
+        aws_dynamodb_parallel_scan.iter_items(mocked_client, batch_size=50, TableName=MOCK_TABLE_NAME, TotalSegments=4)
+    )
+    assert [len(batch) for batch in batches] == [50, 50, 50, 50, 5]
+    assert sorted(itertools.chain(*batches), key=operator.itemgetter("pk")) == sorted(
+        utils.generate_items(205), key=operator.itemgetter("pk")
+    )
+
+
+@pytest.mark.parametrize("batch_size", [0, 10])
+def test_paginate_items_invalid_batch_size(mocked_client, tmp_path, batch_size):
+    paginator = aws_dynamodb_parallel_scan.get_paginator(mocked_client)
+    store = checkpoint.JSONFileCheckpointStore(str(tmp_path / "checkpoint.json"))
+    with pytest.raises(ValueError):
+        next(paginator.paginate_items(TableName=MOCK_TABLE_NAME, batch_size=batch_size, checkpoint_store=store))
+
+
+def test_parallel_scan_max_workers(mocked_client):
+    scan = mocked_client.scan.side_effect
+    lock = threading.Lock()
+    active = 0
+    max_active = 0
+    threads = set()
+
+    def tracking_scan(**kwargs):
+        nonlocal active, max_active
+        with lock:
+            active += 1
+            max_active = max(active, max_active)
+            threads.add(threading.get_ident())
+        time.sleep(0.001)
+        with lock:
+            active -= 1
+        return scan(**kwargs)
+
+    mocked_client.scan.side_effect = tracking_scan
+    paginator = aws_dynamodb_parallel_scan.get_paginator(mocked_client)
+    items = utils.items_from_pages(
+        paginator.paginate(TableName=MOCK_TABLE_NAME, TotalSegments=50, Limit=2, max_workers=3, prefetch=1)
+    )
+
+    assert len(items) == 205
+    assert max_active <= 3
+    assert len(threads) <= 3
+
+
+def test_parallel_scan_max_workers_continues_started_segments(mocked_client):
+    paginator = aws_dynamodb_parallel_scan.get_paginator(mocked_client)
+    pages = paginator.paginate(TableName=MOCK_TABLE_NAME, TotalSegments=10, Limit=5, max_workers=1, prefetch=100)
+    list(pages)
+
+    segments = [call.kwargs["Segment"] for call in mocked_client.scan.call_args_list]
+    # Each segment is scanned to completion before the next one is started
+    assert segments == sorted(segments)
+
+
+def throttling_error(code="ProvisionedThroughputExceededException"):
+    return botocore.exceptions.ClientError({"Error": {"Code": code, "Message": "Throttled"}}, "Scan")
+
+
+def test_parallel_scan_retries_throttled_requests(mocked_client):
+    scan = mocked_client.scan.side_effect
+    calls = itertools.count()
+
+    def throttled_scan(**kwargs):
+        if next(calls) % 3 == 0:
+            raise throttling_error()
+        return scan(**kwargs)
+
+    mocked_client.scan.side_effect = throttled_scan
+    paginator = aws_dynamodb_parallel_scan.get_paginator(mocked_client)
+    with unittest.mock.patch("aws_dynamodb_parallel_scan.throttling.backoff_delay", return_value=0):
+        items = utils.items_from_pages(paginator.paginate(TableName=MOCK_TABLE_NAME, TotalSegments=4, Limit=10))
+
+    assert sorted(items, key=operator.itemgetter("pk")) == sorted(
+        utils.generate_items(205), key=operator.itemgetter("pk")
+    )
+
+
+@pytest.mark.parametrize(
+    "error, max_retries",
+    [
+        (throttling_error(), 0),
+        (throttling_error("ThrottlingException"), 2),
+        (throttling_error("ValidationException"), 10),
+    ],
+)
+def test_parallel_scan_retries_exhausted(mocked_client, error, max_retries):
+    mocked_client.scan.side_effect = error
+    paginator = aws_dynamodb_parallel_scan.get_paginator(mocked_client)
+    with (
+        unittest.mock.patch("aws_dynamodb_parallel_scan.throttling.backoff_delay", return_value=0),
+        pytest.raises(botocore.exceptions.ClientError),
+    ):
+        list(paginator.paginate(TableName=MOCK_TABLE_NAME, max_retries=max_retries))
+
+    expected_calls = max_retries + 1 if throttling.is_throttling_error(error) else 1
+    assert mocked_client.scan.call_count == expected_calls
+
+
+def test_parallel_scan_max_read_capacity(mocked_client):
+    scan = mocked_client.scan.side_effect
+
+    def scan_with_capacity(**kwargs):
+        assert kwargs["ReturnConsumedCapacity"] == "TOTAL"
+        return {**scan(**kwargs), "ConsumedCapacity": {"TableName": MOCK_TABLE_NAME, "CapacityUnits": 100.0}}
+
+    mocked_client.scan.side_effect = scan_with_capacity
+    paginator = aws_dynamodb_parallel_scan.get_paginator(mocked_client)
+    start = time.monotonic()
+    # 24 pages consume 2400 RCUs of which 1600 can be consumed immediately, rest takes ~0.5s
+    pages = list(paginator.paginate(TableName=MOCK_TABLE_NAME, TotalSegments=4, Limit=10, max_read_capacity=1600))
+
+    assert len(pages) == 24
+    assert time.monotonic() - start >= 0.4
+
+
+def test_parallel_scan_error_stops_rate_limited_requests(mocked_client):
+    scan = mocked_client.scan.side_effect
+    failing, first_page = threading.Event(), threading.Event()
+
+    def scan_with_capacity(**kwargs):
+        if kwargs["Segment"] == 1:
+            failing.set()
+            first_page.wait()
+            # Let segment 0 start waiting for the rate limiter
+            time.sleep(0.2)
+            raise RuntimeError("scan failed")
+        failing.wait()
+        first_page.set()
+        return {**scan(**kwargs), "ConsumedCapacity": {"TableName": MOCK_TABLE_NAME, "CapacityUnits": 100.0}}
+
+    mocked_client.scan.side_effect = scan_with_capacity
+    paginator = aws_dynamodb_parallel_scan.get_paginator(mocked_client)
+    start = time.monotonic()
+    with pytest.raises(RuntimeError, match="scan failed"):
+        list(paginator.paginate(TableName=MOCK_TABLE_NAME, TotalSegments=2, Limit=10, max_read_capacity=1))
+
+    # The next request of segment 0 would wait for 100 seconds and is not made
+    assert time.monotonic() - start < 5
+    assert mocked_client.scan.call_count == 2
+
+
+def test_parallel_scan_resume_from_checkpoint(mocked_client, tmp_path):
+    store = checkpoint.JSONFileCheckpointStore(tmp_path / "checkpoint.json")
+    paginator = aws_dynamodb_parallel_scan.get_paginator(mocked_client)
+
+    processed = []
+    for i, page in enumerate(
+        paginator.paginate(TableName=MOCK_TABLE_NAME, TotalSegments=4, Limit=10, checkpoint_store=store)
+    ):
+        # Stop without processing the 6th page
+        if i == 5:
+            break
+        processed.extend(page["Items"])
+
+    saved = store.load()
+    assert saved["TotalSegments"] == 4
+    assert not any(state.get("Done") for state in saved["Segments"].values())
+
+    pages = paginator.paginate(
+        TableName=MOCK_TABLE_NAME, TotalSegments=4, Limit=10, checkpoint_store=store, resume_from=saved
+    )
+    processed.extend(utils.items_from_pages(pages))
+
+    assert sorted(processed, key=operator.itemgetter("pk")) == sorted(
+        utils.generate_items(205), key=operator.itemgetter("pk")
+    )
+    assert all(state == {"Done": True} for state in store.load()["Segments"].values())
+
+
+def test_parallel_scan_resume_completed_checkpoint(mocked_client):
+    paginator = aws_dynamodb_parallel_scan.get_paginator(mocked_client)
+    saved = {"TableName": MOCK_TABLE_NAME, "TotalSegments": 2, "Segments": {"0": {"Done": True}, "1": {"Done": True}}}
+    assert list(paginator.paginate(TableName=MOCK_TABLE_NAME, TotalSegments=2, resume_from=saved)) == []
+    assert mocked_client.scan.call_count == 0
+
+
+@pytest.mark.parametrize(
+    "saved",
+    [
+        {"TableName": MOCK_TABLE_NAME, "TotalSegments": 8, "Segments": {}},
+        {"TableName": "other-table", "TotalSegments": 4, "Segments": {}},
+    ],
+)
+def test_parallel_scan_resume_mismatched_checkpoint(mocked_client, saved):
+    paginator = aws_dynamodb_parallel_scan.get_paginator(mocked_client)
+    with pytest.raises(ValueError):
+        next(paginator.paginate(TableName=MOCK_TABLE_NAME, TotalSegments=4, resume_from=saved))
+
+
+def test_parallel_scan_segments(mocked_client):
+    paginator = aws_dynamodb_parallel_scan.get_paginator(mocked_client)
+    pages = paginator.paginate(TableName=MOCK_TABLE_NAME, TotalSegments=4, Limit=10, segments=[3, 1])
+    items = utils.items_from_pages(pages)
+
+    assert len(items) == 102
+    assert {call.kwargs["Segment"] for call in mocked_client.scan.call_args_list} == {1, 3}
+    assert {call.kwargs["TotalSegments"] for call in mocked_client.scan.call_args_list} == {4}
+
+
+@pytest.mark.parametrize("segments", [[4], [-1]])
+def test_parallel_scan_invalid_segments(mocked_client, segments):
+    paginator = aws_dynamodb_parallel_scan.get_paginator(mocked_client)
+    with pytest.raises(ValueError):
+        next(paginator.paginate(TableName=MOCK_TABLE_NAME, TotalSegments=4, segments=segments))
+
+
+def test_parallel_scan_resume_other_segments(mocked_client, tmp_path):
+    store = checkpoint.JSONFileCheckpointStore(tmp_path / "checkpoint.json")
+    paginator = aws_dynamodb_parallel_scan.get_paginator(mocked_client)
+    list(paginator.paginate(TableName=MOCK_TABLE_NAME, TotalSegments=4, segments=[0, 1], checkpoint_store=store))
+    assert store.load()["AssignedSegments"] == "0-1"
+
+    with pytest.raises(ValueError, match="AssignedSegments"):
+        next(paginator.paginate(TableName=MOCK_TABLE_NAME, TotalSegments=4, segments=[2, 3], resume_from=store.load()))
+
+
+def test_parallel_scan_error(mocked_client):
+    mocked_client.scan.side_effect = RuntimeError("scan failed")
+    paginator = aws_dynamodb_parallel_scan.get_paginator(mocked_client)
+    with pytest.raises(RuntimeError, match="scan failed"):
+        list(paginator.paginate(TableName=MOCK_TABLE_NAME, TotalSegments=4))
 
 
 @pytest.mark.parametrize(
@@ -64,6 +448,18 @@ def test_parallel_scan_mocked_table(
     )
 
 
+@pytest.mark.parametrize("numbers", ["decimal", "int"])
+def test_parallel_scan_deserialize(mocked_table, numbers):
+    paginator = aws_dynamodb_parallel_scan.get_paginator(utils.dynamodb_client())
+    pages = list(paginator.paginate(TableName=MOCK_TABLE_NAME, TotalSegments=4, Limit=50, deserialize=numbers))
+    items = utils.items_from_pages(pages)
+    # LastEvaluatedKey keeps DynamoDB types
+    assert all(page["LastEvaluatedKey"]["pk"].keys() == {"S"} for page in pages if "LastEvaluatedKey" in page)
+    assert sorted(items, key=operator.itemgetter("pk")) == sorted(
+        utils.generate_items(205), key=operator.itemgetter("pk")
+    )
+
+
 @pytest.mark.parametrize(
     "extra_args",
     [
@@ -71,6 +467,11 @@ def test_parallel_scan_mocked_table(
         ["--total-segments", "4"],
         ["--total-segments", "25"],
         ["--total-segments", "4", "--limit", "100"],
+        ["--total-segments", "25", "--max-workers", "2"],
+        ["--total-segments", "4", "--max-retries", "2", "--max-read-capacity", "1000"],
+        ["--total-segments", "4", "--segments", "0-3"],
+        ["--total-segments", "4", "--json-encoder", "json"],
+        ["--total-segments", "4", "--max-items", "1000"],
     ],
 )
 def test_cli_scan_mocked_client(mocked_client, extra_args, capsys):
@@ -87,6 +488,130 @@ def test_cli_scan_mocked_client(mocked_client, extra_args, capsys):
     )
 
 
+def test_cli_scan_document_client_output(mocked_table, capsysbinary):
+    client = clients.create_client(document=True)
+    expected = [
+        json.dumps(item, cls=output.DecimalEncoder).encode() for item in client.scan(TableName=MOCK_TABLE_NAME)["Items"]
+    ]
+
+    args = ["aws-dynamodb-parallel-scan", "--table-name", MOCK_TABLE_NAME, "--use-document-client", "--output-items"]
+    with (
+        unittest.mock.patch("sys.argv", args),
+        unittest.mock.patch.object(output.DecimalEncoder, "default", side_effect=TypeError) as default,
+    ):
+        aws_dynamodb_parallel_scan.cli()
+
+    # Same output as encoding the Decimals of the document client, without converting them
+    assert sorted(capsysbinary.readouterr().out.splitlines()) == sorted(expected)
+    default.assert_not_called()
+
+
+def test_cli_scan_max_items(mocked_client, capsys):
+    args = ["aws-dynamodb-parallel-scan", "--table-name", MOCK_TABLE_NAME, "--total-segments", "4", "--output-items"]
+    with (
+        unittest.mock.patch("sys.argv", [*args, "--max-items", "7"]),
+        unittest.mock.patch("boto3.client", return_value=mocked_client),
+    ):
+        aws_dynamodb_parallel_scan.cli()
+
+    assert len(utils.parse_jsonl(capsys.readouterr().out)) == 7
+
+
+def test_cli_scan_checkpoint(mocked_client, capsys, tmp_path):
+    checkpoint_file = str(tmp_path / "checkpoint.json")
+    args = [
+        "aws-dynamodb-parallel-scan",
+        "--table-name",
+        MOCK_TABLE_NAME,
+        "--total-segments",
+        "4",
+        "--checkpoint-file",
+        checkpoint_file,
+        "--output-items",
+    ]
+    with unittest.mock.patch("sys.argv", args), unittest.mock.patch("boto3.client", return_value=mocked_client):
+        aws_dynamodb_parallel_scan.cli()
+        assert len(utils.parse_jsonl(capsys.readouterr().out)) == 205
+
+        # Scan has been completed, nothing to output anymore
+        aws_dynamodb_parallel_scan.cli()
+        assert utils.parse_jsonl(capsys.readouterr().out) == []
+
+    assert mocked_client.scan.call_count == 4
+
+
+def test_cli_scan_workers(mocked_client, capsys, tmp_path):
+    items = []
+    manifests = []
+    for worker_index in range(3):
+        manifest_file = str(tmp_path / f"manifest-{worker_index}.json")
+        args = [
+            "aws-dynamodb-parallel-scan",
+            "--table-name",
+            MOCK_TABLE_NAME,
+            "--total-segments",
+            "8",
+            "--worker-index",
+            str(worker_index),
+            "--worker-count",
+            "3",
+            "--manifest-file",
+            manifest_file,
+            "--output-items",
+        ]
+        with unittest.mock.patch("sys.argv", args), unittest.mock.patch("boto3.client", return_value=mocked_client):
+            aws_dynamodb_parallel_scan.cli()
+        items.extend(utils.parse_jsonl(capsys.readouterr().out))
+        manifests.append(checkpoint.JSONFileCheckpointStore(manifest_file).load())
+
+    sharding.check_coverage(manifests)
+    assert [m["AssignedSegments"] for m in manifests] == ["0-1", "2-4", "5-7"]
+    assert sorted(items, key=operator.itemgetter("pk")) == sorted(
+        utils.generate_items(205), key=operator.itemgetter("pk")
+    )
+
+
+@pytest.mark.parametrize(
+    "extra_args",
+    [
+        ["--worker-index", "0"],
+        ["--worker-index", "4", "--worker-count", "4"],
+        ["--segments", "0", "--worker-index", "0", "--worker-count", "4"],
+        ["--segments", "x"],
+        ["--segments", "2-4"],
+        ["--deserialize", "int", "--use-document-client"],
+        ["--max-items", "0"],
+        ["--max-items", "5", "--processes", "2"],
+        ["--max-items", "5", "--manifest-file", "manifest.json"],
+    ],
+)
+def test_cli_scan_invalid_segments(mocked_client, extra_args):
+    args = ["aws-dynamodb-parallel-scan", "--table-name", MOCK_TABLE_NAME, "--total-segments", "4", *extra_args]
+    with unittest.mock.patch("sys.argv", args), pytest.raises(SystemExit):
+        aws_dynamodb_parallel_scan.cli()
+
+
+@pytest.mark.parametrize("output_format", ["parquet", "arrow"])
+def test_cli_scan_columnar_without_pyarrow(mocked_client, capsys, tmp_path, output_format):
+    args = [
+        "aws-dynamodb-parallel-scan",
+        "--table-name",
+        MOCK_TABLE_NAME,
+        "--output-format",
+        output_format,
+        "--output-path",
+        str(tmp_path / "mytable"),
+    ]
+    with (
+        unittest.mock.patch("sys.argv", args),
+        unittest.mock.patch.object(columnar, "pyarrow", None),
+        pytest.raises(SystemExit),
+    ):
+        aws_dynamodb_parallel_scan.cli()
+
+    assert "columnar output requires the pyarrow package" in capsys.readouterr().err
+
+
 @pytest.mark.parametrize(
     "extra_args, output_deserializer, item_deserializer, returned_items",
     [
@@ -99,6 +624,19 @@ def test_cli_scan_mocked_client(mocked_client, extra_args, capsys):
             utils.no_op,
             205,
         ),
+        (
+            ["--use-document-client", "--output-items", "--json-encoder", "json"],
+            utils.parse_jsonl,
+            utils.no_op,
+            205,
+        ),
+        (
+            ["--use-document-client", "--output-items", "--json-encoder", "orjson"],
+            utils.parse_jsonl,
+            utils.no_op,
+            205,
+        ),
+        (["--deserialize", "int", "--output-items"], utils.parse_jsonl, utils.no_op, 205),
         (
             [
                 "--filter-expression",
@@ -0,0 +1,441 @@
+import io
+import json
+import threading
+import time
+import unittest.mock
+
+import pytest
+
+import aws_dynamodb_parallel_scan
+from aws_dynamodb_parallel_scan import batch
+
+from . import utils
+from .test_aws_dynamodb_parallel_scan import throttling_error
+
+MOCK_TABLE_NAME = "dynamodb-parallel-scan-testtable"
+
+
+class BatchGetStub:
+    """DynamoDB client stub with a batch_get_item() method over numbered items.
+
+    The first request of each batch leaves the last unprocessed_count keys unprocessed.
+    """
+
+    def __init__(self, item_count: int, unprocessed_count: int = 0):
+        self._item_count = item_count
+        self._unprocessed_count = unprocessed_count
+        self.calls: list[dict] = []
+        self._lock = threading.Lock()
+
+    def batch_get_item(self, **kwargs):
+        with self._lock:
+            self.calls.append(kwargs)
+        assert list(kwargs["RequestItems"]) == [MOCK_TABLE_NAME]
+        keys = kwargs["RequestItems"][MOCK_TABLE_NAME]["Keys"]
+        assert len(keys) <= batch.MAX_BATCH_KEYS
+        unprocessed = []
+        if self._unprocessed_count and len(keys) > self._unprocessed_count:
+            keys, unprocessed = keys[: -self._unprocessed_count], keys[-self._unprocessed_count :]
+        items = [
+            {"pk": key["pk"], "attr2": {"N": key["pk"]["S"]}} for key in keys if int(key["pk"]["S"]) < self._item_count
+        ]
+        response = {"Responses": {MOCK_TABLE_NAME: items}, "UnprocessedKeys": {}}
+        if unprocessed:
+            response["UnprocessedKeys"] = {MOCK_TABLE_NAME: {"Keys": unprocessed}}
+        if kwargs.get("ReturnConsumedCapacity", "NONE") != "NONE":
+            response["ConsumedCapacity"] = [{"TableName": MOCK_TABLE_NAME, "CapacityUnits": len(keys) / 2}]
+        return response
+
+
+def keys(numbers) -> list[dict]:
+    return [{"pk": {"S": str(i)}} for i in numbers]
+
+
+def item_numbers(items) -> list[int]:
+    return sorted(int(item["pk"]["S"]) for item in items)
+
+
+def test_batch_loader():
+    client = BatchGetStub(500)
+    loader = aws_dynamodb_parallel_scan.get_batch_loader(client)
+
+    pages = list(loader.load(keys(range(550)), TableName=MOCK_TABLE_NAME, max_workers=4))
+
+    assert item_numbers(item for page in pages for item in page["Items"]) == list(range(500))
+    assert sum(page["Count"] for page in pages) == 500
+    assert sorted(len(call["RequestItems"][MOCK_TABLE_NAME]["Keys"]) for call in client.calls) == [50] + [100] * 5
+
+
+def test_batch_loader_error_stops_rate_limited_batches():
+    client = BatchGetStub(300)
+    batch_get_item = client.batch_get_item
+    failing, first_batch = threading.Event(), threading.Event()
+
+    def failing_batch_get_item(**kwargs):
+        if kwargs["RequestItems"][MOCK_TABLE_NAME]["Keys"][0] == {"pk": {"S": "100"}}:
+            failing.set()
+            first_batch.wait()
+            # Let the third batch start waiting for the rate limiter
+            time.sleep(0.2)
+            raise RuntimeError("batch failed")
+        failing.wait()
+        first_batch.set()
+        return {**batch_get_item(**kwargs), "ConsumedCapacity": [{"TableName": MOCK_TABLE_NAME, "CapacityUnits": 100}]}
+
+    client.batch_get_item = failing_batch_get_item  # type: ignore[method-assign]
+    loader = aws_dynamodb_parallel_scan.get_batch_loader(client)
+    start = time.monotonic()
+    with pytest.raises(RuntimeError, match="batch failed"):
+        list(loader.load(keys(range(300)), TableName=MOCK_TABLE_NAME, max_workers=2, max_read_capacity=1))
+
+    # The third batch would wait for 100 seconds and is not sent
+    assert time.monotonic() - start < 5
+    assert [call["RequestItems"][MOCK_TABLE_NAME]["Keys"][0] for call in client.calls] == [{"pk": {"S": "0"}}]
+
+
+def test_batch_loader_retries_unprocessed_keys():
+    client = BatchGetStub(250, unprocessed_count=10)
+    loader = aws_dynamodb_parallel_scan.BatchLoader(client)
+
+    with unittest.mock.patch("aws_dynamodb_parallel_scan.throttling.backoff_delay", return_value=0) as delay:
+        items = list(loader.load_items(keys(range(250)), TableName=MOCK_TABLE_NAME))
+
+    assert item_numbers(items) == list(range(250))
+    # Three batches of 100, 100 and 50 keys, each with one retry of 10 keys
+    assert len(client.calls) == 6
+    assert delay.call_count == 3
+
+
+def test_batch_loader_unprocessed_keys_error():
+    client = BatchGetStub(200, unprocessed_count=1)
+    client.batch_get_item = unittest.mock.Mock(  # type: ignore[method-assign]
+        return_value={
+            "Responses": {MOCK_TABLE_NAME: []},
+            "UnprocessedKeys": {MOCK_TABLE_NAME: {"Keys": keys([1])}},
+        }
+    )
+    loader = aws_dynamodb_parallel_scan.get_batch_loader(client)
+
+    with (
+        unittest.mock.patch("aws_dynamodb_parallel_scan.throttling.backoff_delay", return_value=0),
+        pytest.raises(batch.UnprocessedKeysError) as exc_info,
+    ):
+        list(loader.load(keys([1]), TableName=MOCK_TABLE_NAME, max_retries=2))
+
+    assert exc_info.value.keys == keys([1])
+    assert client.batch_get_item.call_count == 3
+
+
+def test_batch_loader_retries_throttled_requests():
+    client = BatchGetStub(10)
+    batch_get_item = client.batch_get_item
+    throttled = []
+
+    def throttling_batch_get_item(**kwargs):
+        if not throttled:
+            throttled.append(kwargs)
+            raise throttling_error()
+        return batch_get_item(**kwargs)
+
+    loader = aws_dynamodb_parallel_scan.get_batch_loader(client)
+    with (
+        unittest.mock.patch.object(client, "batch_get_item", side_effect=throttling_batch_get_item),
+        unittest.mock.patch("aws_dynamodb_parallel_scan.throttling.backoff_delay", return_value=0),
+    ):
+        assert item_numbers(loader.load_items(keys(range(10)), TableName=MOCK_TABLE_NAME)) == list(range(10))
+    assert len(throttled) == 1
+
+
+def test_batch_loader_options():
+    client = BatchGetStub(100)
+    loader = aws_dynamodb_parallel_scan.get_batch_loader([client, client])
+
+    pages = list(
+        loader.load(
+            keys([1, 2, 1, 3, 4, 5]),
+            TableName=MOCK_TABLE_NAME,
+            batch_size=3,
+            deserialize="int",
+            ProjectionExpression="#pk",
+            ExpressionAttributeNames={"#pk": "pk"},
+            ConsistentRead=True,
+            ReturnConsumedCapacity="TOTAL",
+        )
+    )
+
+    # Repeated key is requested once per batch
+    assert sorted(item["attr2"] for page in pages for item in page["Items"]) == [1, 2, 3, 4, 5]
+    assert sorted(page["ConsumedCapacity"]["CapacityUnits"] for page in pages) == [1.0, 1.5]
+    assert client.calls[0]["RequestItems"][MOCK_TABLE_NAME]["ProjectionExpression"] == "#pk"
+    assert client.calls[0]["RequestItems"][MOCK_TABLE_NAME]["ConsistentRead"] is True
+    assert client.calls[0]["ReturnConsumedCapacity"] == "TOTAL"
+
+
+def test_batch_loader_stops_reading_keys():
+    client = BatchGetStub(10_000)
+    loader = aws_dynamodb_parallel_scan.get_batch_loader(client)
+    read = []
+
+    def key_stream():
+        for i in range(10_000):
+            read.append(i)
+            yield {"pk": {"S": str(i)}}
+
+    pages = loader.load(key_stream(), TableName=MOCK_TABLE_NAME, max_workers=2, max_pending_batches=3)
+    next(pages)
+    pages.close()
+
+    # Pending batches and the batches submitted when they completed
+    assert len(read) <= 2 * 3 * 100
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{}, {"TableName": MOCK_TABLE_NAME, "batch_size": 101}, {"TableName": MOCK_TABLE_NAME, "max_workers": 0}],
+)
+def test_batch_loader_invalid_args(kwargs):
+    loader = aws_dynamodb_parallel_scan.get_batch_loader(BatchGetStub(1))
+    with pytest.raises(ValueError):
+        list(loader.load(keys([0]), **kwargs))
+
+
+def test_batch_loader_mocked_table(mocked_table):
+    loader = aws_dynamodb_parallel_scan.get_batch_loader(utils.dynamodb_document_client())
+
+    items = list(loader.load_items(({"pk": str(i)} for i in range(0, 300, 3)), TableName=MOCK_TABLE_NAME))
+
+    assert sorted(item["attr2"] for item in items) == list(range(0, 205, 3))
+
+
+@pytest.mark.parametrize("use_document_client", [False, True])
+def test_cli_get(mocked_table, capsys, tmp_path, use_document_client):
+    keys_file = tmp_path / "keys.jsonl"
+    numbers = range(0, 300, 2)
+    keys_file.write_text(
+        "\n".join(json.dumps({"pk": str(i)} if use_document_client else {"pk": {"S": str(i)}}) for i in numbers)
+    )
+    args = [
+        "aws-dynamodb-parallel-scan",
+        "get",
+        "--table-name",
+        MOCK_TABLE_NAME,
+        "--keys-file",
+        str(keys_file),
+        "--output-items",
+        *(["--use-document-client"] if use_document_client else ["--deserialize", "int"]),
+    ]
+    with unittest.mock.patch("sys.argv", args):
+        aws_dynamodb_parallel_scan.cli()
+
+    items = utils.parse_jsonl(capsys.readouterr().out)
+    assert sorted(item["attr2"] for item in items) == list(range(0, 205, 2))
+
+
+def test_cli_get_stdin(mocked_table, capsys):
+    args = ["aws-dynamodb-parallel-scan", "get", "--table-name", MOCK_TABLE_NAME, "--max-workers", "2"]
+    stdin = io.StringIO("".join(json.dumps({"pk": {"S": str(i)}}) + "\n" for i in range(3)))
+    with unittest.mock.patch("sys.argv", args), unittest.mock.patch("sys.stdin", stdin):
+        aws_dynamodb_parallel_scan.cli()
+
+    assert len(utils.items_from_pages_output(capsys.readouterr().out)) == 3
+
+
+@pytest.mark.parametrize(
+    "extra_args",
+    [[], ["--table-name", MOCK_TABLE_NAME, "--batch-size", "200"], ["--table-name", MOCK_TABLE_NAME, "--clients", "0"]],
+)
+def test_cli_get_invalid_args(mock_aws_env, tmp_path, extra_args):
+    keys_file = tmp_path / "keys.jsonl"
+    keys_file.write_text('{"pk": {"S": "0"}}\n')
+    args = ["aws-dynamodb-parallel-scan", "get", "--keys-file", str(keys_file), *extra_args]
+    with unittest.mock.patch("sys.argv", args), pytest.raises(SystemExit):
+        aws_dynamodb_parallel_scan.cli()
+
+
+class BatchWriteStub:
+    """DynamoDB client stub with a batch_write_item() method that stores put items.
+
+    The first request of each batch leaves the last unprocessed_count items unprocessed.
+    """
+
+    def __init__(self, unprocessed_count: int = 0):
+        self._unprocessed_count = unprocessed_count
+        self.items: dict[str, dict] = {}
+        self.calls: list[dict] = []
+        self._lock = threading.Lock()
+
+    def batch_write_item(self, **kwargs):
+        requests = kwargs["RequestItems"][MOCK_TABLE_NAME]
+        assert len(requests) <= batch.MAX_BATCH_WRITE_ITEMS
+        keys = [request["PutRequest"]["Item"]["pk"]["S"] for request in requests]
+        assert len(set(keys)) == len(keys), "Provided list of item keys contains duplicates"
+        unprocessed = []
+        with self._lock:
+            if self._unprocessed_count and len(requests) > self._unprocessed_count and not self._retry(requests):
+                requests, unprocessed = requests[: -self._unprocessed_count], requests[-self._unprocessed_count :]
+            self.calls.append(kwargs)
+            for request in requests:
+                item = request["PutRequest"]["Item"]
+                self.items[item["pk"]["S"]] = item
+        response = {"UnprocessedItems": {MOCK_TABLE_NAME: unprocessed} if unprocessed else {}}
+        if kwargs.get("ReturnConsumedCapacity", "NONE") != "NONE":
+            response["ConsumedCapacity"] = [{"TableName": MOCK_TABLE_NAME, "CapacityUnits": float(len(requests))}]
+        return response
+
+    def _retry(self, requests: list) -> bool:
+        return any(request["PutRequest"]["Item"]["pk"]["S"] in self.items for request in requests)
+
+
+def test_batch_writer():
+    client = BatchWriteStub()
+    writer = aws_dynamodb_parallel_scan.get_batch_writer(client)
+
+    result = writer.write(iter(keys(range(110))), TableName=MOCK_TABLE_NAME, ReturnConsumedCapacity="TOTAL")
+
+    assert result == {"Count": 110, "ConsumedCapacity": {"TableName": MOCK_TABLE_NAME, "CapacityUnits": 110.0}}
+    assert sorted(map(int, client.items)) == list(range(110))
+    assert sorted(len(call["RequestItems"][MOCK_TABLE_NAME]) for call in client.calls) == [10] + [25] * 4
+
+
+def test_batch_writer_retries_unprocessed_items():
+    client = BatchWriteStub(unprocessed_count=5)
+    writer = aws_dynamodb_parallel_scan.BatchWriter([client, client])
+
+    with unittest.mock.patch("aws_dynamodb_parallel_scan.throttling.backoff_delay", return_value=0) as delay:
+        assert writer.write(keys(range(50)), TableName=MOCK_TABLE_NAME)["Count"] == 50
+
+    assert sorted(map(int, client.items)) == list(range(50))
+    assert len(client.calls) == 4
+    assert delay.call_count == 2
+
+
+def test_batch_writer_unprocessed_items_error():
+    client = unittest.mock.Mock()
+    client.batch_write_item.side_effect = lambda RequestItems: {"UnprocessedItems": RequestItems}
+    writer = aws_dynamodb_parallel_scan.get_batch_writer(client)
+
+    with (
+        unittest.mock.patch("aws_dynamodb_parallel_scan.throttling.backoff_delay", return_value=0),
+        pytest.raises(batch.UnprocessedItemsError) as exc_info,
+    ):
+        writer.write(keys([1]), TableName=MOCK_TABLE_NAME, max_retries=1)
+
+    assert exc_info.value.requests == [{"PutRequest": {"Item": {"pk": {"S": "1"}}}}]
+    assert client.batch_write_item.call_count == 2
+
+
+def test_batch_writer_transform():
+    client = BatchWriteStub()
+    writer = aws_dynamodb_parallel_scan.get_batch_writer(client)
+
+    def transform(item):
+        number = int(item["pk"]["S"])
+        # Skip odd items and map pairs of even items to the same key
+        return None if number % 2 else {"pk": {"S": str(number // 4)}, "source": item["pk"]}
+
+    result = writer.write(keys(range(98)), TableName=MOCK_TABLE_NAME, transform=transform, key_attributes=["pk"])
+
+    assert result["Count"] == 25
+    assert sorted(map(int, client.items)) == list(range(25))
+    # The last item with a key wins
+    assert client.items["0"]["source"] == {"S": "2"}
+
+
+def test_batch_writer_write_capacity():
+    client = BatchWriteStub()
+    writer = aws_dynamodb_parallel_scan.get_batch_writer(client)
+
+    with unittest.mock.patch("aws_dynamodb_parallel_scan.throttling.RateLimiter") as rate_limiter:
+        writer.write(keys(range(30)), TableName=MOCK_TABLE_NAME, max_write_capacity=10)
+
+    rate_limiter.assert_called_once_with(10)
+    assert sorted(c.args[0] for c in rate_limiter.return_value.consume.call_args_list) == [5.0, 25.0]
+    assert all(call["ReturnConsumedCapacity"] == "TOTAL" for call in client.calls)
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"TableName": MOCK_TABLE_NAME, "batch_size": 26}])
+def test_batch_writer_invalid_args(kwargs):
+    with pytest.raises(ValueError):
+        aws_dynamodb_parallel_scan.get_batch_writer(BatchWriteStub()).write(keys([0]), **kwargs)
+
+
+TRANSFORM = """
+def transform(item):
+    if item["attr2"] % 2:
+        return None
+    return {**item, "copied": True}
+"""
+
+
+@pytest.mark.parametrize("use_document_client", [False, True])
+def test_cli_copy(mocked_table, capsys, tmp_path, use_document_client):
+    utils.create_test_table("copy-target")
+    args = [
+        "aws-dynamodb-parallel-scan",
+        "copy",
+        "--table-name",
+        MOCK_TABLE_NAME,
+        "--target-table-name",
+        "copy-target",
+        "--total-segments",
+        "4",
+        "--write-workers",
+        "3",
+        "--max-write-capacity",
+        "1000",
+    ]
+    if use_document_client:
+        (tmp_path / "copy_transform.py").write_text(TRANSFORM)
+        args += ["--use-document-client", "--transform", f"{tmp_path / 'copy_transform.py'}:transform"]
+    with unittest.mock.patch("sys.argv", args):
+        aws_dynamodb_parallel_scan.cli()
+
+    expected = 103 if use_document_client else 205
+    assert json.loads(capsys.readouterr().out) == {"ItemsRead": 205, "ItemsWritten": expected}
+    copied = list(aws_dynamodb_parallel_scan.iter_items(utils.dynamodb_document_client(), TableName="copy-target"))
+    assert len(copied) == expected
+    assert all(item.get("copied", False) == use_document_client for item in copied)
+
+
+DUPLICATE_KEY_TRANSFORM = """
+def transform(item):
+    # Map pairs of items to the same key
+    return {"pk": {"S": str(int(item["pk"]["S"]) // 2)}, "source": item["pk"]}
+"""
+
+
+def test_cli_copy_key_attributes(mocked_table, capsys, tmp_path):
+    utils.create_test_table("copy-target")
+    (tmp_path / "copy_transform.py").write_text(DUPLICATE_KEY_TRANSFORM)
+    args = [
+        "aws-dynamodb-parallel-scan",
+        "copy",
+        "--table-name",
+        MOCK_TABLE_NAME,
+        "--target-table-name",
+        "copy-target",
+        "--transform",
+        f"{tmp_path / 'copy_transform.py'}:transform",
+        "--key-attributes",
+        "pk",
+    ]
+    write = batch.BatchWriter.write
+    with (
+        unittest.mock.patch("sys.argv", args),
+        unittest.mock.patch.object(batch.BatchWriter, "write", autospec=True, side_effect=write) as spy,
+    ):
+        aws_dynamodb_parallel_scan.cli()
+
+    assert spy.call_args.kwargs["key_attributes"] == ["pk"]
+    assert json.loads(capsys.readouterr().out)["ItemsRead"] == 205
+    copied = list(aws_dynamodb_parallel_scan.iter_items(utils.dynamodb_document_client(), TableName="copy-target"))
+    assert sorted(int(item["pk"]) for item in copied) == list(range(103))
+
+
+@pytest.mark.parametrize(
+    "extra_args", [[], ["--target-table-name", "target", "--transform", "no_such_module:transform"]]
+)
+def test_cli_copy_invalid_args(mock_aws_env, extra_args):
+    args = ["aws-dynamodb-parallel-scan", "copy", "--table-name", MOCK_TABLE_NAME, *extra_args]
+    with unittest.mock.patch("sys.argv", args), pytest.raises(SystemExit):
+        aws_dynamodb_parallel_scan.cli()
@@ -0,0 +1,235 @@
+import decimal
+import time
+import unittest.mock
+
+import boto3.dynamodb.types
+import botocore.client
+import pytest
+
+import aws_dynamodb_parallel_scan
+from aws_dynamodb_parallel_scan import cache
+
+from . import utils
+from .conftest import mock_scan
+
+MOCK_TABLE_NAME = "dynamodb-parallel-scan-testtable"
+
+
+def mock_client(item_count: int = 205) -> unittest.mock.Mock:
+    return unittest.mock.Mock(
+        scan=unittest.mock.Mock(side_effect=mock_scan),
+        describe_table=unittest.mock.Mock(
+            return_value={
+                "Table": {
+                    "TableArn": f"arn:aws:dynamodb:eu-north-1:123456789012:table/{MOCK_TABLE_NAME}",
+                    "ItemCount": item_count,
+                    "TableSizeBytes": item_count * 20,
+                }
+            }
+        ),
+    )
+
+
+def scan(client, scan_cache: cache.ScanCache, **kwargs) -> list:
+    paginator = aws_dynamodb_parallel_scan.get_paginator(client)
+    kwargs.setdefault("Limit", 50)
+    return list(paginator.paginate(TableName=MOCK_TABLE_NAME, TotalSegments=4, cache=scan_cache, **kwargs))
+
+
+def test_cache_replays_identical_scan(tmp_path):
+    scan_cache = cache.ScanCache(tmp_path)
+    client = mock_client()
+    pages = scan(client, scan_cache, with_segments=True)
+    calls = client.scan.call_count
+    assert len(list(tmp_path.glob("*.scan"))) == 1
+
+    assert scan(client, scan_cache, with_segments=True) == pages
+    assert sorted(item["pk"] for _, page in pages for item in page["Items"]) == sorted(str(i) for i in range(205))
+    replayed = scan(client, scan_cache)
+    assert replayed == [page for _, page in pages]
+    assert client.scan.call_count == calls
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"FilterExpression": "attr2 > :v", "ExpressionAttributeValues": {":v": {"N": "1"}}},
+        {"ConsistentRead": True},
+        {"segments": [0, 1]},
+    ],
+)
+def test_cache_keyed_by_scan_args(tmp_path, kwargs):
+    scan_cache = cache.ScanCache(tmp_path)
+    client = mock_client()
+    scan(client, scan_cache)
+    calls = client.scan.call_count
+
+    scan(client, scan_cache, **kwargs)
+    assert client.scan.call_count > calls
+    assert len(list(tmp_path.glob("*.scan"))) == 2
+
+
+def test_cache_segments_iterator(tmp_path):
+    scan_cache = cache.ScanCache(tmp_path)
+    client = mock_client()
+    pages = scan(client, scan_cache, segments=iter([0, 1, 2, 3]))
+    assert len([item for page in pages for item in page["Items"]]) == 205
+
+    # The cached scan is the same as the scan of all segments
+    calls = client.scan.call_count
+    assert scan(client, scan_cache, segments=[3, 2, 1, 0]) == pages
+    assert client.scan.call_count == calls
+
+
+def test_cache_keyed_by_table_metadata(tmp_path):
+    scan_cache = cache.ScanCache(tmp_path)
+    scan(mock_client(), scan_cache)
+
+    changed = mock_client(item_count=206)
+    scan(changed, scan_cache)
+    changed.scan.assert_called()
+
+
+def test_cache_expires_entries(tmp_path):
+    client = mock_client()
+    scan(client, cache.ScanCache(tmp_path, ttl=60))
+    calls = client.scan.call_count
+
+    scan(client, cache.ScanCache(tmp_path, ttl=60))
+    assert client.scan.call_count == calls
+    with unittest.mock.patch("time.time", return_value=time.time() + 61):
+        scan(client, cache.ScanCache(tmp_path, ttl=60))
+    assert client.scan.call_count > calls
+
+
+def test_cache_not_stored_when_scan_is_incomplete(tmp_path):
+    scan_cache = cache.ScanCache(tmp_path)
+    paginator = aws_dynamodb_parallel_scan.get_paginator(mock_client())
+    pages = paginator.paginate(TableName=MOCK_TABLE_NAME, TotalSegments=4, Limit=50, cache=scan_cache)
+    next(pages)
+    pages.close()
+
+    token = aws_dynamodb_parallel_scan.CancellationToken()
+    for _ in paginator.paginate(TableName=MOCK_TABLE_NAME, TotalSegments=4, Limit=50, cache=scan_cache, cancel=token):
+        token.cancel()
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    client = mock_client()
+    scan(client, cache.ScanCache(tmp_path), Limit=100)
+    size = next(tmp_path.glob("*.scan")).stat().st_size
+    scan_cache = cache.ScanCache(tmp_path, max_size=size * 5 // 2)
+    scan(client, scan_cache, Limit=101)
+
+    # Use the first entry so that the second one is the least recently used
+    scan(client, scan_cache, Limit=100)
+    calls = client.scan.call_count
+    scan(client, scan_cache, Limit=102)
+    assert len(list(tmp_path.glob("*.scan"))) == 2
+
+    scan(client, scan_cache, Limit=100)
+    assert client.scan.call_count == calls + 4
+    scan(client, scan_cache, Limit=101)
+    assert client.scan.call_count > calls + 4
+
+
+def test_cache_skips_scans_larger_than_max_size(tmp_path):
+    client = mock_client()
+    scan(client, cache.ScanCache(tmp_path, max_size=1000))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_cache_round_trips_native_values(tmp_path):
+    scan_cache = cache.ScanCache(tmp_path)
+    item = {
+        "pk": "a",
+        "n": decimal.Decimal("1.5"),
+        "b": boto3.dynamodb.types.Binary(b"\x00\x01"),
+        "raw": b"\x02",
+        "ss": {"x", "y"},
+        "ns": {decimal.Decimal(1), decimal.Decimal(2)},
+        "m": {"l": [None, True, "s"]},
+    }
+    page = {"Items": [item], "Count": 1, "ResponseMetadata": {"HTTPStatusCode": 200}}
+    key = cache.ScanCache.key({"Scan": {"TableName": MOCK_TABLE_NAME}})
+    assert scan_cache.get(key) is None
+    assert list(scan_cache.put(key, [(3, page)])) == [(3, page)]
+
+    replayed = scan_cache.get(key)
+    assert replayed is not None
+    assert list(replayed) == [(3, {"Items": [item], "Count": 1})]
+
+
+def test_cache_key_is_normalized():
+    first = cache.ScanCache.key({"Scan": {"TableName": "t", "Limit": 1}, "Values": {"a", "b", "c"}})
+    second = cache.ScanCache.key({"Scan": {"Limit": 1, "TableName": "t"}, "Values": {"c", "b", "a"}})
+    assert first == second
+    assert first != cache.ScanCache.key({"Scan": {"TableName": "t", "Limit": 2}, "Values": {"a", "b", "c"}})
+
+
+def test_cache_ignores_invalid_entries(tmp_path):
+    scan_cache = cache.ScanCache(tmp_path)
+    key = cache.ScanCache.key({})
+    (tmp_path / f"{key}.scan").write_bytes(b"garbage")
+    assert scan_cache.get(key) is None
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.parametrize("kwargs", [{"ttl": 0}, {"max_size": 0}])
+def test_cache_invalid_args(tmp_path, kwargs):
+    with pytest.raises(ValueError):
+        cache.ScanCache(tmp_path, **kwargs)
+
+
+def test_cache_cannot_be_used_with_max_items(tmp_path):
+    with pytest.raises(ValueError):
+        scan(mock_client(), cache.ScanCache(tmp_path), max_items=10)
+
+
+def test_cli_scan_cache(mocked_table, capsys, tmp_path):
+    args = [
+        "aws-dynamodb-parallel-scan",
+        "--table-name",
+        MOCK_TABLE_NAME,
+        "--total-segments",
+        "4",
+        "--output-items",
+        "--cache-dir",
+        str(tmp_path),
+        "--cache-ttl",
+        "600",
+    ]
+    with unittest.mock.patch("sys.argv", args):
+        aws_dynamodb_parallel_scan.cli()
+    first = utils.parse_jsonl(capsys.readouterr().out)
+    assert len(first) == 205
+
+    with (
+        unittest.mock.patch("sys.argv", args),
+        unittest.mock.patch.object(
+            botocore.client.BaseClient,
+            "_make_api_call",
+            autospec=True,
+            side_effect=botocore.client.BaseClient._make_api_call,
+        ) as call,
+    ):
+        aws_dynamodb_parallel_scan.cli()
+    assert utils.parse_jsonl(capsys.readouterr().out) == first
+    # Only the table is described, nothing is scanned
+    assert [c.args[1] for c in call.call_args_list] == ["DescribeTable"]
+
+
+@pytest.mark.parametrize(
+    "extra_args",
+    [
+        ["--cache-ttl", "60"],
+        ["--cache-dir", "cache", "--max-items", "10"],
+        ["--cache-dir", "cache", "--cache-ttl", "0"],
+    ],
+)
+def test_cli_scan_invalid_cache_args(mock_aws_env, extra_args):
+    args = ["aws-dynamodb-parallel-scan", "--table-name", MOCK_TABLE_NAME, *extra_args]
+    with unittest.mock.patch("sys.argv", args), pytest.raises(SystemExit):
+        aws_dynamodb_parallel_scan.cli()
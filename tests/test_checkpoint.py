@@ -0,0 +1,51 @@
+import decimal
+import time
+
+import boto3.dynamodb.types
+
+from aws_dynamodb_parallel_scan import checkpoint
+
+
+def test_json_file_checkpoint_store(tmp_path):
+    store = checkpoint.JSONFileCheckpointStore(tmp_path / "checkpoint.json")
+    assert store.load() is None
+
+    saved = {
+        "TableName": "mytable",
+        "TotalSegments": 2,
+        "Segments": {
+            "0": {"ExclusiveStartKey": {"pk": "a", "sk": decimal.Decimal("1.5"), "b": b"\x00\x01"}},
+            "1": {"Done": True},
+        },
+    }
+    store.save(saved)
+    assert store.load() == saved
+    assert list(tmp_path.iterdir()) == [tmp_path / "checkpoint.json"]
+
+
+def test_json_file_checkpoint_store_binary(tmp_path):
+    store = checkpoint.JSONFileCheckpointStore(tmp_path / "checkpoint.json")
+    store.save({"Segments": {"0": {"ExclusiveStartKey": {"pk": boto3.dynamodb.types.Binary(b"key")}}}})
+    assert store.load() == {"Segments": {"0": {"ExclusiveStartKey": {"pk": b"key"}}}}
+
+
+def test_checkpoint_writer_saves_in_background(tmp_path):
+    store = checkpoint.JSONFileCheckpointStore(tmp_path / "checkpoint.json")
+    with checkpoint.CheckpointWriter(store, {"Segments": {}}, interval=0.01) as writer:
+        writer.update(0, {"pk": {"S": "a"}})
+        writer.update(1, None)
+        deadline = time.monotonic() + 5
+        while store.load() is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert store.load() == {"Segments": {"0": {"ExclusiveStartKey": {"pk": {"S": "a"}}}, "1": {"Done": True}}}
+
+        writer.update(0, None)
+
+    assert store.load() == {"Segments": {"0": {"Done": True}, "1": {"Done": True}}}
+
+
+def test_segment_state():
+    saved = {"Segments": {"1": {"Done": True}}}
+    assert checkpoint.segment_state(None, 0) == {}
+    assert checkpoint.segment_state(saved, 0) == {}
+    assert checkpoint.segment_state(saved, 1) == {"Done": True}
@@ -0,0 +1,106 @@
+import decimal
+import unittest.mock
+
+import botocore.config
+import pytest
+
+import aws_dynamodb_parallel_scan
+from aws_dynamodb_parallel_scan import clients
+
+from . import utils
+from .conftest import mock_scan
+
+MOCK_TABLE_NAME = "dynamodb-parallel-scan-testtable"
+
+
+def test_client_config():
+    config = clients.client_config(64)
+    assert config.max_pool_connections == 64
+    assert config.tcp_keepalive
+    # Retries are left to botocore (legacy mode with 10 retries for DynamoDB)
+    assert config.retries is None
+
+    assert clients.client_config(2).max_pool_connections == clients.DEFAULT_MAX_POOL_CONNECTIONS
+    merged = clients.client_config(64, botocore.config.Config(retries={"mode": "adaptive"}, read_timeout=5))
+    assert (merged.max_pool_connections, merged.retries, merged.read_timeout) == (64, {"mode": "adaptive"}, 5)
+
+
+@pytest.mark.parametrize("document", [False, True])
+def test_create_clients(mock_aws_env, document):
+    created = clients.create_clients(3, 64, document=document, region_name="eu-west-1")
+
+    assert len(created) == 3
+    assert len({id(client) for client in created}) == 3
+    for client in created:
+        assert client.meta.config.max_pool_connections == 22
+        assert client.meta.region_name == "eu-west-1"
+
+
+def test_create_client_numbers(mocked_table):
+    document = clients.create_client(document=True)
+    converted = clients.create_client(document=True, numbers="int")
+
+    page = converted.scan(TableName=MOCK_TABLE_NAME, Limit=10)
+    expected = document.scan(TableName=MOCK_TABLE_NAME, Limit=10)
+    assert list(page) == list(expected)
+    assert page["Items"] == expected["Items"]
+    assert {type(item["attr2"]) for item in page["Items"]} == {int}
+    assert {type(item["attr3"]) for item in page["Items"]} == {float}
+    # Keys are converted by boto3, so that they can be used to continue the scan
+    assert page["LastEvaluatedKey"] == expected["LastEvaluatedKey"]
+
+    pk = page["Items"][0]["pk"]
+    queried = converted.query(
+        TableName=MOCK_TABLE_NAME, KeyConditionExpression="pk = :pk", ExpressionAttributeValues={":pk": pk}
+    )
+    assert queried["Items"] == [page["Items"][0]]
+    assert converted.get_item(TableName=MOCK_TABLE_NAME, Key={"pk": pk})["Item"]["attr3"] == decimal.Decimal("0.5")
+
+
+def test_create_client_numbers_requires_document():
+    with pytest.raises(ValueError):
+        clients.create_client(numbers="int")
+
+
+def test_create_clients_invalid_count():
+    with pytest.raises(ValueError):
+        clients.create_clients(0, 10)
+
+
+def test_paginator_shards_segments():
+    sharded = [unittest.mock.Mock(scan=unittest.mock.Mock(side_effect=mock_scan)) for _ in range(3)]
+    paginator = aws_dynamodb_parallel_scan.get_paginator(sharded)
+    pages = list(paginator.paginate(TableName=MOCK_TABLE_NAME, TotalSegments=8, Limit=10))
+
+    assert sorted(item["pk"] for page in pages for item in page["Items"]) == sorted(
+        item["pk"] for item in utils.generate_items(205)
+    )
+    for i, client in enumerate(sharded):
+        assert {call.kwargs["Segment"] for call in client.scan.call_args_list} == set(range(i, 8, 3))
+
+
+def test_paginator_without_clients():
+    with pytest.raises(ValueError):
+        aws_dynamodb_parallel_scan.get_paginator([])
+
+
+@pytest.mark.parametrize(
+    "extra_args, expected_pools",
+    [([], [16]), (["--max-workers", "64"], [64]), (["--max-workers", "64", "--clients", "3"], [22, 22, 22])],
+)
+def test_cli_scan_sizes_connection_pools(mocked_client, capsys, extra_args, expected_pools):
+    args = ["aws-dynamodb-parallel-scan", "--table-name", MOCK_TABLE_NAME, "--total-segments", "16", *extra_args]
+    with (
+        unittest.mock.patch("sys.argv", args),
+        unittest.mock.patch("boto3.client", return_value=mocked_client) as create,
+    ):
+        aws_dynamodb_parallel_scan.cli()
+
+    assert [c.kwargs["config"].max_pool_connections for c in create.call_args_list] == expected_pools
+    assert len(utils.items_from_pages_output(capsys.readouterr().out)) == 205
+
+
+def test_cli_scan_invalid_clients():
+    args = ["aws-dynamodb-parallel-scan", "--table-name", MOCK_TABLE_NAME, "--clients", "0"]
+    with unittest.mock.patch("sys.argv", args), pytest.raises(SystemExit):
+        aws_dynamodb_parallel_scan.cli()
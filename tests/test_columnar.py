@@ -0,0 +1,166 @@
+import operator
+import unittest.mock
+
+import pytest
+
+import aws_dynamodb_parallel_scan
+from aws_dynamodb_parallel_scan import columnar
+
+from . import utils
+
+pyarrow = pytest.importorskip("pyarrow")
+pyarrow_parquet = pytest.importorskip("pyarrow.parquet")
+
+MOCK_TABLE_NAME = "dynamodb-parallel-scan-testtable"
+
+
+def read_files(files, output_format="parquet"):
+    if output_format == "parquet":
+        return [pyarrow_parquet.read_table(f) for f in files]
+    return [pyarrow.ipc.open_file(f).read_all() for f in files]
+
+
+def test_columnar_writer_infers_types(tmp_path):
+    writer = columnar.ColumnarWriter(str(tmp_path / "out"))
+    writer.write_page(
+        {
+            "Items": [
+                {
+                    "s": {"S": "a"},
+                    "n": {"N": "1"},
+                    "f": {"N": "0.5"},
+                    "big": {"N": "12345678901234567890"},
+                    "b": {"B": b"\x00"},
+                    "bool": {"BOOL": True},
+                    "null": {"NULL": True},
+                    "m": {"M": {"ss": {"SS": ["x"]}, "b": {"B": b"\x01"}, "n": {"N": "2"}}},
+                },
+                {"s": {"S": "b"}, "n": {"N": "2"}},
+            ]
+        }
+    )
+    (table,) = read_files(writer.close())
+
+    assert [str(field.type) for field in table.schema] == [
+        "string",
+        "int64",
+        "double",
+        "double",
+        "binary",
+        "bool",
+        "null",
+        "string",
+    ]
+    assert table.to_pylist()[0] == {
+        "s": "a",
+        "n": 1,
+        "f": 0.5,
+        "big": 12345678901234567890.0,
+        "b": b"\x00",
+        "bool": True,
+        "null": None,
+        "m": '{"ss":["x"],"b":"AQ==","n":2}',
+    }
+    assert table.to_pylist()[1]["m"] is None
+
+
+def test_columnar_writer_widens_types(tmp_path):
+    writer = columnar.ColumnarWriter(str(tmp_path / "out"), batch_size=2)
+    writer.write_page({"Items": [{"pk": {"S": "1"}, "v": {"N": "1"}}, {"pk": {"S": "2"}, "v": {"N": "1.5"}}]})
+    # Fits the schema of the first file
+    writer.write_page({"Items": [{"pk": {"S": "3"}, "v": {"N": "2"}}, {"pk": {"S": "4"}}]})
+    # New column and a wider type start a new file
+    writer.write_page({"Items": [{"pk": {"S": "5"}, "v": {"BOOL": True}}, {"pk": {"S": "6"}, "w": {"NULL": True}}]})
+    files = writer.close()
+
+    assert len(files) == 2
+    first, second = read_files(files)
+    assert first.to_pylist() == [
+        {"pk": "1", "v": 1.0},
+        {"pk": "2", "v": 1.5},
+        {"pk": "3", "v": 2.0},
+        {"pk": "4", "v": None},
+    ]
+    assert second.to_pylist() == [{"pk": "5", "v": "true", "w": None}, {"pk": "6", "v": None, "w": None}]
+
+
+@pytest.mark.parametrize("output_format", columnar.OUTPUT_FORMATS)
+def test_columnar_writer_rotates_files(tmp_path, output_format):
+    with columnar.ColumnarWriter(str(tmp_path / "out"), output_format, max_file_size=1000, batch_size=10) as writer:
+        for page in range(10):
+            writer.write_page({"Items": [{"pk": {"N": str(page * 10 + i)}, "v": {"S": "x" * 50}} for i in range(10)]})
+
+    assert len(writer.files) > 1
+    assert all(f.endswith(f".{output_format}") for f in writer.files)
+    tables = read_files(writer.files, output_format)
+    assert sorted(pk for table in tables for pk in table.column("pk").to_pylist()) == list(range(100))
+
+
+def test_columnar_writer_invalid_args(tmp_path):
+    with pytest.raises(ValueError):
+        columnar.ColumnarWriter(str(tmp_path / "out"), "csv")
+    with pytest.raises(ValueError):
+        columnar.ColumnarWriter(str(tmp_path / "out"), batch_size=0)
+
+
+def test_scan_to_files(mocked_table, tmp_path):
+    paginator = aws_dynamodb_parallel_scan.get_paginator(utils.dynamodb_client())
+    files = columnar.scan_to_files(
+        paginator, str(tmp_path / "out"), batch_size=50, TableName=MOCK_TABLE_NAME, TotalSegments=4
+    )
+
+    rows = [row for table in read_files(files) for row in table.to_pylist()]
+    assert sorted(rows, key=operator.itemgetter("pk")) == sorted(
+        (
+            {"pk": item["pk"], "attr1": item["attr1"], "attr2": item["attr2"], "attr3": float(item["attr3"])}
+            for item in utils.generate_items(205)
+        ),
+        key=operator.itemgetter("pk"),
+    )
+
+
+def test_cli_scan_parquet(mocked_table, tmp_path, capsys):
+    args = [
+        "aws-dynamodb-parallel-scan",
+        "--table-name",
+        MOCK_TABLE_NAME,
+        "--total-segments",
+        "4",
+        "--output-format",
+        "parquet",
+        "--output-path",
+        str(tmp_path / "mytable"),
+    ]
+    with unittest.mock.patch("sys.argv", args):
+        aws_dynamodb_parallel_scan.cli()
+
+    assert capsys.readouterr().out == ""
+    assert [f.name for f in tmp_path.iterdir()] == ["mytable-00000.parquet"]
+    assert pyarrow_parquet.read_table(tmp_path / "mytable-00000.parquet").num_rows == 205
+
+
+def test_cli_scan_parquet_error_during_scan(mocked_table, tmp_path):
+    args = [
+        "aws-dynamodb-parallel-scan",
+        "--table-name",
+        MOCK_TABLE_NAME,
+        "--output-format",
+        "parquet",
+        "--output-path",
+        str(tmp_path / "mytable"),
+    ]
+    invalid = pyarrow.ArrowInvalid("invalid data")
+    with (
+        unittest.mock.patch("sys.argv", args),
+        unittest.mock.patch.object(columnar.ColumnarWriter, "write_page", side_effect=invalid),
+        pytest.raises(pyarrow.ArrowInvalid),
+    ):
+        # Not reported as a usage error
+        aws_dynamodb_parallel_scan.cli()
+
+
+@pytest.mark.parametrize("extra_args", [[], ["--output-path", "out", "--use-document-client"]])
+def test_cli_scan_parquet_invalid_args(extra_args):
+    args = ["aws-dynamodb-parallel-scan", "--table-name", MOCK_TABLE_NAME, "--output-format", "parquet", *extra_args]
+    with unittest.mock.patch("sys.argv", args), pytest.raises(SystemExit):
+        aws_dynamodb_parallel_scan.cli()
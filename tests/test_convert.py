@@ -0,0 +1,78 @@
+import decimal
+
+import boto3.dynamodb.types
+import pytest
+
+from aws_dynamodb_parallel_scan import convert
+
+ITEM = {
+    "s": {"S": "text"},
+    "n": {"N": "42"},
+    "neg": {"N": "-7"},
+    "f": {"N": "0.5"},
+    "big": {"N": "12345678901234567890123456789012345678"},
+    "b": {"B": b"\x00\x01"},
+    "bool": {"BOOL": False},
+    "null": {"NULL": True},
+    "ss": {"SS": ["a", "b"]},
+    "ns": {"NS": ["1", "2.5"]},
+    "bs": {"BS": [b"x"]},
+    "l": {"L": [{"S": "a"}, {"N": "1"}, {"L": [{"M": {}}]}]},
+    "m": {"M": {"nested": {"M": {"n": {"N": "3"}, "l": {"L": []}}}}},
+}
+
+
+def test_item_converter_matches_type_deserializer():
+    deserializer = boto3.dynamodb.types.TypeDeserializer()
+    expected = {k: deserializer.deserialize(v) for k, v in ITEM.items()}
+    expected["b"] = expected["b"].value
+    expected["bs"] = {b.value for b in expected["bs"]}
+
+    assert convert.item_converter()(ITEM) == expected
+
+
+@pytest.mark.parametrize(
+    "numbers, expected",
+    [
+        ("decimal", [decimal.Decimal(42), decimal.Decimal(-7), decimal.Decimal("0.5"), {decimal.Decimal(1)}]),
+        ("int", [42, -7, 0.5, {1, 2.5}]),
+        ("float", [42.0, -7.0, 0.5, {1.0, 2.5}]),
+        ("str", ["42", "-7", "0.5", {"1", "2.5"}]),
+    ],
+)
+def test_item_converter_numbers(numbers, expected):
+    item = convert.item_converter(numbers)(ITEM)
+    assert [item["n"], item["neg"], item["f"]] == expected[:3]
+    assert all(type(a) is type(b) for a, b in zip([item["n"], item["neg"], item["f"]], expected[:3]))
+    assert expected[3] <= item["ns"]
+    assert item["m"]["nested"]["n"] == convert.item_converter(numbers)({"n": {"N": "3"}})["n"]
+
+
+@pytest.mark.parametrize(
+    "value", ["12", "-3", "0.5", "1E+2", "2.0", "-1.5E-3", "1E-400", "1E+400", "1.0000000000000000001"]
+)
+def test_item_converter_int_matches_decimal(value):
+    converted = convert.item_converter("int")({"n": {"N": value}})["n"]
+    exact = decimal.Decimal(value)
+    expected = int(exact) if exact == exact.to_integral_value() else float(exact)
+    assert converted == expected
+    assert type(converted) is type(expected)
+
+
+def test_item_converter_invalid_numbers():
+    with pytest.raises(ValueError):
+        convert.item_converter("double")
+
+
+@pytest.mark.parametrize("numbers", convert.NUMBER_TYPES)
+def test_value_converter(numbers):
+    convert_value = convert.value_converter(numbers)
+    assert {k: convert_value(v) for k, v in ITEM.items()} == convert.item_converter(numbers)(ITEM)
+
+
+def test_page_converter():
+    page = {"Items": [{"pk": {"S": "a"}, "n": {"N": "1"}}], "Count": 1, "LastEvaluatedKey": {"pk": {"S": "a"}}}
+    converted = convert.page_converter("int")(page)
+    assert converted == {"Items": [{"pk": "a", "n": 1}], "Count": 1, "LastEvaluatedKey": {"pk": {"S": "a"}}}
+    assert page["Items"] == [{"pk": {"S": "a"}, "n": {"N": "1"}}]
+    assert convert.page_converter()({"Count": 0}) == {"Count": 0}
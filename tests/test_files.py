@@ -0,0 +1,181 @@
+import gzip
+import json
+import unittest.mock
+
+import more_itertools
+import pytest
+
+import aws_dynamodb_parallel_scan
+from aws_dynamodb_parallel_scan import files
+
+from . import utils
+from .conftest import MOCK_SCAN_ITEMS, mock_scan
+
+MOCK_TABLE_NAME = "dynamodb-parallel-scan-testtable"
+
+
+def read_file(path) -> list[dict]:
+    if path.suffix == ".gz":
+        return utils.parse_jsonl(gzip.decompress(path.read_bytes()).decode())
+    if path.suffix == ".zst":
+        zstandard = pytest.importorskip("zstandard")
+        with open(path, "rb") as raw, zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True) as f:
+            return utils.parse_jsonl(f.read().decode())
+    return utils.parse_jsonl(path.read_text())
+
+
+def read_output(directory) -> tuple[dict, dict[str, list[dict]]]:
+    manifest = json.loads((directory / files.MANIFEST_NAME).read_text())
+    contents = {entry["Path"]: read_file(directory / entry["Path"]) for entry in manifest["Files"]}
+    for entry in manifest["Files"]:
+        assert entry["Items"] == len(contents[entry["Path"]])
+        assert entry["Size"] == (directory / entry["Path"]).stat().st_size
+    assert sorted(path.name for path in directory.iterdir()) == sorted([*contents, files.MANIFEST_NAME])
+    return manifest, contents
+
+
+def scan(writer: files.FileWriter, total_segments: int = 4):
+    client = unittest.mock.Mock(scan=unittest.mock.Mock(side_effect=mock_scan))
+    paginator = aws_dynamodb_parallel_scan.get_paginator(client)
+    with writer:
+        for segment, page in paginator.paginate(
+            TableName=MOCK_TABLE_NAME, TotalSegments=total_segments, Limit=10, with_segments=True
+        ):
+            writer.write_page(page, segment)
+
+
+@pytest.mark.parametrize("compression", files.COMPRESSIONS)
+def test_file_writer_rotates_files(tmp_path, compression):
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    writer = files.FileWriter(
+        tmp_path / "out",
+        compression=compression,
+        max_file_size=5000,
+        chunk_size=1000,
+        output_items=True,
+        encoder="json",
+        metadata={"TableName": MOCK_TABLE_NAME},
+    )
+    scan(writer)
+
+    manifest, contents = read_output(tmp_path / "out")
+    assert manifest["TableName"] == MOCK_TABLE_NAME
+    assert manifest["Compression"] == compression
+    assert manifest["Items"] == 205
+    assert len(manifest["Files"]) > 2
+    assert manifest["Files"][0]["Path"] == "part-00000.jsonl" + {"none": "", "gzip": ".gz", "zstd": ".zst"}[compression]
+    items = [item for path in sorted(contents) for item in contents[path]]
+    assert sorted(item["pk"] for item in items) == sorted(item["pk"] for item in MOCK_SCAN_ITEMS)
+
+
+def test_file_writer_splits_segments(tmp_path):
+    writer = files.FileWriter(tmp_path, split="segment", compression="gzip", output_items=True, chunk_size=500)
+    scan(writer)
+
+    manifest, contents = read_output(tmp_path)
+    assert sorted(entry["Segment"] for entry in manifest["Files"]) == [0, 1, 2, 3]
+    segments = list(more_itertools.divide(4, MOCK_SCAN_ITEMS))
+    for entry in manifest["Files"]:
+        assert entry["Path"] == f"segment-{entry['Segment']:05d}-00000.jsonl.gz"
+        assert [item["pk"] for item in contents[entry["Path"]]] == [item["pk"] for item in segments[entry["Segment"]]]
+
+
+def test_file_writer_bounds_buffered_output(tmp_path):
+    writer = files.FileWriter(tmp_path, split="segment", output_items=True, chunk_size=1000, max_buffered_chunks=2)
+    for segment in range(3):
+        writer.write_page({"Items": [{"pk": str(segment) * 800}]}, segment)
+
+    # The first file was flushed when the third one made the buffers exceed two chunks
+    assert [file.buffered for file in writer.files] == [0, 811, 811]
+
+    writer.close()
+    _, contents = read_output(tmp_path)
+    assert [len(items) for items in contents.values()] == [1, 1, 1]
+
+
+def test_file_writer_removes_stale_manifest(tmp_path):
+    with files.FileWriter(tmp_path, output_items=True) as writer:
+        writer.write_page({"Items": [{"pk": "a"}]})
+    assert (tmp_path / files.MANIFEST_NAME).exists()
+
+    with pytest.raises(RuntimeError), files.FileWriter(tmp_path, output_items=True) as writer:
+        writer.write_page({"Items": [{"pk": "b"}]})
+        raise RuntimeError("scan failed")
+
+    assert not (tmp_path / files.MANIFEST_NAME).exists()
+
+
+def test_file_writer_pages(tmp_path):
+    with files.FileWriter(tmp_path) as writer:
+        writer.write_page({"Items": [{"pk": "a"}], "Count": 1})
+
+    assert read_file(tmp_path / "part-00000.jsonl") == [{"Items": [{"pk": "a"}], "Count": 1}]
+
+
+def test_file_writer_no_manifest_on_error(tmp_path):
+    with pytest.raises(RuntimeError), files.FileWriter(tmp_path, output_items=True) as writer:
+        writer.write_page({"Items": [{"pk": "a"}]})
+        raise RuntimeError("scan failed")
+
+    assert not (tmp_path / files.MANIFEST_NAME).exists()
+
+
+@pytest.mark.parametrize(
+    "kwargs", [{"split": "hash"}, {"compression": "bz2"}, {"max_file_size": 0}, {"max_buffered_chunks": 0}]
+)
+def test_file_writer_invalid_args(tmp_path, kwargs):
+    with pytest.raises(ValueError):
+        files.FileWriter(tmp_path, **kwargs)
+
+
+def test_file_writer_segment_required(tmp_path):
+    writer = files.FileWriter(tmp_path, split="segment")
+    with pytest.raises(ValueError):
+        writer.write_page({"Items": []})
+
+
+@pytest.mark.parametrize("split", files.SPLITS)
+def test_cli_scan_output_dir(mocked_client, capsys, tmp_path, split):
+    args = [
+        "aws-dynamodb-parallel-scan",
+        "--table-name",
+        MOCK_TABLE_NAME,
+        "--total-segments",
+        "4",
+        "--output-items",
+        "--output-dir",
+        str(tmp_path),
+        "--split",
+        split,
+        "--compression",
+        "gzip",
+        "--compression-level",
+        "1",
+    ]
+    with (
+        unittest.mock.patch("sys.argv", args),
+        unittest.mock.patch("boto3.client", return_value=mocked_client),
+    ):
+        aws_dynamodb_parallel_scan.cli()
+
+    assert capsys.readouterr().out == ""
+    manifest, contents = read_output(tmp_path)
+    assert manifest["TableName"] == MOCK_TABLE_NAME
+    assert manifest["TotalSegments"] == 4
+    assert len(manifest["Files"]) == (4 if split == "segment" else 1)
+    assert sum(len(items) for items in contents.values()) == 205
+
+
+@pytest.mark.parametrize(
+    "extra_args",
+    [
+        ["--compression", "gzip"],
+        ["--output-dir", "out", "--processes", "2"],
+        ["--output-dir", "out", "--output-format", "parquet", "--output-path", "out"],
+    ],
+)
+def test_cli_scan_invalid_output_dir(mocked_client, extra_args):
+    args = ["aws-dynamodb-parallel-scan", "--table-name", MOCK_TABLE_NAME, *extra_args]
+    with unittest.mock.patch("sys.argv", args), pytest.raises(SystemExit):
+        aws_dynamodb_parallel_scan.cli()
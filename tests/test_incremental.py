@@ -0,0 +1,378 @@
+import decimal
+import json
+import unittest.mock
+
+import pytest
+
+import aws_dynamodb_parallel_scan
+from aws_dynamodb_parallel_scan import checkpoint, incremental
+
+from . import utils
+
+MOCK_TABLE_NAME = "dynamodb-parallel-scan-testtable"
+
+
+def test_changed_since_args():
+    args = incremental.changed_since_args(
+        {
+            "TableName": MOCK_TABLE_NAME,
+            "FilterExpression": "#a = :a",
+            "ExpressionAttributeNames": {"#a": "attr1"},
+            "ExpressionAttributeValues": {":a": {"S": "test"}},
+        },
+        "updated_at",
+        "2026-01-01T00:00:00Z",
+    )
+
+    assert args == {
+        "TableName": MOCK_TABLE_NAME,
+        "FilterExpression": "(#a = :a) AND #watermark >= :watermark",
+        "ExpressionAttributeNames": {"#a": "attr1", "#watermark": "updated_at"},
+        "ExpressionAttributeValues": {":a": {"S": "test"}, ":watermark": {"S": "2026-01-01T00:00:00Z"}},
+    }
+    document_args = incremental.changed_since_args({}, "version", {"N": "5"}, document=True)
+    assert document_args["ExpressionAttributeValues"] == {":watermark": decimal.Decimal(5)}
+
+
+@pytest.mark.parametrize("value", [True, {"BOOL": True}, [1]])
+def test_changed_since_args_invalid_watermark(value):
+    with pytest.raises(ValueError):
+        incremental.changed_since_args({}, "version", value)
+
+
+def put_item(client, pk: str, attr2: int):
+    client.put_item(
+        TableName=MOCK_TABLE_NAME, Item={"pk": {"S": pk}, "attr1": {"S": "test"}, "attr2": {"N": str(attr2)}}
+    )
+
+
+@pytest.mark.parametrize("document", [False, True])
+def test_scan_changed_since(mocked_table, tmp_path, document):
+    client = utils.dynamodb_document_client() if document else utils.dynamodb_client()
+    paginator = aws_dynamodb_parallel_scan.get_paginator(client)
+    store = checkpoint.JSONFileCheckpointStore(tmp_path / "watermark.json")
+
+    def scan(next_watermark):
+        pages = incremental.scan_changed_since(
+            paginator,
+            "attr2",
+            store,
+            next_watermark=next_watermark,
+            document=document,
+            TableName=MOCK_TABLE_NAME,
+            TotalSegments=4,
+        )
+        return sorted(str(item["pk"] if document else item["pk"]["S"]) for page in pages for item in page["Items"])
+
+    assert len(scan(200)) == 205
+    assert store.load() == {
+        "TableName": MOCK_TABLE_NAME,
+        "TotalSegments": 4,
+        "Attribute": "attr2",
+        "Watermark": {"N": "200"},
+    }
+
+    # Items with the watermark value are returned again
+    assert scan(lambda: 300) == ["200", "201", "202", "203", "204"]
+
+    low_level = utils.dynamodb_client()
+    put_item(low_level, "5", 300)
+    put_item(low_level, "new", 250)
+    assert scan(decimal.Decimal(400)) == ["5"]
+    assert store.load()["Watermark"] == {"N": "400"}
+
+
+class ChangingClient:
+    """Client of a table with item a in segment 0 and item b in segment 1.
+
+    Both items are updated while segment 1 is scanned, after segment 0 has been scanned.
+    """
+
+    def __init__(self):
+        self.values = {"a": 1, "b": 2}
+
+    def scan(self, **kwargs):
+        pk = "ab"[kwargs["Segment"]]
+        if pk == "b":
+            self.values = {"a": 15, "b": 20}
+        watermark = kwargs.get("ExpressionAttributeValues", {}).get(":watermark")
+        if watermark and self.values[pk] < int(watermark["N"]):
+            return {"Items": [], "Count": 0}
+        return {"Items": [{"pk": {"S": pk}, "v": {"N": str(self.values[pk])}}], "Count": 1}
+
+
+def test_scan_changed_since_item_changed_during_scan(tmp_path):
+    client = ChangingClient()
+    paginator = aws_dynamodb_parallel_scan.get_paginator(client)
+    store = checkpoint.JSONFileCheckpointStore(tmp_path / "watermark.json")
+    clock = iter([10, 30])
+
+    def scan():
+        pages = incremental.scan_changed_since(
+            paginator,
+            "v",
+            store,
+            next_watermark=lambda: next(clock),
+            TableName=MOCK_TABLE_NAME,
+            TotalSegments=2,
+            max_workers=1,
+        )
+        return {item["pk"]["S"]: item["v"]["N"] for page in pages for item in page["Items"]}
+
+    assert scan() == {"a": "1", "b": "20"}
+    # The largest value seen (20) would miss the update of a, which was scanned before it changed
+    assert store.load()["Watermark"] == {"N": "10"}
+    assert scan() == {"a": "15", "b": "20"}
+    assert store.load()["Watermark"] == {"N": "30"}
+
+
+def test_scan_changed_since_initial_watermark():
+    client = unittest.mock.Mock()
+    client.scan.return_value = {"Items": [{"v": {"N": "7"}}, {"v": {"N": "12"}}, {"x": {"S": "no v"}}], "Count": 3}
+    store = unittest.mock.Mock(load=unittest.mock.Mock(return_value=None))
+    paginator = aws_dynamodb_parallel_scan.get_paginator(client)
+
+    pages = list(
+        incremental.scan_changed_since(paginator, "v", store, next_watermark=20, initial=5, TableName=MOCK_TABLE_NAME)
+    )
+
+    assert len(pages) == 1
+    assert client.scan.call_args.kwargs["ExpressionAttributeValues"] == {":watermark": {"N": "5"}}
+    assert store.save.call_args.args[0]["Watermark"] == {"N": "20"}
+
+
+def test_scan_changed_since_not_saved_when_stopped_early():
+    client = unittest.mock.Mock()
+    client.scan.return_value = {"Items": [{"v": {"N": "7"}}], "Count": 1}
+    store = unittest.mock.Mock(load=unittest.mock.Mock(return_value=None))
+    paginator = aws_dynamodb_parallel_scan.get_paginator(client)
+
+    pages = incremental.scan_changed_since(paginator, "v", store, next_watermark=10, TableName=MOCK_TABLE_NAME)
+    next(pages)
+    pages.close()
+
+    store.save.assert_not_called()
+
+
+def test_scan_changed_since_not_saved_when_cancelled(tmp_path):
+    client = unittest.mock.Mock()
+    client.scan.return_value = {"Items": [{"v": {"N": "7"}}], "Count": 1, "LastEvaluatedKey": {"pk": {"S": "a"}}}
+    store = checkpoint.JSONFileCheckpointStore(tmp_path / "watermark.json")
+    store.save({"TableName": MOCK_TABLE_NAME, "Attribute": "v", "Watermark": {"N": "5"}})
+    paginator = aws_dynamodb_parallel_scan.get_paginator(client)
+    token = aws_dynamodb_parallel_scan.CancellationToken()
+
+    pages = incremental.scan_changed_since(
+        paginator, "v", store, next_watermark=100, TableName=MOCK_TABLE_NAME, TotalSegments=4, cancel=token
+    )
+    for i, _ in enumerate(pages):
+        if i == 2:
+            token.cancel()
+
+    assert store.load()["Watermark"] == {"N": "5"}
+
+
+@pytest.mark.parametrize(
+    "saved, next_watermark, kwargs",
+    [
+        ({"Attribute": "other", "Watermark": {"N": "1"}}, 10, {}),
+        (None, 10, {"max_items": 10}),
+        (None, 10, {"segments": [0, 1]}),
+        (None, True, {}),
+        ({"Attribute": "v", "Watermark": {"N": "1"}}, "2026-01-01T00:00:00Z", {}),
+    ],
+)
+def test_scan_changed_since_invalid(saved, next_watermark, kwargs):
+    store = unittest.mock.Mock(load=unittest.mock.Mock(return_value=saved))
+    paginator = aws_dynamodb_parallel_scan.get_paginator(unittest.mock.Mock())
+    with pytest.raises(ValueError):
+        list(
+            incremental.scan_changed_since(
+                paginator, "v", store, next_watermark=next_watermark, TableName=MOCK_TABLE_NAME, **kwargs
+            )
+        )
+
+
+def test_scan_changed_since_mixed_types():
+    client = unittest.mock.Mock()
+    client.scan.return_value = {"Items": [{"v": {"N": "7"}}, {"v": {"S": "2026-01-01T00:00:00Z"}}], "Count": 2}
+    store = unittest.mock.Mock(load=unittest.mock.Mock(return_value=None))
+    paginator = aws_dynamodb_parallel_scan.get_paginator(client)
+
+    with pytest.raises(ValueError, match="mixes number and string values"):
+        list(incremental.scan_changed_since(paginator, "v", store, next_watermark=10, TableName=MOCK_TABLE_NAME))
+    store.save.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "watermark_format, expected",
+    [("epoch", 1767225540), ("epoch-ms", 1767225540500), ("iso8601", "2025-12-31T23:59:00")],
+)
+def test_clock(watermark_format, expected):
+    now = incremental.clock(watermark_format, lookback=60)
+    with unittest.mock.patch.object(incremental.time, "time", return_value=1767225600.5):
+        assert now() == expected
+
+
+@pytest.mark.parametrize(
+    "updated_at", ["2025-12-31T23:59:00Z", "2025-12-31T23:59:00.123Z", "2025-12-31T23:59:00.123+00:00"]
+)
+def test_scan_changed_since_iso8601_boundary(mocked_table, tmp_path, updated_at):
+    client = utils.dynamodb_client()
+    paginator = aws_dynamodb_parallel_scan.get_paginator(client)
+    store = checkpoint.JSONFileCheckpointStore(tmp_path / "watermark.json")
+    now = incremental.clock("iso8601")
+
+    def scan():
+        pages = incremental.scan_changed_since(
+            paginator, "updated_at", store, next_watermark=now, TableName=MOCK_TABLE_NAME, TotalSegments=4
+        )
+        return [item["pk"]["S"] for page in pages for item in page["Items"]]
+
+    with unittest.mock.patch.object(incremental.time, "time", return_value=1767225540.5):
+        assert len(scan()) == 205
+
+    # Written in the second the previous scan started
+    client.put_item(TableName=MOCK_TABLE_NAME, Item={"pk": {"S": "new"}, "updated_at": {"S": updated_at}})
+    assert scan() == ["new"]
+
+
+@pytest.mark.parametrize("watermark_format, lookback", [("date", 0), ("epoch", -1)])
+def test_clock_invalid(watermark_format, lookback):
+    with pytest.raises(ValueError):
+        incremental.clock(watermark_format, lookback=lookback)
+
+
+def item(pk: str, value: str, **extra) -> dict:
+    return {"pk": {"S": pk}, "sk": {"N": "1"}, "value": {"S": value}, **extra}
+
+
+def changes(index: incremental.DigestIndex, items: list[dict], **kwargs) -> list[tuple[str, str]]:
+    records = index.changes([{"Items": items[:2]}, {"Items": items[2:]}], ["pk", "sk"], **kwargs)
+    return sorted((record["EventName"], record["Keys"]["pk"]["S"]) for record in records)
+
+
+def test_digest_index(tmp_path):
+    path = tmp_path / "index.db"
+    with incremental.DigestIndex(path) as index:
+        assert changes(index, [item("a", "1"), item("b", "1"), item("c", "1")]) == [
+            ("INSERT", "a"),
+            ("INSERT", "b"),
+            ("INSERT", "c"),
+        ]
+        assert changes(index, [item("c", "1"), item("a", "1"), item("b", "1")]) == []
+
+    # Changes are compared with the state saved by the previous run
+    with incremental.DigestIndex(path) as index:
+        assert changes(index, [item("a", "2"), item("c", "1"), item("d", "1")], batch_size=1) == [
+            ("INSERT", "d"),
+            ("MODIFY", "a"),
+            ("REMOVE", "b"),
+        ]
+        assert len(index) == 3
+
+
+def test_digest_index_records(tmp_path):
+    with incremental.DigestIndex(tmp_path / "index.db") as index:
+        first = item("a", "1", tags={"SS": ["x", "y"]})
+        assert list(index.changes([{"Items": [first]}], ["pk", "sk"])) == [
+            {"EventName": "INSERT", "Keys": {"pk": {"S": "a"}, "sk": {"N": "1"}}, "NewImage": first}
+        ]
+        # Order of set members does not matter
+        assert list(index.changes([{"Items": [item("a", "1", tags={"SS": ["y", "x"]})]}], ["pk", "sk"])) == []
+        assert list(index.changes([{"Items": []}], ["pk", "sk"])) == [
+            {"EventName": "REMOVE", "Keys": {"pk": {"S": "a"}, "sk": {"N": "1"}}}
+        ]
+
+
+def test_digest_index_native_items(tmp_path):
+    native = {"pk": "a", "n": decimal.Decimal("1.5"), "b": b"\x00", "s": {"y", "x"}}
+    with incremental.DigestIndex(tmp_path / "index.db") as index:
+        assert [r["EventName"] for r in index.changes([{"Items": [native]}], ["pk"])] == ["INSERT"]
+        assert list(index.changes([{"Items": [{**native, "s": {"x", "y"}}]}], ["pk"])) == []
+        records = list(index.changes([{"Items": [{**native, "n": decimal.Decimal(2)}]}], ["pk"]))
+        assert [(r["EventName"], r["Keys"]) for r in records] == [("MODIFY", {"pk": "a"})]
+
+
+def test_digest_index_rolls_back_interrupted_run(tmp_path):
+    with incremental.DigestIndex(tmp_path / "index.db") as index:
+        assert len(changes(index, [item("a", "1"), item("b", "1")])) == 2
+
+        records = index.changes([{"Items": [item("a", "2"), item("c", "1")]}], ["pk", "sk"])
+        next(records)
+        records.close()
+
+        assert changes(index, [item("a", "2"), item("c", "1")]) == [("INSERT", "c"), ("MODIFY", "a"), ("REMOVE", "b")]
+
+
+def test_digest_index_requires_key_attributes(tmp_path):
+    with incremental.DigestIndex(tmp_path / "index.db") as index, pytest.raises(ValueError):
+        list(index.changes([], []))
+
+
+def run_cli(*extra_args):
+    args = ["aws-dynamodb-parallel-scan", "--table-name", MOCK_TABLE_NAME, "--total-segments", "4", *extra_args]
+    with unittest.mock.patch("sys.argv", args):
+        aws_dynamodb_parallel_scan.cli()
+
+
+def test_cli_scan_watermark(mocked_table, capsys, tmp_path):
+    args = [
+        "--watermark-attribute",
+        "attr2",
+        "--watermark-file",
+        str(tmp_path / "wm.json"),
+        "--watermark-format",
+        "epoch",
+        "--watermark-lookback",
+        "60",
+        "--output-items",
+    ]
+    with unittest.mock.patch.object(incremental, "time", unittest.mock.Mock(time=lambda: 1000.5)):
+        run_cli(*args)
+    assert len(utils.parse_jsonl(capsys.readouterr().out)) == 205
+    assert json.loads((tmp_path / "wm.json").read_text())["Watermark"] == {"N": "940"}
+
+    put_item(utils.dynamodb_client(), "new", 950)
+    put_item(utils.dynamodb_client(), "old", 900)
+    run_cli(*args, "--deserialize", "int")
+    assert [item["pk"] for item in utils.parse_jsonl(capsys.readouterr().out)] == ["new"]
+
+
+def test_cli_scan_digest_index(mocked_table, capsys, tmp_path):
+    args = ["--digest-index", str(tmp_path / "index.db"), "--key-attributes", "pk", "--use-document-client"]
+    run_cli(*args)
+    assert len(utils.parse_jsonl(capsys.readouterr().out)) == 205
+
+    client = utils.dynamodb_client()
+    client.delete_item(TableName=MOCK_TABLE_NAME, Key={"pk": {"S": "1"}})
+    put_item(client, "2", 1000)
+    run_cli(*args)
+    records = utils.parse_jsonl(capsys.readouterr().out)
+    assert sorted((r["EventName"], r["Keys"]["pk"]) for r in records) == [("MODIFY", "2"), ("REMOVE", "1")]
+    assert [r["NewImage"]["attr2"] for r in records if r["EventName"] == "MODIFY"] == [1000]
+
+
+@pytest.mark.parametrize(
+    "extra_args",
+    [
+        ["--watermark-attribute", "attr2"],
+        ["--digest-index", "index.db"],
+        [
+            "--watermark-attribute",
+            "attr2",
+            "--watermark-file",
+            "wm.json",
+            "--digest-index",
+            "i",
+            "--key-attributes",
+            "pk",
+        ],
+        ["--watermark-attribute", "attr2", "--watermark-file", "wm.json", "--segments", "0-1"],
+        ["--watermark-attribute", "attr2", "--watermark-file", "wm.json", "--watermark-lookback", "-1"],
+        ["--digest-index", "index.db", "--key-attributes", "pk", "--max-items", "10"],
+    ],
+)
+def test_cli_scan_invalid_incremental_args(mock_aws_env, extra_args):
+    with pytest.raises(SystemExit):
+        run_cli(*extra_args)
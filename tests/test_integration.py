@@ -2,6 +2,7 @@ import logging
 import operator
 import unittest.mock
 
+import botocore.exceptions
 import pytest
 
 import aws_dynamodb_parallel_scan
@@ -44,6 +45,42 @@ def test_integration(real_table, scan_args, returned_items):
     )
 
 
+def test_integration_split_start_key(real_table):
+    """Check the undocumented DynamoDB behavior that splitting segments (max_split_depth) relies on."""
+    client = utils.dynamodb_client()
+    page = client.scan(TableName=TEST_TABLE_NAME, TotalSegments=1, Segment=0, Limit=50)
+    start_key = page["LastEvaluatedKey"]
+
+    # Exactly one of the halves of the segment accepts the key, the other rejects it
+    accepted, rejected = [], []
+    for segment in (0, 1):
+        try:
+            client.scan(
+                TableName=TEST_TABLE_NAME, TotalSegments=2, Segment=segment, Limit=1, ExclusiveStartKey=start_key
+            )
+            accepted.append(segment)
+        except botocore.exceptions.ClientError as exc:
+            assert aws_dynamodb_parallel_scan._is_invalid_start_key(exc), exc.response["Error"]  # pylint: disable=protected-access
+            rejected.append(segment)
+    assert len(accepted) == len(rejected) == 1
+
+
+def test_integration_split(real_table):
+    client = utils.dynamodb_document_client()
+    scan = client.scan
+    with unittest.mock.patch.object(client, "scan", wraps=scan) as wrapped_scan:
+        paginator = aws_dynamodb_parallel_scan.get_paginator(client)
+        items = utils.items_from_pages(
+            paginator.paginate(TableName=TEST_TABLE_NAME, TotalSegments=2, Limit=5, max_workers=8, max_split_depth=3)
+        )
+
+    assert max(call.kwargs["TotalSegments"] for call in wrapped_scan.call_args_list) > 2
+    # Every item is returned exactly once
+    assert sorted(items, key=operator.itemgetter("pk")) == sorted(
+        utils.generate_items(205), key=operator.itemgetter("pk")
+    )
+
+
 @pytest.mark.parametrize(
     "extra_args, output_deserializer, item_deserializer, returned_items",
     [
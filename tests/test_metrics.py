@@ -0,0 +1,89 @@
+import io
+import unittest.mock
+
+import pytest
+
+import aws_dynamodb_parallel_scan
+from aws_dynamodb_parallel_scan import metrics
+
+from .test_aws_dynamodb_parallel_scan import MOCK_TABLE_NAME, throttling_error
+
+
+def test_latency_histogram():
+    histogram = metrics.LatencyHistogram()
+    assert histogram.percentile(50) == 0.0
+
+    for latency in [0.001] * 90 + [0.2] * 9 + [30.0]:
+        histogram.add(latency)
+
+    assert histogram.count == 100
+    assert histogram.percentile(50) == 0.005
+    assert histogram.percentile(95) == 0.25
+    assert histogram.percentile(100) == 30.0
+
+
+def test_scan_metrics(mocked_client):
+    scan = mocked_client.scan.side_effect
+    throttled = set()
+
+    def throttling_scan(**kwargs):
+        if kwargs["Segment"] == 1 and not throttled:
+            throttled.add(1)
+            raise throttling_error()
+        return scan(**kwargs)
+
+    mocked_client.scan.side_effect = throttling_scan
+    scan_metrics = metrics.ScanMetrics()
+    paginator = aws_dynamodb_parallel_scan.get_paginator(mocked_client)
+    with unittest.mock.patch("aws_dynamodb_parallel_scan.throttling.backoff_delay", return_value=0):
+        pages = list(paginator.paginate(TableName=MOCK_TABLE_NAME, TotalSegments=4, Limit=10, observer=scan_metrics))
+
+    totals = scan_metrics.totals()
+    assert totals.pages == len(pages) == 24
+    assert totals.items == totals.scanned_count == 205
+    assert totals.retries == 1
+    assert totals.latency.count == 24
+    assert totals.done
+    assert sorted(scan_metrics.segments) == [0, 1, 2, 3]
+    assert [scan_metrics.segments[i].retries for i in range(4)] == [0, 1, 0, 0]
+    assert scan_metrics.running_segments() == []
+    assert scan_metrics.consumer_blocked_seconds > 0
+
+    progress = scan_metrics.format_progress()
+    assert progress.startswith("segments 4/4 done, 24 pages, 205 items")
+    assert "1 retries" in progress
+
+
+def test_scan_metrics_running_segments():
+    scan_metrics = metrics.ScanMetrics()
+    scan_metrics.scan_started([0, 1, 2])
+    scan_metrics.request_completed(0, 0.01, {"Items": [], "Count": 0, "ScannedCount": 5})
+    scan_metrics.request_completed(1, 0.01, {"Count": 2, "ScannedCount": 2, "LastEvaluatedKey": {"pk": "a"}})
+
+    assert scan_metrics.running_segments() == [1, 2]
+    assert scan_metrics.format_progress().endswith("running: 1-2")
+
+
+def test_progress_reporter():
+    scan_metrics = metrics.ScanMetrics()
+    stream = io.StringIO()
+    with metrics.ProgressReporter(scan_metrics, stream, interval=0.01):
+        scan_metrics.request_completed(0, 0.01, {"Count": 3, "ScannedCount": 3})
+
+    lines = stream.getvalue().splitlines()
+    assert lines
+    assert lines[-1].startswith("segments 1/1 done, 1 pages, 3 items")
+
+
+@pytest.mark.parametrize("extra_args", [[], ["--stats-interval", "0.01"]])
+def test_cli_scan_stats(mocked_client, capsys, extra_args):
+    args = ["aws-dynamodb-parallel-scan", "--table-name", MOCK_TABLE_NAME, "--total-segments", "4", "--stats"]
+    with (
+        unittest.mock.patch("sys.argv", args + extra_args),
+        unittest.mock.patch("boto3.client", return_value=mocked_client),
+    ):
+        aws_dynamodb_parallel_scan.cli()
+
+    captured = capsys.readouterr()
+    assert len(captured.out.splitlines()) == 4
+    assert captured.err.splitlines()[-1].startswith("segments 4/4 done, 4 pages, 205 items")
@@ -0,0 +1,188 @@
+import decimal
+import itertools
+import random
+import time
+import unittest.mock
+
+import more_itertools
+import pytest
+
+import aws_dynamodb_parallel_scan
+from aws_dynamodb_parallel_scan import ordering
+
+from . import utils
+from .conftest import MOCK_SCAN_ITEMS, mock_scan
+
+MOCK_TABLE_NAME = "dynamodb-parallel-scan-testtable"
+
+
+def page(segment: int, number: int, last: bool) -> dict:
+    result: dict = {"Items": [{"pk": f"{segment}-{number}"}], "Count": 1}
+    if not last:
+        result["LastEvaluatedKey"] = {"pk": f"{segment}-{number}"}
+    return result
+
+
+# Pages per segment of the scan of test_reorder_buffer
+PAGES = {0: 3, 1: 1, 2: 4}
+
+
+def shuffled_pages(seed: int) -> list[tuple[int, dict]]:
+    """Interleave the pages of the segments in a random order, keeping pages of a segment in order."""
+    remaining = {segment: list(range(count)) for segment, count in PAGES.items()}
+    rng = random.Random(seed)
+    result = []
+    while remaining:
+        segment = rng.choice(sorted(remaining))
+        number = remaining[segment].pop(0)
+        result.append((segment, page(segment, number, not remaining[segment])))
+        if not remaining[segment]:
+            del remaining[segment]
+    return result
+
+
+def names(pages) -> list[str]:
+    return [p["Items"][0]["pk"] for _, p in pages]
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("max_memory_bytes", [0, 1 << 20])
+def test_reorder_buffer(seed, max_memory_bytes):
+    buffer = ordering.ReorderBuffer(PAGES, "segment", max_memory_bytes=max_memory_bytes)
+    assert names(ordering.ordered_pages(shuffled_pages(seed), buffer)) == [
+        "0-0",
+        "0-1",
+        "0-2",
+        "1-0",
+        "2-0",
+        "2-1",
+        "2-2",
+        "2-3",
+    ]
+    assert buffer.done()
+
+    buffer = ordering.ReorderBuffer(PAGES, "round-robin", max_memory_bytes=max_memory_bytes)
+    assert names(ordering.ordered_pages(shuffled_pages(seed), buffer)) == [
+        "0-0",
+        "1-0",
+        "2-0",
+        "0-1",
+        "2-1",
+        "0-2",
+        "2-2",
+        "2-3",
+    ]
+    assert buffer.done()
+
+
+def test_reorder_buffer_spills_to_disk(tmp_path):
+    buffer = ordering.ReorderBuffer(
+        [0, 1], "segment", max_memory_bytes=100, measure=lambda page: 60, directory=tmp_path
+    )
+    native = {"pk": "1-0", "n": decimal.Decimal("1.5"), "b": b"\x00", "s": {"x", "y"}}
+    buffer.add(1, {"Items": [native], "Count": 1, "LastEvaluatedKey": {"pk": "1-0"}})
+    buffer.add(1, page(1, 1, False))
+    buffer.add(1, page(1, 2, True))
+    assert list(buffer.ready()) == []
+    assert buffer.buffered_bytes == buffer.peak_buffered_bytes == 60
+    assert buffer.spilled_pages == 2
+
+    buffer.add(0, page(0, 0, True))
+    ready = list(buffer.ready())
+    assert names(ready) == ["0-0", "1-0", "1-1", "1-2"]
+    assert ready[1][1]["Items"] == [native]
+    assert buffer.buffered_bytes == 0
+    buffer.close()
+
+
+def test_reorder_buffer_invalid_args():
+    with pytest.raises(ValueError):
+        ordering.ReorderBuffer([0], "random")
+    with pytest.raises(ValueError):
+        ordering.ReorderBuffer([0], "segment", max_memory_bytes=-1)
+
+
+def expected_pages(total_segments: int, limit: int) -> list[list[list[str]]]:
+    """Get the pk values of the pages of each segment of mock_scan."""
+    segments = []
+    for segment in range(total_segments):
+        items = [item["pk"] for item in more_itertools.divide(total_segments, MOCK_SCAN_ITEMS)[segment]]
+        segments.append([items[i : i + limit] for i in range(0, len(items), limit)])
+    return segments
+
+
+def slow_scan(**kwargs):
+    # Later segments are faster so that pages arrive out of order
+    time.sleep(random.uniform(0, 0.002) * (4 - kwargs["Segment"]))
+    return mock_scan(**kwargs)
+
+
+@pytest.mark.parametrize("order", ordering.ORDERS)
+def test_paginate_order(order):
+    client = unittest.mock.Mock(scan=unittest.mock.Mock(side_effect=slow_scan))
+    paginator = aws_dynamodb_parallel_scan.get_paginator(client)
+
+    pages = list(
+        paginator.paginate(
+            TableName=MOCK_TABLE_NAME, TotalSegments=4, Limit=10, order=order, max_reorder_bytes=500, with_segments=True
+        )
+    )
+
+    segments = expected_pages(4, 10)
+    if order == "segment":
+        expected = [page for segment in segments for page in segment]
+    else:
+        expected = [page for round_ in itertools.zip_longest(*segments) for page in round_ if page is not None]
+    assert [[item["pk"] for item in page["Items"]] for _, page in pages] == expected
+    assert [segment for segment, _ in pages][:4] == ([0, 0, 0, 0] if order == "segment" else [0, 1, 2, 3])
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"order": "random"},
+        {"order": "segment", "max_items": 10},
+        {"order": "segment", "max_split_depth": 1},
+        {"order": "segment", "resume_from": {"TableName": MOCK_TABLE_NAME, "TotalSegments": 4, "Segments": {}}},
+    ],
+)
+def test_paginate_order_invalid_args(kwargs):
+    paginator = aws_dynamodb_parallel_scan.get_paginator(unittest.mock.Mock())
+    with pytest.raises(ValueError):
+        list(paginator.paginate(TableName=MOCK_TABLE_NAME, TotalSegments=4, **kwargs))
+
+
+def test_cli_scan_order(mocked_client, capsys):
+    args = [
+        "aws-dynamodb-parallel-scan",
+        "--table-name",
+        MOCK_TABLE_NAME,
+        "--total-segments",
+        "4",
+        "--limit",
+        "10",
+        "--output-items",
+        "--order",
+        "segment",
+        "--max-reorder-bytes",
+        "0",
+    ]
+    with unittest.mock.patch("sys.argv", args), unittest.mock.patch("boto3.client", return_value=mocked_client):
+        aws_dynamodb_parallel_scan.cli()
+
+    items = utils.parse_jsonl(capsys.readouterr().out)
+    assert [item["pk"] for item in items] == [item["pk"] for item in MOCK_SCAN_ITEMS]
+
+
+@pytest.mark.parametrize(
+    "extra_args",
+    [
+        ["--max-reorder-bytes", "100"],
+        ["--order", "segment", "--processes", "2"],
+        ["--order", "segment", "--max-items", "5"],
+    ],
+)
+def test_cli_scan_invalid_order_args(mocked_client, extra_args):
+    args = ["aws-dynamodb-parallel-scan", "--table-name", MOCK_TABLE_NAME, *extra_args]
+    with unittest.mock.patch("sys.argv", args), pytest.raises(SystemExit):
+        aws_dynamodb_parallel_scan.cli()
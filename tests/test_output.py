@@ -0,0 +1,67 @@
+import decimal
+import io
+import json
+
+import pytest
+
+from aws_dynamodb_parallel_scan import output
+
+ITEMS = [
+    {"pk": {"S": "1"}, "n": {"N": "1.5"}},
+    {"pk": "2", "int": decimal.Decimal(10), "float": decimal.Decimal("0.25"), "list": [decimal.Decimal(-3)]},
+    {"pk": "3", "big": decimal.Decimal(12345678901234567890123456789012345678)},
+]
+
+
+@pytest.mark.parametrize("encoder", ["json", "orjson"])
+def test_json_lines_encoder(encoder):
+    encoded = output.json_lines_encoder(encoder)(ITEMS)
+    assert encoded.endswith(b"\n")
+    assert [json.loads(line) for line in encoded.decode().splitlines()] == [
+        {"pk": {"S": "1"}, "n": {"N": "1.5"}},
+        {"pk": "2", "int": 10, "float": 0.25, "list": [-3]},
+        {"pk": "3", "big": 12345678901234567890123456789012345678},
+    ]
+
+
+def test_json_lines_encoder_default():
+    # The default output does not depend on whether orjson is installed
+    item = {"pk": "ä", "n": decimal.Decimal("1.5")}
+    assert output.json_lines_encoder()([item]) == (json.dumps(item, cls=output.DecimalEncoder) + "\n").encode()
+
+
+def test_json_lines_encoder_empty():
+    assert output.json_lines_encoder()([]) == b""
+
+
+@pytest.mark.parametrize("encoder", ["json", "orjson"])
+def test_json_lines_encoder_unsupported_type(encoder):
+    with pytest.raises(TypeError):
+        output.json_lines_encoder(encoder)([{"value": object()}])
+
+
+def test_json_lines_encoder_invalid():
+    with pytest.raises(ValueError):
+        output.json_lines_encoder("simplejson")
+
+
+def test_json_lines_writer():
+    stream = io.BytesIO()
+    writer = output.JSONLinesWriter(stream, output_items=True, buffer_size=100)
+    writer.write_page({"Items": [{"pk": "a" * 10}]})
+    assert stream.getvalue() == b""
+
+    writer.write_page({"Items": [{"pk": "b" * 100}]})
+    assert len(stream.getvalue().splitlines()) == 2
+
+    writer.write_page({"Items": [{"pk": "c"}], "Count": 1})
+    writer.flush()
+    assert [json.loads(line)["pk"] for line in stream.getvalue().splitlines()] == ["a" * 10, "b" * 100, "c"]
+
+
+def test_json_lines_writer_pages():
+    stream = io.BytesIO()
+    writer = output.JSONLinesWriter(stream, encoder="json")
+    writer.write_page({"Items": [], "Count": 0})
+    writer.flush()
+    assert stream.getvalue() == b'{"Items": [], "Count": 0}\n'
@@ -0,0 +1,96 @@
+import operator
+import unittest.mock
+
+import pytest
+
+import aws_dynamodb_parallel_scan
+from aws_dynamodb_parallel_scan import clients, processes
+
+from . import utils
+from .conftest import mock_scan
+
+MOCK_TABLE_NAME = "dynamodb-parallel-scan-testtable"
+
+
+class MockClient:  # pylint: disable=too-few-public-methods
+    """DynamoDB client with mocked scan method that can be created in a worker process."""
+
+    scan = staticmethod(mock_scan)
+
+
+def mock_clients(count, max_workers, **kwargs):
+    """Create clients with mocked scan method for clients.create_clients() in a worker process."""
+    assert max_workers == 4
+    return [MockClient() for _ in range(count)]
+
+
+class FailingClient:  # pylint: disable=too-few-public-methods
+    """DynamoDB client whose scan always fails."""
+
+    @staticmethod
+    def scan(**kwargs):
+        raise RuntimeError("scan failed")
+
+
+def assert_items(items, expected):
+    assert sorted(items, key=operator.itemgetter("pk")) == sorted(expected, key=operator.itemgetter("pk"))
+
+
+@pytest.mark.parametrize(
+    "num_processes, scan_args",
+    [
+        (1, {}),
+        (2, {"TotalSegments": 4, "Limit": 10}),
+        (8, {"TotalSegments": 3, "max_workers": 1}),
+    ],
+)
+def test_scan_json_lines(num_processes, scan_args):
+    chunks = processes.scan_json_lines(
+        num_processes, client_factory=MockClient, output_items=True, TableName=MOCK_TABLE_NAME, **scan_args
+    )
+    assert_items(utils.parse_jsonl(b"".join(chunks).decode()), utils.generate_items(205))
+
+
+@pytest.mark.parametrize(
+    "kwargs, expected",
+    [
+        ({"TableName": MOCK_TABLE_NAME}, [{"TableName": MOCK_TABLE_NAME}] * 3),
+        ({"max_read_capacity": 300}, [{"max_read_capacity": 100}] * 3),
+        ({"max_workers": 8}, [{"max_workers": 3}, {"max_workers": 3}, {"max_workers": 2}]),
+        ({"max_workers": 2}, [{"max_workers": 1}] * 3),
+    ],
+)
+def test_worker_kwargs(kwargs, expected):
+    # Limits for the whole scan are divided between the workers
+    shares = [processes._worker_kwargs(kwargs, i, 3) for i in range(3)]  # pylint: disable=protected-access
+    assert shares == expected
+
+
+def test_scan_json_lines_segments():
+    chunks = processes.scan_json_lines(
+        2, client_factory=MockClient, TableName=MOCK_TABLE_NAME, TotalSegments=4, segments=[1, 3]
+    )
+    items = utils.items_from_pages_output(b"".join(chunks).decode())
+    assert len(items) == 102
+
+
+def test_scan_json_lines_error():
+    with pytest.raises(RuntimeError, match="scan failed"):
+        list(processes.scan_json_lines(2, client_factory=FailingClient, TableName=MOCK_TABLE_NAME, TotalSegments=2))
+
+
+def test_scan_json_lines_invalid_processes():
+    with pytest.raises(ValueError):
+        next(processes.scan_json_lines(0, TableName=MOCK_TABLE_NAME))
+
+
+@pytest.mark.parametrize("num_clients", [1, 2])
+def test_cli_scan_processes(mock_aws_env, capsys, num_clients):
+    args = ["aws-dynamodb-parallel-scan", "--table-name", MOCK_TABLE_NAME, "--total-segments", "4", "--processes", "2"]
+    with (
+        unittest.mock.patch("sys.argv", [*args, "--clients", str(num_clients)]),
+        unittest.mock.patch.object(clients, "create_clients", mock_clients),
+    ):
+        aws_dynamodb_parallel_scan.cli()
+
+    assert_items(utils.items_from_pages_output(capsys.readouterr().out), utils.generate_items(205))
@@ -0,0 +1,165 @@
+import threading
+import unittest.mock
+
+import pytest
+
+import aws_dynamodb_parallel_scan
+from aws_dynamodb_parallel_scan import metrics
+
+from . import utils
+from .test_aws_dynamodb_parallel_scan import throttling_error
+
+MOCK_TABLE_NAME = "dynamodb-parallel-scan-testtable"
+
+
+class QueryTableStub:
+    """DynamoDB client stub with a query() method over partitions of numbered items."""
+
+    def __init__(self, partitions: dict[str, int]):
+        self._partitions = partitions
+        self.calls: list[dict] = []
+        self._lock = threading.Lock()
+
+    def query(self, **kwargs):
+        with self._lock:
+            self.calls.append(kwargs)
+        assert kwargs["KeyConditionExpression"] == "#pk = :pk"
+        assert kwargs["ExpressionAttributeNames"]["#pk"] == "pk"
+        key = kwargs["ExpressionAttributeValues"][":pk"]["S"]
+        start = kwargs.get("ExclusiveStartKey", {}).get("sk", {}).get("N")
+        start = int(start) + 1 if start is not None else 0
+        end = min(self._partitions.get(key, 0), start + kwargs.get("Limit", 100))
+        items = [{"pk": {"S": key}, "sk": {"N": str(i)}} for i in range(start, end)]
+        response = {"Items": items, "Count": len(items), "ScannedCount": len(items)}
+        if end < self._partitions.get(key, 0):
+            response["LastEvaluatedKey"] = items[-1]
+        return response
+
+
+def keys(count: int) -> list[dict]:
+    return [{"S": f"key-{i}"} for i in range(count)]
+
+
+def item_ids(items) -> list[tuple[str, int]]:
+    return sorted((item["pk"]["S"], int(item["sk"]["N"])) for item in items)
+
+
+def test_query_paginator():
+    client = QueryTableStub({f"key-{i}": i for i in range(50)})
+    paginator = aws_dynamodb_parallel_scan.get_query_paginator(client)
+    queries = aws_dynamodb_parallel_scan.partition_key_queries("pk", keys(60))
+
+    pages = list(paginator.paginate(queries, TableName=MOCK_TABLE_NAME, Limit=10, max_workers=8))
+
+    assert item_ids(item for page in pages for item in page["Items"]) == sorted(
+        (f"key-{i}", j) for i in range(50) for j in range(i)
+    )
+    # Pages of each query are returned in order
+    for key in range(50):
+        numbers = [int(item["sk"]["N"]) for page in pages for item in page["Items"] if item["pk"]["S"] == f"key-{key}"]
+        assert numbers == list(range(key))
+    assert all(call["TableName"] == MOCK_TABLE_NAME for call in client.calls)
+
+
+def test_query_paginator_reads_queries_lazily():
+    client = QueryTableStub({f"key-{i}": 3 for i in range(1000)})
+    paginator = aws_dynamodb_parallel_scan.get_query_paginator(client)
+    pulled = 0
+
+    def queries():
+        nonlocal pulled
+        for query in aws_dynamodb_parallel_scan.partition_key_queries("pk", keys(1000)):
+            pulled += 1
+            yield query
+
+    pages = paginator.paginate(queries(), TableName=MOCK_TABLE_NAME, max_workers=4)
+    next(pages)
+    # Only about max_workers queries are in progress
+    assert pulled <= 5
+    assert len(list(pages)) == 999
+    assert pulled == 1000
+
+
+def test_query_paginator_merges_expression_attributes():
+    client = unittest.mock.Mock()
+    client.query.return_value = {"Items": [], "Count": 0}
+    paginator = aws_dynamodb_parallel_scan.QueryPaginator(client)
+
+    list(
+        paginator.paginate(
+            aws_dynamodb_parallel_scan.partition_key_queries("pk", keys(1)),
+            TableName=MOCK_TABLE_NAME,
+            FilterExpression="#a > :a",
+            ExpressionAttributeNames={"#a": "attr2"},
+            ExpressionAttributeValues={":a": {"N": "1"}},
+        )
+    )
+
+    client.query.assert_called_once_with(
+        TableName=MOCK_TABLE_NAME,
+        KeyConditionExpression="#pk = :pk",
+        FilterExpression="#a > :a",
+        ExpressionAttributeNames={"#a": "attr2", "#pk": "pk"},
+        ExpressionAttributeValues={":a": {"N": "1"}, ":pk": {"S": "key-0"}},
+    )
+
+
+def test_query_paginator_items_and_options():
+    client = QueryTableStub({f"key-{i}": 30 for i in range(10)})
+    scan_metrics = metrics.ScanMetrics()
+    paginator = aws_dynamodb_parallel_scan.get_query_paginator([client, client])
+    queries = list(aws_dynamodb_parallel_scan.partition_key_queries("pk", keys(10)))
+
+    items = list(
+        paginator.paginate_items(
+            queries, TableName=MOCK_TABLE_NAME, Limit=7, prefetch=2, max_buffered_items=50, observer=scan_metrics
+        )
+    )
+    assert len(items) == 300
+    assert sorted(scan_metrics.segments) == list(range(10))
+    assert scan_metrics.totals().done
+
+    batches = list(paginator.paginate_items(queries, batch_size=100, TableName=MOCK_TABLE_NAME, max_items=250))
+    assert [len(batch) for batch in batches] == [100, 100, 50]
+
+
+def test_query_paginator_retries_throttled_requests():
+    client = QueryTableStub({"key-0": 5})
+    query = client.query
+    throttled = []
+
+    def throttling_query(**kwargs):
+        if not throttled:
+            throttled.append(kwargs)
+            raise throttling_error()
+        return query(**kwargs)
+
+    paginator = aws_dynamodb_parallel_scan.get_query_paginator(client)
+    queries = aws_dynamodb_parallel_scan.partition_key_queries("pk", keys(1))
+    with (
+        unittest.mock.patch.object(client, "query", side_effect=throttling_query),
+        unittest.mock.patch("aws_dynamodb_parallel_scan.throttling.backoff_delay", return_value=0),
+    ):
+        assert len(list(paginator.paginate_items(queries, TableName=MOCK_TABLE_NAME))) == 5
+    assert len(throttled) == 1
+
+
+def test_query_paginator_no_queries():
+    paginator = aws_dynamodb_parallel_scan.get_query_paginator(QueryTableStub({}))
+    assert list(paginator.paginate([], TableName=MOCK_TABLE_NAME)) == []
+
+
+@pytest.mark.parametrize("kwargs", [{"max_workers": 0}, {"max_items": -1}, {"batch_size": 0}])
+def test_query_paginator_invalid_args(kwargs):
+    paginator = aws_dynamodb_parallel_scan.get_query_paginator(QueryTableStub({}))
+    with pytest.raises(ValueError):
+        list(paginator.paginate_items(keys(1), TableName=MOCK_TABLE_NAME, **kwargs))
+
+
+def test_query_paginator_mocked_table(mocked_table):
+    paginator = aws_dynamodb_parallel_scan.get_query_paginator(utils.dynamodb_client())
+    queries = aws_dynamodb_parallel_scan.partition_key_queries("pk", ({"S": str(i)} for i in range(0, 205, 10)))
+
+    items = list(paginator.paginate_items(queries, TableName=MOCK_TABLE_NAME, deserialize="int"))
+
+    assert sorted(item["attr2"] for item in items) == list(range(0, 205, 10))
@@ -0,0 +1,67 @@
+import itertools
+
+import pytest
+
+from aws_dynamodb_parallel_scan import sharding
+
+
+@pytest.mark.parametrize(
+    "spec, expected",
+    [
+        ("0", [0]),
+        ("0-3", [0, 1, 2, 3]),
+        ("5, 0-2,2-3", [0, 1, 2, 3, 5]),
+    ],
+)
+def test_parse_segments(spec, expected):
+    assert sharding.parse_segments(spec) == expected
+
+
+@pytest.mark.parametrize("spec", ["", "a", "3-1", "-1", "1-"])
+def test_parse_segments_invalid(spec):
+    with pytest.raises(ValueError):
+        sharding.parse_segments(spec)
+
+
+def test_format_segments():
+    assert sharding.format_segments([7, 0, 1, 2, 3, 5]) == "0-3,5,7"
+    assert sharding.parse_segments(sharding.format_segments(range(64))) == list(range(64))
+
+
+@pytest.mark.parametrize("worker_count, total_segments", [(1, 1), (3, 10), (4, 64), (10, 10)])
+def test_worker_segments(worker_count, total_segments):
+    assigned = [sharding.worker_segments(i, worker_count, total_segments) for i in range(worker_count)]
+    assert list(itertools.chain(*assigned)) == list(range(total_segments))
+    assert all(assigned)
+
+
+@pytest.mark.parametrize("worker_index, worker_count, total_segments", [(2, 2, 4), (-1, 2, 4), (0, 0, 4), (0, 5, 4)])
+def test_worker_segments_invalid(worker_index, worker_count, total_segments):
+    with pytest.raises(ValueError):
+        sharding.worker_segments(worker_index, worker_count, total_segments)
+
+
+def manifest(segments, table_name="mytable", total_segments=4):
+    return {
+        "TableName": table_name,
+        "TotalSegments": total_segments,
+        "Segments": {str(i): {"Done": True} for i in segments},
+    }
+
+
+def test_check_coverage():
+    sharding.check_coverage([manifest([0, 1]), manifest([2, 3])])
+
+
+@pytest.mark.parametrize(
+    "documents, message",
+    [
+        ([manifest([0, 1]), manifest([3])], "not completed: 2"),
+        ([manifest([0, 1, 2]), manifest([2, 3])], "more than once: 2"),
+        ([manifest([0, 1]), manifest([2, 3], table_name="other")], "different scans"),
+        ([manifest([0, 1, 2]), {**manifest([]), "Segments": {"3": {"ExclusiveStartKey": {}}}}], "not completed: 3"),
+    ],
+)
+def test_check_coverage_incomplete(documents, message):
+    with pytest.raises(ValueError, match=message):
+        sharding.check_coverage(documents)
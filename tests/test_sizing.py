@@ -0,0 +1,190 @@
+import io
+import unittest.mock
+
+import pytest
+
+import aws_dynamodb_parallel_scan
+from aws_dynamodb_parallel_scan import checkpoint, metrics, sizing
+
+from .conftest import mock_scan
+
+MOCK_TABLE_NAME = "dynamodb-parallel-scan-testtable"
+MB = 1 << 20
+
+
+@pytest.mark.parametrize(
+    "size_bytes, max_workers, expected",
+    [
+        (0, None, 1),
+        (5 * MB, None, 1),
+        (100 * MB, None, 12),
+        (10**12, None, sizing.DEFAULT_MAX_WORKERS),
+        (10**12, 2000, 2000),
+        (100 * MB, 4, 4),
+    ],
+)
+def test_choose_total_segments(size_bytes, max_workers, expected):
+    estimate = sizing.TableEstimate(size_bytes, size_bytes // 100, "DescribeTable")
+    total_segments, reason = sizing.choose_total_segments(estimate, max_workers=max_workers)
+    assert total_segments == reason["TotalSegments"] == expected
+    assert reason["TableSizeBytes"] == size_bytes
+    assert reason["Recommended"] == max(1, -(-size_bytes // sizing.SEGMENT_BYTES))
+
+
+def test_choose_total_segments_recommended_size():
+    # 2 GB per segment is the minimum even if pages are small
+    estimate = sizing.TableEstimate(40 * 1000**3, 10**9, "DescribeTable")
+    assert sizing.choose_total_segments(estimate, max_workers=1000)[1]["Recommended"] == 20
+
+
+def test_choose_total_segments_with_limit():
+    # Pages of 10 items of 100 bytes are 1000 bytes, so a 1 MB table has enough pages for 131 segments
+    estimate = sizing.TableEstimate(MB, MB // 100, "DescribeTable")
+    assert sizing.choose_total_segments(estimate, max_workers=1000)[0] == 1
+    assert sizing.choose_total_segments(estimate, max_workers=1000, limit=10)[0] == MB // 8000
+
+
+def describe_response(size_bytes: int) -> dict:
+    return {
+        "Table": {
+            "TableName": MOCK_TABLE_NAME,
+            "TableSizeBytes": size_bytes,
+            "ItemCount": size_bytes // 100,
+            "GlobalSecondaryIndexes": [{"IndexName": "gsi", "IndexSizeBytes": 1000, "ItemCount": 10}],
+        }
+    }
+
+
+def test_describe_table():
+    client = unittest.mock.Mock(describe_table=unittest.mock.Mock(return_value=describe_response(5000)))
+    assert sizing.describe_table(client, MOCK_TABLE_NAME) == sizing.TableEstimate(5000, 50, "DescribeTable")
+    assert sizing.describe_table(client, MOCK_TABLE_NAME, "gsi") == sizing.TableEstimate(1000, 10, "DescribeTable")
+    with pytest.raises(ValueError):
+        sizing.describe_table(client, MOCK_TABLE_NAME, "missing")
+
+
+def test_probe_table():
+    def scan(**kwargs):
+        assert kwargs["Select"] == "COUNT"
+        assert kwargs["TotalSegments"] == 100
+        page = {"Count": 20, "ScannedCount": 20, "ConsumedCapacity": {"CapacityUnits": 1.0}}
+        if kwargs["Segment"] == 50:
+            page["LastEvaluatedKey"] = {"pk": {"S": "a"}}
+        return page
+
+    client = unittest.mock.Mock(scan=unittest.mock.Mock(side_effect=scan))
+    estimate = sizing.probe_table(client, {"TableName": MOCK_TABLE_NAME, "Limit": 5}, probe_segments=100, samples=4)
+
+    assert [c.kwargs["Segment"] for c in client.scan.call_args_list] == [0, 25, 50, 75]
+    assert "Limit" not in client.scan.call_args.kwargs
+    assert estimate == sizing.TableEstimate(100 * 8192, 2000, "probe", lower_bound=True)
+
+
+def auto_client(size_bytes: int) -> unittest.mock.Mock:
+    return unittest.mock.Mock(
+        scan=unittest.mock.Mock(side_effect=mock_scan),
+        describe_table=unittest.mock.Mock(return_value=describe_response(size_bytes)),
+    )
+
+
+def test_paginate_auto_total_segments():
+    client = auto_client(100 * MB)
+    scan_metrics = metrics.ScanMetrics()
+    paginator = aws_dynamodb_parallel_scan.get_paginator(client)
+
+    items = [
+        item
+        for page in paginator.paginate(TableName=MOCK_TABLE_NAME, TotalSegments="auto", observer=scan_metrics)
+        for item in page["Items"]
+    ]
+
+    assert len(items) == 205
+    assert {c.kwargs["TotalSegments"] for c in client.scan.call_args_list} == {12}
+    assert scan_metrics.total_segments is not None
+    assert scan_metrics.total_segments["TotalSegments"] == 12
+    assert scan_metrics.total_segments["Source"] == "DescribeTable"
+    assert len(scan_metrics.segments) == 12
+
+
+def test_paginate_auto_total_segments_with_estimate():
+    client = auto_client(0)
+    paginator = aws_dynamodb_parallel_scan.get_paginator(client)
+    estimate = sizing.TableEstimate(100 * MB, MB, "probe")
+
+    list(paginator.paginate(TableName=MOCK_TABLE_NAME, TotalSegments="auto", max_workers=4, table_estimate=estimate))
+
+    assert {c.kwargs["TotalSegments"] for c in client.scan.call_args_list} == {4}
+
+
+def test_paginate_auto_total_segments_resumes_from_checkpoint(tmp_path):
+    client = auto_client(100 * MB)
+    paginator = aws_dynamodb_parallel_scan.get_paginator(client)
+    resume_from = {"TableName": MOCK_TABLE_NAME, "TotalSegments": 3, "Segments": {"0": {"Done": True}}}
+
+    list(paginator.paginate(TableName=MOCK_TABLE_NAME, TotalSegments="auto", resume_from=resume_from))
+
+    client.describe_table.assert_not_called()
+    assert sorted({(c.kwargs["TotalSegments"], c.kwargs["Segment"]) for c in client.scan.call_args_list}) == [
+        (3, 1),
+        (3, 2),
+    ]
+
+
+def test_paginate_auto_total_segments_invalid():
+    paginator = aws_dynamodb_parallel_scan.get_paginator(auto_client(100 * MB))
+    with pytest.raises(ValueError):
+        list(paginator.paginate(TableName=MOCK_TABLE_NAME, TotalSegments="auto", segments=[0]))
+
+
+def test_progress_reporter_reports_total_segments():
+    scan_metrics = metrics.ScanMetrics()
+    scan_metrics.total_segments_chosen(
+        sizing.choose_total_segments(sizing.TableEstimate(100 * MB, MB, "DescribeTable"))[1]
+    )
+    stream = io.StringIO()
+    with metrics.ProgressReporter(scan_metrics, stream, interval=60):
+        pass
+
+    lines = stream.getvalue().splitlines()
+    assert lines[0] == (
+        "TotalSegments 12: 105 MB, 1048576 items (DescribeTable), 1 recommended (2 GB per segment), "
+        "12 with full pages, budget 32"
+    )
+    assert lines[1].startswith("segments 0/0 done")
+
+
+def test_cli_scan_auto_total_segments(mocked_table, capsys, tmp_path):
+    args = [
+        "aws-dynamodb-parallel-scan",
+        "--table-name",
+        MOCK_TABLE_NAME,
+        "--total-segments",
+        "auto",
+        "--probe",
+        "--stats",
+        "--output-items",
+        "--checkpoint-file",
+        str(tmp_path / "checkpoint.json"),
+    ]
+    with unittest.mock.patch("sys.argv", args):
+        aws_dynamodb_parallel_scan.cli()
+
+    captured = capsys.readouterr()
+    assert len(captured.out.splitlines()) == 205
+    assert captured.err.startswith("TotalSegments 1: ")
+    assert checkpoint.JSONFileCheckpointStore(tmp_path / "checkpoint.json").load()["TotalSegments"] == 1
+
+
+@pytest.mark.parametrize(
+    "extra_args",
+    [
+        ["--total-segments", "4", "--probe"],
+        ["--total-segments", "auto", "--segments", "0-1"],
+        ["--total-segments", "auto", "--worker-index", "0", "--worker-count", "2"],
+        ["--total-segments", "many"],
+    ],
+)
+def test_cli_scan_invalid_auto_total_segments(mock_aws_env, extra_args):
+    args = ["aws-dynamodb-parallel-scan", "--table-name", MOCK_TABLE_NAME, *extra_args]
+    with unittest.mock.patch("sys.argv", args), pytest.raises(SystemExit):
+        aws_dynamodb_parallel_scan.cli()
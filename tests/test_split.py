@@ -0,0 +1,118 @@
+import random
+import threading
+import unittest.mock
+
+import botocore.exceptions
+import pytest
+
+import aws_dynamodb_parallel_scan
+from aws_dynamodb_parallel_scan import metrics
+
+HASH_SPACE = 1 << 32
+
+INVALID_START_KEY_MESSAGE = (
+    "The provided Exclusive start key does not map to the provided Segment and TotalSegments values."
+)
+
+
+class SegmentedTableStub:
+    """DynamoDB client stub that scans segments in hash order like DynamoDB.
+
+    Segment s of n segments covers hashes [s * HASH_SPACE // n, (s + 1) * HASH_SPACE // n), and
+    an ExclusiveStartKey outside the segment is rejected with ValidationException.
+    """
+
+    def __init__(self, hashes: list[int]):
+        self._items = sorted(({"pk": {"S": f"item-{i}"}, "h": {"N": str(h)}} for i, h in enumerate(hashes)), key=_hash)
+        self.calls: list[dict] = []
+        self._lock = threading.Lock()
+
+    def scan(self, **kwargs):
+        with self._lock:
+            self.calls.append(kwargs)
+        total, segment = kwargs["TotalSegments"], kwargs["Segment"]
+        low, high = segment * HASH_SPACE // total, (segment + 1) * HASH_SPACE // total
+        start_key = kwargs.get("ExclusiveStartKey")
+        if start_key:
+            if not low <= _hash(start_key) < high:
+                raise botocore.exceptions.ClientError(
+                    {"Error": {"Code": "ValidationException", "Message": INVALID_START_KEY_MESSAGE}}, "Scan"
+                )
+            low = _hash(start_key) + 1
+        items = [item for item in self._items if low <= _hash(item) < high][: kwargs.get("Limit")]
+        response = {"Items": items, "Count": len(items), "ScannedCount": len(items)}
+        if items and "Limit" in kwargs and len(items) == kwargs["Limit"]:
+            response["LastEvaluatedKey"] = items[-1]
+        return response
+
+
+def _hash(item):
+    return int(item["h"]["N"])
+
+
+def scan_item_names(client, **kwargs):
+    paginator = aws_dynamodb_parallel_scan.get_paginator(client)
+    return [item["pk"]["S"] for page in paginator.paginate(TableName="mytable", **kwargs) for item in page["Items"]]
+
+
+def test_split_skewed_segment():
+    # All items of the table are in the first segment
+    client = SegmentedTableStub([i * 1000 for i in range(500)])
+    scan_metrics = metrics.ScanMetrics()
+
+    names = scan_item_names(client, TotalSegments=4, Limit=10, max_split_depth=4, observer=scan_metrics)
+
+    assert sorted(names) == sorted(f"item-{i}" for i in range(500))
+    assert max(call["TotalSegments"] for call in client.calls) > 4
+    assert scan_metrics.totals().items == 500
+    assert sorted(scan_metrics.segments) == [0, 1, 2, 3]
+
+
+@pytest.mark.parametrize("max_workers", [2, 4, 8])
+def test_split_uniform_segments(max_workers):
+    rng = random.Random(max_workers)
+    client = SegmentedTableStub([rng.randrange(HASH_SPACE) for _ in range(1000)])
+
+    names = scan_item_names(client, TotalSegments=4, Limit=7, max_workers=max_workers, max_split_depth=3, prefetch=1)
+
+    assert sorted(names) == sorted(f"item-{i}" for i in range(1000))
+    assert max(call["TotalSegments"] for call in client.calls) <= 32
+
+
+def test_split_disabled():
+    client = SegmentedTableStub([i * 1000 for i in range(100)])
+
+    names = scan_item_names(client, TotalSegments=4, Limit=10)
+
+    assert sorted(names) == sorted(f"item-{i}" for i in range(100))
+    assert {call["TotalSegments"] for call in client.calls} == {4}
+
+
+def test_split_other_validation_error():
+    client = SegmentedTableStub([i * 1000 for i in range(500)])
+    scan = client.scan
+
+    def failing_scan(**kwargs):
+        if kwargs["TotalSegments"] > 4:
+            raise botocore.exceptions.ClientError(
+                {"Error": {"Code": "ValidationException", "Message": "Limit must be at least 1"}}, "Scan"
+            )
+        return scan(**kwargs)
+
+    client.scan = failing_scan  # type: ignore[method-assign]
+    # Only a rejected ExclusiveStartKey means that the first half has been scanned
+    with pytest.raises(botocore.exceptions.ClientError, match="Limit must be at least 1"):
+        scan_item_names(client, TotalSegments=4, Limit=10, max_split_depth=1)
+
+
+@pytest.mark.parametrize("kwargs", [{"max_split_depth": -1}, {"max_split_depth": 1, "resume_from": {"Segments": {}}}])
+def test_split_invalid_args(kwargs):
+    paginator = aws_dynamodb_parallel_scan.get_paginator(SegmentedTableStub([]))
+    with pytest.raises(ValueError):
+        list(paginator.paginate(TableName="mytable", TotalSegments=4, **kwargs))
+
+
+def test_cli_split_invalid_args():
+    args = ["aws-dynamodb-parallel-scan", "--table-name", "mytable", "--max-split-depth", "2", "--checkpoint-file", "x"]
+    with unittest.mock.patch("sys.argv", args), pytest.raises(SystemExit):
+        aws_dynamodb_parallel_scan.cli()
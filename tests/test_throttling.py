@@ -0,0 +1,94 @@
+import threading
+import time
+
+import botocore.exceptions
+import pytest
+
+from aws_dynamodb_parallel_scan import throttling
+
+
+@pytest.mark.parametrize(
+    "exc, expected",
+    [
+        (botocore.exceptions.ClientError({"Error": {"Code": "ThrottlingException"}}, "Scan"), True),
+        (botocore.exceptions.ClientError({"Error": {"Code": "RequestLimitExceeded"}}, "Scan"), True),
+        (botocore.exceptions.ClientError({"Error": {"Code": "ValidationException"}}, "Scan"), False),
+        (RuntimeError("failed"), False),
+    ],
+)
+def test_is_throttling_error(exc, expected):
+    assert throttling.is_throttling_error(exc) is expected
+
+
+def test_backoff_delay():
+    assert all(
+        0 <= throttling.backoff_delay(attempt, base=0.1, cap=1) <= min(1, 0.1 * 2**attempt) for attempt in range(10)
+    )
+
+
+@pytest.mark.parametrize(
+    "response, expected",
+    [
+        ({}, 0),
+        ({"ConsumedCapacity": {"CapacityUnits": 2.5}}, 2.5),
+        ({"ConsumedCapacity": [{"CapacityUnits": 1}, {"CapacityUnits": 3}]}, 4),
+    ],
+)
+def test_consumed_capacity(response, expected):
+    assert throttling.consumed_capacity(response) == expected
+
+
+def test_rate_limiter():
+    limiter = throttling.RateLimiter(100)
+    start = time.monotonic()
+    for _ in range(4):
+        limiter.acquire()
+        limiter.consume(50)
+
+    # 200 units of which 100 available immediately, the next 50 after 0.5s
+    assert time.monotonic() - start >= 0.45
+
+
+def test_rate_limiter_interrupted():
+    limiter = throttling.RateLimiter(1)
+    limiter.consume(100)
+    stopped = threading.Event()
+    stopped.set()
+    start = time.monotonic()
+    limiter.acquire(stopped.wait)
+    assert time.monotonic() - start < 1
+
+
+def test_rate_limiter_invalid_rate():
+    with pytest.raises(ValueError):
+        throttling.RateLimiter(0)
+
+
+def test_adaptive_concurrency():
+    concurrency = throttling.AdaptiveConcurrency(8)
+    concurrency.acquire()
+    concurrency.release(throttled=True)
+    concurrency.acquire()
+    concurrency.release(throttled=True)
+    assert concurrency.limit == 2
+
+    for _ in range(100):
+        concurrency.acquire()
+        concurrency.release(throttled=False)
+    assert concurrency.limit == 8
+
+
+def test_adaptive_concurrency_interrupted():
+    concurrency = throttling.AdaptiveConcurrency(1)
+    stopped = threading.Event()
+    assert concurrency.acquire(stopped)
+
+    threading.Timer(0.1, stopped.set).start()
+    start = time.monotonic()
+    assert not concurrency.acquire(stopped)
+    assert time.monotonic() - start < 1
+
+    # A free slot is not taken after the event has been set
+    concurrency.release(throttled=False)
+    assert not concurrency.acquire(stopped)
+    assert concurrency.acquire()